@@ -0,0 +1,108 @@
+# common/pdf_watermark.py
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+DEFAULT_WATERMARK_TEXT = "CONFIDENTIAL - DO NOT DISTRIBUTE"
+DEFAULT_FONT_SIZE = 20
+TILE_STEP = (300, 200)  # Horizontal / vertical distance between tiled copies
+
+
+class PDFWatermarker:
+    """
+    Stamps a text watermark onto every page of a PDF held in memory.
+
+    The watermark is drawn once per page size into a one-page overlay
+    document and shown with show_pdf_page on the first page of each
+    geometry. The other pages get a reference to that form XObject and
+    its drawing stream, so every page shares one copy of the text and
+    show_pdf_page does not rescan the (often shared) resources per page.
+    """
+
+    def __init__(self, text: str = DEFAULT_WATERMARK_TEXT, font_size: float = DEFAULT_FONT_SIZE,
+                 color: Tuple[float, float, float] = (0, 0, 0), tiled: bool = True):
+        # tiled: repeat the text across the page; otherwise one copy left of centre
+        self.text = text
+        self.font_size = font_size
+        self.color = color
+        self.tiled = tiled
+        self._overlays: Dict[Tuple[float, float], fitz.Document] = {}
+
+    def positions(self, width: float, height: float) -> List[Tuple[float, float]]:
+        """Baseline points of the watermark copies on a page of this size"""
+        if not self.tiled:
+            return [(width / 5, height / 2)]
+        step_x, step_y = TILE_STEP
+        return [(x, y) for y in range(0, int(height), step_y) for x in range(0, int(width), step_x)]
+
+    def overlay(self, width: float, height: float) -> fitz.Document:
+        """One-page document holding the watermark for this page size, built once"""
+        key = (round(width, 2), round(height, 2))
+        overlay = self._overlays.get(key)
+        if overlay is None:
+            overlay = fitz.open()
+            page = overlay.new_page(width=width, height=height)
+            writer = fitz.TextWriter(page.rect)
+            for point in self.positions(width, height):
+                writer.append(point, self.text, fontsize=self.font_size)
+            writer.write_text(page, color=self.color)
+            self._overlays[key] = overlay
+        return overlay
+
+    def stamp(self, document: fitz.Document) -> None:
+        """Stamp every page of an open document in place"""
+        # (mediabox, cropbox, rotation) -> (form xref, form name, drawing stream xref)
+        shown: Dict[tuple, Tuple[int, str, int]] = {}
+        for page in document:
+            key = (tuple(page.mediabox), tuple(page.cropbox), page.rotation)
+            if key in shown and _reuse_form(document, page, *shown[key]):
+                continue
+            rect = page.rect
+            page.show_pdf_page(rect, self.overlay(rect.width, rect.height), 0, overlay=True)
+            stream = page.get_contents()[-1]
+            name = document.xref_stream(stream).split()[1].lstrip(b'/').decode()
+            form = next(xref for xref, xobject_name, *_ in page.get_xobjects() if xobject_name == name)
+            shown.setdefault(key, (form, name, stream))
+
+    def watermark(self, data: bytes, **save_options) -> bytes:
+        """
+        Watermarked copy of a PDF given as bytes. ``save_options`` go to
+        Document.tobytes (e.g. encryption and passwords).
+        """
+        save_options.setdefault('garbage', 3)
+        save_options.setdefault('deflate', True)
+        document = fitz.open(stream=data, filetype='pdf')
+        try:
+            self.stamp(document)
+            return document.tobytes(**save_options)
+        finally:
+            document.close()
+
+
+def _entry(document: fitz.Document, xref: int, key: str) -> Tuple[int, str]:
+    """(object xref, key prefix) for writing into a dictionary entry, following an indirect reference"""
+    kind, value = document.xref_get_key(xref, key)
+    if kind == 'xref':
+        return int(value.split()[0]), ''
+    return xref, f'{key}/'
+
+
+def _reuse_form(document: fitz.Document, page: fitz.Page, form: int, name: str, stream: int) -> bool:
+    """
+    Draw an already inserted overlay form on another page of the same
+    geometry. False when the page inherits its resources or uses the
+    name for something else; show_pdf_page handles those pages.
+    """
+    if document.xref_get_key(page.xref, 'Resources')[0] == 'null':
+        return False
+    owner, prefix = _entry(document, page.xref, 'Resources')
+    owner, prefix = _entry(document, owner, f'{prefix}XObject')
+    kind, value = document.xref_get_key(owner, f'{prefix}{name}')
+    if kind != 'null' and value != f'{form} 0 R':
+        return False
+    document.xref_set_key(owner, f'{prefix}{name}', f'{form} 0 R')
+    if not page.is_wrapped:
+        page.wrap_contents()
+    contents = page.get_contents() + [stream]
+    document.xref_set_key(page.xref, 'Contents', '[' + ' '.join(f'{xref} 0 R' for xref in contents) + ']')
+    return True
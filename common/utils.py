@@ -1489,25 +1489,32 @@ import hashlib
 import json
 
 class AnalysisCache:
+    """
+    PDF cache keyed by object and data version. Pass ``version`` (for
+    surveys, surveys.services.survey_reports.survey_data_version) so a
+    lookup does not have to serialize and hash the whole context; the
+    context hash is only the fallback.
+    """
     @staticmethod
-    def get_cache_key(pk, context_data):
+    def get_cache_key(pk, context_data=None, version=None):
         """Generate a unique cache key based on data and parameters"""
-        # Create a hash of the context data to detect changes
-        context_hash = hashlib.md5(
-            json.dumps(context_data, sort_keys=True).encode('utf-8')
-        ).hexdigest()
-        return f'analysis_pdf_{pk}_{context_hash}'
+        if version is None:
+            # Create a hash of the context data to detect changes
+            version = hashlib.md5(
+                json.dumps(context_data, sort_keys=True, default=str).encode('utf-8')
+            ).hexdigest()
+        return f'analysis_pdf_{pk}_{version}'
 
     @staticmethod
-    def get_cached_pdf(pk, context_data):
+    def get_cached_pdf(pk, context_data=None, version=None):
         """Get cached PDF if it exists"""
-        cache_key = AnalysisCache.get_cache_key(pk, context_data)
+        cache_key = AnalysisCache.get_cache_key(pk, context_data, version)
         return cache.get(cache_key)
 
     @staticmethod
-    def cache_pdf(pk, context_data, pdf_content, timeout=3600):  # Cache for 1 hour
+    def cache_pdf(pk, context_data, pdf_content, timeout=3600, version=None):  # Cache for 1 hour
         """Cache the generated PDF"""
-        cache_key = AnalysisCache.get_cache_key(pk, context_data)
+        cache_key = AnalysisCache.get_cache_key(pk, context_data, version)
         cache.set(cache_key, pdf_content, timeout)
 
 import os
@@ -1520,10 +1527,13 @@ from django.core.files.storage import FileSystemStorage
 from django.core.files.base import ContentFile
 import fitz  # PyMuPDF
 import math
+from common.pdf_watermark import PDFWatermarker
 
 class ProtectedFileStorage1(FileSystemStorage):
     def __init__(self):
         super().__init__(location=settings.PROTECTED_MEDIA_ROOT)
+        # Red text left of centre on every page
+        self.watermarker = PDFWatermarker(color=(1, 0, 0), tiled=False)
         
     def _save(self, name, content):
         if name.lower().endswith('.pdf'):
@@ -1531,58 +1541,21 @@ class ProtectedFileStorage1(FileSystemStorage):
         return super()._save(name, content)
     
     def _save_protected_pdf(self, name, content):
-        # Create temporary file
-        temp_path = super()._save(f"temp_{name}", content)
-        
-        try:
-            # Open the PDF
-            pdf_document = fitz.open(os.path.join(self.location, temp_path))
-            
-            # Add watermark to each page
-            for page in pdf_document:
-                # Get page dimensions
-                rect = page.rect
-                
-                # Create watermark text
-                watermark_text = "CONFIDENTIAL - DO NOT DISTRIBUTE"
-                font_size = 20  # Increased for better visibility
-                
-                red_color = (1, 0, 0)  # Red c 
-                # Calculate center position
-                center_x = rect.width / 5
-                center_y = rect.height / 2
-                
-                # Add text watermark multiple times for darker effect
-                for i in range(3):  # Adding text 3 times to make it more visible
-                    page.insert_text(
-                        point=(center_x, center_y),  # position
-                        text=watermark_text,
-                        fontsize=font_size,
-                        color= red_color,  # gray color
-                    )
-            
-            # Save with security
-            pdf_document.save(
-                os.path.join(self.location, name),
-                encryption=fitz.PDF_ENCRYPT_AES_256,  # Strong encryption
-                owner_pw="123password",  # Set owner password
-                user_pw="123password",    # Set user password
-                permissions=fitz.PDF_PERM_PRINT  # Only allow printing
-            )
-            
-            # Clean up
-            pdf_document.close()
-            
-        finally:
-            # Always clean up the temporary file
-            if os.path.exists(os.path.join(self.location, temp_path)):
-                os.remove(os.path.join(self.location, temp_path))
-        
-        return name
+        # Watermarked and encrypted in memory; only the final file is written
+        content.seek(0)
+        protected = self.watermarker.watermark(
+            content.read(),
+            encryption=fitz.PDF_ENCRYPT_AES_256,  # Strong encryption
+            owner_pw="123password",  # Set owner password
+            user_pw="123password",    # Set user password
+            permissions=fitz.PDF_PERM_PRINT  # Only allow printing
+        )
+        return super()._save(name, ContentFile(protected))
 
 class ProtectedFileStorage(FileSystemStorage):
     def __init__(self):
         super().__init__(location=settings.MEDIA_ROOT)
+        self.watermarker = PDFWatermarker()
         
     def _save(self, name, content):
         if name.lower().endswith('.pdf'):
@@ -1590,39 +1563,10 @@ class ProtectedFileStorage(FileSystemStorage):
         return super()._save(name, content)
     
     def _save_watermarked_pdf(self, name, content):
-        temp_path = super()._save(f"temp_{name}", content)
-        
-        try:
-            pdf_document = fitz.open(os.path.join(self.location, temp_path))
-            
-            for page in pdf_document:
-                rect = page.rect
-                width = rect.width
-                height = rect.height
-                
-                watermark_text = "CONFIDENTIAL - DO NOT DISTRIBUTE"
-                font_size = 20
-                
-                for i in range(0, int(height), 200):
-                    for j in range(0, int(width), 300):
-                        page.insert_text(
-                            point=(j, i),
-                            text=watermark_text,
-                            fontsize=font_size
-                            #rotate=45
-                        )
-            
-            pdf_document.save(
-                os.path.join(self.location, name)
-            )
-            
-            pdf_document.close()
-            
-        finally:
-            if os.path.exists(os.path.join(self.location, temp_path)):
-                os.remove(os.path.join(self.location, temp_path))
-        
-        return name
+        # One pass in memory: the overlay form is inserted once per page
+        # geometry and every other page references it
+        content.seek(0)
+        return super()._save(name, ContentFile(self.watermarker.watermark(content.read())))
 
 ''' 
 from core.models import Messaging, MessageAttachment, MessageNotification
@@ -26,6 +26,7 @@ admin.site.register(SentimentAnalysis)
 admin.site.register(Review)
 admin.site.register(Theme)
 admin.site.register(FeedbackTheme)
+admin.site.register(FeedbackCounter)
 admin.site.register(Survey)
 admin.site.register(SurveyResponse)
 admin.site.register(NPSResponse)
@@ -34,6 +35,10 @@ admin.site.register(CESResponse)
 
 admin.site.register(AIAnalysisJob)
 admin.site.register(MetricSnapshot)
+admin.site.register(ThemeOccurrence)
+admin.site.register(AIResultCacheEntry)
+admin.site.register(TranslationMemory)
+admin.site.register(ExportWatermark)
 admin.site.register(Alert)
 admin.site.register(Resolution)
 admin.site.register(Escalation)
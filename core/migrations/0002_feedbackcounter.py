@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedbackCounter",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Created At"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True, default=True, verbose_name="Active"
+                    ),
+                ),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("total", "Total"),
+                            ("status", "Status"),
+                            ("origin", "Origin"),
+                            ("sentiment_label", "Sentiment Label"),
+                            ("priority", "Priority"),
+                            ("feedback_type", "Feedback Type"),
+                            ("ai_analyzed", "AI Analyzed"),
+                            ("requires_human_review", "Requires Human Review"),
+                            ("analyzed_sentiment", "Analyzed Sentiment"),
+                        ],
+                        max_length=30,
+                        verbose_name="Dimension",
+                    ),
+                ),
+                (
+                    "value",
+                    models.CharField(
+                        blank=True, default="", max_length=50, verbose_name="Value"
+                    ),
+                ),
+                ("count", models.BigIntegerField(default=0, verbose_name="Count")),
+                (
+                    "score_sum",
+                    models.FloatField(default=0.0, verbose_name="Sentiment Score Sum"),
+                ),
+                (
+                    "score_count",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Sentiment Score Count"
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feedback_counters",
+                        to="core.organization",
+                        verbose_name="Organization",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Feedback Counter",
+                "verbose_name_plural": "Feedback Counters",
+                "ordering": ["organization", "dimension", "value"],
+                "indexes": [
+                    models.Index(
+                        fields=["organization", "dimension"],
+                        name="core_feedba_organiz_2a221e_idx",
+                    )
+                ],
+                "unique_together": {("organization", "dimension", "value")},
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:15
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_feedbackcounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThemeOccurrence",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Created At"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True, default=True, verbose_name="Active"
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("nps", "NPS Response"),
+                            ("csat", "CSAT Response"),
+                            ("ces", "CES Response"),
+                        ],
+                        max_length=10,
+                        verbose_name="Source",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("theme", "Key Theme"),
+                            ("friction_point", "Friction Point"),
+                        ],
+                        max_length=20,
+                        verbose_name="Kind",
+                    ),
+                ),
+                (
+                    "response_id",
+                    models.UUIDField(db_index=True, verbose_name="Response ID"),
+                ),
+                ("label", models.CharField(max_length=255, verbose_name="Label")),
+                (
+                    "response_created_at",
+                    models.DateTimeField(verbose_name="Response Created At"),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="theme_occurrences",
+                        to="core.organization",
+                        verbose_name="Organization",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Theme Occurrence",
+                "verbose_name_plural": "Theme Occurrences",
+                "ordering": ["-response_created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["organization", "source", "kind", "response_created_at"],
+                        name="core_themeo_organiz_39fb64_idx",
+                    ),
+                    models.Index(
+                        fields=["organization", "source", "kind", "label"],
+                        name="core_themeo_organiz_f356ce_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_themeoccurrence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="nps_score",
+            field=models.PositiveSmallIntegerField(
+                blank=True, null=True, verbose_name="NPS Score"
+            ),
+        ),
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="csat_score",
+            field=models.PositiveSmallIntegerField(
+                blank=True, null=True, verbose_name="CSAT Score"
+            ),
+        ),
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="csat_scale_max",
+            field=models.PositiveSmallIntegerField(
+                blank=True, null=True, verbose_name="CSAT Scale Maximum"
+            ),
+        ),
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="ces_score",
+            field=models.PositiveSmallIntegerField(
+                blank=True, null=True, verbose_name="CES Score"
+            ),
+        ),
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="ces_scale_max",
+            field=models.PositiveSmallIntegerField(
+                blank=True, null=True, verbose_name="CES Scale Maximum"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "nps_score"], name="core_survey_survey__7551ee_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "csat_score"], name="core_survey_survey__1a3f70_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "ces_score"], name="core_survey_survey__1e7b9e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_surveyresponse_score_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="pipeline_state",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Status and attempt count of each post-save pipeline stage",
+                verbose_name="Pipeline State",
+            ),
+        ),
+    ]
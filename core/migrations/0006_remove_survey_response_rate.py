@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_surveyresponse_pipeline_state"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="survey",
+            name="response_rate",
+        ),
+    ]
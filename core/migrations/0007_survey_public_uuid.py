@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:30
+
+import uuid
+
+from django.db import migrations, models
+
+
+def copy_public_uuid_from_metadata(apps, schema_editor):
+    """Move metadata['public_uuid'] into the indexed column (first survey wins on duplicates)"""
+    Survey = apps.get_model("core", "Survey")
+    seen = set()
+    pending = []
+    surveys = Survey.objects.filter(metadata__has_key="public_uuid").only("id", "metadata")
+    for survey in surveys.iterator(chunk_size=500):
+        try:
+            public_uuid = uuid.UUID(str(survey.metadata.get("public_uuid")))
+        except (ValueError, AttributeError, TypeError):
+            continue
+        if public_uuid in seen or public_uuid == survey.id:
+            continue
+        seen.add(public_uuid)
+        survey.public_uuid = public_uuid
+        pending.append(survey)
+        if len(pending) >= 500:
+            Survey.objects.bulk_update(pending, ["public_uuid"])
+            pending = []
+    if pending:
+        Survey.objects.bulk_update(pending, ["public_uuid"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_remove_survey_response_rate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="survey",
+            name="public_uuid",
+            field=models.UUIDField(
+                blank=True,
+                help_text="Legacy public link identifier, migrated from metadata",
+                null=True,
+                unique=True,
+                verbose_name="Public UUID",
+            ),
+        ),
+        migrations.RunPython(copy_public_uuid_from_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_survey_public_uuid"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AIResultCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Created At"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True, default=True, verbose_name="Active"
+                    ),
+                ),
+                (
+                    "cache_key",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Cache Key"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("feedback_sentiment", "Feedback Sentiment"),
+                            ("survey_sentiment", "Survey Response Sentiment"),
+                            ("feedback_themes", "Feedback Themes"),
+                        ],
+                        max_length=30,
+                        verbose_name="Kind",
+                    ),
+                ),
+                (
+                    "model_name",
+                    models.CharField(max_length=100, verbose_name="AI Model"),
+                ),
+                (
+                    "model_version",
+                    models.CharField(max_length=50, verbose_name="Model Version"),
+                ),
+                ("result", models.JSONField(default=dict, verbose_name="Result")),
+                (
+                    "hit_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Hit Count"),
+                ),
+                (
+                    "last_hit_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Last Hit At"
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(db_index=True, verbose_name="Expires At"),
+                ),
+            ],
+            options={
+                "verbose_name": "AI Result Cache Entry",
+                "verbose_name_plural": "AI Result Cache Entries",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "model_name"],
+                        name="core_airesu_kind_286806_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
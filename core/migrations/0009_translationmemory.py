@@ -0,0 +1,85 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:40
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_airesultcacheentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TranslationMemory",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Created At"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True, default=True, verbose_name="Active"
+                    ),
+                ),
+                (
+                    "memory_key",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Memory Key"
+                    ),
+                ),
+                (
+                    "source_language",
+                    models.CharField(max_length=10, verbose_name="Source Language"),
+                ),
+                (
+                    "target_language",
+                    models.CharField(max_length=10, verbose_name="Target Language"),
+                ),
+                ("source_text", models.TextField(verbose_name="Source Text")),
+                ("translated_text", models.TextField(verbose_name="Translated Text")),
+                (
+                    "model_name",
+                    models.CharField(max_length=100, verbose_name="AI Model"),
+                ),
+                (
+                    "use_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Use Count"),
+                ),
+                (
+                    "last_used_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Last Used At"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Translation Memory Entry",
+                "verbose_name_plural": "Translation Memory",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["source_language", "target_language"],
+                        name="core_transl_source__1a1425_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
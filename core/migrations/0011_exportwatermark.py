@@ -0,0 +1,75 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_alter_aianalysisjob_job_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportWatermark",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Created At"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True, default=True, verbose_name="Active"
+                    ),
+                ),
+                ("dataset", models.CharField(max_length=50, verbose_name="Dataset")),
+                (
+                    "scope",
+                    models.CharField(blank=True, max_length=100, verbose_name="Scope"),
+                ),
+                (
+                    "exported_until",
+                    models.DateTimeField(verbose_name="Exported Until"),
+                ),
+                (
+                    "rows_exported",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Rows Exported"
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_watermarks",
+                        to="core.organization",
+                        verbose_name="Organization",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Export Watermark",
+                "verbose_name_plural": "Export Watermarks",
+                "ordering": ["-created_at"],
+                "unique_together": {("organization", "dataset", "scope")},
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:20
+
+from django.db import migrations
+
+# (model, kind, field, JSON key inside the field or None)
+SOURCES = {
+    "nps": ("NPSResponse", "theme", "key_themes", None),
+    "csat": ("CSATResponse", "theme", "metadata", "themes"),
+    "ces": ("CESResponse", "friction_point", "friction_points", None),
+}
+
+
+def clean_labels(values):
+    """Same rules as ThemeOccurrence.clean_labels"""
+    labels = []
+    if isinstance(values, list):
+        for value in values:
+            if isinstance(value, str) and value.strip() and value[:255] not in labels:
+                labels.append(value[:255])
+    return labels
+
+
+def backfill_theme_occurrences(apps, schema_editor):
+    """Create occurrences for analyzed responses that have none yet"""
+    ThemeOccurrence = apps.get_model("core", "ThemeOccurrence")
+    for source, (model_name, kind, field, key) in SOURCES.items():
+        model = apps.get_model("core", model_name)
+        synced = set(
+            ThemeOccurrence.objects.filter(source=source, kind=kind).values_list("response_id", flat=True)
+        )
+        responses = model.objects.filter(ai_analyzed=True).order_by().values_list(
+            "id", "organization_id", "created_at", field
+        )
+        pending = []
+        for response_id, organization_id, created_at, values in responses.iterator(chunk_size=500):
+            if response_id in synced:
+                continue
+            if key is not None:
+                values = values.get(key) if isinstance(values, dict) else None
+            pending.extend(
+                ThemeOccurrence(
+                    organization_id=organization_id,
+                    source=source,
+                    kind=kind,
+                    response_id=response_id,
+                    label=label,
+                    response_created_at=created_at,
+                )
+                for label in clean_labels(values)
+            )
+            if len(pending) >= 500:
+                ThemeOccurrence.objects.bulk_create(pending)
+                pending = []
+        if pending:
+            ThemeOccurrence.objects.bulk_create(pending)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_exportwatermark"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_theme_occurrences, migrations.RunPython.noop),
+    ]
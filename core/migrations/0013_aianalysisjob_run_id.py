@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_backfill_themeoccurrence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aianalysisjob",
+            name="run_id",
+            field=models.UUIDField(
+                blank=True, editable=False, null=True, verbose_name="Run ID"
+            ),
+        ),
+    ]
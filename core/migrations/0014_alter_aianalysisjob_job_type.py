@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_aianalysisjob_run_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="aianalysisjob",
+            name="job_type",
+            field=models.CharField(
+                choices=[
+                    ("sentiment_analysis", "Sentiment Analysis"),
+                    ("theme_extraction", "Theme Extraction"),
+                    ("bulk_analysis", "Bulk Analysis"),
+                    ("trend_analysis", "Trend Analysis"),
+                    ("report_generation", "Report Generation"),
+                    ("feedback_import", "Feedback Import"),
+                    ("columnar_export", "Columnar Export"),
+                ],
+                db_index=True,
+                max_length=50,
+                verbose_name="Job Type",
+            ),
+        ),
+    ]
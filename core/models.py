@@ -9,7 +9,7 @@ from django.contrib.postgres.fields import ArrayField
 # Third-party Libraries
 from django.db import models
 from django.db import transaction
-from django.db.models.signals import pre_save, post_save, pre_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -66,7 +66,6 @@ from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.conf import settings
 import logging
 from uuid import UUID
 import json
@@ -1141,7 +1140,31 @@ class Feedback(TimeStampedModel):
         if not self.feedback_id:
             # Generate unique feedback ID
             self.feedback_id = f"FB-{self.organization.slug.upper()}-{uuid.uuid4().hex[:8].upper()}"
-        super().save(*args, **kwargs)
+        
+        # Keep the organization counters in step with the row inside one transaction
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Feedback.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values(*FeedbackCounter.COUNTED_FIELDS).first()
+            
+            super().save(*args, **kwargs)
+            
+            current = self.get_counted_values()
+            update_fields = kwargs.get('update_fields')
+            if previous and update_fields is not None:
+                # Fields that were not written keep their database value
+                current = {
+                    name: current[name] if name in update_fields else previous[name]
+                    for name in FeedbackCounter.COUNTED_FIELDS
+                }
+            
+            FeedbackCounter.apply_change(self.organization_id, previous, current)
+    
+    def get_counted_values(self):
+        """Values of the fields tracked by FeedbackCounter"""
+        return {name: getattr(self, name) for name in FeedbackCounter.COUNTED_FIELDS}
     
     @property
     def sentiment_analysis_obj(self):
@@ -1623,6 +1646,209 @@ class FeedbackTheme(TimeStampedModel):
         return f"{self.theme.name} - {self.feedback.feedback_id} ({self.relevance_score:.2f})"
 
 
+class FeedbackCounter(TimeStampedModel):
+    """
+    Denormalized per-organization feedback counters.
+    One row per (dimension, value) pair, maintained incrementally by
+    Feedback.save() and the Feedback post_delete signal.
+    """
+    DIMENSION_CHOICES = [
+        ('total', _('Total')),
+        ('status', _('Status')),
+        ('origin', _('Origin')),
+        ('sentiment_label', _('Sentiment Label')),
+        ('priority', _('Priority')),
+        ('feedback_type', _('Feedback Type')),
+        ('ai_analyzed', _('AI Analyzed')),
+        ('requires_human_review', _('Requires Human Review')),
+        ('analyzed_sentiment', _('Analyzed Sentiment')),
+    ]
+    
+    COUNTED_FIELDS = (
+        'status', 'origin', 'sentiment_label', 'priority', 'feedback_type',
+        'ai_analyzed', 'requires_human_review', 'sentiment_score',
+    )
+    BREAKDOWN_DIMENSIONS = ('status', 'origin', 'sentiment_label', 'priority', 'feedback_type')
+    
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='feedback_counters',
+        verbose_name=_('Organization')
+    )
+    dimension = models.CharField(_('Dimension'), max_length=30, choices=DIMENSION_CHOICES)
+    value = models.CharField(_('Value'), max_length=50, blank=True, default='')
+    count = models.BigIntegerField(_('Count'), default=0)
+    score_sum = models.FloatField(_('Sentiment Score Sum'), default=0.0)
+    score_count = models.BigIntegerField(_('Sentiment Score Count'), default=0)
+    
+    class Meta:
+        verbose_name = _('Feedback Counter')
+        verbose_name_plural = _('Feedback Counters')
+        ordering = ['organization', 'dimension', 'value']
+        unique_together = [['organization', 'dimension', 'value']]
+        indexes = [
+            models.Index(fields=['organization', 'dimension']),
+        ]
+    
+    def __str__(self):
+        return f"{self.organization} - {self.dimension}:{self.value} = {self.count}"
+    
+    @property
+    def avg_score(self):
+        return self.score_sum / self.score_count if self.score_count else 0.0
+    
+    @classmethod
+    def counted_keys(cls, values):
+        """
+        Counter rows one feedback contributes to, as (dimension, value, carries_score)
+        """
+        keys = [('total', '', True)]
+        for dimension in cls.BREAKDOWN_DIMENSIONS:
+            keys.append((dimension, values.get(dimension) or '', False))
+        if values.get('ai_analyzed'):
+            keys.append(('ai_analyzed', 'true', False))
+            keys.append(('analyzed_sentiment', values.get('sentiment_label') or '', True))
+        if values.get('requires_human_review'):
+            keys.append(('requires_human_review', 'true', False))
+        return keys
+    
+    @classmethod
+    def contributions(cls, values):
+        """
+        Map one feedback's counted values to the counter rows it contributes to.
+        Returns {(dimension, value): [count, score_sum, score_count]}
+        """
+        score = values.get('sentiment_score')
+        has_score = score is not None
+        return {
+            (dimension, value): [
+                1,
+                score if carries_score and has_score else 0.0,
+                1 if carries_score and has_score else 0,
+            ]
+            for dimension, value, carries_score in cls.counted_keys(values)
+        }
+    
+    @classmethod
+    def compute_deltas(cls, previous, current):
+        """Difference between the contributions of two feedback states"""
+        deltas = {}
+        for values, sign in ((previous, -1), (current, 1)):
+            if not values:
+                continue
+            for key, (count, score_sum, score_count) in cls.contributions(values).items():
+                delta = deltas.setdefault(key, [0, 0.0, 0])
+                delta[0] += sign * count
+                delta[1] += sign * score_sum
+                delta[2] += sign * score_count
+        return {key: delta for key, delta in deltas.items() if any(delta)}
+    
+    @classmethod
+    def apply_change(cls, organization_id, previous, current):
+        """
+        Apply the change between two feedback states with F() increments.
+        Must be called inside the transaction that writes the feedback row.
+        """
+        deltas = cls.compute_deltas(previous, current)
+        for (dimension, value), (count, score_sum, score_count) in deltas.items():
+            updated = cls.objects.filter(
+                organization_id=organization_id,
+                dimension=dimension,
+                value=value,
+            ).update(
+                count=models.F('count') + count,
+                score_sum=models.F('score_sum') + score_sum,
+                score_count=models.F('score_count') + score_count,
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                counter, created = cls.objects.get_or_create(
+                    organization_id=organization_id,
+                    dimension=dimension,
+                    value=value,
+                    defaults={'count': count, 'score_sum': score_sum, 'score_count': score_count},
+                )
+                if not created:
+                    cls.objects.filter(pk=counter.pk).update(
+                        count=models.F('count') + count,
+                        score_sum=models.F('score_sum') + score_sum,
+                        score_count=models.F('score_count') + score_count,
+                    )
+    
+    @classmethod
+    def rebuild(cls, organization):
+        """
+        Recompute all counters for an organization from the Feedback table.
+
+        The organization's counter rows are locked before the aggregate is
+        read, so feedback writers block on their counter update until the
+        rebuild commits and then add their delta on top of the new totals.
+        Rows are updated in place rather than replaced for the same reason.
+        """
+        with transaction.atomic():
+            existing = {
+                (counter.dimension, counter.value): counter
+                for counter in cls.objects.select_for_update().filter(organization=organization)
+            }
+            
+            totals = {('total', ''): [0, 0.0, 0]}
+            grouped_fields = [name for name in cls.COUNTED_FIELDS if name != 'sentiment_score']
+            rows = Feedback.objects.filter(organization=organization).order_by().values(
+                *grouped_fields
+            ).annotate(
+                row_count=models.Count('id'),
+                row_score_sum=models.Sum('sentiment_score'),
+                row_score_count=models.Count('sentiment_score'),
+            )
+            for row in rows:
+                for dimension, value, carries_score in cls.counted_keys(row):
+                    total = totals.setdefault((dimension, value), [0, 0.0, 0])
+                    total[0] += row['row_count']
+                    if carries_score:
+                        total[1] += row['row_score_sum'] or 0.0
+                        total[2] += row['row_score_count']
+            
+            now = timezone.now()
+            changed = []
+            for key, counter in existing.items():
+                # Values that no longer occur are zeroed, not deleted
+                count, score_sum, score_count = totals.get(key, (0, 0.0, 0))
+                if (counter.count, counter.score_sum, counter.score_count) != (count, score_sum, score_count):
+                    counter.count, counter.score_sum, counter.score_count = count, score_sum, score_count
+                    counter.updated_at = now
+                    changed.append(counter)
+            if changed:
+                cls.objects.bulk_update(changed, ['count', 'score_sum', 'score_count', 'updated_at'])
+            
+            for (dimension, value), (count, score_sum, score_count) in totals.items():
+                if (dimension, value) in existing:
+                    continue
+                counter, created = cls.objects.get_or_create(
+                    organization=organization,
+                    dimension=dimension,
+                    value=value,
+                    defaults={'count': count, 'score_sum': score_sum, 'score_count': score_count},
+                )
+                if not created:
+                    # A concurrent writer created the row after our aggregate was read
+                    cls.objects.filter(pk=counter.pk).update(
+                        count=models.F('count') + count,
+                        score_sum=models.F('score_sum') + score_sum,
+                        score_count=models.F('score_count') + score_count,
+                        updated_at=now,
+                    )
+        return len(totals)
+
+
+@receiver(post_delete, sender=Feedback)
+def update_feedback_counters_on_delete(sender, instance, **kwargs):
+    """Decrement organization counters when a feedback row is deleted"""
+    try:
+        FeedbackCounter.apply_change(instance.organization_id, instance.get_counted_values(), None)
+    except Exception as e:
+        logger.error(f"Error updating feedback counters for {instance.pk}: {str(e)}")
+
 
 class Survey(TimeStampedModel):
     """
@@ -1706,10 +1932,16 @@ class Survey(TimeStampedModel):
     # Statistics
     total_sent = models.IntegerField(_('Total Sent'), default=0)
     total_responses = models.IntegerField(_('Total Responses'), default=0)
-    response_rate = models.FloatField(_('Response Rate'), default=0.0)
     
     # Metadata
     metadata = models.JSONField(_('Additional Metadata'), default=dict, blank=True)
+    public_uuid = models.UUIDField(
+        _('Public UUID'),
+        unique=True,
+        null=True,
+        blank=True,
+        help_text=_('Legacy public link identifier, migrated from metadata')
+    )
     
     class Meta:
         verbose_name = _('Survey')
@@ -1723,9 +1955,38 @@ class Survey(TimeStampedModel):
     def __str__(self):
         return f"{self.title} ({self.get_survey_type_display()})"
     
+    # Only changed by the F() updates in surveys.services.survey_counters
+    COUNTER_FIELDS = ('total_sent', 'total_responses')
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # A loaded instance holds stale counters; writing them back would
+            # undo submissions counted since it was read
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        # Drop the cached public definition once the new version is visible
+        from surveys.services.survey_definitions import invalidate_survey_definition
+        transaction.on_commit(lambda: invalidate_survey_definition(self))
+    
     @property
     def is_mixed_survey(self):
         return self.survey_type == 'mixed'
+    
+    @property
+    def response_rate(self) -> float:
+        """Response rate in percent, derived from the counters on read"""
+        from surveys.services.survey_counters import calculate_response_rate
+        return calculate_response_rate(self.total_responses, self.total_sent)
+
+
+@receiver(post_delete, sender=Survey)
+def invalidate_survey_definition_on_delete(sender, instance, **kwargs):
+    """Deleted surveys must stop resolving from the public definition cache"""
+    from surveys.services.survey_definitions import invalidate_survey_definition
+    invalidate_survey_definition(instance)
 
 
 logger = logging.getLogger(__name__)
@@ -1863,6 +2124,21 @@ class SurveyResponse(TimeStampedModel):
         help_text=_('Number of times analysis has been retried')
     )
     
+    # Scores extracted from response_data on save (see materialize_scores)
+    nps_score = models.PositiveSmallIntegerField(_('NPS Score'), null=True, blank=True)
+    csat_score = models.PositiveSmallIntegerField(_('CSAT Score'), null=True, blank=True)
+    csat_scale_max = models.PositiveSmallIntegerField(_('CSAT Scale Maximum'), null=True, blank=True)
+    ces_score = models.PositiveSmallIntegerField(_('CES Score'), null=True, blank=True)
+    ces_scale_max = models.PositiveSmallIntegerField(_('CES Scale Maximum'), null=True, blank=True)
+
+    SCORE_FIELDS = ('nps_score', 'csat_score', 'csat_scale_max', 'ces_score', 'ces_scale_max')
+
+    pipeline_state = models.JSONField(
+        _('Pipeline State'),
+        default=dict,
+        blank=True,
+        help_text=_('Status and attempt count of each post-save pipeline stage')
+    )
 
     class Meta:
         verbose_name = _('Survey Response')
@@ -1875,6 +2151,9 @@ class SurveyResponse(TimeStampedModel):
             models.Index(fields=['analysis_status', 'created_at']),
             models.Index(fields=['sentiment_score']),
             models.Index(fields=['ai_analyzed', 'created_at']),
+            models.Index(fields=['survey', 'nps_score']),
+            models.Index(fields=['survey', 'csat_score']),
+            models.Index(fields=['survey', 'ces_score']),
         ]
 
     def __str__(self):
@@ -1891,7 +2170,33 @@ class SurveyResponse(TimeStampedModel):
             # Always copy survey_type from the survey
             self.survey_type = self.survey.survey_type
         
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'response_data', 'metadata', 'survey_type'} & set(update_fields):
+            self.materialize_scores()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.SCORE_FIELDS)
+        
         super().save(*args, **kwargs)
+    
+    def materialize_scores(self):
+        """
+        Parse response_data once and store the NPS, CSAT and CES scores
+        (and scale maxima) in their columns so reads and aggregates do not
+        have to walk the JSON again
+        """
+        for field_name in self.SCORE_FIELDS:
+            setattr(self, field_name, None)
+        
+        # Responses without a parseable score store None, so the column
+        # aggregates skip them instead of counting a default score
+        if self.survey_type == 'nps':
+            self.nps_score = self._parse_nps_score(fallback=False)
+        elif self.survey_type == 'csat':
+            self.csat_score = self._parse_csat_score(fallback=False)
+            self.csat_scale_max = self._parse_csat_scale_max()
+        elif self.survey_type == 'ces':
+            self.ces_score = self._parse_ces_score(fallback=False)
+            self.ces_scale_max = self._parse_ces_scale_max()
         
     @property
     def organization(self):
@@ -1909,7 +2214,19 @@ class SurveyResponse(TimeStampedModel):
         self._organization = value
     
     def get_nps_score(self) -> Optional[int]:
-        """Extract NPS score from response data for NPS surveys"""
+        """NPS score, read from the materialized column when available"""
+        if self.survey_type != 'nps':
+            return None
+        if self.nps_score is not None:
+            return self.nps_score
+        return self._parse_nps_score()
+    
+    def _parse_nps_score(self, fallback: bool = True) -> Optional[int]:
+        """
+        Extract NPS score from response data for NPS surveys. Without
+        ``fallback`` a missing or unparseable score gives None instead of
+        the neutral default.
+        """
         if self.survey_type != 'nps':
             logger.debug(f"Not an NPS survey: {self.survey_type}")
             return None
@@ -1950,15 +2267,30 @@ class SurveyResponse(TimeStampedModel):
                                     logger.debug(f"Found NPS score {item_score} in list item")
                                     return item_score
             
+            if not fallback:
+                logger.warning(f"No NPS score found in response data for {self.id}")
+                return None
             logger.warning(f"No NPS score found in response data for {self.id}, using default 5")
             return 5  # Default fallback
             
         except Exception as e:
             logger.error(f"Error extracting NPS score for response {self.id}: {str(e)}")
-            return 5
+            return 5 if fallback else None
     
     def get_csat_score(self) -> Optional[int]:
-        """Extract CSAT score from response data for CSAT surveys"""
+        """CSAT score, read from the materialized column when available"""
+        if self.survey_type != 'csat':
+            return None
+        if self.csat_score is not None:
+            return self.csat_score
+        return self._parse_csat_score()
+    
+    def _parse_csat_score(self, fallback: bool = True) -> Optional[int]:
+        """
+        Extract CSAT score from response data for CSAT surveys. Without
+        ``fallback`` a missing or unparseable score gives None instead of
+        the neutral default.
+        """
         if self.survey_type != 'csat':
             logger.debug(f"Not a CSAT survey: {self.survey_type}")
             return None
@@ -1989,27 +2321,37 @@ class SurveyResponse(TimeStampedModel):
                             return nested_score
                 
                 # Check survey configuration for default scale
-                if hasattr(self.survey, 'metadata') and self.survey.metadata:
+                if fallback and hasattr(self.survey, 'metadata') and self.survey.metadata:
                     if 'default_score' in self.survey.metadata:
                         default_score = self.survey.metadata['default_score']
                         if isinstance(default_score, (int, float)):
                             logger.debug(f"Using default CSAT score from survey metadata: {default_score}")
                             return int(default_score)
             
+            if not fallback:
+                logger.warning(f"No CSAT score found in response data for {self.id}")
+                return None
             logger.warning(f"No CSAT score found in response data for {self.id}, using default 3")
             return 3  # Neutral score
             
         except Exception as e:
             logger.error(f"Error extracting CSAT score for response {self.id}: {str(e)}")
-            return 3
+            return 3 if fallback else None
     def get_csat_scale_max(self) -> int:
+        """CSAT scale maximum, read from the materialized column when available"""
+        if self.survey_type == 'csat' and self.csat_scale_max is not None:
+            return self.csat_scale_max
+        return self._parse_csat_scale_max()
+    
+    def _parse_csat_scale_max(self) -> int:
         """Determine the scale maximum for CSAT survey"""
         if self.survey_type != 'csat':
             return 5  # Default
         
         try:
-            # Check survey configuration for scale
-            if hasattr(self.survey, 'questions') and isinstance(self.survey.questions, list):
+            # Check survey configuration for scale; unsaved responses may
+            # not have their survey assigned yet
+            if self.survey_id and isinstance(self.survey.questions, list):
                 for question in self.survey.questions:
                     if question.get('type') == 'rating' and 'scale_max' in question:
                         return int(question['scale_max'])
@@ -2082,7 +2424,19 @@ class SurveyResponse(TimeStampedModel):
         return feedback_text
     
     def get_ces_score(self) -> Optional[int]:
-        """Extract CES score from response data for CES surveys"""
+        """CES score, read from the materialized column when available"""
+        if self.survey_type != 'ces':
+            return None
+        if self.ces_score is not None:
+            return self.ces_score
+        return self._parse_ces_score()
+    
+    def _parse_ces_score(self, fallback: bool = True) -> Optional[int]:
+        """
+        Extract CES score from response data for CES surveys. Without
+        ``fallback`` a missing or unparseable score gives None instead of
+        the neutral default.
+        """
         if self.survey_type != 'ces':
             logger.debug(f"Not a CES survey: {self.survey_type}")
             return None
@@ -2119,21 +2473,31 @@ class SurveyResponse(TimeStampedModel):
                             logger.debug(f"Found effort score {value} in key '{key}'")
                             return int(value)
             
+            if not fallback:
+                logger.warning(f"No CES score found in response data for {self.id}")
+                return None
             logger.warning(f"No CES score found in response data for {self.id}, using default 4")
             return 4  # Neutral score on 7-point scale
             
         except Exception as e:
             logger.error(f"Error extracting CES score for response {self.id}: {str(e)}")
-            return 4
+            return 4 if fallback else None
     
     def get_ces_scale_max(self) -> int:
+        """CES scale maximum, read from the materialized column when available"""
+        if self.survey_type == 'ces' and self.ces_scale_max is not None:
+            return self.ces_scale_max
+        return self._parse_ces_scale_max()
+    
+    def _parse_ces_scale_max(self) -> int:
         """Determine the scale maximum for CES survey"""
         if self.survey_type != 'ces':
             return 7  # Default for CES
         
         try:
-            # Check survey configuration for scale
-            if hasattr(self.survey, 'questions') and isinstance(self.survey.questions, list):
+            # Check survey configuration for scale; unsaved responses may
+            # not have their survey assigned yet
+            if self.survey_id and isinstance(self.survey.questions, list):
                 for question in self.survey.questions:
                     if question.get('type') == 'rating' and 'scale_max' in question:
                         return int(question['scale_max'])
@@ -2614,6 +2978,15 @@ class SurveyResponse(TimeStampedModel):
         else:
             logger.warning(f"No specific response model for survey type: {self.survey_type}")
             return None
+    def propagate_analysis(self):
+        """Copy sentiment results to the NPS/CSAT/CES response linked to this response"""
+        if self.survey_type == 'nps':
+            update_nps_response_from_analysis(self)
+        elif self.survey_type == 'csat':
+            update_csat_response_from_analysis(self)
+        elif self.survey_type == 'ces':
+            update_ces_response_from_analysis(self)
+    
     @property
     def has_text_responses(self) -> bool:
         """Check if response contains textual feedback for analysis"""
@@ -2647,6 +3020,7 @@ class SurveyResponse(TimeStampedModel):
                 'sentiment_score', 'ai_analyzed', 'analysis_status', 
                 'sentiment_metadata', 'updated_at'
             ])
+            self.propagate_analysis()
             return True
         
         try:
@@ -2700,6 +3074,7 @@ class SurveyResponse(TimeStampedModel):
             ])
             
             logger.info(f"Successfully analyzed sentiment for survey response {self.id}: score={self.sentiment_score}")
+            self.propagate_analysis()
             return True
             
         except Exception as e:
@@ -3057,14 +3432,14 @@ class NPSResponse(TimeStampedModel):
             self.metadata['channel'] = survey_response.channel.name
 
 
-# Signal handler for creating NPSResponse from SurveyResponse
-@receiver(post_save, sender=SurveyResponse)
-def create_nps_response_from_survey_response(sender, instance, created, **kwargs):
+# Pipeline stage: create NPSResponse from SurveyResponse
+def create_nps_response_from_survey_response(instance):
     """
-    Create NPSResponse when a SurveyResponse is created for an NPS survey
+    Create NPSResponse for a completed NPS SurveyResponse.
+    Idempotent; errors are re-raised so the pipeline can retry the stage.
     """
     # Only process if it's an NPS survey and is complete
-    if not created or not instance.is_complete or instance.survey_type != 'nps':
+    if not instance.is_complete or instance.survey_type != 'nps':
         return
     
     # Don't create if customer is not available
@@ -3099,40 +3474,20 @@ def create_nps_response_from_survey_response(sender, instance, created, **kwargs
         nps_response.save()
         
         logger.info(f"Created NPSResponse {nps_response.id} from SurveyResponse {instance.id}")
-        
-        # Update survey statistics
-        instance.survey.total_responses += 1
-        instance.survey.save(update_fields=['total_responses', 'updated_at'])
+        return nps_response
         
     except Exception as e:
         logger.error(f"Error creating NPSResponse from SurveyResponse {instance.id}: {str(e)}", exc_info=True)
+        raise
 
 
-# Signal handler for auto-analysis
-@receiver(post_save, sender=SurveyResponse)
-def trigger_sentiment_analysis(sender, instance, created, **kwargs):
-    """
-    Trigger sentiment analysis when a survey response is created
-    """
-    if created and instance.is_complete:
-        # For immediate feedback, run sync analysis
-        # For production, use async with Celery
-        if settings.DEBUG:
-            # Sync for development
-            instance.analyze_sentiment_sync()
-        else:
-            # Async for production
-            instance.analyze_sentiment_async()
-
-
-# Signal handler for updating NPSResponse when SurveyResponse sentiment is analyzed
-@receiver(post_save, sender=SurveyResponse)
-def update_nps_response_from_analysis(sender, instance, created, **kwargs):
+# Propagate SurveyResponse sentiment results to the NPSResponse
+def update_nps_response_from_analysis(instance):
     """
     Update NPSResponse with sentiment analysis results
     """
     # Only process if it's an NPS survey and has been analyzed
-    if created or instance.survey_type != 'nps' or not instance.ai_analyzed:
+    if instance.survey_type != 'nps' or not instance.ai_analyzed:
         return
     
     try:
@@ -3414,14 +3769,14 @@ class CSATResponse(TimeStampedModel):
         return self.normalized_score or ((self.score - 1) / (self.scale_max - 1)) * 100
 
 
-# Signal handler for creating CSATResponse from SurveyResponse
-@receiver(post_save, sender=SurveyResponse)
-def create_csat_response_from_survey_response(sender, instance, created, **kwargs):
+# Pipeline stage: create CSATResponse from SurveyResponse
+def create_csat_response_from_survey_response(instance):
     """
-    Create CSATResponse when a SurveyResponse is created for a CSAT survey
+    Create CSATResponse for a completed CSAT SurveyResponse.
+    Idempotent; errors are re-raised so the pipeline can retry the stage.
     """
     # Only process if it's a CSAT survey and is complete
-    if not created or not instance.is_complete or instance.survey_type != 'csat':
+    if not instance.is_complete or instance.survey_type != 'csat':
         return
     
     # Don't create if customer is not available
@@ -3465,25 +3820,19 @@ def create_csat_response_from_survey_response(sender, instance, created, **kwarg
         csat_response.save()
         
         logger.info(f"Created CSATResponse {csat_response.id} from SurveyResponse {instance.id}")
-        
-        # Update survey statistics
-        try:
-            instance.survey.total_responses += 1
-            instance.survey.save(update_fields=['total_responses', 'updated_at'])
-        except Exception as e:
-            logger.error(f"Failed to update survey statistics: {str(e)}")
+        return csat_response
         
     except Exception as e:
         logger.error(f"Error creating CSATResponse from SurveyResponse {instance.id}: {str(e)}", exc_info=True)
+        raise
 
-# Signal handler for updating CSATResponse when SurveyResponse sentiment is analyzed
-@receiver(post_save, sender=SurveyResponse)
-def update_csat_response_from_analysis(sender, instance, created, **kwargs):
+# Propagate SurveyResponse sentiment results to the CSATResponse
+def update_csat_response_from_analysis(instance):
     """
     Update CSATResponse with sentiment analysis results
     """
     # Only process if it's a CSAT survey and has been analyzed
-    if created or instance.survey_type != 'csat' or not instance.ai_analyzed:
+    if instance.survey_type != 'csat' or not instance.ai_analyzed:
         return
     
     try:
@@ -3810,14 +4159,14 @@ class CESResponse(TimeStampedModel):
             return 'neutral'
 
 
-# Signal handler for creating CESResponse from SurveyResponse
-@receiver(post_save, sender=SurveyResponse)
-def create_ces_response_from_survey_response(sender, instance, created, **kwargs):
+# Pipeline stage: create CESResponse from SurveyResponse
+def create_ces_response_from_survey_response(instance):
     """
-    Create CESResponse when a SurveyResponse is created for a CES survey
+    Create CESResponse for a completed CES SurveyResponse.
+    Idempotent; errors are re-raised so the pipeline can retry the stage.
     """
     # Only process if it's a CES survey and is complete
-    if not created or not instance.is_complete or instance.survey_type != 'ces':
+    if not instance.is_complete or instance.survey_type != 'ces':
         return
     
     # Don't create if customer is not available
@@ -3842,8 +4191,8 @@ def create_ces_response_from_survey_response(sender, instance, created, **kwargs
             logger.warning(f"Cannot create CESResponse: No organization for SurveyResponse {instance.id}")
             return
         
-        # Create CESResponse with minimal required fields first
-        ces_response = CESResponse.objects.create(
+        # Create CESResponse
+        ces_response = CESResponse(
             survey_response=instance,
             organization=instance.organization,
             customer=instance.customer,
@@ -3856,31 +4205,25 @@ def create_ces_response_from_survey_response(sender, instance, created, **kwargs
             friction_points=instance.extract_friction_points()
         )
         
-        # Now update with additional data (after save)
+        # Copy additional data and save once
         ces_response.copy_from_survey_response(instance)
-        ces_response.save()  # Save again with updated data
+        ces_response.save()
         
         logger.info(f"Created CESResponse {ces_response.id} from SurveyResponse {instance.id}")
-        
-        # Update survey statistics
-        try:
-            instance.survey.total_responses += 1
-            instance.survey.save(update_fields=['total_responses', 'updated_at'])
-        except Exception as e:
-            logger.error(f"Failed to update survey statistics: {str(e)}")
+        return ces_response
         
     except Exception as e:
         logger.error(f"Error creating CESResponse from SurveyResponse {instance.id}: {str(e)}", exc_info=True)
+        raise
 
 
-# Signal handler for updating CESResponse when SurveyResponse sentiment is analyzed
-@receiver(post_save, sender=SurveyResponse)
-def update_ces_response_from_analysis(sender, instance, created, **kwargs):
+# Propagate SurveyResponse sentiment results to the CESResponse
+def update_ces_response_from_analysis(instance):
     """
     Update CESResponse with sentiment analysis results
     """
     # Only process if it's a CES survey and has been analyzed
-    if created or instance.survey_type != 'ces' or not instance.ai_analyzed:
+    if instance.survey_type != 'ces' or not instance.ai_analyzed:
         return
     
     try:
@@ -4955,10 +5298,10 @@ class MixedSurveyResponse(TimeStampedModel):
         }
 
 
-@receiver(post_save, sender=SurveyResponse)
-def create_mixed_response_for_mixed_surveys(sender, instance, created, **kwargs):
+def create_mixed_response_for_mixed_surveys(instance):
     """
-    Create MixedSurveyResponse when a SurveyResponse is created for a mixed survey
+    Pipeline stage: create MixedSurveyResponse for a completed mixed-survey
+    SurveyResponse. Idempotent; errors are re-raised so the stage is retried.
     """
     # Only process if it's a mixed survey and is complete
     if not instance.is_complete:
@@ -5037,23 +5380,41 @@ def create_mixed_response_for_mixed_surveys(sender, instance, created, **kwargs)
         logger.error(f"SurveyResponse details: id={instance.id}, survey={instance.survey.id if instance.survey else None}, "
                     f"customer={instance.customer.id if instance.customer else None}, "
                     f"is_complete={instance.is_complete}")
-#combined signal handler to include CES
-@receiver(post_save, sender=SurveyResponse)
-def create_specialized_response(sender, instance, created, **kwargs):
+        raise
+
+
+def create_specialized_response(instance):
     """
-    Create specialized response models (NPSResponse, CSATResponse, CESResponse) based on survey type
-    This is a combined handler that calls the specific handlers
+    Pipeline stage: create the specialized response model (NPSResponse,
+    CSATResponse, CESResponse) for the survey type
     """
-    if not created or not instance.is_complete:
-        return
+    if not instance.is_complete:
+        return None
     
     # Route to appropriate handler based on survey type
     if instance.survey_type == 'nps':
-        create_nps_response_from_survey_response(sender, instance, created, **kwargs)
+        return create_nps_response_from_survey_response(instance)
     elif instance.survey_type == 'csat':
-        create_csat_response_from_survey_response(sender, instance, created, **kwargs)
+        return create_csat_response_from_survey_response(instance)
     elif instance.survey_type == 'ces':
-        create_ces_response_from_survey_response(sender, instance, created, **kwargs)
+        return create_ces_response_from_survey_response(instance)
+    return None
+
+
+@receiver(post_save, sender=SurveyResponse)
+def enqueue_survey_response_pipeline(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Queue the post-save pipeline once the response is committed. The request
+    only pays for the insert; specialized responses, mixed-survey records and
+    sentiment analysis run on the configured executor.
+    """
+    if not instance.is_complete:
+        return
+    if not created and not (update_fields and 'is_complete' in update_fields):
+        return
+    
+    from surveys.services.response_pipeline import enqueue_response_pipeline
+    enqueue_response_pipeline(instance.pk)
 
 
 class AIAnalysisJob(TimeStampedModel):
@@ -5078,6 +5439,8 @@ class AIAnalysisJob(TimeStampedModel):
             ('bulk_analysis', _('Bulk Analysis')),
             ('trend_analysis', _('Trend Analysis')),
             ('report_generation', _('Report Generation')),
+            ('feedback_import', _('Feedback Import')),
+            ('columnar_export', _('Columnar Export')),
         ],
         db_index=True
     )
@@ -5102,6 +5465,9 @@ class AIAnalysisJob(TimeStampedModel):
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
+    # Set by each claim of the job; a worker whose claim was replaced
+    # (cancel, resume, stale requeue) can no longer checkpoint
+    run_id = models.UUIDField(_('Run ID'), null=True, blank=True, editable=False)
     
     # Processing Details
     total_items = models.IntegerField(_('Total Items'), default=0)
@@ -5213,6 +5579,222 @@ class MetricSnapshot(TimeStampedModel):
     def __str__(self):
         return f"{self.organization.name} - {self.snapshot_date} ({self.period_type})"
 
+
+class ThemeOccurrence(TimeStampedModel):
+    """
+    Normalized theme / friction point occurrences extracted from analyzed
+    NPS, CSAT and CES responses, so top-N counts are a grouped SQL query
+    instead of a Python pass over JSON columns.
+    """
+    SOURCE_CHOICES = [
+        ('nps', _('NPS Response')),
+        ('csat', _('CSAT Response')),
+        ('ces', _('CES Response')),
+    ]
+    KIND_CHOICES = [
+        ('theme', _('Key Theme')),
+        ('friction_point', _('Friction Point')),
+    ]
+    
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='theme_occurrences',
+        verbose_name=_('Organization')
+    )
+    source = models.CharField(_('Source'), max_length=10, choices=SOURCE_CHOICES)
+    kind = models.CharField(_('Kind'), max_length=20, choices=KIND_CHOICES)
+    response_id = models.UUIDField(_('Response ID'), db_index=True)
+    label = models.CharField(_('Label'), max_length=255)
+    response_created_at = models.DateTimeField(_('Response Created At'))
+    
+    class Meta:
+        verbose_name = _('Theme Occurrence')
+        verbose_name_plural = _('Theme Occurrences')
+        ordering = ['-response_created_at']
+        indexes = [
+            models.Index(fields=['organization', 'source', 'kind', 'response_created_at']),
+            models.Index(fields=['organization', 'source', 'kind', 'label']),
+        ]
+    
+    def __str__(self):
+        return f"{self.source}:{self.kind} - {self.label}"
+    
+    # (source, kind) -> callable returning the labels stored on a response
+    EXTRACTORS = {
+        ('nps', 'theme'): lambda response: response.key_themes,
+        ('csat', 'theme'): lambda response: (response.metadata or {}).get('themes'),
+        ('ces', 'friction_point'): lambda response: response.friction_points,
+    }
+    
+    @staticmethod
+    def clean_labels(values):
+        """Distinct, non-empty string labels in their original order"""
+        labels = []
+        if isinstance(values, list):
+            for value in values:
+                if isinstance(value, str) and value.strip() and value[:255] not in labels:
+                    labels.append(value[:255])
+        return labels
+    
+    @classmethod
+    def sync_response(cls, source, response):
+        """Replace the occurrences of one response with its current labels"""
+        for (extractor_source, kind), extractor in cls.EXTRACTORS.items():
+            if extractor_source != source:
+                continue
+            
+            labels = cls.clean_labels(extractor(response)) if response.ai_analyzed else []
+            existing = list(cls.objects.filter(
+                response_id=response.pk, source=source, kind=kind
+            ).values_list('label', flat=True))
+            if sorted(existing) == sorted(labels):
+                continue
+            
+            with transaction.atomic():
+                cls.objects.filter(response_id=response.pk, source=source, kind=kind).delete()
+                cls.objects.bulk_create([
+                    cls(
+                        organization_id=response.organization_id,
+                        source=source,
+                        kind=kind,
+                        response_id=response.pk,
+                        label=label,
+                        response_created_at=response.created_at,
+                    )
+                    for label in labels
+                ])
+
+
+class AIResultCacheEntry(TimeStampedModel):
+    """
+    Persistent tier of the AI analysis result cache. Rows are addressed by a
+    hash of the normalized input text, language, analysis config and model
+    name; see cx_analytics.services.ai_result_cache.
+    """
+    KIND_CHOICES = [
+        ('feedback_sentiment', _('Feedback Sentiment')),
+        ('survey_sentiment', _('Survey Response Sentiment')),
+        ('feedback_themes', _('Feedback Themes')),
+    ]
+    
+    cache_key = models.CharField(_('Cache Key'), max_length=64, unique=True)
+    kind = models.CharField(_('Kind'), max_length=30, choices=KIND_CHOICES)
+    model_name = models.CharField(_('AI Model'), max_length=100)
+    model_version = models.CharField(_('Model Version'), max_length=50)
+    result = models.JSONField(_('Result'), default=dict)
+    hit_count = models.PositiveIntegerField(_('Hit Count'), default=0)
+    last_hit_at = models.DateTimeField(_('Last Hit At'), null=True, blank=True)
+    expires_at = models.DateTimeField(_('Expires At'), db_index=True)
+    
+    class Meta:
+        verbose_name = _('AI Result Cache Entry')
+        verbose_name_plural = _('AI Result Cache Entries')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'model_name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} ({self.model_name}) - {self.cache_key[:12]}"
+    
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class TranslationMemory(TimeStampedModel):
+    """
+    Persistent translation memory. One row per source text and language
+    pair, addressed by memory_key; see
+    cx_analytics.services.translation_memory.
+    """
+    memory_key = models.CharField(_('Memory Key'), max_length=64, unique=True)
+    source_language = models.CharField(_('Source Language'), max_length=10)
+    target_language = models.CharField(_('Target Language'), max_length=10)
+    source_text = models.TextField(_('Source Text'))
+    translated_text = models.TextField(_('Translated Text'))
+    model_name = models.CharField(_('AI Model'), max_length=100)
+    use_count = models.PositiveIntegerField(_('Use Count'), default=0)
+    last_used_at = models.DateTimeField(_('Last Used At'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('Translation Memory Entry')
+        verbose_name_plural = _('Translation Memory')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['source_language', 'target_language']),
+        ]
+    
+    def __str__(self):
+        return f"{self.source_language}->{self.target_language}: {self.source_text[:50]}"
+
+
+class ExportWatermark(TimeStampedModel):
+    """
+    High-water mark of incremental columnar exports. One row per
+    organization, dataset and scope (a survey id, or '' for the whole
+    organization); see cx_analytics.services.columnar_export.
+    """
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='export_watermarks',
+        verbose_name=_('Organization')
+    )
+    dataset = models.CharField(_('Dataset'), max_length=50)
+    scope = models.CharField(_('Scope'), max_length=100, blank=True)
+    exported_until = models.DateTimeField(_('Exported Until'))
+    rows_exported = models.PositiveIntegerField(_('Rows Exported'), default=0)
+    
+    class Meta:
+        verbose_name = _('Export Watermark')
+        verbose_name_plural = _('Export Watermarks')
+        ordering = ['-created_at']
+        unique_together = [['organization', 'dataset', 'scope']]
+    
+    def __str__(self):
+        return f"{self.dataset} ({self.scope or 'all'}) until {self.exported_until}"
+
+
+THEME_SOURCE_FIELDS = {
+    'nps': {'ai_analyzed', 'key_themes'},
+    'csat': {'ai_analyzed', 'metadata'},
+    'ces': {'ai_analyzed', 'friction_points'},
+}
+
+
+def sync_theme_occurrences(source, instance, update_fields=None):
+    """Keep ThemeOccurrence rows in step with a saved response"""
+    if update_fields is not None and not THEME_SOURCE_FIELDS[source] & set(update_fields):
+        return
+    try:
+        ThemeOccurrence.sync_response(source, instance)
+    except Exception as e:
+        logger.error(f"Error syncing theme occurrences for {source} response {instance.pk}: {str(e)}")
+
+
+@receiver(post_save, sender=NPSResponse)
+def sync_nps_theme_occurrences(sender, instance, created, update_fields=None, **kwargs):
+    sync_theme_occurrences('nps', instance, update_fields)
+
+
+@receiver(post_save, sender=CSATResponse)
+def sync_csat_theme_occurrences(sender, instance, created, update_fields=None, **kwargs):
+    sync_theme_occurrences('csat', instance, update_fields)
+
+
+@receiver(post_save, sender=CESResponse)
+def sync_ces_theme_occurrences(sender, instance, created, update_fields=None, **kwargs):
+    sync_theme_occurrences('ces', instance, update_fields)
+
+
+@receiver(post_delete, sender=NPSResponse)
+@receiver(post_delete, sender=CSATResponse)
+@receiver(post_delete, sender=CESResponse)
+def delete_theme_occurrences(sender, instance, **kwargs):
+    ThemeOccurrence.objects.filter(response_id=instance.pk).delete()
+
 class Alert(TimeStampedModel):
     """
     Real-time alerts for significant events or threshold breaches
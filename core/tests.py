@@ -1,3 +1,59 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Customer, Feedback, FeedbackCounter, Organization
+
+
+class FeedbackCounterRebuildTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        cls.customer = Customer.objects.create(
+            organization=cls.organization, customer_id='CUST-1', email='customer@example.com'
+        )
+
+    def create_feedback(self, **fields):
+        return Feedback.objects.create(
+            organization=self.organization, customer=self.customer, content='Feedback', **fields
+        )
+
+    def counter(self, dimension, value=''):
+        return FeedbackCounter.objects.get(organization=self.organization, dimension=dimension, value=value)
+
+    def test_rebuild_repairs_counters_after_queryset_update(self):
+        self.create_feedback(requires_human_review=True, ai_analyzed=True, sentiment_score=0.5,
+                             sentiment_label='positive')
+        self.create_feedback(requires_human_review=True)
+        review_counter = self.counter('requires_human_review', 'true')
+        self.assertEqual(review_counter.count, 2)
+
+        # Bypasses Feedback.save, as the bulk actions do
+        Feedback.objects.filter(organization=self.organization).update(requires_human_review=False)
+        FeedbackCounter.rebuild(self.organization)
+
+        rebuilt = self.counter('requires_human_review', 'true')
+        self.assertEqual(rebuilt.pk, review_counter.pk)
+        self.assertEqual(rebuilt.count, 0)
+        self.assertEqual(self.counter('total').count, 2)
+        self.assertEqual(self.counter('analyzed_sentiment', 'positive').score_count, 1)
+
+    def test_rebuild_creates_missing_rows(self):
+        self.create_feedback(status='resolved')
+        FeedbackCounter.objects.filter(organization=self.organization).delete()
+
+        FeedbackCounter.rebuild(self.organization)
+
+        self.assertEqual(self.counter('total').count, 1)
+        self.assertEqual(self.counter('status', 'resolved').count, 1)
+
+    def test_incremental_updates_continue_from_rebuilt_totals(self):
+        feedback = self.create_feedback(status='new')
+        FeedbackCounter.rebuild(self.organization)
+
+        feedback.status = 'closed'
+        feedback.save()
+        self.create_feedback(status='closed')
+
+        self.assertEqual(self.counter('total').count, 2)
+        self.assertEqual(self.counter('status', 'new').count, 0)
+        self.assertEqual(self.counter('status', 'closed').count, 2)
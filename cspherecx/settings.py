@@ -43,6 +43,15 @@ ALLOWED_HOSTS = [ '192.168.1.157', 'localhost', '127.0.0.1']
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', default='your-gemini-api-key')
 GEMINI_MODEL = 'gemini-2.5-flash'  # Balanced for cost/performance
 GEMINI_MODEL_PRO = 'gemini-2.5-pro'  # For complex analysis
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get('GEMINI_REQUESTS_PER_MINUTE', 600))  # Per API key
+GEMINI_MAX_WORKERS = 8  # Concurrent requests in batch analysis
+GEMINI_PACKED_ANALYSIS = True  # Pack several short feedbacks into one request
+AI_MODEL_VERSION = '1.0'  # Bump to invalidate cached AI analysis results
+AI_RESULT_CACHE_ENABLED = True
+AI_RESULT_CACHE_TTL = 60 * 60 * 24 * 30  # Seconds a cached AI result stays valid
+AI_RESULT_CACHE_MAX_ENTRIES = 2048  # In-process LRU tier size
+LANGUAGE_DETECTION_MIN_CONFIDENCE = 0.8  # Below this the offline detector defers to Gemini
+GEMINI_HEALTH_CHECK_TTL = 60  # Seconds a health-check probe result is reused
 
 
 # Application definition
@@ -115,10 +124,40 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3",
         #"NAME": BASE_DIR / "db.sqlite3",
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # SQLite serializes writers: concurrent requests wait for the write
+        # lock (IMMEDIATE takes it when a transaction starts, so a reader
+        # never fails upgrading) instead of failing with "database is locked"
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # A file, not the shared in-memory database, so tests that submit
+        # from several threads get the same locking as the real database
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
 
+# Cache
+# Set REDIS_URL in production so every process shares one cache (and cache
+# invalidation, e.g. of public survey definitions, reaches all of them).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -249,7 +288,52 @@ SITE_ID = 1
 # Analysis Configuration
 SENTIMENT_THRESHOLD = 0.7
 THEME_MIN_CLUSTER_SIZE = 3
+THEME_CHUNK_TOKEN_BUDGET = 6000  # Approximate input tokens of feedback per theme-extraction request
+THEME_CHUNK_MAX_ITEMS = 100  # Keeps the per-chunk feedback_assignments output bounded
+THEME_ITEM_MAX_CHARS = 2000  # Longer feedback is truncated for theme extraction
+THEME_EMBEDDING_MODEL = None  # e.g. 'models/text-embedding-004'; None merges themes by trigram similarity
 NPS_INFERENCE_ENABLED = True
+FEEDBACK_IMPORT_BATCH_SIZE = 2000  # CSV rows resolved and bulk-created together on import
+
+# Survey response post-save pipeline: 'local' (background thread),
+# 'inline' (synchronous, for tests) or 'celery'
+SURVEY_PIPELINE_EXECUTOR = 'local'
+
+# Background AI analysis / import jobs (AIAnalysisJob): 'local' (background
+# thread), 'inline' (synchronous, for tests) or 'celery'
+AI_JOB_EXECUTOR = 'local'
+# Running jobs without a checkpoint for this long lost their worker; celery
+# beat re-queues them (without beat: run_analysis_jobs --requeue-stale)
+AI_JOB_STALE_MINUTES = 30
+
+# Incremental columnar exports stop this many seconds before "now", so rows
+# written by transactions still open when the export starts are not skipped.
+# Larger exports requested from the survey views run as a background job.
+COLUMNAR_EXPORT_WATERMARK_LAG = 300
+COLUMNAR_EXPORT_INLINE_MAX_ROWS = 100000
+
+# Dashboards read MetricSnapshot rows for closed days. Days without a snapshot
+# are collected live and, with METRIC_SNAPSHOT_BACKFILL, stored on first read.
+# The nightly build runs from celery beat (Celery app configured with
+# namespace='CELERY'); without beat, run
+# `manage.py build_metric_snapshots --days 3` from cron shortly after midnight.
+METRIC_SNAPSHOT_BACKFILL = True
+try:
+    from celery.schedules import crontab
+except ImportError:  # Celery is only needed by the worker and beat processes
+    crontab = None
+if crontab is not None:
+    CELERY_BEAT_SCHEDULE = {
+        'build-metric-snapshots': {
+            'task': 'cx_analytics.tasks.build_metric_snapshots',
+            'schedule': crontab(hour=0, minute=30),
+            'kwargs': {'days': 3},
+        },
+        'requeue-stale-analysis-jobs': {
+            'task': 'cx_analytics.tasks.requeue_stale_analysis_jobs',
+            'schedule': crontab(minute='*/10'),
+        },
+    }
 
 # Allauth settings
 SOCIALACCOUNT_PROVIDERS = {
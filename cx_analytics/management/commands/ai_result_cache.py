@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from cx_analytics.services.ai_result_cache import persistent_cache_stats, purge_expired_results
+
+
+class Command(BaseCommand):
+    help = (
+        'Report the entries and accumulated hits of the persistent AI result cache. '
+        'Each hit is a Gemini request that was not made.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help='Delete expired entries and entries from an older AI_MODEL_VERSION first.',
+        )
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            deleted = purge_expired_results()
+            self.stdout.write(f'Purged {deleted} expired cache entries')
+
+        stats = persistent_cache_stats()
+        total_hits = 0
+        for kind, values in stats.items():
+            total_hits += values['hits']
+            self.stdout.write(f"{kind}: {values['entries']} entries, {values['hits']} hits")
+
+        self.stdout.write(self.style.SUCCESS(f'AI result cache saved {total_hits} requests'))
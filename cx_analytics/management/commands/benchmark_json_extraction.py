@@ -0,0 +1,110 @@
+import json
+import logging
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cx_analytics.services.json_extraction import extract_json
+from cx_analytics.services.language_detection import DATA_DIR
+
+CORPUS_PATH = DATA_DIR / 'malformed_responses.json'
+
+
+def naive_extract(text, expect):
+    """The find/rfind + json.loads parsing the analyzers used before"""
+    closer = '}' if expect == '{' else ']'
+    cleaned = re.sub(r'```(?:json)?', '', text, flags=re.IGNORECASE).strip()
+    start_idx = cleaned.find(expect)
+    end_idx = cleaned.rfind(closer) + 1
+    if start_idx == -1 or end_idx == 0:
+        raise ValueError('No JSON found')
+    return json.loads(cleaned[start_idx:end_idx])
+
+
+def case_expect(case):
+    """'[' or '{'; cases that must be rejected name it explicitly"""
+    if 'expect' in case:
+        return case['expect']
+    return '[' if isinstance(case['expected'], list) else '{'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the incremental JSON extractor with naive find/rfind + json.loads '
+        'parsing on a corpus of malformed Gemini-style responses.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            default=str(CORPUS_PATH),
+            help='JSON list of {"name", "response", "expected"} cases; a null expected value must raise.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Timing passes over the corpus for each parser.',
+        )
+
+    def handle(self, *args, **options):
+        with open(options['corpus'], encoding='utf-8') as corpus_file:
+            cases = json.load(corpus_file)
+        if not cases:
+            raise CommandError('The corpus is empty')
+
+        parsers = {
+            'naive': lambda text, expect: naive_extract(text, expect),
+            'extractor': lambda text, expect: extract_json(text, expect, drop_incomplete=(expect == '[')),
+        }
+
+        # Truncation warnings would flood the output
+        extraction_logger = logging.getLogger('cx_analytics.services.json_extraction')
+        previous_level = extraction_logger.level
+        extraction_logger.setLevel(logging.ERROR)
+        try:
+            results = {name: self._run(parse, cases, max(1, options['repeat'])) for name, parse in parsers.items()}
+        finally:
+            extraction_logger.setLevel(previous_level)
+
+        self.stdout.write(f'Responses: {len(cases)}')
+        for name, (passed, latency, _outcomes) in results.items():
+            self.stdout.write(
+                f'{name}: {passed}/{len(cases)} handled ({passed / len(cases):.1%}), '
+                f'{latency * 1_000_000:.1f} us per response'
+            )
+
+        naive_outcomes = results['naive'][2]
+        extractor_outcomes = results['extractor'][2]
+        for case, naive_ok, extractor_ok in zip(cases, naive_outcomes, extractor_outcomes):
+            self.stdout.write(
+                f'  {case["name"]:<28} naive={"ok" if naive_ok else "FAIL":<4} '
+                f'extractor={"ok" if extractor_ok else "FAIL"}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('JSON extraction benchmark finished'))
+
+    def _run(self, parse, cases, repeat):
+        """
+        (cases handled correctly, mean seconds per response, per-case outcome).
+        A case whose expected value is null must be rejected.
+        """
+        outcomes = []
+        for case in cases:
+            expect = case_expect(case)
+            try:
+                outcomes.append(parse(case['response'], expect) == case['expected'])
+            except ValueError:
+                outcomes.append(case['expected'] is None)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for case in cases:
+                expect = case_expect(case)
+                try:
+                    parse(case['response'], expect)
+                except ValueError:
+                    pass
+        latency = (time.perf_counter() - started) / (len(cases) * repeat)
+        return sum(outcomes), latency, outcomes
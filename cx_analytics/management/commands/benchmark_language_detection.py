@@ -0,0 +1,96 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cx_analytics.services.language_detection import DATA_DIR, LanguageDetector
+
+SAMPLES_PATH = DATA_DIR / 'language_samples.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Report accuracy and per-item latency of the offline language detector '
+        'on the bundled multilingual sample set, optionally against Gemini.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples',
+            default=str(SAMPLES_PATH),
+            help='JSON list of [language, text] pairs.',
+        )
+        parser.add_argument(
+            '--llm',
+            action='store_true',
+            help='Also run every sample through the Gemini detection path (one request per sample).',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timing passes over the sample set for the local detector.',
+        )
+
+    def handle(self, *args, **options):
+        with open(options['samples'], encoding='utf-8') as samples_file:
+            samples = json.load(samples_file)
+        if not samples:
+            raise CommandError('The sample set is empty')
+
+        from django.conf import settings
+        from cx_analytics.services.translation_service import DEFAULT_LANGUAGE_DETECTION_MIN_CONFIDENCE
+        threshold = getattr(settings, 'LANGUAGE_DETECTION_MIN_CONFIDENCE', DEFAULT_LANGUAGE_DETECTION_MIN_CONFIDENCE)
+
+        detector = LanguageDetector()
+        guesses = [detector.detect(text) for _language, text in samples]
+
+        started = time.perf_counter()
+        for _ in range(max(1, options['repeat'])):
+            for _language, text in samples:
+                detector.detect(text)
+        local_latency = (time.perf_counter() - started) / (len(samples) * max(1, options['repeat']))
+
+        correct = sum(1 for (language, _text), guess in zip(samples, guesses) if guess and guess.language == language)
+        confident = [
+            (language, guess) for (language, _text), guess in zip(samples, guesses)
+            if guess and guess.confidence >= threshold
+        ]
+        confident_correct = sum(1 for language, guess in confident if guess.language == language)
+
+        self.stdout.write(f'Samples: {len(samples)}')
+        self.stdout.write(
+            f'Local detector: {correct / len(samples):.1%} accurate, '
+            f'{local_latency * 1_000_000:.0f} us per item'
+        )
+        self.stdout.write(
+            f'Confident (>= {threshold}): {len(confident)} items ({len(confident) / len(samples):.1%} '
+            f'answered without Gemini), {confident_correct / len(confident) if confident else 0:.1%} accurate'
+        )
+
+        for (language, text), guess in zip(samples, guesses):
+            if guess is None or guess.language != language:
+                found = f'{guess.language} ({guess.confidence})' if guess else 'none'
+                self.stdout.write(f'  miss: expected {language}, got {found}: {text[:60]}')
+
+        if options['llm']:
+            self._benchmark_llm(samples)
+
+        self.stdout.write(self.style.SUCCESS('Language detection benchmark finished'))
+
+    def _benchmark_llm(self, samples):
+        from cx_analytics.services.translation_service import TranslationService
+
+        service = TranslationService()
+        if not service.is_configured():
+            raise CommandError('Translation service is not configured; cannot run the Gemini path')
+
+        correct = 0
+        started = time.perf_counter()
+        for language, text in samples:
+            if service._detect_language_remote(text) == language:
+                correct += 1
+        latency = (time.perf_counter() - started) / len(samples)
+        self.stdout.write(
+            f'Gemini: {correct / len(samples):.1%} accurate, {latency * 1000:.0f} ms per item'
+        )
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+from django.core.management.base import BaseCommand, CommandError
+
+from common.pdf_watermark import DEFAULT_FONT_SIZE, DEFAULT_WATERMARK_TEXT, TILE_STEP, PDFWatermarker
+
+
+def build_sample_pdf(page_count):
+    """A Letter-size PDF with a paragraph of text on every page"""
+    document = fitz.open()
+    for number in range(1, page_count + 1):
+        page = document.new_page(width=612, height=792)
+        page.insert_textbox(
+            fitz.Rect(72, 72, 540, 720),
+            f'Page {number}\n\n' + 'Customer feedback report body text. ' * 60,
+            fontsize=10,
+        )
+    data = document.tobytes(garbage=3, deflate=True)
+    document.close()
+    return data
+
+
+def legacy_watermark(data, directory):
+    """The temp-file + per-tile insert_text approach ProtectedFileStorage used before"""
+    temp_path = os.path.join(directory, 'temp_report.pdf')
+    output_path = os.path.join(directory, 'report.pdf')
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(data)
+    try:
+        document = fitz.open(temp_path)
+        step_x, step_y = TILE_STEP
+        for page in document:
+            rect = page.rect
+            for i in range(0, int(rect.height), step_y):
+                for j in range(0, int(rect.width), step_x):
+                    page.insert_text(point=(j, i), text=DEFAULT_WATERMARK_TEXT, fontsize=DEFAULT_FONT_SIZE)
+        document.save(output_path)
+        document.close()
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    with open(output_path, 'rb') as output_file:
+        return output_file.read()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the in-memory overlay watermarking against the previous temp-file '
+        'approach on 10, 100 and 1,000 page PDFs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000],
+            help='Page counts of the generated sample documents.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per method and document; the best time is reported.',
+        )
+
+    def handle(self, *args, **options):
+        if any(pages < 1 for pages in options['pages']):
+            raise CommandError('Page counts must be positive')
+        repeat = max(1, options['repeat'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            methods = {
+                'legacy': lambda data: legacy_watermark(data, directory),
+                'overlay': lambda data: PDFWatermarker().watermark(data),
+            }
+
+            for pages in options['pages']:
+                source = build_sample_pdf(pages)
+                self.stdout.write(f'{pages} pages ({len(source) / 1024:.0f} KiB):')
+                for name, method in methods.items():
+                    best = None
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        output = method(source)
+                        elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    self.stdout.write(
+                        f'  {name:<9} {best * 1000:9.1f} ms  {best * 1000 / pages:7.2f} ms/page  '
+                        f'{len(output) / 1024:9.0f} KiB'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('PDF watermark benchmark finished'))
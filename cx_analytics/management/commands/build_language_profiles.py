@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from cx_analytics.services.language_detection import CORPUS_PATH, PROFILES_PATH, write_profiles
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the n-gram language profiles used by the offline language detector'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            default=str(CORPUS_PATH),
+            help='JSON file of {language: [texts]} to train on.',
+        )
+        parser.add_argument(
+            '--output',
+            default=str(PROFILES_PATH),
+            help='Where to write the profile file.',
+        )
+
+    def handle(self, *args, **options):
+        profiles = write_profiles(options['corpus'], options['output'])
+        languages = ', '.join(sorted(profiles['languages']))
+        self.stdout.write(self.style.SUCCESS(f"Wrote profiles for {languages} to {options['output']}"))
@@ -0,0 +1,74 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization
+from cx_analytics.services.metric_snapshots import MetricSnapshotBuilder
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Build daily, weekly and monthly MetricSnapshot rollups. '
+        'Only days touched since the last run are rebuilt; schedule nightly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            action='append',
+            dest='organizations',
+            help='Organization id or slug to build (repeatable). Defaults to all active organizations.',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignore the watermark and rebuild every day that has data.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Also rebuild the last N closed days (picks up deleted rows).',
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.filter(is_active=True)
+
+        identifiers = options.get('organizations')
+        if identifiers:
+            selected = []
+            for identifier in identifiers:
+                organization = self._get_organization(identifier)
+                if organization is None:
+                    raise CommandError(f'Organization not found: {identifier}')
+                selected.append(organization)
+            organizations = selected
+
+        total_days = 0
+        for organization in organizations:
+            try:
+                result = MetricSnapshotBuilder(organization).run(
+                    full=options['full'],
+                    days=options['days'],
+                )
+            except Exception as e:
+                logger.error(f'Error building snapshots for {organization.name}: {str(e)}', exc_info=True)
+                self.stderr.write(f'{organization.name}: failed ({str(e)})')
+                continue
+
+            total_days += result['days_rebuilt']
+            self.stdout.write(f"{organization.name}: {result['days_rebuilt']} days rebuilt")
+
+        self.stdout.write(self.style.SUCCESS(f'Metric snapshots updated ({total_days} days rebuilt)'))
+
+    def _get_organization(self, identifier):
+        """Look up an organization by primary key or slug"""
+        organization = Organization.objects.filter(slug=identifier).first()
+        if organization is None:
+            try:
+                organization = Organization.objects.filter(pk=identifier).first()
+            except Exception:
+                organization = None
+        return organization
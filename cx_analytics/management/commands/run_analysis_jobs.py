@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.models import AIAnalysisJob
+from cx_analytics.services.analysis_jobs import JOB_PENDING, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Run pending AI analysis jobs in this process. Use it as the worker when '
+        'AI_JOB_EXECUTOR is not "celery", or to finish jobs left behind by a restart.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue-stale',
+            type=int,
+            metavar='MINUTES',
+            help='First re-queue running jobs without a checkpoint for this many minutes; they resume.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new pending jobs instead of exiting when none are left.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls with --loop.',
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_stale']:
+            # Not dispatched: the loop below runs them in this process
+            requeued = requeue_stale_jobs(timedelta(minutes=options['requeue_stale']), dispatch=False)
+            for job_id in requeued:
+                self.stdout.write(f'Re-queued stale job {job_id}')
+
+        finished = 0
+        while True:
+            pending = list(
+                AIAnalysisJob.objects.filter(status=JOB_PENDING).order_by('created_at').values_list('pk', 'job_id')
+            )
+            for job_pk, job_id in pending:
+                status = run_job(job_pk)
+                if status is not None:
+                    finished += 1
+                    self.stdout.write(f'{job_id}: {status}')
+            if not options['loop']:
+                break
+            if not pending:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Ran {finished} analysis jobs'))
@@ -0,0 +1,252 @@
+# services/ai_result_cache.py
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 30 * 24 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MODEL_VERSION = '1.0'
+
+KIND_FEEDBACK_SENTIMENT = 'feedback_sentiment'
+KIND_SURVEY_SENTIMENT = 'survey_sentiment'
+KIND_FEEDBACK_THEMES = 'feedback_themes'
+
+
+def current_model_version() -> str:
+    """Bumping settings.AI_MODEL_VERSION invalidates every cached result"""
+    return str(getattr(settings, 'AI_MODEL_VERSION', DEFAULT_MODEL_VERSION))
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """NFKC, case-folded, whitespace-collapsed form used for cache keys"""
+    if not text:
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).casefold().split())
+
+
+def make_cache_key(kind: str, text: str, language: str = '', config: Optional[Dict[str, Any]] = None,
+                   model_name: str = '') -> str:
+    """sha256 over the normalized text, language, analysis config and model name"""
+    payload = json.dumps(
+        [kind, normalize_text(text), (language or '').lower(), config or {}, model_name],
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AIResultCache:
+    """
+    Two-tier cache for AI analysis results.
+
+    The first tier is a size-bounded in-process LRU, the second the
+    AIResultCacheEntry table. Entries expire after ``ttl`` seconds and are
+    ignored (and dropped) when their model_version differs from
+    settings.AI_MODEL_VERSION. Results are copied on the way in and out so
+    callers can add metadata freely. Database errors degrade to a miss.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: int = DEFAULT_TTL,
+                 enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        # cache_key -> (result, expires_at as epoch seconds, model_version)
+        self._memory: 'OrderedDict[str, Tuple[Dict[str, Any], float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+
+    # In-process tier
+
+    def _memory_get(self, cache_key: str, model_version: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry is None:
+                return None
+            result, expires_at, entry_version = entry
+            if expires_at <= time.time() or entry_version != model_version:
+                del self._memory[cache_key]
+                self._stats['invalidations'] += 1
+                return None
+            self._memory.move_to_end(cache_key)
+            return result
+
+    def _memory_set(self, cache_key: str, result: Dict[str, Any], expires_at: float,
+                    model_version: str) -> None:
+        with self._lock:
+            self._memory[cache_key] = (result, expires_at, model_version)
+            self._memory.move_to_end(cache_key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # Database tier
+
+    def _db_get(self, cache_key: str, model_version: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        from core.models import AIResultCacheEntry
+
+        try:
+            entry = AIResultCacheEntry.objects.filter(cache_key=cache_key).only(
+                'id', 'result', 'model_version', 'expires_at'
+            ).first()
+            if entry is None:
+                return None
+            if entry.is_expired or entry.model_version != model_version:
+                AIResultCacheEntry.objects.filter(pk=entry.pk).delete()
+                with self._lock:
+                    self._stats['invalidations'] += 1
+                return None
+            AIResultCacheEntry.objects.filter(pk=entry.pk).update(
+                hit_count=F('hit_count') + 1, last_hit_at=timezone.now()
+            )
+            return entry.result, entry.expires_at.timestamp()
+        except Exception as e:
+            logger.warning(f"AI result cache lookup failed: {str(e)}")
+            return None
+
+    def _db_set(self, cache_key: str, kind: str, model_name: str, model_version: str,
+                result: Dict[str, Any], expires_at) -> None:
+        from core.models import AIResultCacheEntry
+
+        try:
+            AIResultCacheEntry.objects.update_or_create(
+                cache_key=cache_key,
+                defaults={
+                    'kind': kind,
+                    'model_name': model_name[:100],
+                    'model_version': model_version,
+                    'result': result,
+                    'hit_count': 0,
+                    'last_hit_at': None,
+                    'expires_at': expires_at,
+                },
+            )
+        except Exception as e:
+            logger.warning(f"AI result cache store failed: {str(e)}")
+
+    # Public API
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``cache_key`` (a private copy) or None"""
+        if not self.enabled:
+            return None
+        model_version = current_model_version()
+
+        result = self._memory_get(cache_key, model_version)
+        if result is not None:
+            with self._lock:
+                self._stats['memory_hits'] += 1
+            return copy.deepcopy(result)
+
+        stored = self._db_get(cache_key, model_version)
+        if stored is not None:
+            result, expires_at = stored
+            self._memory_set(cache_key, result, expires_at, model_version)
+            with self._lock:
+                self._stats['db_hits'] += 1
+            return copy.deepcopy(result)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, cache_key: str, result: Dict[str, Any], kind: str, model_name: str) -> None:
+        """Store a successful result in both tiers"""
+        if not self.enabled or not isinstance(result, dict):
+            return
+        model_version = current_model_version()
+        expires_at = timezone.now() + timedelta(seconds=self.ttl)
+        stored = copy.deepcopy(result)
+
+        self._memory_set(cache_key, stored, expires_at.timestamp(), model_version)
+        self._db_set(cache_key, kind, model_name, model_version, stored, expires_at)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def get_or_compute(self, kind: str, text: str, compute: Callable[[], Dict[str, Any]],
+                       language: str = '', config: Optional[Dict[str, Any]] = None,
+                       model_name: str = '') -> Tuple[Dict[str, Any], bool]:
+        """
+        Return ``(result, cached)``. On a miss ``compute`` is called and its
+        result stored; exceptions from ``compute`` propagate and nothing is
+        cached.
+        """
+        cache_key = make_cache_key(kind, text, language, config, model_name)
+        result = self.get(cache_key)
+        if result is not None:
+            return result, True
+
+        result = compute()
+        self.set(cache_key, result, kind, model_name)
+        return result, False
+
+    def invalidate(self, cache_key: str) -> None:
+        from core.models import AIResultCacheEntry
+
+        with self._lock:
+            self._memory.pop(cache_key, None)
+        try:
+            AIResultCacheEntry.objects.filter(cache_key=cache_key).delete()
+        except Exception as e:
+            logger.warning(f"AI result cache invalidation failed: {str(e)}")
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Process-local hit / miss counters and the hit ratio"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def purge_expired_results() -> int:
+    """Delete expired and outdated-version rows; returns the number deleted"""
+    from core.models import AIResultCacheEntry
+
+    deleted, _ = AIResultCacheEntry.objects.filter(
+        Q(expires_at__lte=timezone.now()) | ~Q(model_version=current_model_version())
+    ).delete()
+    return deleted
+
+
+def persistent_cache_stats() -> Dict[str, Any]:
+    """Row counts and accumulated hits of the database tier, per kind"""
+    from core.models import AIResultCacheEntry
+
+    rows = AIResultCacheEntry.objects.filter(
+        expires_at__gt=timezone.now(), model_version=current_model_version()
+    ).values('kind').annotate(entries=Count('id'), hits=Sum('hit_count')).order_by('kind')
+    return {row['kind']: {'entries': row['entries'], 'hits': row['hits'] or 0} for row in rows}
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> AIResultCache:
+    """Process-wide cache configured from settings.AI_RESULT_CACHE_*"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = AIResultCache(
+                max_entries=getattr(settings, 'AI_RESULT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+                ttl=getattr(settings, 'AI_RESULT_CACHE_TTL', DEFAULT_TTL),
+                enabled=getattr(settings, 'AI_RESULT_CACHE_ENABLED', True),
+            )
+        return _result_cache
@@ -0,0 +1,511 @@
+# services/analysis_jobs.py
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+ACTIVE_STATUSES = (JOB_PENDING, JOB_RUNNING)
+RESUMABLE_STATUSES = (JOB_FAILED, JOB_CANCELLED)
+
+JOB_FEEDBACK_IMPORT = 'feedback_import'
+JOB_SENTIMENT_ANALYSIS = 'sentiment_analysis'
+JOB_THEME_EXTRACTION = 'theme_extraction'
+JOB_REPORT_GENERATION = 'report_generation'
+JOB_COLUMNAR_EXPORT = 'columnar_export'
+
+MAX_ERROR_LOG_LINES = 200
+JOB_UPLOAD_DIR = 'analysis_jobs'
+
+# Fields returned by the progress endpoint
+PROGRESS_FIELDS = (
+    'job_id', 'job_type', 'status', 'progress', 'total_items', 'processed_items',
+    'failed_items', 'started_at', 'completed_at', 'updated_at',
+)
+
+
+class JobCancelled(Exception):
+    """Raised at a checkpoint once this run no longer holds the job (cancelled or re-claimed)"""
+
+
+class JobContext:
+    """
+    Handed to a job handler. ``cursor`` is where the last committed chunk
+    ended (0 on a fresh job); ``checkpoint`` records the next one. Writes
+    only match while the job is running under this context's ``run_id``.
+    """
+
+    def __init__(self, job, run_id=None):
+        self.job = job
+        self.run_id = run_id if run_id is not None else job.run_id
+        self.parameters = job.parameters or {}
+        self.state = dict(job.result_data or {})
+        self.cursor = self.state.get('cursor', 0)
+        self.processed_items = job.processed_items
+        self.failed_items = job.failed_items
+        self._errors: List[str] = [line for line in (job.error_log or '').splitlines() if line]
+
+    def set_total(self, total_items: int) -> None:
+        self.job.total_items = total_items
+        if not self._claimed().update(total_items=total_items, updated_at=timezone.now()):
+            raise JobCancelled(self.job.job_id)
+
+    def _claimed(self):
+        from core.models import AIAnalysisJob
+
+        return AIAnalysisJob.objects.filter(pk=self.job.pk, status=JOB_RUNNING, run_id=self.run_id)
+
+    def checkpoint(self, cursor: Any, processed: int = 0, failed: int = 0,
+                   errors: Optional[List[str]] = None, **state) -> None:
+        """
+        Record a finished chunk with one UPDATE. It matches nothing once
+        the job was cancelled, or resumed or requeued and claimed by
+        another run, and JobCancelled is raised instead. Call it inside
+        the chunk's transaction when the chunk must not be repeated on
+        resume; the chunk is then rolled back with the lost claim.
+        """
+        self.cursor = cursor
+        self.processed_items += processed
+        self.failed_items += failed
+        self.state.update(state, cursor=cursor)
+        if errors:
+            self._errors = (self._errors + list(errors))[-MAX_ERROR_LOG_LINES:]
+
+        total = self.job.total_items
+        progress = min(99, int(self.processed_items * 100 / total)) if total else 0
+        checkpointed = self._claimed().update(
+            progress=progress,
+            processed_items=self.processed_items,
+            failed_items=self.failed_items,
+            result_data=self.state,
+            error_log='\n'.join(self._errors),
+            updated_at=timezone.now(),
+        )
+        if not checkpointed:
+            raise JobCancelled(self.job.job_id)
+
+
+# Handlers
+
+def _run_feedback_import(context: JobContext) -> Dict[str, Any]:
+    """Stream a stored CSV upload into Feedback rows; resumes after the last committed batch"""
+    from django.core.files.storage import default_storage
+    from core.models import Channel
+    from feedback.services.feedback_import import FeedbackImporter, iter_csv_rows
+
+    parameters = context.parameters
+    path = parameters['file_path']
+    organization = context.job.organization
+
+    if not context.job.total_items:
+        with default_storage.open(path, 'rb') as upload:
+            context.set_total(sum(1 for _row in iter_csv_rows(upload)))
+
+    # Totals of earlier runs of a resumed job
+    base_imported = context.state.get('imported_count', 0)
+    base_customers = context.state.get('customers_created', 0)
+    reported_errors = [0]
+
+    def on_batch(result, last_row_number):
+        new_errors = result.errors[reported_errors[0]:]
+        reported_errors[0] = len(result.errors)
+        context.checkpoint(
+            last_row_number,
+            # Data rows start at 2; the cursor is 0 until the first batch
+            processed=last_row_number - max(context.cursor, 1),
+            failed=len(new_errors),
+            errors=[str(error) for error in new_errors],
+            imported_count=base_imported + result.imported_count,
+            customers_created=base_customers + result.customers_created,
+        )
+
+    channel = None
+    if parameters.get('channel_id'):
+        channel = Channel.objects.get(pk=parameters['channel_id'], organization=organization)
+
+    importer = FeedbackImporter(
+        organization,
+        channel=channel,
+        language=parameters.get('language'),
+        required_columns=parameters.get('required_columns') or ('customer_email',),
+        metadata={'import_job': context.job.job_id},
+        start_row=context.cursor,
+        on_batch=on_batch,
+    )
+    with default_storage.open(path, 'rb') as upload:
+        importer.import_file(upload)
+    default_storage.delete(path)
+
+    if parameters.get('extract_themes') and context.state.get('imported_count'):
+        theme_job = create_job(
+            organization, JOB_THEME_EXTRACTION,
+            {'import_job_id': context.job.job_id, 'language': parameters.get('language') or 'en'},
+            description=f"Theme extraction for import {context.job.job_id}",
+            total_items=context.state['imported_count'],
+        )
+        enqueue_job(theme_job)
+        context.state['theme_job_id'] = theme_job.job_id
+    return context.state
+
+
+def _run_sentiment_analysis(context: JobContext) -> Dict[str, Any]:
+    """Analyze the job's feedback ids chunk by chunk; cursor is an index into the id list"""
+    from core.models import Feedback, FeedbackCounter
+    from cx_analytics.services.batch_analysis import DEFAULT_CHUNK_SIZE, analyze_feedback_queryset
+
+    parameters = context.parameters
+    feedback_ids = parameters['feedback_ids']
+    chunk_size = parameters.get('chunk_size') or DEFAULT_CHUNK_SIZE
+    if not context.job.total_items:
+        context.set_total(len(feedback_ids))
+
+    analyzed = context.state.get('analyzed_count', 0)
+    try:
+        for start in range(context.cursor, len(feedback_ids), chunk_size):
+            chunk_ids = feedback_ids[start:start + chunk_size]
+            queryset = Feedback.objects.filter(organization=context.job.organization, id__in=chunk_ids)
+            if not parameters.get('overwrite_existing'):
+                queryset = queryset.exclude(ai_analyzed=True, ai_analysis_date__gte=context.job.created_at)
+            attempted = queryset.count()
+            # Results are upserted per feedback, so a chunk repeated after a
+            # crash overwrites rather than duplicates
+            succeeded = analyze_feedback_queryset(
+                queryset,
+                parameters.get('analysis_config') or {},
+                target_language=parameters.get('target_language', 'en'),
+                translate=parameters.get('translate', False),
+                chunk_size=chunk_size,
+                rebuild_counters=False,
+            )
+            analyzed += succeeded
+            context.checkpoint(
+                start + len(chunk_ids),
+                processed=len(chunk_ids),
+                failed=attempted - succeeded,
+                analyzed_count=analyzed,
+            )
+    finally:
+        if analyzed:
+            FeedbackCounter.rebuild(context.job.organization)
+    return context.state
+
+
+def _run_theme_extraction(context: JobContext) -> Dict[str, Any]:
+    """
+    Chunked theme extraction over explicit feedback ids or the rows of an
+    import job; feedback analyzed by an earlier run of this job is skipped
+    on resume
+    """
+    from core.models import Feedback
+    from cx_analytics.services.theme_extraction import ThemeExtractionPipeline
+
+    parameters = context.parameters
+    queryset = Feedback.objects.filter(organization=context.job.organization)
+    if parameters.get('import_job_id'):
+        queryset = queryset.filter(metadata__import_job=parameters['import_job_id'])
+    else:
+        queryset = queryset.filter(id__in=parameters['feedback_ids'])
+    if not context.job.total_items:
+        context.set_total(queryset.count())
+    queryset = queryset.exclude(ai_analyzed=True, ai_analysis_date__gte=context.job.created_at)
+
+    # Totals of earlier runs of a resumed job
+    base_processed = context.cursor
+    base_themes = context.state.get('themes_created', 0)
+    base_links = context.state.get('links_written', 0)
+    reported = {'feedback': 0}
+
+    def progress(summary):
+        processed = summary.feedback_count - reported['feedback']
+        reported['feedback'] = summary.feedback_count
+        try:
+            context.checkpoint(
+                base_processed + summary.feedback_count,
+                processed=processed,
+                themes_created=base_themes + summary.themes_created,
+                links_written=base_links + summary.links_written,
+                failed_chunks=summary.failed_chunks,
+            )
+        except JobCancelled:
+            return False
+        return True
+
+    summary = ThemeExtractionPipeline().run(
+        queryset,
+        context.job.organization_id,
+        language=parameters.get('language', 'en'),
+        min_relevance_score=parameters.get('min_relevance_score', 0.7),
+        progress=progress,
+    )
+    if summary.stopped:
+        raise JobCancelled(context.job.job_id)
+    return context.state
+
+
+def _run_report_generation(context: JobContext) -> Dict[str, Any]:
+    """Render one stored survey analytics report"""
+    from surveys.services.survey_reports import generate_survey_report
+
+    report = generate_survey_report(context.parameters['report_id'])
+    context.checkpoint(1, processed=1, report_status=report.generation_status if report else 'skipped')
+    return context.state
+
+
+def _run_columnar_export(context: JobContext) -> Dict[str, Any]:
+    """Write a Parquet / Arrow export to storage; the path is kept in the job's result data"""
+    import tempfile
+    from datetime import date
+    from django.core.files import File
+    from django.core.files.storage import default_storage
+    from core.models import Survey
+    from cx_analytics.services.columnar_export import FORMAT_EXTENSIONS, ColumnarExporter
+
+    parameters = context.parameters
+    organization = context.job.organization
+    survey = None
+    if parameters.get('survey_id'):
+        survey = Survey.objects.get(pk=parameters['survey_id'], organization=organization)
+    exporter = ColumnarExporter(
+        organization,
+        parameters['dataset'],
+        fmt=parameters['format'],
+        survey=survey,
+        start=date.fromisoformat(parameters['start']) if parameters.get('start') else None,
+        end=date.fromisoformat(parameters['end']) if parameters.get('end') else None,
+    )
+
+    # Parquet needs the whole file written before it can be read back
+    with tempfile.TemporaryFile() as export_file:
+        result = exporter.write(export_file)
+        export_file.seek(0)
+        path = default_storage.save(
+            f"{JOB_UPLOAD_DIR}/{context.job.job_id}{FORMAT_EXTENSIONS[exporter.format]}", File(export_file)
+        )
+    try:
+        context.checkpoint(result.rows, processed=result.rows, file_path=path, rows=result.rows)
+    except JobCancelled:
+        default_storage.delete(path)
+        raise
+    return context.state
+
+
+JOB_HANDLERS: Dict[str, Callable[[JobContext], Dict[str, Any]]] = {
+    JOB_FEEDBACK_IMPORT: _run_feedback_import,
+    JOB_SENTIMENT_ANALYSIS: _run_sentiment_analysis,
+    JOB_THEME_EXTRACTION: _run_theme_extraction,
+    JOB_REPORT_GENERATION: _run_report_generation,
+    JOB_COLUMNAR_EXPORT: _run_columnar_export,
+}
+
+
+# Lifecycle
+
+def create_job(organization, job_type: str, parameters: Dict[str, Any], description: str = '',
+               total_items: int = 0):
+    """A pending AIAnalysisJob; call enqueue_job to run it"""
+    from core.models import AIAnalysisJob
+
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"No handler for job type {job_type}")
+    return AIAnalysisJob.objects.create(
+        organization=organization,
+        job_id=f"JOB-{uuid.uuid4().hex[:12].upper()}",
+        job_type=job_type,
+        description=description,
+        parameters=parameters,
+        total_items=total_items,
+    )
+
+
+def store_job_upload(uploaded_file) -> str:
+    """Save an upload where a worker can read it; returns the storage path"""
+    from django.core.files.storage import default_storage
+
+    return default_storage.save(f"{JOB_UPLOAD_DIR}/{uuid.uuid4().hex}.csv", uploaded_file)
+
+
+def run_job(job_pk) -> Optional[str]:
+    """
+    Claim a pending job and run its handler. Returns the final status, or
+    None if another worker claimed it or it is no longer pending. Each
+    claim gets a new run id, and every later write of this run is
+    conditional on it, so a worker that lost the job cannot overwrite the
+    run that replaced it.
+    """
+    from core.models import AIAnalysisJob
+
+    now = timezone.now()
+    run_id = uuid.uuid4()
+    claimed = AIAnalysisJob.objects.filter(pk=job_pk, status=JOB_PENDING).update(
+        status=JOB_RUNNING, run_id=run_id, updated_at=now
+    )
+    if not claimed:
+        return None
+    job = AIAnalysisJob.objects.select_related('organization').get(pk=job_pk)
+    if job.started_at is None:
+        job.started_at = now
+        AIAnalysisJob.objects.filter(pk=job_pk, run_id=run_id).update(started_at=now)
+
+    context = JobContext(job, run_id)
+    try:
+        result_data = JOB_HANDLERS[job.job_type](context)
+    except JobCancelled:
+        logger.info(f"Job {job.job_id} cancelled after {context.processed_items} items")
+        return JOB_CANCELLED
+    except Exception as e:
+        logger.error(f"Job {job.job_id} failed: {str(e)}", exc_info=True)
+        finished = timezone.now()
+        context._claimed().update(
+            status=JOB_FAILED,
+            error_log='\n'.join((context._errors + [f"Job failed: {str(e)}"])[-MAX_ERROR_LOG_LINES:]),
+            completed_at=finished,
+            duration=finished - job.started_at,
+            updated_at=finished,
+        )
+        return JOB_FAILED
+
+    finished = timezone.now()
+    completed = context._claimed().update(
+        status=JOB_COMPLETED,
+        progress=100,
+        result_data=result_data,
+        completed_at=finished,
+        duration=finished - job.started_at,
+        updated_at=finished,
+    )
+    if not completed:
+        logger.info(f"Job {job.job_id} finished after its run was cancelled or replaced")
+        return JOB_CANCELLED
+    logger.info(f"Job {job.job_id} completed: {context.processed_items} items, {context.failed_items} failed")
+    return JOB_COMPLETED
+
+
+def cancel_job(job) -> bool:
+    """Mark a pending or running job cancelled; a running one stops at its next checkpoint"""
+    from core.models import AIAnalysisJob
+
+    now = timezone.now()
+    return bool(AIAnalysisJob.objects.filter(pk=job.pk, status__in=ACTIVE_STATUSES).update(
+        status=JOB_CANCELLED, completed_at=now, updated_at=now
+    ))
+
+
+def resume_job(job) -> bool:
+    """
+    Re-queue a failed or cancelled job; it continues after the last
+    committed checkpoint. A worker still finishing the cancelled run holds
+    an old run id, so its next checkpoint stops it.
+    """
+    from core.models import AIAnalysisJob
+
+    resumed = AIAnalysisJob.objects.filter(pk=job.pk, status__in=RESUMABLE_STATUSES).update(
+        status=JOB_PENDING, completed_at=None, duration=None, updated_at=timezone.now()
+    )
+    if resumed:
+        enqueue_job(job)
+    return bool(resumed)
+
+
+def requeue_stale_jobs(stale_after: timedelta, dispatch: bool = True) -> List[str]:
+    """
+    Running jobs without a checkpoint for ``stale_after`` lost their
+    worker; put them back to pending and, with ``dispatch``, submit them
+    to the job executor again so they resume. Returns their job ids.
+    """
+    from core.models import AIAnalysisJob
+
+    cutoff = timezone.now() - stale_after
+    stale = list(AIAnalysisJob.objects.filter(status=JOB_RUNNING, updated_at__lt=cutoff).values_list('pk', 'job_id'))
+    requeued = []
+    for job_pk, job_id in stale:
+        if AIAnalysisJob.objects.filter(pk=job_pk, status=JOB_RUNNING, updated_at__lt=cutoff).update(
+            status=JOB_PENDING, updated_at=timezone.now()
+        ):
+            requeued.append(job_id)
+            if dispatch:
+                get_job_executor().submit(job_pk)
+    return requeued
+
+
+def job_progress(organization, job_id) -> Optional[Dict[str, Any]]:
+    """Progress fields of one job with a single narrow query"""
+    from core.models import AIAnalysisJob
+
+    return AIAnalysisJob.objects.filter(organization=organization, job_id=job_id).values(*PROGRESS_FIELDS).first()
+
+
+# Executors
+
+class LocalJobExecutor:
+    """
+    In-process executor for tests and single-node deployments.
+    With ``background=False`` the job runs inline in the caller.
+    """
+
+    def __init__(self, background: bool = True, max_workers: int = 2):
+        self.background = background
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, job_pk) -> None:
+        if not self.background:
+            run_job(job_pk)
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis-job')
+        self._pool.submit(self._run, job_pk)
+
+    def _run(self, job_pk) -> None:
+        try:
+            run_job(job_pk)
+        except Exception as e:
+            logger.error(f"Error running analysis job {job_pk}: {str(e)}", exc_info=True)
+        finally:
+            close_old_connections()
+
+
+class CeleryJobExecutor:
+    """Hand the job to the Celery worker queue"""
+
+    def submit(self, job_pk) -> None:
+        from cx_analytics.tasks import run_analysis_job
+        run_analysis_job.delay(str(job_pk))
+
+
+_executor = None
+
+
+def get_job_executor():
+    """
+    Executor selected by settings.AI_JOB_EXECUTOR:
+    'local' (background thread), 'inline' (synchronous) or 'celery'
+    """
+    global _executor
+    if _executor is None:
+        name = getattr(settings, 'AI_JOB_EXECUTOR', 'local')
+        if name == 'celery':
+            _executor = CeleryJobExecutor()
+        elif name == 'inline':
+            _executor = LocalJobExecutor(background=False)
+        else:
+            _executor = LocalJobExecutor()
+    return _executor
+
+
+def enqueue_job(job) -> None:
+    """Submit the job once the surrounding transaction commits"""
+    transaction.on_commit(lambda: get_job_executor().submit(job.pk))
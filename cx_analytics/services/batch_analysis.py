@@ -0,0 +1,459 @@
+# services/batch_analysis.py
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# google-api-core ships with google-generativeai; fall back to message sniffing without it
+try:
+    from google.api_core import exceptions as google_exceptions
+    QUOTA_EXCEPTIONS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+    )
+except ImportError:
+    google_exceptions = None
+    QUOTA_EXCEPTIONS = ()
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_MINUTE = 600
+DEFAULT_CHUNK_SIZE = 200
+
+SENTIMENT_LABELS = ('very_negative', 'negative', 'neutral', 'positive', 'very_positive')
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``rate`` tokens are added per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until ``tokens`` are available; False if ``timeout`` expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: Optional[str]) -> TokenBucket:
+    """Process-wide token bucket per API key (keys are hashed, never stored)"""
+    key = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            per_minute = getattr(settings, 'GEMINI_REQUESTS_PER_MINUTE', DEFAULT_REQUESTS_PER_MINUTE)
+            _rate_limiters[key] = TokenBucket(rate=per_minute / 60.0, capacity=max(per_minute / 60.0, 1.0))
+        return _rate_limiters[key]
+
+
+def is_quota_error(error: Exception) -> bool:
+    """True for rate-limit / quota / overload errors that are worth retrying"""
+    if QUOTA_EXCEPTIONS and isinstance(error, QUOTA_EXCEPTIONS):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ('429', 'quota', 'rate limit', 'resource exhausted', '503'))
+
+
+def call_with_backoff(func: Callable[[], Any], rate_limiter: Optional[TokenBucket] = None,
+                      max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0) -> Any:
+    """
+    Call ``func`` under the rate limiter, retrying quota errors with
+    exponential backoff and full jitter. Other errors are raised at once.
+    """
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return func()
+        except Exception as e:
+            if not is_quota_error(e) or attempt >= max_retries:
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            delay = random.uniform(0, delay)
+            logger.warning(f"Gemini quota error, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries}): {str(e)}")
+            time.sleep(delay)
+            attempt += 1
+
+
+def needs_human_review(analysis_result: Dict[str, Any]) -> bool:
+    """Low confidence, near-neutral or critical-urgency results are flagged for review"""
+    try:
+        if analysis_result['overall_sentiment']['confidence'] < 0.5:
+            return True
+
+        sentiment_score = analysis_result['overall_sentiment']['score']
+        if -0.3 <= sentiment_score <= 0.3:
+            return True
+
+        urgency_data = analysis_result.get('urgency', {})
+        if isinstance(urgency_data, dict) and urgency_data.get('level') == 'critical':
+            return True
+
+        return False
+    except (KeyError, TypeError):
+        return True
+
+
+@dataclass
+class BatchItem:
+    """One text to analyze"""
+    id: Any
+    content: str
+    language: str = 'en'
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one item"""
+    id: Any
+    success: bool
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    translated_content: Optional[str] = None
+    analysis_language: Optional[str] = None
+
+
+class BatchSentimentEngine:
+    """
+    Analyze many texts with a bounded thread pool. Every Gemini call goes
+    through the per-API-key token bucket and is retried with backoff on
+    quota errors. The analyzer and translator are injected, so a local
+    fake exposing ``analyze_feedback`` / ``translate_text`` can stand in
+    for Gemini.
+    """
+
+    def __init__(self, analyzer=None, translator=None, max_workers: Optional[int] = None,
+                 rate_limiter: Optional[TokenBucket] = None, max_retries: int = 5):
+        if analyzer is None:
+            from cx_analytics.services.gemini_analyzer import GeminiSentimentAnalyzer
+            analyzer = GeminiSentimentAnalyzer()
+        self.analyzer = analyzer
+        self.translator = translator
+        self.max_workers = max_workers or getattr(settings, 'GEMINI_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+        self.rate_limiter = rate_limiter or get_rate_limiter(getattr(analyzer, 'api_key', None))
+        self.max_retries = max_retries
+
+    def _call(self, func: Callable[[], Any]) -> Any:
+        return call_with_backoff(func, self.rate_limiter, max_retries=self.max_retries)
+
+    def _needs_translation(self, item: BatchItem, target_language: Optional[str], translate: bool) -> bool:
+        return bool(translate and target_language and target_language != item.language and self.translator is not None)
+
+    def _translate_all(self, items: List[BatchItem], target_language: Optional[str],
+                       translate: bool) -> Optional[Dict[Any, str]]:
+        """
+        Translate every item that needs it with one translate_batch call
+        (translation-memory lookup plus packed requests for the misses).
+        The translator rate-limits each of its requests itself. Returns
+        None when the translator has no batch support.
+        """
+        if not hasattr(self.translator, 'translate_batch'):
+            return None
+        pending = [item for item in items if self._needs_translation(item, target_language, translate)]
+        if not pending:
+            return {}
+        try:
+            if not self.translator.is_configured():
+                return {}
+            translated = self.translator.translate_batch(
+                [item.content for item in pending],
+                target_language=target_language,
+                source_languages=[item.language or 'auto' for item in pending],
+            )
+            return {item.id: text for item, text in zip(pending, translated) if text}
+        except Exception as e:
+            # Out of quota: analyzing the untranslated texts would fail the same way
+            if is_quota_error(e):
+                raise
+            # Continue with the original content if translation fails
+            logger.warning(f"Batch translation of {len(pending)} items failed: {str(e)}")
+            return {}
+
+    def _prepare(self, item: BatchItem, target_language: Optional[str], translate: bool,
+                 translations: Optional[Dict[Any, str]] = None) -> BatchItemResult:
+        """
+        Translate the item if requested; the result carries the text to
+        analyze. ``translations`` holds texts already translated in bulk.
+        """
+        prepared = BatchItemResult(id=item.id, success=True, analysis_language=item.language or 'en')
+        prepared.result = {'content': item.content}
+
+        if not self._needs_translation(item, target_language, translate):
+            return prepared
+
+        translated_content = None
+        if translations is not None:
+            translated_content = translations.get(item.id)
+        else:
+            try:
+                if self.translator.is_configured():
+                    translated_content = self._call(lambda: self.translator.translate_text(
+                        item.content,
+                        source_language=item.language or 'auto',
+                        target_language=target_language,
+                    ))
+            except Exception as e:
+                # Continue with the original content if translation fails
+                logger.warning(f"Translation failed for item {item.id}: {str(e)}")
+
+        if translated_content:
+            prepared.translated_content = translated_content
+            prepared.result = {'content': translated_content}
+            prepared.analysis_language = target_language
+        return prepared
+
+    def _process(self, item: BatchItem, analysis_config: Dict[str, Any],
+                 target_language: Optional[str], translate: bool,
+                 translations: Optional[Dict[Any, str]] = None) -> BatchItemResult:
+        prepared = self._prepare(item, target_language, translate, translations)
+        content = prepared.result['content']
+        try:
+            prepared.result = self._call(
+                lambda: self.analyzer.analyze_feedback(content, prepared.analysis_language, analysis_config)
+            )
+            return prepared
+        except Exception as e:
+            logger.error(f"Failed to analyze item {item.id}: {str(e)}")
+            return BatchItemResult(id=item.id, success=False, error=str(e))
+
+    def _process_pack(self, pack: List[Dict[str, Any]], analysis_config: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+        try:
+            return self._call(lambda: self.analyzer.analyze_feedback_pack(pack, analysis_config))
+        except Exception as e:
+            logger.error(f"Failed to analyze pack of {len(pack)} items: {str(e)}")
+            return {}
+
+    def analyze(self, items: Iterable[BatchItem], analysis_config: Optional[Dict[str, Any]] = None,
+                target_language: Optional[str] = None, translate: bool = False,
+                packed: bool = False) -> List[BatchItemResult]:
+        """
+        Analyze ``items`` concurrently; results come back in input order.
+        With ``packed`` several short items share one request (see
+        GeminiSentimentAnalyzer.analyze_feedback_pack).
+        """
+        items = list(items)
+        if not items:
+            return []
+        analysis_config = analysis_config or {}
+        workers = max(1, min(self.max_workers, len(items)))
+        translations = self._translate_all(items, target_language, translate)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gemini-batch') as pool:
+            if not packed or not hasattr(self.analyzer, 'analyze_feedback_pack'):
+                return list(pool.map(
+                    lambda item: self._process(item, analysis_config, target_language, translate, translations),
+                    items,
+                ))
+
+            prepared = list(pool.map(
+                lambda item: self._prepare(item, target_language, translate, translations), items
+            ))
+            pack_items = [
+                {'id': index, 'content': entry.result['content'], 'language': entry.analysis_language}
+                for index, entry in enumerate(prepared)
+            ]
+            analyzed = {}
+            for pack_results in pool.map(
+                lambda pack: self._process_pack(pack, analysis_config),
+                self.analyzer.plan_packs(pack_items),
+            ):
+                analyzed.update(pack_results)
+
+        results = []
+        for index, entry in enumerate(prepared):
+            if index in analyzed:
+                entry.result = analyzed[index]
+                results.append(entry)
+            else:
+                results.append(BatchItemResult(id=entry.id, success=False, error='No analysis result returned'))
+        return results
+
+
+def _sentiment_analysis_values(feedback, item_result: BatchItemResult, target_language: str) -> Dict[str, Any]:
+    """Field values of the SentimentAnalysis row for one successful result"""
+    analysis_result = item_result.result
+    overall = analysis_result['overall_sentiment']
+    label = overall['label'] if overall['label'] in SENTIMENT_LABELS else 'neutral'
+
+    intent_data = analysis_result.get('intent', {})
+    urgency_data = analysis_result.get('urgency', {})
+    metadata = analysis_result.get('analysis_metadata', {})
+
+    return {
+        'organization': feedback.organization,
+        'overall_score': overall['score'],
+        'overall_label': label,
+        'confidence_score': overall['confidence'],
+        'aspects': analysis_result.get('aspect_sentiments', {}),
+        'emotions': analysis_result.get('emotions', {}),
+        'intent': intent_data.get('type') if isinstance(intent_data, dict) else None,
+        'intent_confidence': intent_data.get('confidence') if isinstance(intent_data, dict) else None,
+        'urgency_level': urgency_data.get('level', 'medium').lower() if isinstance(urgency_data, dict) else 'medium',
+        'urgency_indicators': urgency_data.get('indicators', []) if isinstance(urgency_data, dict) else [],
+        'key_phrases': analysis_result.get('key_phrases', []),
+        'entities': analysis_result.get('entities', {}),
+        'model_used': metadata.get('model_used', 'gemini-1.5-flash'),
+        'model_version': metadata.get('model_version', '1.0'),
+        'analysis_metadata': metadata,
+        'analysis_language': target_language,
+        'translated_content': item_result.translated_content,
+        'original_language': feedback.original_language,
+    }
+
+
+def save_feedback_analyses(feedbacks: Dict[Any, Any], results: List[BatchItemResult],
+                           target_language: str, rebuild_counters: bool = True) -> int:
+    """
+    Write successful results with one bulk upsert of SentimentAnalysis rows
+    and one bulk_update of Feedback rows. bulk_update bypasses Feedback.save,
+    so the organization counters are rebuilt unless the caller does it.
+
+    Returns:
+        int: number of feedback rows updated
+    """
+    from core.models import Feedback, FeedbackCounter, SentimentAnalysis
+
+    now = timezone.now()
+    analyses = []
+    updated_feedbacks = []
+
+    for item_result in results:
+        feedback = feedbacks.get(item_result.id)
+        if feedback is None or not item_result.success:
+            continue
+        try:
+            values = _sentiment_analysis_values(feedback, item_result, target_language)
+        except (KeyError, TypeError) as e:
+            logger.error(f"Incomplete analysis result for feedback {feedback.feedback_id}: {str(e)}")
+            continue
+
+        analyses.append(SentimentAnalysis(feedback=feedback, **values))
+
+        feedback.ai_analyzed = True
+        feedback.ai_analysis_date = now
+        feedback.sentiment_score = values['overall_score']
+        feedback.sentiment_label = values['overall_label']
+        feedback.requires_human_review = needs_human_review(item_result.result)
+        feedback.updated_at = now
+        updated_feedbacks.append(feedback)
+
+    if not updated_feedbacks:
+        return 0
+
+    update_fields = [
+        'organization', 'overall_score', 'overall_label', 'confidence_score', 'aspects',
+        'emotions', 'intent', 'intent_confidence', 'urgency_level', 'urgency_indicators',
+        'key_phrases', 'entities', 'model_used', 'model_version', 'analysis_metadata',
+        'analysis_language', 'translated_content', 'original_language', 'updated_at',
+    ]
+
+    with transaction.atomic():
+        SentimentAnalysis.objects.bulk_create(
+            analyses,
+            update_conflicts=True,
+            unique_fields=['feedback'],
+            update_fields=update_fields,
+        )
+        Feedback.objects.bulk_update(updated_feedbacks, [
+            'ai_analyzed', 'ai_analysis_date', 'sentiment_score', 'sentiment_label',
+            'requires_human_review', 'updated_at',
+        ])
+
+    if rebuild_counters:
+        for organization in {feedback.organization for feedback in updated_feedbacks}:
+            FeedbackCounter.rebuild(organization)
+
+    return len(updated_feedbacks)
+
+
+def analyze_feedback_queryset(queryset, analysis_config: Dict[str, Any], target_language: str = 'en',
+                              translate: bool = False, engine: Optional[BatchSentimentEngine] = None,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              progress: Optional[Callable[[int, int], None]] = None,
+                              packed: Optional[bool] = None, rebuild_counters: bool = True) -> int:
+    """
+    Analyze every feedback in ``queryset`` chunk by chunk: each chunk is
+    analyzed concurrently and then written in bulk, so progress is durable
+    and memory stays flat on large runs.
+
+    Returns:
+        int: number of feedback rows successfully analyzed
+    """
+    if engine is None:
+        translator = None
+        if translate:
+            from cx_analytics.services.translation_service import TranslationService
+            translator = TranslationService()
+        engine = BatchSentimentEngine(translator=translator)
+    if packed is None:
+        packed = getattr(settings, 'GEMINI_PACKED_ANALYSIS', True)
+
+    from core.models import FeedbackCounter
+
+    success_count = 0
+    processed = 0
+    organizations = {}
+    chunk: List[Any] = []
+
+    def flush():
+        nonlocal success_count, processed
+        feedbacks = {feedback.pk: feedback for feedback in chunk}
+        results = engine.analyze(
+            [BatchItem(feedback.pk, feedback.content, feedback.original_language) for feedback in chunk],
+            analysis_config,
+            target_language=target_language,
+            translate=translate,
+            packed=packed,
+        )
+        success_count += save_feedback_analyses(feedbacks, results, target_language, rebuild_counters=False)
+        organizations.update({feedback.organization_id: feedback.organization for feedback in chunk})
+        processed += len(chunk)
+        if progress is not None:
+            progress(processed, success_count)
+        chunk.clear()
+
+    for feedback in queryset.select_related('organization').iterator(chunk_size=chunk_size):
+        chunk.append(feedback)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    # Counters are rebuilt once per run rather than once per chunk
+    if success_count and rebuild_counters:
+        for organization in organizations.values():
+            FeedbackCounter.rebuild(organization)
+
+    return success_count
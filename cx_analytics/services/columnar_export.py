@@ -0,0 +1,498 @@
+# services/columnar_export.py
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# pyarrow is optional; without it columnar exports are unavailable
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip
+RECORD_BATCH_ROWS = 50000  # Rows per record batch / Parquet row group
+PARQUET_COMPRESSION = 'zstd'
+# updated_at is set when a row is saved, not when its transaction commits;
+# incremental exports stop this far behind "now" so slow transactions land
+# before the watermark instead of behind it
+DEFAULT_WATERMARK_LAG = timedelta(minutes=5)
+DEFAULT_INLINE_MAX_ROWS = 100000  # Larger view exports run as a background job
+
+FORMAT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# Question types whose answers are exported as float64 / list<string>
+NUMERIC_QUESTION_TYPES = {'rating', 'nps', 'csat', 'ces', 'scale', 'slider', 'number', 'numeric'}
+LIST_QUESTION_TYPES = {'checkbox', 'checkboxes', 'multiple_select', 'multi_select', 'multiselect'}
+
+_encode_json = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+class ColumnarExportError(Exception):
+    """The export cannot run (pyarrow missing, unknown dataset or format)"""
+
+
+# Value converters, one per column kind
+
+def _to_string(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value: Any) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+def _to_json(value: Any) -> Optional[str]:
+    return None if value is None or value == '' else _encode_json(value)
+
+
+def _to_string_list(value: Any) -> Optional[List[str]]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (list, tuple)):
+        return [item if isinstance(item, str) else _encode_json(item) for item in value]
+    return [str(value)]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'string': _to_string,
+    'int': _to_int,
+    'float': _to_float,
+    'bool': _to_bool,
+    'timestamp': _identity,
+    'duration': _identity,
+    'json': _to_json,
+    'string_list': _to_string_list,
+}
+
+
+def arrow_type(kind: str):
+    return {
+        'string': pa.string(),
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'duration': pa.duration('us'),
+        'json': pa.string(),
+        'string_list': pa.list_(pa.string()),
+    }[kind]
+
+
+@dataclass
+class ExportColumn:
+    """One output column; read from ``source`` in the values() row unless ``extract`` is set"""
+    name: str
+    kind: str
+    source: Optional[str] = None
+    extract: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+    def __post_init__(self):
+        if self.source is None and self.extract is None:
+            self.source = self.name
+
+
+@dataclass
+class ExportDataset:
+    """A model exported as one table"""
+    name: str
+    model_name: str
+    organization_lookup: str
+    columns: List[ExportColumn]
+    survey_lookup: Optional[str] = None  # Filter for a single survey, if supported
+    requires_survey: bool = False
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model('core', self.model_name)
+
+
+C = ExportColumn
+
+DATASETS: Dict[str, ExportDataset] = {
+    dataset.name: dataset for dataset in [
+        ExportDataset(
+            name='survey_responses',
+            model_name='SurveyResponse',
+            organization_lookup='survey__organization',
+            survey_lookup='survey',
+            requires_survey=True,
+            columns=[
+                C('id', 'string', 'pk'),
+                C('survey_id', 'string'),
+                C('customer_id', 'string'),
+                C('created_at', 'timestamp'),
+                C('updated_at', 'timestamp'),
+                C('started_at', 'timestamp'),
+                C('completed_at', 'timestamp'),
+                C('is_complete', 'bool'),
+                C('completion_time', 'duration'),
+                C('channel', 'string', 'channel__name'),
+                C('device_type', 'string'),
+                C('language', 'string'),
+                C('survey_type', 'string'),
+                C('ai_analyzed', 'bool'),
+                C('sentiment_score', 'float'),
+                C('nps_score', 'int'),
+                C('csat_score', 'int'),
+                C('csat_scale_max', 'int'),
+                C('ces_score', 'int'),
+                C('ces_scale_max', 'int'),
+                C('metadata', 'json'),
+            ],
+        ),
+        ExportDataset(
+            name='feedback',
+            model_name='Feedback',
+            organization_lookup='organization',
+            columns=[
+                C('id', 'string', 'pk'),
+                C('feedback_id', 'string'),
+                C('customer_id', 'string'),
+                C('created_at', 'timestamp'),
+                C('updated_at', 'timestamp'),
+                C('channel', 'string', 'channel__name'),
+                C('product', 'string', 'product__name'),
+                C('origin', 'string'),
+                C('feedback_type', 'string'),
+                C('priority', 'string'),
+                C('status', 'string'),
+                C('subject', 'string'),
+                C('content', 'string'),
+                C('original_language', 'string'),
+                C('ai_analyzed', 'bool'),
+                C('requires_human_review', 'bool'),
+                C('sentiment_score', 'float'),
+                C('sentiment_label', 'string'),
+                C('resolution_time', 'duration'),
+                C('resolved_at', 'timestamp'),
+                C('closed_at', 'timestamp'),
+                C('analysis_score', 'float', 'sentiment_analysis__overall_score'),
+                C('analysis_label', 'string', 'sentiment_analysis__overall_label'),
+                C('analysis_confidence', 'float', 'sentiment_analysis__confidence_score'),
+                C('intent', 'string', 'sentiment_analysis__intent'),
+                C('intent_confidence', 'float', 'sentiment_analysis__intent_confidence'),
+                C('urgency_level', 'string', 'sentiment_analysis__urgency_level'),
+                C('aspects', 'json', 'sentiment_analysis__aspects'),
+                C('emotions', 'json', 'sentiment_analysis__emotions'),
+                C('key_phrases', 'string_list', 'sentiment_analysis__key_phrases'),
+                C('metadata', 'json'),
+            ],
+        ),
+        ExportDataset(
+            name='nps_responses',
+            model_name='NPSResponse',
+            organization_lookup='organization',
+            survey_lookup='survey_response__survey',
+            columns=[
+                C('id', 'string', 'pk'),
+                C('customer_id', 'string'),
+                C('survey_response_id', 'string'),
+                C('created_at', 'timestamp'),
+                C('updated_at', 'timestamp'),
+                C('score', 'int'),
+                C('category', 'string'),
+                C('reason', 'string'),
+                C('product', 'string', 'product__name'),
+                C('touchpoint', 'string'),
+                C('ai_analyzed', 'bool'),
+                C('sentiment_score', 'float'),
+                C('key_themes', 'string_list'),
+                C('metadata', 'json'),
+            ],
+        ),
+        ExportDataset(
+            name='csat_responses',
+            model_name='CSATResponse',
+            organization_lookup='organization',
+            survey_lookup='survey_response__survey',
+            columns=[
+                C('id', 'string', 'pk'),
+                C('customer_id', 'string'),
+                C('survey_response_id', 'string'),
+                C('created_at', 'timestamp'),
+                C('updated_at', 'timestamp'),
+                C('score', 'int'),
+                C('scale_max', 'int'),
+                C('normalized_score', 'float'),
+                C('satisfaction_level', 'string'),
+                C('question_text', 'string'),
+                C('feedback_comment', 'string'),
+                C('product', 'string', 'product__name'),
+                C('interaction_type', 'string'),
+                C('ai_analyzed', 'bool'),
+                C('sentiment_score', 'float'),
+                C('metadata', 'json'),
+            ],
+        ),
+        ExportDataset(
+            name='ces_responses',
+            model_name='CESResponse',
+            organization_lookup='organization',
+            survey_lookup='survey_response__survey',
+            columns=[
+                C('id', 'string', 'pk'),
+                C('customer_id', 'string'),
+                C('survey_response_id', 'string'),
+                C('created_at', 'timestamp'),
+                C('updated_at', 'timestamp'),
+                C('score', 'int'),
+                C('scale_max', 'int'),
+                C('normalized_score', 'float'),
+                C('effort_level', 'string'),
+                C('effort_area', 'string'),
+                C('question_text', 'string'),
+                C('task_description', 'string'),
+                C('feedback_comment', 'string'),
+                C('ai_analyzed', 'bool'),
+                C('sentiment_score', 'float'),
+                C('friction_points', 'json'),
+                C('metadata', 'json'),
+            ],
+        ),
+    ]
+}
+
+
+def question_columns(questions: List[Dict[str, Any]]) -> List[ExportColumn]:
+    """
+    One column per survey question, typed from the question's type:
+    numeric questions as float64, multi-select questions as
+    list<string>, everything else as string (objects as JSON text)
+    """
+    columns = []
+    seen = set()
+    for i, question in enumerate(questions, 1):
+        if not isinstance(question, dict):
+            continue
+        question_id = str(question.get('id', f'q{i}'))
+        if question_id in seen:
+            continue
+        seen.add(question_id)
+        question_type = str(question.get('type') or '').lower()
+        if question_type in NUMERIC_QUESTION_TYPES:
+            kind = 'float'
+        elif question_type in LIST_QUESTION_TYPES:
+            kind = 'string_list'
+        else:
+            kind = 'string'
+
+        def extract(row, question_id=question_id, kind=kind):
+            answer = (row['response_data'] or {}).get(question_id)
+            if kind == 'string' and isinstance(answer, (dict, list)):
+                return _encode_json(answer)
+            return answer
+
+        columns.append(ExportColumn(f'answer_{question_id}', kind, extract=extract))
+    return columns
+
+
+def watermark_lag() -> timedelta:
+    lag = getattr(settings, 'COLUMNAR_EXPORT_WATERMARK_LAG', None)
+    return DEFAULT_WATERMARK_LAG if lag is None else timedelta(seconds=lag)
+
+
+def inline_export_max_rows() -> int:
+    return getattr(settings, 'COLUMNAR_EXPORT_INLINE_MAX_ROWS', DEFAULT_INLINE_MAX_ROWS)
+
+
+def _window_start(value) -> datetime:
+    """Dates are whole days in the current time zone"""
+    if isinstance(value, datetime):
+        return value if timezone.is_aware(value) else timezone.make_aware(value)
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+@dataclass
+class ColumnarExportResult:
+    dataset: str
+    format: str
+    rows: int = 0
+    batches: int = 0
+    columns: List[str] = field(default_factory=list)
+    changed_after: Optional[datetime] = None  # Incremental exports only
+    changed_until: Optional[datetime] = None
+
+
+class ColumnarExporter:
+    """
+    Writes one dataset as a Parquet or Arrow IPC file.
+
+    Rows are read as a values() projection with iterator(), converted
+    column by column and written as record batches of RECORD_BATCH_ROWS
+    rows, so memory is bounded by one batch. ``start`` / ``end`` limit
+    the export to rows created in that range (dates are inclusive whole
+    days). With ``incremental`` only rows changed since the previous
+    incremental export of the same dataset and scope are written, and
+    the watermark moves forward once the file is complete.
+    """
+
+    def __init__(self, organization, dataset: str, fmt: str = 'parquet', survey=None,
+                 start=None, end=None, incremental: bool = False):
+        if not PYARROW_AVAILABLE:
+            raise ColumnarExportError("Columnar export requires pyarrow (pip install pyarrow)")
+        if dataset not in DATASETS:
+            raise ColumnarExportError(f"Unknown dataset {dataset}; choose from {', '.join(DATASETS)}")
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ColumnarExportError(f"Unknown format {fmt}; choose from {', '.join(FORMAT_EXTENSIONS)}")
+
+        self.organization = organization
+        self.dataset = DATASETS[dataset]
+        self.format = fmt
+        self.survey = survey
+        self.start = start
+        self.end = end
+        self.incremental = incremental
+
+        if self.dataset.requires_survey and survey is None:
+            raise ColumnarExportError(f"The {dataset} export needs a survey")
+        if survey is not None and self.dataset.survey_lookup is None:
+            raise ColumnarExportError(f"The {dataset} export cannot be limited to a survey")
+
+        self.columns = list(self.dataset.columns)
+        if self.dataset.name == 'survey_responses':
+            self.columns.extend(question_columns(survey.questions or []))
+        self.schema = pa.schema([pa.field(column.name, arrow_type(column.kind)) for column in self.columns])
+
+    @property
+    def scope(self) -> str:
+        return str(self.survey.pk) if self.survey is not None else ''
+
+    def queryset(self, changed_after: Optional[datetime] = None, changed_until: Optional[datetime] = None):
+        filters = {self.dataset.organization_lookup: self.organization}
+        if self.survey is not None:
+            filters[self.dataset.survey_lookup] = self.survey
+        if self.start is not None:
+            filters['created_at__gte'] = _window_start(self.start)
+        if self.end is not None:
+            end = self.end if isinstance(self.end, datetime) else self.end + timedelta(days=1)
+            filters['created_at__lt'] = _window_start(end)
+        if changed_after is not None:
+            filters['updated_at__gt'] = changed_after
+        if changed_until is not None:
+            filters['updated_at__lte'] = changed_until
+
+        sources = {column.source for column in self.columns if column.source}
+        if any(column.extract for column in self.columns):
+            sources.add('response_data')
+        return self.dataset.model.objects.filter(**filters).order_by('created_at', 'pk').values(*sources)
+
+    def iter_batches(self, queryset) -> Iterator[Any]:
+        converters = [
+            (column, CONVERTERS[column.kind]) for column in self.columns
+        ]
+        rows = []
+        for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            rows.append(row)
+            if len(rows) >= RECORD_BATCH_ROWS:
+                yield self._record_batch(rows, converters)
+                rows = []
+        if rows:
+            yield self._record_batch(rows, converters)
+
+    def _record_batch(self, rows: List[Dict[str, Any]], converters):
+        arrays = []
+        for (column, convert), arrow_field in zip(converters, self.schema):
+            if column.extract is not None:
+                values = [convert(column.extract(row)) for row in rows]
+            else:
+                values = [convert(row[column.source]) for row in rows]
+            arrays.append(pa.array(values, type=arrow_field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _open_writer(self, sink):
+        if self.format == 'parquet':
+            return pq.ParquetWriter(sink, self.schema, compression=PARQUET_COMPRESSION)
+        return pa.ipc.new_file(sink, self.schema)
+
+    def write(self, sink) -> ColumnarExportResult:
+        """Write the export to ``sink`` (a path or a writable binary file)"""
+        from core.models import ExportWatermark
+
+        result = ColumnarExportResult(
+            dataset=self.dataset.name,
+            format=self.format,
+            columns=[column.name for column in self.columns],
+        )
+        if self.incremental:
+            result.changed_after = ExportWatermark.objects.filter(
+                organization=self.organization, dataset=self.dataset.name, scope=self.scope
+            ).values_list('exported_until', flat=True).first()
+            # Fixed upper bound so rows changed while exporting go to the next
+            # run; it trails "now" so uncommitted writes are not skipped
+            result.changed_until = timezone.now() - watermark_lag()
+            if result.changed_after is not None and result.changed_until < result.changed_after:
+                result.changed_until = result.changed_after
+
+        writer = self._open_writer(sink)
+        try:
+            for batch in self.iter_batches(self.queryset(result.changed_after, result.changed_until)):
+                writer.write_table(pa.Table.from_batches([batch]))
+                result.rows += batch.num_rows
+                result.batches += 1
+        finally:
+            writer.close()
+
+        if self.incremental:
+            self._advance_watermark(result)
+
+        logger.info(
+            f"Exported {result.rows} {self.dataset.name} rows for organization {self.organization.pk} "
+            f"as {self.format} ({result.batches} batches)"
+        )
+        return result
+
+    def _advance_watermark(self, result: ColumnarExportResult) -> None:
+        from core.models import ExportWatermark
+
+        with transaction.atomic():
+            watermark, created = ExportWatermark.objects.select_for_update().get_or_create(
+                organization=self.organization,
+                dataset=self.dataset.name,
+                scope=self.scope,
+                defaults={'exported_until': result.changed_until, 'rows_exported': result.rows},
+            )
+            if not created:
+                ExportWatermark.objects.filter(pk=watermark.pk).update(
+                    exported_until=result.changed_until,
+                    rows_exported=F('rows_exported') + result.rows,
+                    updated_at=timezone.now(),
+                )
@@ -1,37 +1,57 @@
 import logging
 import json
 import re
-import os
+import time
 from typing import Dict, Any, Optional, List
-import google.generativeai as genai
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
+from .ai_result_cache import KIND_FEEDBACK_SENTIMENT, current_model_version, get_result_cache, make_cache_key
+from .batch_analysis import call_with_backoff, get_rate_limiter, is_quota_error
+from .gemini_client import get_api_key, get_client_registry
+from .json_extraction import extract_json_array, extract_json_object
+
 logger = logging.getLogger(__name__)
 
+# Packed mode: several short feedbacks share one prompt and one response
+PACK_MAX_ITEMS = 20
+PACK_MAX_CHARS = 6000
+PACK_OUTPUT_TOKENS_PER_ITEM = 1024
+MAX_OUTPUT_TOKENS = 32768
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+]
+
+DEFAULT_ANALYSIS_CONFIG = {
+    'detect_aspects': True,
+    'detect_emotions': True,
+    'detect_intent': True,
+    'extract_key_phrases': True,
+    'target_language': 'en'
+}
+
 class GeminiSentimentAnalyzer:
     """
     Service class for analyzing feedback using Google's Gemini AI
     """
     
     def __init__(self):
-        self.api_key = getattr(settings, 'GEMINI_API_KEY', None)
-        if not self.api_key:
-            self.api_key = os.getenv('GEMINI_API_KEY')
-            
+        self.api_key = get_api_key()
         self.model_name = getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-flash')
         self.model = None
+        self.result_cache = get_result_cache()
+        # Same process-wide bucket as BatchSentimentEngine for this API key
+        self.rate_limiter = get_rate_limiter(self.api_key)
         self.configure_client()
     
     def configure_client(self):
-        """Configure the Gemini AI client"""
+        """Take the shared model handle from the process-wide client registry"""
         try:
-            if not self.api_key:
-                raise ValueError("GEMINI_API_KEY not found in settings or environment variables")
-                
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(self.model_name)
-            logger.info(f"Gemini AI client configured with model: {self.model_name}")
+            self.model = get_client_registry().get_model(self.model_name, self.api_key)
         except Exception as e:
             logger.error(f"Failed to configure Gemini AI client: {str(e)}")
             raise
@@ -50,73 +70,269 @@ class GeminiSentimentAnalyzer:
             Dictionary containing analysis results
         """
         if analysis_config is None:
-            analysis_config = {
-                'detect_aspects': True,
-                'detect_emotions': True,
-                'detect_intent': True,
-                'extract_key_phrases': True,
-                'target_language': 'en'
-            }
+            analysis_config = dict(DEFAULT_ANALYSIS_CONFIG)
         
         try:
             # Validate input
             if not feedback_content or not feedback_content.strip():
                 raise ValueError("Feedback content cannot be empty")
             
-            if self.model is None:
-                self.configure_client()
-            
-            # Construct the analysis prompt
-            prompt = self._construct_analysis_prompt(feedback_content, language, analysis_config)
-            
-            # Generate analysis with safety settings
-            generation_config = {
-                'temperature': 0.1,
-                'top_p': 0.95,
-                'top_k': 40,
-                'max_output_tokens': 32768,
-            }
-            
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            ]
-            
-            response = self.model.generate_content(
-                prompt,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
+            # Identical (normalized) text, language and config reuse an earlier result
+            cache_key = self._cache_key(feedback_content, language, analysis_config)
+            analysis_result = self.result_cache.get(cache_key)
+            cached = analysis_result is not None
             
-            # Check if response was blocked
-            if not response.text:
-                if response.prompt_feedback and response.prompt_feedback.block_reason:
-                    raise ValueError(f"Response blocked due to: {response.prompt_feedback.block_reason}")
-                else:
-                    raise ValueError("Empty response from Gemini AI")
-            
-            # Parse the response
-            analysis_result = self._parse_analysis_response(response.text, analysis_config)
+            if not cached:
+                # Construct the analysis prompt
+                prompt = self._construct_analysis_prompt(feedback_content, language, analysis_config)
+                
+                response_text = self._generate(prompt, MAX_OUTPUT_TOKENS)
+                
+                # Parse the response
+                analysis_result = self._parse_analysis_response(response_text, analysis_config)
+                self.result_cache.set(cache_key, analysis_result, KIND_FEEDBACK_SENTIMENT, self.model_name)
             
             # Add metadata
-            analysis_result['analysis_metadata'] = {
-                'model_used': self.model_name,
-                'model_version': '1.0',
-                'language_detected': language,
-                'analysis_config': analysis_config,
-                'feedback_length': len(feedback_content),
-                'target_language': analysis_config.get('target_language', 'en')
-            }
+            analysis_result['analysis_metadata'] = self._analysis_metadata(
+                feedback_content, language, analysis_config, cached=cached
+            )
             
-            logger.info(f"Successfully analyzed feedback with Gemini AI in language: {language}")
+            if cached:
+                logger.info(f"Served feedback analysis from the result cache in language: {language}")
+            else:
+                logger.info(f"Successfully analyzed feedback with Gemini AI in language: {language}")
             return analysis_result
             
         except Exception as e:
             logger.error(f"Error analyzing feedback with Gemini AI: {str(e)}")
             raise
     
+    def _generate(self, prompt: str, max_output_tokens: int) -> str:
+        """Send one prompt with the shared generation and safety settings"""
+        if self.model is None:
+            self.configure_client()
+        
+        generation_config = {
+            'temperature': 0.1,
+            'top_p': 0.95,
+            'top_k': 40,
+            'max_output_tokens': max_output_tokens,
+        }
+        
+        response = self.model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            safety_settings=SAFETY_SETTINGS
+        )
+        
+        # Check if response was blocked
+        if not response.text:
+            if response.prompt_feedback and response.prompt_feedback.block_reason:
+                raise ValueError(f"Response blocked due to: {response.prompt_feedback.block_reason}")
+            else:
+                raise ValueError("Empty response from Gemini AI")
+        
+        return response.text
+    
+    def _cache_key(self, content: str, language: str, analysis_config: Dict[str, Any]) -> str:
+        return make_cache_key(KIND_FEEDBACK_SENTIMENT, content, language, analysis_config, self.model_name)
+    
+    def _analysis_metadata(self, content: str, language: str, analysis_config: Dict[str, Any],
+                           packed: bool = False, cached: bool = False) -> Dict[str, Any]:
+        """Metadata stored alongside every analysis result"""
+        metadata = {
+            'model_used': self.model_name,
+            'model_version': current_model_version(),
+            'language_detected': language,
+            'analysis_config': analysis_config,
+            'feedback_length': len(content),
+            'target_language': analysis_config.get('target_language', 'en')
+        }
+        if packed:
+            metadata['packed'] = True
+        if cached:
+            metadata['cached'] = True
+        return metadata
+    
+    def plan_packs(self, items: List[Dict[str, Any]], max_items: int = PACK_MAX_ITEMS,
+                   max_chars: int = PACK_MAX_CHARS) -> List[List[Dict[str, Any]]]:
+        """
+        Group items into packs greedily by character length, so many short
+        feedbacks share a request while long ones travel alone
+        """
+        packs = []
+        current = []
+        current_chars = 0
+        
+        for item in items:
+            length = len(item.get('content') or '')
+            if current and (len(current) >= max_items or current_chars + length > max_chars):
+                packs.append(current)
+                current = []
+                current_chars = 0
+            current.append(item)
+            current_chars += length
+        
+        if current:
+            packs.append(current)
+        return packs
+    
+    def analyze_feedback_pack(self, items: List[Dict[str, Any]],
+                              analysis_config: Dict[str, Any] = None) -> Dict[Any, Dict[str, Any]]:
+        """
+        Analyze several feedbacks in one request
+        
+        Args:
+            items: List of dicts with 'id', 'content' and 'language'
+            analysis_config: Configuration for analysis depth
+        
+        Returns:
+            Mapping of item id to analysis result. Items the packed response
+            did not answer validly are retried one by one; items that still
+            fail are left out of the mapping. Quota errors are raised so the
+            caller can back off.
+        """
+        if analysis_config is None:
+            analysis_config = dict(DEFAULT_ANALYSIS_CONFIG)
+        
+        items = [item for item in items if item.get('content') and item['content'].strip()]
+        
+        # Cached items never reach the prompt
+        cached_results = {}
+        pending = []
+        for item in items:
+            language = item.get('language', 'en')
+            cached = self.result_cache.get(self._cache_key(item['content'], language, analysis_config))
+            if cached is None:
+                pending.append(item)
+                continue
+            cached['analysis_metadata'] = self._analysis_metadata(
+                item['content'], language, analysis_config, cached=True
+            )
+            cached_results[item['id']] = cached
+        items = pending
+        
+        if not items:
+            return cached_results
+        if len(items) == 1:
+            cached_results.update(self._analyze_individually(items, analysis_config))
+            return cached_results
+        
+        # Stable per-pack ids keep the model from echoing long database ids
+        keyed = {f'item_{index}': item for index, item in enumerate(items)}
+        results = {}
+        
+        try:
+            prompt = self._construct_packed_prompt(keyed, analysis_config)
+            max_tokens = min(MAX_OUTPUT_TOKENS, 512 + PACK_OUTPUT_TOKENS_PER_ITEM * len(items))
+            response_text = self._generate(prompt, max_tokens)
+            results = self._parse_packed_response(response_text, keyed, analysis_config)
+        except Exception as e:
+            if is_quota_error(e):
+                raise
+            logger.warning(f"Packed analysis of {len(items)} items failed, retrying individually: {str(e)}")
+        
+        missing = [item for key, item in keyed.items() if item['id'] not in results]
+        if missing:
+            logger.info(f"Retrying {len(missing)} of {len(items)} packed items individually")
+            results.update(self._analyze_individually(missing, analysis_config))
+        
+        results.update(cached_results)
+        return results
+    
+    def _analyze_individually(self, items: List[Dict[str, Any]],
+                              analysis_config: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+        """
+        One request per item, each through the rate limiter with backoff.
+        Results already obtained stay in the result cache if a quota error
+        is finally raised.
+        """
+        results = {}
+        for item in items:
+            try:
+                results[item['id']] = call_with_backoff(
+                    lambda: self.analyze_feedback(item['content'], item.get('language', 'en'), analysis_config),
+                    self.rate_limiter,
+                )
+            except Exception as e:
+                if is_quota_error(e):
+                    raise
+                logger.error(f"Failed to analyze feedback {item.get('id')}: {str(e)}")
+        return results
+    
+    def _construct_packed_prompt(self, keyed_items: Dict[str, Dict[str, Any]],
+                                 analysis_config: Dict[str, Any]) -> str:
+        """Prompt asking for one JSON array entry per item"""
+        feedback_blocks = "\n\n".join(
+            f"[{key}] (Language: {item.get('language', 'en')}):\n{item['content']}"
+            for key, item in keyed_items.items()
+        )
+        
+        return f"""You are a sentiment analysis expert. Analyze EACH customer feedback below independently and return ONLY a valid JSON array.
+
+FEEDBACK ITEMS:
+{feedback_blocks}
+
+ANALYSIS REQUIREMENTS (for every item):
+1. Overall sentiment: Provide score (-1.0 to 1.0), label (very_negative, negative, neutral, positive, very_positive), and confidence (0.0 to 1.0)
+2. Aspect sentiments: Analyze product, service, price, usability, support with scores and mention counts
+3. Emotions: Detect anger, joy, sadness, fear, surprise, trust with scores (0.0 to 1.0)
+4. Intent: Classify as complaint, compliment, suggestion, question, or request with confidence
+5. Urgency: Level (low, medium, high, critical) with indicators
+6. Key phrases: Extract 3-5 most important phrases
+7. Entities: Identify products, features, issues mentioned
+
+Return exactly one object per item, each carrying the item's "id" exactly as given in brackets (for example "item_0").
+CRITICAL: Return ONLY the JSON array. Do not add any text before or after it.
+
+JSON STRUCTURE:
+[
+    {{
+        "id": "item_0",
+        "overall_sentiment": {{"score": -0.85, "label": "very_negative", "confidence": 0.92}},
+        "aspect_sentiments": {{"service": {{"score": -0.9, "mentions": 3}}}},
+        "emotions": {{"anger": 0.8, "joy": 0.1, "sadness": 0.6, "fear": 0.2, "surprise": 0.1, "trust": 0.3}},
+        "intent": {{"type": "complaint", "confidence": 0.88}},
+        "urgency": {{"level": "high", "indicators": ["urgent language"]}},
+        "key_phrases": ["poor service"],
+        "entities": {{"products": [], "features": [], "issues": ["crashing"]}}
+    }}
+]"""
+    
+    def _parse_packed_response(self, response_text: str, keyed_items: Dict[str, Dict[str, Any]],
+                               analysis_config: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Split a packed response into per-item results. Each element goes
+        through _parse_analysis_response (and so _validate_analysis_result);
+        elements that fail are skipped so the caller can retry them.
+        """
+        elements = extract_json_array(response_text)
+        
+        results = {}
+        for element in elements:
+            if not isinstance(element, dict):
+                continue
+            key = str(element.pop('id', ''))
+            item = keyed_items.get(key)
+            if item is None or item['id'] in results:
+                continue
+            try:
+                result = self._parse_analysis_response(json.dumps(element), analysis_config)
+            except ValueError as e:
+                logger.warning(f"Invalid packed result for {key}: {str(e)}")
+                continue
+            language = item.get('language', 'en')
+            self.result_cache.set(
+                self._cache_key(item['content'], language, analysis_config),
+                result, KIND_FEEDBACK_SENTIMENT, self.model_name
+            )
+            result['analysis_metadata'] = self._analysis_metadata(
+                item['content'], language, analysis_config, packed=True
+            )
+            results[item['id']] = result
+        
+        return results
+    
     def _construct_analysis_prompt(self, content: str, language: str, 
                                  analysis_config: Dict[str, Any]) -> str:
         """Construct the analysis prompt for Gemini AI"""
@@ -167,119 +383,24 @@ JSON STRUCTURE:
         logger.debug(f"Raw Gemini response length: {len(response_text)}")
         
         try:
-            # Clean the response text
-            cleaned_text = response_text.strip()
-            
-            # Remove markdown code blocks and any extra text
-            cleaned_text = re.sub(r'```json\s*', '', cleaned_text, flags=re.IGNORECASE)
-            cleaned_text = re.sub(r'```\s*', '', cleaned_text)
-            cleaned_text = re.sub(r'^json\s*', '', cleaned_text, flags=re.IGNORECASE)
-            cleaned_text = re.sub(r'^\s*\{\s*', '{', cleaned_text)
-            cleaned_text = re.sub(r'\}\s*$', '}', cleaned_text)
-            
-            # Remove any text before the first { and after the last }
-            start_idx = cleaned_text.find('{')
-            end_idx = cleaned_text.rfind('}') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                logger.error(f"No JSON found in response. Response: {cleaned_text[:200]}")
-                raise ValueError("No valid JSON found in AI response")
-            
-            json_str = cleaned_text[start_idx:end_idx]
-            
-            # Additional cleaning for common JSON formatting issues
-            json_str = self._clean_json_string(json_str)
-            
-            # Try to parse the JSON
-            try:
-                result = json.loads(json_str)
-            except json.JSONDecodeError as json_error:
-                # If JSON parsing fails, try to fix common issues
-                logger.warning(f"Initial JSON parse failed: {str(json_error)}. Attempting to fix...")
-                json_str = self._fix_common_json_issues(json_str)
-                result = json.loads(json_str)
+            # One tolerant pass: skips fences and prose, repairs commas and
+            # quoting without touching string contents
+            result = extract_json_object(response_text)
             
             # Validate required fields
             self._validate_analysis_result(result, analysis_config)
             
             return result
             
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
+        except (ValueError, KeyError) as e:
             logger.error(f"Failed to parse Gemini AI response: {str(e)}")
             logger.error(f"Raw response (first 500 chars): {response_text[:500]}")
-            if 'cleaned_text' in locals():
-                logger.error(f"Cleaned text (first 500 chars): {cleaned_text[:500]}")
-            if 'json_str' in locals():
-                logger.error(f"JSON string (first 500 chars): {json_str[:500]}")
             
             # Debug the specific error area
             self._debug_json_response(response_text, str(e))
             
             raise ValueError(f"Invalid analysis response format: {str(e)}")
     
-    def _clean_json_string(self, json_str: str) -> str:
-        """Clean common JSON formatting issues"""
-        # Remove trailing commas
-        json_str = re.sub(r',\s*}', '}', json_str)
-        json_str = re.sub(r',\s*]', ']', json_str)
-        
-        # Fix unquoted keys (common in some AI responses)
-        json_str = re.sub(r'(\s*)([a-zA-Z_][a-zA-Z0-9_]*)(\s*):', r'\1"\2"\3:', json_str)
-        
-        # Fix single quotes to double quotes
-        json_str = re.sub(r"(?<!\\)'", '"', json_str)
-        
-        # Remove comments (though JSON shouldn't have them)
-        json_str = re.sub(r'//.*?\n', '', json_str)
-        json_str = re.sub(r'/\*.*?\*/', '', json_str, flags=re.DOTALL)
-        
-        # Fix newlines in strings
-        json_str = re.sub(r'(?<=\[|,)\s*\n\s*', '', json_str)
-        
-        # Remove extra whitespace
-        json_str = re.sub(r'\s+', ' ', json_str)
-        
-        return json_str.strip()
-    
-    def _fix_common_json_issues(self, json_str: str) -> str:
-        """Attempt to fix common JSON formatting issues"""
-        try:
-            # Try to parse line by line and fix issues
-            lines = json_str.split('\n')
-            fixed_lines = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Fix missing commas between objects in arrays
-                if line.endswith('}') and not line.endswith('},'):
-                    # Check if next line starts with {
-                    fixed_lines.append(line)
-                else:
-                    fixed_lines.append(line)
-            
-            fixed_json = '\n'.join(fixed_lines)
-            
-            # Ensure proper array formatting
-            fixed_json = re.sub(r'\}\s*\{', '},{', fixed_json)
-            
-            # Fix missing quotes in array items
-            fixed_json = re.sub(r'\[\s*([^\[\]\{\}]+?)\s*\]', 
-                              lambda m: '["' + '","'.join([x.strip() for x in m.group(1).split(',')]) + '"]', 
-                              fixed_json)
-            
-            # Try parsing again
-            json.loads(fixed_json)
-            logger.info("Successfully fixed JSON issues")
-            return fixed_json
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to fix JSON: {str(e)}")
-            # If we can't fix it, return the original and let it fail
-            return json_str
-    
     def _debug_json_response(self, response_text: str, error_msg: str):
         """Debug method to help identify JSON parsing issues"""
         try:
@@ -356,7 +477,7 @@ JSON STRUCTURE:
     def batch_analyze_feedbacks(self, feedbacks_data: List[Dict[str, Any]], 
                               analysis_config: Dict[str, bool] = None) -> List[Dict[str, Any]]:
         """
-        Analyze multiple feedbacks in batch
+        Analyze multiple feedbacks concurrently (see BatchSentimentEngine)
         
         Args:
             feedbacks_data: List of dicts with 'id', 'content', and 'language'
@@ -368,24 +489,25 @@ JSON STRUCTURE:
         if analysis_config is None:
             analysis_config = {}
         
-        results = []
+        from cx_analytics.services.batch_analysis import BatchItem, BatchSentimentEngine
         
-        for feedback_data in feedbacks_data:
-            try:
-                analysis_result = self.analyze_feedback(
-                    feedback_data['content'],
-                    feedback_data.get('language', 'en'),
-                    analysis_config
-                )
-                analysis_result['feedback_id'] = feedback_data['id']
+        engine = BatchSentimentEngine(analyzer=self)
+        items = [
+            BatchItem(feedback_data.get('id'), feedback_data.get('content'), feedback_data.get('language', 'en'))
+            for feedback_data in feedbacks_data
+        ]
+        
+        results = []
+        for item_result in engine.analyze(items, analysis_config):
+            if item_result.success:
+                analysis_result = item_result.result
+                analysis_result['feedback_id'] = item_result.id
                 analysis_result['success'] = True
                 results.append(analysis_result)
-                
-            except Exception as e:
-                logger.error(f"Failed to analyze feedback {feedback_data.get('id')}: {str(e)}")
+            else:
                 results.append({
-                    'feedback_id': feedback_data.get('id'),
-                    'error': str(e),
+                    'feedback_id': item_result.id,
+                    'error': item_result.error,
                     'success': False
                 })
         
@@ -393,19 +515,27 @@ JSON STRUCTURE:
 
     def health_check(self) -> Dict[str, Any]:
         """
-        Check if the Gemini AI service is healthy and accessible
+        Check if the Gemini AI service is healthy and accessible. The live
+        probe result is shared process-wide for GEMINI_HEALTH_CHECK_TTL seconds.
         """
+        result = get_client_registry().health_check(f'sentiment:{self.model_name}', self._probe_health)
+        result['result_cache'] = self.result_cache.stats()
+        return result
+    
+    def _probe_health(self) -> Dict[str, Any]:
+        """One live request to the model"""
         try:
             if self.model is None:
                 self.configure_client()
             
             test_prompt = "Respond with only the word 'healthy' in lowercase"
+            started = time.monotonic()
             response = self.model.generate_content(test_prompt)
             
             return {
                 'healthy': response.text.strip().lower() == 'healthy',
                 'model': self.model_name,
-                'response_time': 'test_not_implemented'
+                'response_time': round(time.monotonic() - started, 3)
             }
         except Exception as e:
             logger.error(f"Gemini AI health check failed: {str(e)}")
@@ -0,0 +1,127 @@
+# services/gemini_client.py
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Try to import Gemini, but handle if not available
+try:
+    import google.generativeai as genai
+    GEMINI_AVAILABLE = True
+except ImportError:
+    genai = None
+    GEMINI_AVAILABLE = False
+
+DEFAULT_HEALTH_CHECK_TTL = 60  # seconds
+
+
+def get_api_key() -> Optional[str]:
+    """GEMINI_API_KEY from settings, falling back to the environment"""
+    return getattr(settings, 'GEMINI_API_KEY', None) or os.getenv('GEMINI_API_KEY')
+
+
+class GeminiClientRegistry:
+    """
+    Process-wide Gemini setup.
+
+    ``genai.configure`` runs once per API key and one GenerativeModel is
+    kept per model name, so analyzers created per request or per feedback
+    share the underlying client and its connections. Health-check results
+    are cached for ``health_check_ttl`` seconds.
+    """
+
+    def __init__(self, health_check_ttl: int = DEFAULT_HEALTH_CHECK_TTL):
+        self.health_check_ttl = health_check_ttl
+        self._lock = threading.Lock()
+        # Separate lock so a slow probe does not block model lookups
+        self._health_lock = threading.Lock()
+        self._configured_key: Optional[str] = None
+        self._models: Dict[str, Any] = {}
+        self._health: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def _configure(self, api_key: str) -> None:
+        key_hash = hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+        if self._configured_key == key_hash:
+            return
+        genai.configure(api_key=api_key)
+        # Handles built against a previous key must not be reused
+        self._models.clear()
+        self._configured_key = key_hash
+        logger.info("Gemini client configured")
+
+    def get_model(self, model_name: str, api_key: Optional[str] = None):
+        """Shared GenerativeModel for ``model_name``; created on first use"""
+        if not GEMINI_AVAILABLE:
+            raise ImportError("google.generativeai is not installed")
+        api_key = api_key or get_api_key()
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in settings or environment variables")
+
+        with self._lock:
+            self._configure(api_key)
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+                logger.info(f"Gemini model handle created: {model_name}")
+            return model
+
+    def embed(self, texts: List[str], model_name: str, api_key: Optional[str] = None) -> List[List[float]]:
+        """Embedding vectors for ``texts`` from ``model_name``, in order"""
+        if not GEMINI_AVAILABLE:
+            raise ImportError("google.generativeai is not installed")
+        api_key = api_key or get_api_key()
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in settings or environment variables")
+        with self._lock:
+            self._configure(api_key)
+        response = genai.embed_content(model=model_name, content=texts)
+        return response['embedding']
+
+    def health_check(self, name: str, probe: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Result of ``probe`` for ``name``, reused until it is older than
+        health_check_ttl. Only one caller runs the probe when it expires.
+        """
+        with self._health_lock:
+            cached = self._health.get(name)
+            if cached is not None and time.monotonic() - cached[0] < self.health_check_ttl:
+                return dict(cached[1], cached=True)
+
+            result = probe()
+            self._health[name] = (time.monotonic(), result)
+            return dict(result, cached=False)
+
+    def reset(self) -> None:
+        """Forget every handle and cached health result (tests, key rotation)"""
+        with self._lock:
+            self._configured_key = None
+            self._models.clear()
+        with self._health_lock:
+            self._health.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> GeminiClientRegistry:
+    """Process-wide registry configured from settings.GEMINI_HEALTH_CHECK_TTL"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GeminiClientRegistry(
+                health_check_ttl=getattr(settings, 'GEMINI_HEALTH_CHECK_TTL', DEFAULT_HEALTH_CHECK_TTL)
+            )
+        return _registry
+
+
+def get_gemini_model(model_name: str, api_key: Optional[str] = None):
+    """Shortcut for get_client_registry().get_model()"""
+    return get_client_registry().get_model(model_name, api_key)
@@ -0,0 +1,394 @@
+# services/json_extraction.py
+import json
+import logging
+import re
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Inside a string only these characters need attention
+_STRING_SPECIAL = {
+    '"': re.compile(r'["\\\x00-\x1f]'),
+    "'": re.compile(r'[\'"\\\x00-\x1f]'),
+}
+_WHITESPACE = re.compile(r'\s+')
+_TOKEN = re.compile(r'[A-Za-z0-9_$.+\-]+')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?$')
+_NUMBER_PREFIX = re.compile(r'-?\d*(?:\.\d*)?(?:[eE][+-]?\d*)?$')
+_CONTROL_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+_LITERALS = {
+    'true': 'true', 'false': 'false', 'null': 'null',
+    'True': 'true', 'False': 'false', 'None': 'null',
+}
+
+# Container states
+EXPECT_KEY = 'key'
+EXPECT_COLON = 'colon'
+EXPECT_VALUE = 'value'
+AFTER_VALUE = 'after_value'
+
+
+class JSONExtractionError(ValueError):
+    """No JSON value could be recovered from the text"""
+
+
+class IncrementalJSONParser:
+    """
+    Single-pass, state-machine JSON repairer.
+
+    Text before the first ``{`` / ``[`` (prose, code fences) is skipped and
+    text after the matching closer is ignored. Between them the machine
+    drops trailing and doubled commas, ``//`` and ``/* */`` comments,
+    inserts missing commas, quotes bare keys and bare words, maps
+    True/False/None, turns single-quoted strings into JSON strings and
+    escapes raw control characters inside strings. String contents are
+    otherwise copied unchanged.
+
+    Text can be fed in chunks as it streams in; ``partial()`` returns the
+    value parsed so far with every open string and container closed. A
+    number or literal cut off at the end is never completed: ``partial()``
+    raises, or ``text(drop_incomplete=True)`` drops the whole open item of
+    an outer array.
+    """
+
+    def __init__(self, expect: Optional[str] = None):
+        # expect: '{', '[' or None for whichever comes first
+        self.expect = expect
+        self.started = False
+        self.done = False
+        self._out: List[str] = []
+        self._stack: List[List[str]] = []  # [opener, state]
+        self._item_start = 0  # Output index where the outermost container's last item begins
+        self._pending_comma = False
+        self._token: List[str] = []
+        self._token_is_key = False
+        self._in_string = False
+        self._quote = '"'
+        self._string_is_key = False
+        self._escape = False
+        self._comment: Optional[str] = None
+        self._pending_slash = False
+        self._pending_star = False
+
+    # Output helpers
+
+    def _begin_value(self) -> bool:
+        """Emit a separator if needed; returns True if the new item is an object key"""
+        if not self._stack:
+            return False
+        top = self._stack[-1]
+        if len(self._stack) == 1:
+            self._item_start = len(self._out)
+        if self._pending_comma or top[1] == AFTER_VALUE:
+            self._out.append(',')
+            top[1] = EXPECT_KEY if top[0] == '{' else EXPECT_VALUE
+        self._pending_comma = False
+        if top[0] == '{' and top[1] == EXPECT_KEY:
+            return True
+        if top[0] == '{' and top[1] == EXPECT_COLON:
+            # Value without a colon after a key
+            self._out.append(':')
+            top[1] = EXPECT_VALUE
+        return False
+
+    def _value_done(self) -> None:
+        if self._stack:
+            top = self._stack[-1]
+            top[1] = EXPECT_COLON if (top[0] == '{' and top[1] == EXPECT_KEY) else AFTER_VALUE
+
+    @staticmethod
+    def _render_token(token: str, is_key: bool, final: bool) -> str:
+        if is_key:
+            return json.dumps(token)
+        if final:
+            # At the very end of the text a number may have lost digits and a
+            # literal its tail; neither can be completed without guessing
+            if _NUMBER_PREFIX.match(token) or any(
+                literal.startswith(token) and literal != token for literal in _LITERALS
+            ):
+                raise JSONExtractionError(f"JSON was truncated inside the value {token!r}")
+        if token in _LITERALS:
+            return _LITERALS[token]
+        if _NUMBER.match(token):
+            return token
+        return json.dumps(token)
+
+    def _flush_token(self) -> None:
+        if not self._token:
+            return
+        token = ''.join(self._token)
+        self._out.append(self._render_token(token, self._token_is_key, final=False))
+        self._token = []
+        self._value_done()
+
+    def _close_container(self, closer: str) -> None:
+        self._pending_comma = False
+        # Close inner containers the text forgot to close; every container
+        # below the innermost one holds the container above it as its value
+        innermost = True
+        while self._stack:
+            opener, state = self._stack.pop()
+            if innermost and opener == '{' and state == EXPECT_COLON:
+                self._out.append(':null')
+            elif innermost and opener == '{' and state == EXPECT_VALUE:
+                self._out.append('null')
+            self._out.append('}' if opener == '{' else ']')
+            innermost = False
+            if (opener == '{') == (closer == '}'):
+                break
+        if self._stack:
+            self._value_done()
+        else:
+            self.done = True
+
+    # Feeding
+
+    def feed(self, text: str) -> 'IncrementalJSONParser':
+        position = 0
+        length = len(text)
+        out = self._out
+
+        while position < length and not self.done:
+            if not self.started:
+                targets = [self.expect] if self.expect else ['{', '[']
+                found = [index for index in (text.find(target, position) for target in targets) if index != -1]
+                if not found:
+                    return self
+                position = min(found)
+                self.started = True
+                out.append(text[position])
+                self._stack.append([text[position], EXPECT_KEY if text[position] == '{' else EXPECT_VALUE])
+                position += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    char = text[position]
+                    self._escape = False
+                    # \' is not a JSON escape
+                    out.append("'" if char == "'" else '\\' + char)
+                    position += 1
+                    continue
+                match = _STRING_SPECIAL[self._quote].search(text, position)
+                if match is None:
+                    out.append(text[position:])
+                    return self
+                index = match.start()
+                if index > position:
+                    out.append(text[position:index])
+                char = text[index]
+                position = index + 1
+                if char == '\\':
+                    self._escape = True
+                elif char == self._quote:
+                    out.append('"')
+                    self._in_string = False
+                    self._value_done()
+                elif char == '"':
+                    out.append('\\"')
+                else:
+                    out.append(_CONTROL_ESCAPES.get(char, f'\\u{ord(char):04x}'))
+                continue
+
+            if self._comment is not None:
+                if self._comment == 'line':
+                    index = text.find('\n', position)
+                    if index == -1:
+                        return self
+                    self._comment = None
+                    position = index + 1
+                elif self._pending_star and text[position] == '/':
+                    self._comment = None
+                    self._pending_star = False
+                    position += 1
+                else:
+                    self._pending_star = False
+                    index = text.find('*/', position)
+                    if index == -1:
+                        # The closing '*/' may be split across chunks
+                        self._pending_star = text.endswith('*')
+                        return self
+                    self._comment = None
+                    position = index + 2
+                continue
+
+            char = text[position]
+
+            if self._pending_slash:
+                self._pending_slash = False
+                if char == '/':
+                    self._comment = 'line'
+                    position += 1
+                    continue
+                if char == '*':
+                    self._comment = 'block'
+                    position += 1
+                    continue
+
+            if self._token:
+                match = _TOKEN.match(text, position)
+                if match:
+                    self._token.append(match.group())
+                    position = match.end()
+                    continue
+                self._flush_token()
+
+            if char.isspace():
+                position = _WHITESPACE.match(text, position).end()
+                continue
+
+            if char == '"' or char == "'":
+                self._string_is_key = self._begin_value()
+                self._in_string = True
+                self._quote = char
+                out.append('"')
+                position += 1
+            elif char == '{' or char == '[':
+                self._begin_value()
+                out.append(char)
+                self._stack.append([char, EXPECT_KEY if char == '{' else EXPECT_VALUE])
+                position += 1
+            elif char == '}' or char == ']':
+                self._close_container(char)
+                position += 1
+            elif char == ',':
+                top = self._stack[-1]
+                if top[1] == EXPECT_COLON:
+                    # Key without a value
+                    out.append(':null')
+                    top[1] = AFTER_VALUE
+                if top[1] == AFTER_VALUE:
+                    self._pending_comma = True
+                    top[1] = EXPECT_KEY if top[0] == '{' else EXPECT_VALUE
+                position += 1
+            elif char == ':':
+                top = self._stack[-1]
+                if top[0] == '{' and top[1] == EXPECT_COLON:
+                    out.append(':')
+                    top[1] = EXPECT_VALUE
+                position += 1
+            elif char == '/':
+                self._pending_slash = True
+                position += 1
+            else:
+                match = _TOKEN.match(text, position)
+                if match:
+                    self._token_is_key = self._begin_value()
+                    self._token.append(match.group())
+                    position = match.end()
+                else:
+                    # Stray characters (backticks, '#', ...) are dropped
+                    position += 1
+
+        return self
+
+    # Results
+
+    def _closing_suffix(self) -> str:
+        """Text that would close everything still open, without changing state"""
+        suffix = []
+        states = [list(entry) for entry in self._stack]
+        if self._in_string:
+            suffix.append('"')
+            if states:
+                top = states[-1]
+                top[1] = EXPECT_COLON if (top[0] == '{' and self._string_is_key) else AFTER_VALUE
+        elif self._token:
+            token = ''.join(self._token)
+            suffix.append(self._render_token(token, self._token_is_key, final=True))
+            if states:
+                states[-1][1] = EXPECT_COLON if self._token_is_key else AFTER_VALUE
+        for depth, (opener, state) in enumerate(reversed(states)):
+            if depth == 0 and opener == '{' and state == EXPECT_COLON:
+                suffix.append(':null')
+            elif depth == 0 and opener == '{' and state == EXPECT_VALUE:
+                suffix.append('null')
+            suffix.append('}' if opener == '{' else ']')
+        return ''.join(suffix)
+
+    @property
+    def last_item_open(self) -> bool:
+        """True while the outermost container's last item is still being read"""
+        return len(self._stack) > 1 or (
+            len(self._stack) == 1 and (self._in_string or bool(self._token))
+        )
+
+    def text(self, drop_incomplete: bool = False) -> str:
+        """
+        Repaired JSON text, closed if the input was truncated. With
+        ``drop_incomplete`` an outer array loses its unfinished last item.
+        """
+        if not self.started:
+            raise JSONExtractionError("No JSON object or array found")
+        if self.done:
+            return ''.join(self._out)
+        if drop_incomplete and self._stack[0][0] == '[' and self.last_item_open:
+            # The separator before the item is cut off with it
+            return ''.join(self._out[:self._item_start]) + ']'
+        return ''.join(self._out) + self._closing_suffix()
+
+    def partial(self, drop_incomplete: bool = False) -> Any:
+        """Value parsed so far; open strings and containers are closed"""
+        try:
+            return json.loads(self.text(drop_incomplete))
+        except json.JSONDecodeError as e:
+            raise JSONExtractionError(f"Could not repair JSON: {str(e)}") from e
+
+
+def _first_start(text: str, expect: Optional[str]) -> int:
+    if expect:
+        return text.find(expect)
+    starts = [index for index in (text.find('{'), text.find('[')) if index != -1]
+    return min(starts) if starts else -1
+
+
+def extract_json(text: str, expect: Optional[str] = None, drop_incomplete: bool = False) -> Any:
+    """
+    First JSON value in an LLM response.
+
+    Well-formed JSON is decoded directly from the first ``{`` / ``[``
+    (``expect`` restricts which); anything else goes through one pass of
+    IncrementalJSONParser. A truncated object raises, since any of its
+    fields may be missing or cut short. With ``drop_incomplete`` a
+    truncated array loses its unfinished last item instead of getting it
+    half-filled. Raises JSONExtractionError (a ValueError).
+    """
+    if not text:
+        raise JSONExtractionError("Empty response")
+    start = _first_start(text, expect)
+    if start == -1:
+        raise JSONExtractionError("No JSON object or array found")
+
+    try:
+        value, _end = json.JSONDecoder().raw_decode(text, start)
+        return value
+    except json.JSONDecodeError:
+        pass
+
+    parser = IncrementalJSONParser(expect or text[start]).feed(text[start:])
+    if parser.done:
+        return parser.partial()
+
+    if (expect or text[start]) == '{':
+        raise JSONExtractionError("JSON object in AI response was truncated")
+    logger.warning("JSON array in AI response was truncated; closing open structures")
+    return parser.partial(drop_incomplete)
+
+
+def extract_json_object(text: str) -> dict:
+    """extract_json for responses that must be a single object"""
+    value = extract_json(text, expect='{')
+    if not isinstance(value, dict):
+        raise JSONExtractionError("Response is not a JSON object")
+    return value
+
+
+def extract_json_array(text: str, drop_incomplete: bool = True) -> list:
+    """
+    extract_json for responses that must be an array. Items cut off by
+    truncation are dropped by default so callers can retry them.
+    """
+    value = extract_json(text, expect='[', drop_incomplete=drop_incomplete)
+    if not isinstance(value, list):
+        raise JSONExtractionError("Response is not a JSON array")
+    return value
@@ -0,0 +1,284 @@
+# services/language_detection.py
+import json
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+PROFILES_PATH = DATA_DIR / 'language_profiles.json'
+CORPUS_PATH = DATA_DIR / 'language_corpus.json'
+
+PROFILE_FORMAT_VERSION = 1
+NGRAM_ORDERS = (1, 2, 3)
+# Top n-grams kept per language and order in the shipped profile
+PROFILE_SIZES = {1: 40, 2: 200, 3: 250}
+# Scales the log-likelihood gap between the two best languages into a 0-1 confidence
+CONFIDENCE_TEMPERATURE = 0.5
+# Texts shorter than this many words get proportionally lower confidence
+FULL_CONFIDENCE_WORDS = 4
+# Minimum mean log-likelihood ratio per n-gram of the best language against
+# an even mix of all profiled languages. Text in an unprofiled language
+# (Indonesian, Danish, Czech, ...) fits every profile about equally badly
+# and stays below this, however clear the margin between the top two is.
+MIN_PROFILE_FIT = 0.14
+# Confidence multiplier for text that fails the fit check or is written in
+# a shared script without any distinguishing letter
+UNCERTAIN_CONFIDENCE_FACTOR = 0.5
+
+# Script blocks: (language or shared script name, first, last code point)
+SCRIPT_RANGES = (
+    ('ko', 0xAC00, 0xD7AF),
+    ('ko', 0x1100, 0x11FF),
+    ('ko', 0x3130, 0x318F),
+    ('ja', 0x3040, 0x30FF),
+    ('zh', 0x4E00, 0x9FFF),
+    ('arabic', 0x0600, 0x06FF),
+    ('hi', 0x0900, 0x097F),
+    ('bn', 0x0980, 0x09FF),
+    ('th', 0x0E00, 0x0E7F),
+    ('cyrillic', 0x0400, 0x04FF),
+)
+
+# Letters that single out one language among those sharing a script,
+# checked in order (Kazakh and Belarusian also use the Ukrainian i, Urdu
+# also uses the Persian letters). The last entry is the default language
+# of the script when no marker is present.
+SHARED_SCRIPT_MARKERS = {
+    'cyrillic': (
+        ('kk', frozenset('әғқңөұүһ')),
+        ('be', frozenset('ў')),
+        ('mk', frozenset('ѓќѕ')),
+        ('sr', frozenset('ђјљњћџ')),
+        ('uk', frozenset('іїєґ')),
+        ('ru', frozenset('ыэё')),
+    ),
+    'arabic': (
+        ('ur', frozenset('ٹڈڑںے')),
+        ('fa', frozenset('پچژگکی')),
+        ('ar', frozenset('ةيكى')),
+    ),
+}
+
+_NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+
+
+@dataclass(frozen=True)
+class LanguageGuess:
+    """Detected ISO 639-1 code and a 0-1 confidence"""
+    language: str
+    confidence: float
+    method: str = 'ngram'
+
+
+def _script_language(char: str) -> Optional[str]:
+    code_point = ord(char)
+    for language, first, last in SCRIPT_RANGES:
+        if first <= code_point <= last:
+            return language
+    return None
+
+
+def extract_ngrams(text: str) -> Counter:
+    """Character 1-3 grams of the lowercased words, padded with spaces"""
+    counts: Counter = Counter()
+    text = unicodedata.normalize('NFC', text).lower()
+    for word in _NON_LETTERS.sub(' ', text).split():
+        padded = f' {word} '
+        for order in NGRAM_ORDERS:
+            for index in range(len(padded) - order + 1):
+                gram = padded[index:index + order]
+                if gram.strip():
+                    counts[gram] += 1
+    return counts
+
+
+def build_profiles(corpus: Dict[str, Iterable[str]]) -> Dict[str, object]:
+    """
+    Log-probability tables from ``{language: [texts]}``. Each order keeps
+    its top PROFILE_SIZES n-grams; everything else falls back to the
+    order's floor (half a count).
+    """
+    languages = {}
+    for language, texts in sorted(corpus.items()):
+        counts = extract_ngrams(' '.join(texts))
+        ngrams = {}
+        floors = {}
+        for order in NGRAM_ORDERS:
+            order_counts = {gram: count for gram, count in counts.items() if len(gram) == order}
+            total = sum(order_counts.values()) or 1
+            floors[str(order)] = round(math.log(0.5 / total), 3)
+            for gram, count in Counter(order_counts).most_common(PROFILE_SIZES[order]):
+                ngrams[gram] = round(math.log(count / total), 3)
+        languages[language] = {'floors': floors, 'ngrams': ngrams}
+    return {'version': PROFILE_FORMAT_VERSION, 'languages': languages}
+
+
+def write_profiles(corpus_path: Path = CORPUS_PATH, profiles_path: Path = PROFILES_PATH) -> Dict[str, object]:
+    """Rebuild the shipped profile file from the training corpus"""
+    with open(corpus_path, encoding='utf-8') as corpus_file:
+        profiles = build_profiles(json.load(corpus_file))
+    with open(profiles_path, 'w', encoding='utf-8') as profile_file:
+        json.dump(profiles, profile_file, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return profiles
+
+
+class LanguageDetector:
+    """
+    Offline language identifier.
+
+    Texts dominated by a script that belongs to one supported language
+    (Hangul, kana, Han, Devanagari, Bengali, Thai) are decided by script.
+    Cyrillic and Arabic-script text is decided by letters specific to one
+    of the languages using the script. Latin-script text is scored with a
+    character n-gram naive Bayes model loaded from language_profiles.json.
+
+    Guesses the detector cannot stand behind (no distinguishing letter,
+    or text that fits none of the profiles) get at most half confidence,
+    so callers with a confidence threshold fall back to Gemini.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, object]] = None):
+        if profiles is None:
+            with open(PROFILES_PATH, encoding='utf-8') as profile_file:
+                profiles = json.load(profile_file)
+        self.languages: Dict[str, Dict[str, float]] = {}
+        self.floors: Dict[str, Dict[int, float]] = {}
+        for language, profile in profiles['languages'].items():
+            self.languages[language] = profile['ngrams']
+            self.floors[language] = {int(order): floor for order, floor in profile['floors'].items()}
+
+        # Log-probability of each n-gram under an even mix of all languages,
+        # precomputed for fit(); unlisted n-grams fall back to the mixed floors
+        self.mixture_floors = {
+            order: self._mix(self.floors[language][order] for language in self.languages)
+            for order in NGRAM_ORDERS
+        } if self.languages else {}
+        grams = {gram for table in self.languages.values() for gram in table}
+        self.mixture = {
+            gram: self._mix(
+                table.get(gram, self.floors[language][len(gram)])
+                for language, table in self.languages.items()
+            )
+            for gram in grams
+        }
+
+    @staticmethod
+    def _mix(log_probabilities: Iterable[float]) -> float:
+        """Log of the mean of the given probabilities"""
+        values = list(log_probabilities)
+        peak = max(values)
+        return peak + math.log(sum(math.exp(value - peak) for value in values) / len(values))
+
+    def _script_guess(self, text: str) -> Optional[LanguageGuess]:
+        """Guess for text where one non-Latin script covers at least half the letters"""
+        letters = [char for char in text if char.isalpha()]
+        if not letters:
+            return None
+        scripts = Counter(_script_language(char) for char in letters)
+        # Japanese mixes kana with Han characters
+        if scripts.get('ja') and scripts.get('zh'):
+            scripts['ja'] += scripts.pop('zh')
+        language, count = scripts.most_common(1)[0]
+        confidence = count / len(letters)
+        if language is None or confidence < 0.5:
+            return None
+
+        markers = SHARED_SCRIPT_MARKERS.get(language)
+        if markers is not None:
+            present = {char.lower() for char in letters}
+            for candidate, candidate_markers in markers:
+                if present & candidate_markers:
+                    language = candidate
+                    break
+            else:
+                language = markers[-1][0]
+                confidence *= UNCERTAIN_CONFIDENCE_FACTOR
+        return LanguageGuess(language, round(confidence, 3), method='script')
+
+    def scores(self, text: str) -> List[Tuple[str, float]]:
+        """Log-likelihood of ``text`` under every Latin-script language, best first"""
+        ngrams = extract_ngrams(text)
+        if not ngrams:
+            return []
+        scores = []
+        for language, table in self.languages.items():
+            floors = self.floors[language]
+            score = sum(count * table.get(gram, floors[len(gram)]) for gram, count in ngrams.items())
+            scores.append((language, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+    def fit(self, text: str, language: str) -> float:
+        """
+        Mean log-likelihood ratio per n-gram of ``text`` under ``language``
+        against an even mix of every profiled language
+        """
+        ngrams = extract_ngrams(text)
+        total = sum(ngrams.values())
+        if not total:
+            return 0.0
+        table = self.languages[language]
+        floors = self.floors[language]
+        ratio = sum(
+            count * (
+                table.get(gram, floors[len(gram)])
+                - self.mixture.get(gram, self.mixture_floors[len(gram)])
+            )
+            for gram, count in ngrams.items()
+        )
+        return ratio / total
+
+    def detect(self, text: str) -> Optional[LanguageGuess]:
+        """Best guess for ``text``, or None when it has no letters"""
+        if not text or not text.strip():
+            return None
+        script_guess = self._script_guess(text)
+        if script_guess is not None:
+            return script_guess
+
+        scores = self.scores(text)
+        if not scores:
+            return None
+        if len(scores) == 1:
+            return LanguageGuess(scores[0][0], 1.0)
+
+        # Softmax over the tempered scores, damped for very short texts
+        best = scores[0][1]
+        weights = [math.exp((score - best) * CONFIDENCE_TEMPERATURE) for _language, score in scores]
+        confidence = weights[0] / sum(weights)
+        words = len(_NON_LETTERS.sub(' ', text).split())
+        confidence *= min(1.0, words / FULL_CONFIDENCE_WORDS)
+        # A clear winner among the profiles may still be the wrong language
+        if self.fit(text, scores[0][0]) < MIN_PROFILE_FIT:
+            confidence *= UNCERTAIN_CONFIDENCE_FACTOR
+        return LanguageGuess(scores[0][0], round(confidence, 3))
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_language_detector() -> LanguageDetector:
+    """Process-wide detector; the profile file is read once"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = LanguageDetector()
+        return _detector
+
+
+def detect_language_locally(text: str) -> Optional[LanguageGuess]:
+    """Detect with the shared detector; None if the profiles cannot be loaded"""
+    try:
+        return get_language_detector().detect(text)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Local language detection unavailable: {str(e)}")
+        return None
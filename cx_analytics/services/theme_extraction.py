@@ -0,0 +1,462 @@
+# services/theme_extraction.py
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .batch_analysis import DEFAULT_MAX_WORKERS, call_with_backoff, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_TOKEN_BUDGET = 6000
+DEFAULT_CHUNK_MAX_ITEMS = 100
+DEFAULT_ITEM_MAX_CHARS = 2000
+CHARS_PER_TOKEN = 4  # Rough estimate for Latin-script text
+
+# Two themes are merged when their keyword sets overlap this much (Jaccard)...
+KEYWORD_OVERLAP_THRESHOLD = 0.5
+# ...or their vectors are this close (cosine); local trigram vectors are coarser
+EMBEDDING_SIMILARITY_THRESHOLD = 0.88
+LOCAL_SIMILARITY_THRESHOLD = 0.75
+
+MAX_THEME_KEYWORDS = 15
+MAX_THEME_SNIPPETS = 5
+THEME_CATEGORIES = (
+    'product_quality', 'customer_service', 'pricing', 'delivery', 'usability',
+    'features', 'performance', 'documentation', 'other',
+)
+# Feedback.sentiment_label -> Theme.sentiment_distribution key
+SENTIMENT_COUNT_KEYS = {
+    'very_positive': 'positive_count',
+    'positive': 'positive_count',
+    'neutral': 'neutral_count',
+    'negative': 'negative_count',
+    'very_negative': 'negative_count',
+}
+
+_NON_ALNUM = re.compile(r'[^\w]+')
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def normalize_theme_name(name: str) -> str:
+    """Case-, accent- and plural-insensitive key for theme names"""
+    name = unicodedata.normalize('NFKD', name).casefold()
+    words = _NON_ALNUM.sub(' ', name).split()
+    return ' '.join(word[:-1] if len(word) > 3 and word.endswith('s') else word for word in words)
+
+
+def trigram_vector(text: str) -> Counter:
+    """Character trigram counts, the offline stand-in for an embedding"""
+    grams: Counter = Counter()
+    for word in normalize_theme_name(text).split():
+        padded = f' {word} '
+        for index in range(len(padded) - 2):
+            grams[padded[index:index + 3]] += 1
+    return grams
+
+
+def cosine_similarity(left, right) -> float:
+    if isinstance(left, Counter):
+        dot = sum(count * right.get(gram, 0) for gram, count in left.items())
+        left_norm = math.sqrt(sum(count * count for count in left.values()))
+        right_norm = math.sqrt(sum(count * count for count in right.values()))
+    else:
+        dot = sum(a * b for a, b in zip(left, right))
+        left_norm = math.sqrt(sum(a * a for a in left))
+        right_norm = math.sqrt(sum(b * b for b in right))
+    if not left_norm or not right_norm:
+        return 0.0
+    return dot / (left_norm * right_norm)
+
+
+def gemini_embedder(model_name: str) -> Callable[[List[str]], List[List[float]]]:
+    """Embed texts through the shared Gemini client registry"""
+    from .gemini_client import get_client_registry
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        return get_client_registry().embed(texts, model_name)
+    return embed
+
+
+@dataclass
+class MergedTheme:
+    """One deduplicated theme across every chunk of a run"""
+    name: str
+    description: str = ''
+    category: str = 'other'
+    keywords: List[str] = field(default_factory=list)
+    snippets: List[str] = field(default_factory=list)
+    sentiment: Dict[str, int] = field(default_factory=dict)
+    occurrences: int = 0
+    vector: Any = None
+    theme_id: Any = None
+    touched: bool = False
+
+    @property
+    def keyword_set(self):
+        return {normalize_theme_name(keyword) for keyword in self.keywords if keyword}
+
+    def absorb(self, theme_data: Dict[str, Any]) -> None:
+        """Fold a chunk-level theme into this one"""
+        if not self.description and theme_data.get('description'):
+            self.description = str(theme_data['description'])
+        known = self.keyword_set
+        for keyword in theme_data.get('keywords') or []:
+            if len(self.keywords) >= MAX_THEME_KEYWORDS:
+                break
+            if isinstance(keyword, str) and normalize_theme_name(keyword) not in known:
+                self.keywords.append(keyword)
+                known.add(normalize_theme_name(keyword))
+        for snippet in theme_data.get('representative_snippets') or []:
+            if len(self.snippets) >= MAX_THEME_SNIPPETS:
+                break
+            if isinstance(snippet, str) and snippet not in self.snippets:
+                self.snippets.append(snippet)
+        self.touched = True
+
+    def link(self, sentiment_label: Optional[str]) -> None:
+        """Count one newly linked feedback"""
+        self.occurrences += 1
+        key = SENTIMENT_COUNT_KEYS.get(sentiment_label)
+        if key:
+            self.sentiment[key] = self.sentiment.get(key, 0) + 1
+
+
+class ThemeMerger:
+    """
+    Deduplicates themes across chunks. A theme joins an existing one when
+    the normalized names match, the keyword sets overlap, or the vectors
+    (Gemini embeddings when an embedder is given, character trigrams
+    otherwise) are close enough; otherwise it starts a new theme.
+    """
+
+    def __init__(self, embedder: Optional[Callable[[List[str]], List[List[float]]]] = None):
+        self.embedder = embedder
+        self.threshold = EMBEDDING_SIMILARITY_THRESHOLD if embedder else LOCAL_SIMILARITY_THRESHOLD
+        self.themes: List[MergedTheme] = []
+        self._by_name: Dict[str, MergedTheme] = {}
+
+    def _vectors(self, texts: List[str]) -> List[Any]:
+        if self.embedder is not None and texts:
+            try:
+                return self.embedder(texts)
+            except Exception as e:
+                logger.warning(f"Theme embedding failed, using trigram similarity: {str(e)}")
+                self.embedder = None
+                self.threshold = LOCAL_SIMILARITY_THRESHOLD
+                for theme in self.themes:
+                    theme.vector = trigram_vector(theme.name)
+        return [trigram_vector(text.split(':', 1)[0]) for text in texts]
+
+    def _register(self, theme: MergedTheme) -> None:
+        self.themes.append(theme)
+        self._by_name.setdefault(normalize_theme_name(theme.name), theme)
+
+    def seed(self, themes: Sequence[Any]) -> None:
+        """Existing Theme rows, so new chunks merge into them instead of duplicating"""
+        themes = list(themes)
+        vectors = self._vectors([f'{theme.name}: {theme.description}' for theme in themes])
+        for theme, vector in zip(themes, vectors):
+            self._register(MergedTheme(
+                name=theme.name,
+                description=theme.description,
+                category=theme.category,
+                keywords=list(theme.keywords or []),
+                snippets=list((theme.metadata or {}).get('content_snippets', [])),
+                sentiment=dict(theme.sentiment_distribution or {}),
+                occurrences=theme.occurrence_count,
+                vector=vector,
+                theme_id=theme.pk,
+            ))
+
+    def _match(self, name: str, keywords: set, vector: Any) -> Optional[MergedTheme]:
+        theme = self._by_name.get(normalize_theme_name(name))
+        if theme is not None:
+            return theme
+        best, best_score = None, 0.0
+        for candidate in self.themes:
+            candidate_keywords = candidate.keyword_set
+            if keywords and candidate_keywords:
+                shared = len(keywords & candidate_keywords)
+                if shared >= 2 and shared / len(keywords | candidate_keywords) >= KEYWORD_OVERLAP_THRESHOLD:
+                    return candidate
+            if candidate.vector is not None and vector is not None:
+                score = cosine_similarity(vector, candidate.vector)
+                if score >= self.threshold and score > best_score:
+                    best, best_score = candidate, score
+        return best
+
+    def merge_all(self, themes_data: List[Dict[str, Any]]) -> List[Tuple[MergedTheme, bool]]:
+        """Canonical theme for each chunk theme, and whether it already existed"""
+        vectors = self._vectors([
+            f"{theme_data['name']}: {theme_data.get('description') or ''}" for theme_data in themes_data
+        ])
+        merged = []
+        for theme_data, vector in zip(themes_data, vectors):
+            name = str(theme_data['name'])[:255]
+            keywords = {
+                normalize_theme_name(keyword) for keyword in theme_data.get('keywords') or []
+                if isinstance(keyword, str) and keyword
+            }
+            theme = self._match(name, keywords, vector)
+            existed = theme is not None
+            if theme is None:
+                category = theme_data.get('category')
+                theme = MergedTheme(
+                    name=name,
+                    category=category if category in THEME_CATEGORIES else 'other',
+                    vector=vector,
+                )
+                self._register(theme)
+            theme.absorb(theme_data)
+            merged.append((theme, existed))
+        return merged
+
+
+@dataclass
+class ThemeExtractionSummary:
+    """Outcome of one run"""
+    feedback_count: int = 0
+    chunk_count: int = 0
+    failed_chunks: int = 0
+    themes_created: int = 0
+    themes_merged: int = 0
+    links_written: int = 0
+    stopped: bool = False
+
+
+class ThemeExtractionPipeline:
+    """
+    Map-reduce theme extraction. Feedback is streamed from the database
+    and cut into chunks that fit a token budget; chunks are sent to Gemini
+    concurrently (a bounded number in flight), and each result is merged
+    into the run's deduplicated themes and written with bulk upserts
+    before the next one, so memory does not grow with the feedback count.
+    """
+
+    def __init__(self, analyzer=None, max_workers: Optional[int] = None,
+                 token_budget: Optional[int] = None, max_items: Optional[int] = None,
+                 item_max_chars: Optional[int] = None, rate_limiter=None,
+                 embedder: Optional[Callable[[List[str]], List[List[float]]]] = None):
+        if analyzer is None:
+            from cx_analytics.theme_views import GeminiThemeAnalyzer
+            analyzer = GeminiThemeAnalyzer()
+        self.analyzer = analyzer
+        self.max_workers = max_workers or getattr(settings, 'GEMINI_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+        self.token_budget = token_budget or getattr(settings, 'THEME_CHUNK_TOKEN_BUDGET', DEFAULT_CHUNK_TOKEN_BUDGET)
+        self.max_items = max_items or getattr(settings, 'THEME_CHUNK_MAX_ITEMS', DEFAULT_CHUNK_MAX_ITEMS)
+        self.item_max_chars = item_max_chars or getattr(settings, 'THEME_ITEM_MAX_CHARS', DEFAULT_ITEM_MAX_CHARS)
+        self.rate_limiter = rate_limiter or get_rate_limiter(getattr(analyzer, 'api_key', None))
+        if embedder is None and getattr(settings, 'THEME_EMBEDDING_MODEL', None):
+            embedder = gemini_embedder(settings.THEME_EMBEDDING_MODEL)
+        self.embedder = embedder
+
+    def iter_chunks(self, queryset) -> Iterator[List[Tuple[Any, str, Optional[str]]]]:
+        """(feedback id, content, sentiment label) lists, each within the token budget and item cap"""
+        chunk = []
+        chunk_tokens = 0
+        rows = queryset.values_list('id', 'content', 'sentiment_label').iterator(chunk_size=2000)
+        for feedback_id, content, sentiment_label in rows:
+            content = (content or '').strip()[:self.item_max_chars]
+            if not content:
+                continue
+            tokens = estimate_tokens(content)
+            if chunk and (len(chunk) >= self.max_items or chunk_tokens + tokens > self.token_budget):
+                yield chunk
+                chunk = []
+                chunk_tokens = 0
+            chunk.append((feedback_id, content, sentiment_label))
+            chunk_tokens += tokens
+        if chunk:
+            yield chunk
+
+    def _extract(self, chunk: List[Tuple[Any, str, Optional[str]]], language: str) -> Optional[Dict[str, Any]]:
+        contents = [content for _feedback_id, content, _label in chunk]
+        try:
+            return call_with_backoff(
+                lambda: self.analyzer.analyze_feedback_batch(contents, language), self.rate_limiter
+            )
+        except Exception as e:
+            logger.error(f"Theme extraction failed for a chunk of {len(chunk)} feedbacks: {str(e)}")
+            return None
+
+    def run(self, queryset, organization_id, language: str = 'en', min_relevance_score: float = 0.7,
+            progress: Optional[Callable[[ThemeExtractionSummary], Any]] = None) -> ThemeExtractionSummary:
+        """
+        Extract, merge and store themes for every feedback in ``queryset``.
+        ``progress`` is called after each chunk is written; returning False
+        stops the run after the themes touched so far are finalized.
+        """
+        from core.models import FeedbackCounter, Organization, Theme
+
+        summary = ThemeExtractionSummary()
+        merger = ThemeMerger(self.embedder)
+        merger.seed(Theme.objects.filter(organization_id=organization_id))
+        queryset = queryset.filter(organization_id=organization_id)
+
+        window = max(1, self.max_workers) * 2
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix='theme-map') as pool:
+            pending = deque()
+            chunks = self.iter_chunks(queryset)
+            while True:
+                # Keep a bounded number of chunks in flight
+                while len(pending) < window:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append((chunk, pool.submit(self._extract, chunk, language)))
+                if not pending:
+                    break
+
+                # Reduce in submission order on this thread, which owns the DB writes
+                chunk, future = pending.popleft()
+                result = future.result()
+                summary.chunk_count += 1
+                if result is None:
+                    summary.failed_chunks += 1
+                else:
+                    self._save_chunk(chunk, result, organization_id, min_relevance_score, merger, summary)
+                if progress is not None and progress(summary) is False:
+                    summary.stopped = True
+                    for _chunk, future in pending:
+                        future.cancel()
+                    break
+
+        self._finalize(merger, organization_id)
+        if summary.feedback_count:
+            FeedbackCounter.rebuild(Organization.objects.get(pk=organization_id))
+        return summary
+
+    def _save_chunk(self, chunk: List[Tuple[Any, str, Optional[str]]], result: Dict[str, Any], organization_id,
+                    min_relevance_score: float, merger: ThemeMerger, summary: ThemeExtractionSummary) -> None:
+        from core.models import Feedback, FeedbackTheme, Theme
+
+        now = timezone.now()
+        themes_data = [
+            theme_data for theme_data in result.get('themes') or []
+            if isinstance(theme_data, dict) and theme_data.get('name')
+        ]
+        canonical = {}
+        for theme_data, (theme, existed) in zip(themes_data, merger.merge_all(themes_data)):
+            canonical[theme_data['name']] = theme
+            if existed:
+                summary.themes_merged += 1
+
+        new_themes = {theme.name: theme for theme in canonical.values() if theme.theme_id is None}
+
+        with transaction.atomic():
+            if new_themes:
+                Theme.objects.bulk_create(
+                    [
+                        Theme(
+                            organization_id=organization_id,
+                            name=theme.name,
+                            description=theme.description,
+                            category=theme.category,
+                            keywords=theme.keywords,
+                            sentiment_distribution=theme.sentiment,
+                            auto_generated=True,
+                            last_analysis_date=now,
+                            metadata={'content_snippets': theme.snippets},
+                        )
+                        for theme in new_themes.values()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['organization', 'name'],
+                    update_fields=['last_analysis_date', 'updated_at'],
+                )
+                # Rows that already existed keep their own primary key
+                for name, theme_id in Theme.objects.filter(
+                    organization_id=organization_id, name__in=list(new_themes)
+                ).values_list('name', 'id'):
+                    new_themes[name].theme_id = theme_id
+                summary.themes_created += len(new_themes)
+
+            links = {}
+            for assignment in result.get('feedback_assignments') or []:
+                if not isinstance(assignment, dict):
+                    continue
+                index = assignment.get('feedback_index')
+                if not isinstance(index, int) or not 0 <= index < len(chunk):
+                    continue
+                feedback_id = chunk[index][0]
+                for theme_assignment in assignment.get('themes') or []:
+                    if not isinstance(theme_assignment, dict):
+                        continue
+                    theme = canonical.get(theme_assignment.get('theme_name'))
+                    score = theme_assignment.get('relevance_score')
+                    if theme is None or not isinstance(score, (int, float)) or score < min_relevance_score:
+                        continue
+                    key = (feedback_id, theme.theme_id)
+                    links[key] = max(links.get(key, 0.0), min(1.0, float(score)))
+
+            if links:
+                # Occurrence and sentiment counts grow by the links this run adds
+                existing = set(FeedbackTheme.objects.filter(
+                    feedback_id__in={feedback_id for feedback_id, _theme_id in links},
+                    theme_id__in={theme_id for _feedback_id, theme_id in links},
+                ).values_list('feedback_id', 'theme_id'))
+                themes_by_id = {theme.theme_id: theme for theme in canonical.values()}
+                labels = {feedback_id: label for feedback_id, _content, label in chunk}
+                for feedback_id, theme_id in links.keys() - existing:
+                    themes_by_id[theme_id].link(labels[feedback_id])
+
+                FeedbackTheme.objects.bulk_create(
+                    [
+                        FeedbackTheme(
+                            feedback_id=feedback_id,
+                            theme_id=theme_id,
+                            relevance_score=score,
+                            is_primary=score > 0.8,
+                        )
+                        for (feedback_id, theme_id), score in links.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['feedback', 'theme'],
+                    update_fields=['relevance_score', 'is_primary', 'updated_at'],
+                )
+                summary.links_written += len(links)
+
+            Feedback.objects.filter(id__in=[feedback_id for feedback_id, _content, _label in chunk]).update(
+                ai_analyzed=True,
+                ai_analysis_date=now,
+                updated_at=now,
+            )
+        summary.feedback_count += len(chunk)
+
+    def _finalize(self, merger: ThemeMerger, organization_id) -> None:
+        """
+        Write merged keywords, snippets, sentiment and occurrence counts of
+        touched themes; the counts were kept in memory by _save_chunk
+        """
+        from core.models import Theme
+
+        touched = {theme.theme_id: theme for theme in merger.themes if theme.touched and theme.theme_id}
+        if not touched:
+            return
+        now = timezone.now()
+        rows = []
+        for theme in Theme.objects.filter(id__in=list(touched)):
+            merged = touched[theme.pk]
+            theme.keywords = merged.keywords
+            theme.sentiment_distribution = merged.sentiment
+            theme.metadata = dict(theme.metadata or {}, content_snippets=merged.snippets)
+            theme.occurrence_count = merged.occurrences
+            theme.last_analysis_date = now
+            theme.updated_at = now
+            rows.append(theme)
+        Theme.objects.bulk_update(rows, [
+            'keywords', 'sentiment_distribution', 'metadata', 'occurrence_count',
+            'last_analysis_date', 'updated_at',
+        ], batch_size=500)
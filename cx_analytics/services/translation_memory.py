@@ -0,0 +1,102 @@
+# services/translation_memory.py
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_BATCH_SIZE = 500
+
+
+def normalize_source(text: Optional[str]) -> str:
+    """
+    Whitespace-collapsed source text. Case and punctuation are kept: unlike
+    sentiment, a translation has to reproduce them.
+    """
+    if not text:
+        return ''
+    return ' '.join(str(text).split())
+
+
+def make_memory_key(text: str, source_language: Optional[str], target_language: str) -> str:
+    """sha256 over the normalized source text and the language pair"""
+    payload = '\x00'.join([
+        (source_language or 'auto').lower(),
+        (target_language or '').lower(),
+        normalize_source(text),
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def lookup_translations(memory_keys: Iterable[str]) -> Dict[str, str]:
+    """
+    Bulk lookup of translated texts by memory key. A batch of up to
+    LOOKUP_BATCH_SIZE keys is one query; use counts are bumped in one
+    more update per batch.
+    """
+    from core.models import TranslationMemory
+
+    keys = list(dict.fromkeys(memory_keys))
+    found: Dict[str, str] = {}
+    try:
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + LOOKUP_BATCH_SIZE]
+            rows = TranslationMemory.objects.filter(memory_key__in=batch).values_list('memory_key', 'translated_text')
+            found.update(rows)
+        if found:
+            TranslationMemory.objects.filter(memory_key__in=list(found)).update(
+                use_count=F('use_count') + 1, last_used_at=timezone.now()
+            )
+    except Exception as e:
+        logger.warning(f"Translation memory lookup failed: {str(e)}")
+    return found
+
+
+def store_translations(entries: Iterable[Tuple[str, Optional[str], str, str]], model_name: str) -> int:
+    """
+    Save ``(source_text, source_language, target_language, translated_text)``
+    tuples. Existing keys are left untouched, so the first model to
+    translate a text keeps the entry.
+    """
+    from core.models import TranslationMemory
+
+    rows = {}
+    for source_text, source_language, target_language, translated_text in entries:
+        if not source_text or not translated_text:
+            continue
+        memory_key = make_memory_key(source_text, source_language, target_language)
+        rows[memory_key] = TranslationMemory(
+            memory_key=memory_key,
+            source_language=(source_language or 'auto')[:10],
+            target_language=target_language[:10],
+            source_text=source_text,
+            translated_text=translated_text,
+            model_name=model_name[:100],
+        )
+    if not rows:
+        return 0
+    try:
+        TranslationMemory.objects.bulk_create(list(rows.values()), ignore_conflicts=True)
+    except Exception as e:
+        logger.warning(f"Translation memory store failed: {str(e)}")
+        return 0
+    return len(rows)
+
+
+def translation_memory_stats() -> Dict[str, Dict[str, int]]:
+    """Entries and reuse counts per language pair"""
+    from core.models import TranslationMemory
+
+    rows = TranslationMemory.objects.values('source_language', 'target_language').annotate(
+        entries=Count('id'), uses=Sum('use_count')
+    ).order_by('source_language', 'target_language')
+    return {
+        f"{row['source_language']}->{row['target_language']}": {
+            'entries': row['entries'],
+            'uses': row['uses'] or 0,
+        }
+        for row in rows
+    }
@@ -1,38 +1,53 @@
+import json
 import logging
-import os
-from typing import Optional, Dict, Any
-import google.generativeai as genai
+from typing import Optional, Dict, Any, List
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 import re 
+
+from .batch_analysis import call_with_backoff, get_rate_limiter, is_quota_error
+from .gemini_client import get_api_key, get_client_registry
+from .json_extraction import extract_json_array
+from .language_detection import detect_language_locally
+from .translation_memory import (
+    lookup_translations,
+    make_memory_key,
+    store_translations,
+    translation_memory_stats,
+)
+
 logger = logging.getLogger(__name__)
 
+# Packed batch translation: several short texts share one prompt
+TRANSLATION_PACK_MAX_ITEMS = 25
+TRANSLATION_PACK_MAX_CHARS = 8000
+
+# Local detections at or above this confidence skip the Gemini request
+DEFAULT_LANGUAGE_DETECTION_MIN_CONFIDENCE = 0.8
+
 class TranslationService:
     """
     Service class for translating text using Google's Gemini AI
     """
     
     def __init__(self):
-        self.api_key = getattr(settings, 'GEMINI_API_KEY', None)
-        if not self.api_key:
-            self.api_key = os.getenv('GEMINI_API_KEY')
-            
+        self.api_key = get_api_key()
         self.model_name = getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-flash')
         self.model = None
+        # Same process-wide bucket as the analyzer for this API key
+        self.rate_limiter = get_rate_limiter(self.api_key)
         self.configure_client()
     
     def configure_client(self):
-        """Configure the Gemini AI client"""
+        """Take the shared model handle from the process-wide client registry"""
         try:
             if not self.api_key:
                 logger.warning("GEMINI_API_KEY not found in settings or environment variables")
                 self.is_configured_flag = False
                 return
             
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(self.model_name)
+            self.model = get_client_registry().get_model(self.model_name, self.api_key)
             self.is_configured_flag = True
-            logger.info(f"Translation service configured with model: {self.model_name}")
         except Exception as e:
             logger.error(f"Failed to configure translation service: {str(e)}")
             self.is_configured_flag = False
@@ -54,11 +69,24 @@ class TranslationService:
         if not text or not text.strip():
             raise ValueError("Text to translate cannot be empty")
         
+        # Repeated texts come from the translation memory
+        memory_key = make_memory_key(text, source_language, target_language)
+        remembered = lookup_translations([memory_key]).get(memory_key)
+        if remembered is not None:
+            logger.debug(f"Translation memory hit for {source_language} -> {target_language}")
+            return remembered
+        
         # Check if service is configured
         if not self.is_configured():
             logger.error("Translation service not properly configured")
             raise ValueError("Translation service is not configured. Please check your API key.")
         
+        translated_text = self._translate_uncached(text, source_language, target_language)
+        store_translations([(text, source_language, target_language, translated_text)], self.model_name)
+        return translated_text
+    
+    def _translate_uncached(self, text: str, source_language: str, target_language: str) -> str:
+        """One Gemini translation request"""
         try:
             if self.model is None:
                 self.configure_client()
@@ -99,18 +127,7 @@ class TranslationService:
             if not response or not response.text:
                 raise ValueError("Empty response from translation service")
             
-            translated_text = response.text.strip()
-            
-            # Clean up the response
-            # Remove quotes and any prefix like "Translation:"
-            if translated_text.startswith('"') and translated_text.endswith('"'):
-                translated_text = translated_text[1:-1]
-            
-            # Remove common prefixes
-            prefixes = ['translation:', 'translated text:', 'result:']
-            for prefix in prefixes:
-                if translated_text.lower().startswith(prefix):
-                    translated_text = translated_text[len(prefix):].strip()
+            translated_text = self._clean_translation(response.text)
             
             logger.info(f"Successfully translated text from {source_language} to {target_language}")
             logger.debug(f"Original ({len(text)} chars): {text[:50]}...")
@@ -122,6 +139,190 @@ class TranslationService:
             logger.error(f"Error translating text: {str(e)}")
             raise
     
+    def _clean_translation(self, translated_text: str) -> str:
+        """Remove quotes and any prefix like 'Translation:'"""
+        translated_text = translated_text.strip()
+        if translated_text.startswith('"') and translated_text.endswith('"'):
+            translated_text = translated_text[1:-1]
+        
+        # Remove common prefixes
+        prefixes = ['translation:', 'translated text:', 'result:']
+        for prefix in prefixes:
+            if translated_text.lower().startswith(prefix):
+                translated_text = translated_text[len(prefix):].strip()
+        return translated_text
+    
+    def translate_batch(self, texts: List[str], target_language: str = 'en',
+                        source_languages: Optional[List[Optional[str]]] = None) -> List[Optional[str]]:
+        """
+        Translate many texts at once
+        
+        Hits are resolved with one translation-memory query per 500 texts;
+        distinct misses are translated in packed requests and saved back.
+        
+        Args:
+            texts: Texts to translate
+            target_language: Target language code
+            source_languages: Source language per text (None or 'auto' to detect)
+        
+        Returns:
+            Translations in input order; None where a text was empty or
+            could not be translated
+        
+        Raises:
+            Quota errors that persist after backoff; translations finished
+            before them are still saved to the memory
+        """
+        if source_languages is None:
+            source_languages = ['auto'] * len(texts)
+        source_languages = [
+            self._resolve_source_language(text, language) for text, language in zip(texts, source_languages)
+        ]
+        
+        keys = [
+            make_memory_key(text, language, target_language) if text and text.strip() else None
+            for text, language in zip(texts, source_languages)
+        ]
+        translations = dict(lookup_translations(key for key in keys if key))
+        
+        # Texts detected as already being in the target language are kept as they are
+        for key, text, language in zip(keys, texts, source_languages):
+            if key and language == target_language:
+                translations.setdefault(key, text)
+        
+        # Each distinct miss is translated once, however often it repeats
+        misses = {}
+        for key, text, language in zip(keys, texts, source_languages):
+            if key and key not in translations and key not in misses:
+                misses[key] = {'text': text, 'source_language': language}
+        
+        if misses:
+            if not self.is_configured():
+                logger.warning(f"Translation service not configured, {len(misses)} texts left untranslated")
+            else:
+                logger.info(
+                    f"Translation memory resolved {len(set(filter(None, keys))) - len(misses)} texts, "
+                    f"translating {len(misses)} to {target_language}"
+                )
+                translated = {}
+                try:
+                    self._translate_misses(misses, target_language, translated)
+                finally:
+                    store_translations(
+                        [
+                            (misses[key]['text'], misses[key]['source_language'], target_language, text)
+                            for key, text in translated.items()
+                        ],
+                        self.model_name,
+                    )
+                translations.update(translated)
+        
+        return [translations.get(key) if key else None for key in keys]
+    
+    def _resolve_source_language(self, text: Optional[str], source_language: Optional[str]) -> str:
+        """Replace 'auto' with a confident local detection"""
+        if source_language and source_language != 'auto':
+            return source_language
+        if text and text.strip():
+            guess = self._detect_locally(text)
+            if guess is not None and guess.confidence >= self._min_detection_confidence():
+                return guess.language
+        return 'auto'
+    
+    def _translate_misses(self, misses: Dict[str, Dict[str, str]], target_language: str,
+                          translated: Dict[str, str]) -> Dict[str, str]:
+        """
+        Translate memory misses pack by pack into ``translated``; failed
+        items are retried one by one. Every request takes a token from the
+        rate limiter and backs off on quota errors, which are raised once
+        retries run out.
+        """
+        for pack in self._plan_packs(list(misses.items())):
+            if len(pack) > 1:
+                try:
+                    translated.update(call_with_backoff(
+                        lambda: self._translate_pack(pack, target_language), self.rate_limiter
+                    ))
+                except Exception as e:
+                    if is_quota_error(e):
+                        raise
+                    logger.warning(f"Packed translation of {len(pack)} texts failed, retrying individually: {str(e)}")
+            for key, item in pack:
+                if key in translated:
+                    continue
+                try:
+                    translated[key] = call_with_backoff(
+                        lambda: self._translate_uncached(item['text'], item['source_language'], target_language),
+                        self.rate_limiter,
+                    )
+                except Exception as e:
+                    if is_quota_error(e):
+                        raise
+                    logger.error(f"Translation failed: {str(e)}")
+        return translated
+    
+    def _plan_packs(self, entries: List[Any]) -> List[List[Any]]:
+        """Group (key, item) entries by count and total length"""
+        packs = []
+        current = []
+        current_chars = 0
+        for entry in entries:
+            length = len(entry[1]['text'])
+            if current and (len(current) >= TRANSLATION_PACK_MAX_ITEMS
+                            or current_chars + length > TRANSLATION_PACK_MAX_CHARS):
+                packs.append(current)
+                current = []
+                current_chars = 0
+            current.append(entry)
+            current_chars += length
+        if current:
+            packs.append(current)
+        return packs
+    
+    def _translate_pack(self, pack: List[Any], target_language: str) -> Dict[str, str]:
+        """One request for several texts; returns {memory_key: translation}"""
+        if self.model is None:
+            self.configure_client()
+        
+        keyed = {f'item_{index}': entry for index, entry in enumerate(pack)}
+        payload = [
+            {'id': item_id, 'source_language': item['source_language'], 'text': item['text']}
+            for item_id, (key, item) in keyed.items()
+        ]
+        prompt = f"""Translate each item's "text" to {target_language}.
+        "source_language" is the item's language, or "auto" to detect it.
+        Provide natural and accurate translations.
+        Return ONLY a JSON array of objects with "id" and "translation", one per item, in any order.
+        
+        Items:
+        {json.dumps(payload, ensure_ascii=False)}
+        
+        JSON:"""
+        
+        response = self.model.generate_content(
+            prompt,
+            generation_config={
+                "temperature": 0.1,
+                "top_p": 0.8,
+                "top_k": 40,
+                "max_output_tokens": min(32768, 512 + 2 * sum(len(item['text']) for _key, item in pack)),
+            }
+        )
+        if not response or not response.text:
+            raise ValueError("Empty response from translation service")
+        
+        # Translations cut off by max_output_tokens are dropped and retried
+        translated = {}
+        for element in extract_json_array(response.text):
+            if not isinstance(element, dict):
+                continue
+            entry = keyed.get(str(element.get('id', '')))
+            translation = element.get('translation')
+            if entry is None or not isinstance(translation, str) or not translation.strip():
+                continue
+            translated[entry[0]] = self._clean_translation(translation)
+        return translated
+    
     def detect_language(self, text: str) -> str:
         """
         Detect the language of the given text
@@ -135,11 +336,33 @@ class TranslationService:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty for language detection")
         
+        # The offline detector answers the common cases without a request
+        guess = self._detect_locally(text)
+        if guess is not None and guess.confidence >= self._min_detection_confidence():
+            return guess.language
+        
         # Check if service is configured
         if not self.is_configured():
-            logger.warning("Translation service not configured - using default 'en'")
-            return 'en'
+            fallback = guess.language if guess is not None else 'en'
+            logger.warning(f"Translation service not configured - using local guess '{fallback}'")
+            return fallback
         
+        return self._detect_language_remote(text)
+    
+    def _detect_locally(self, text: str):
+        guess = detect_language_locally(text)
+        if guess is None:
+            return None
+        supported = {code for code, _name in self.get_supported_languages()}
+        return guess if guess.language in supported else None
+    
+    def _min_detection_confidence(self) -> float:
+        return getattr(
+            settings, 'LANGUAGE_DETECTION_MIN_CONFIDENCE', DEFAULT_LANGUAGE_DETECTION_MIN_CONFIDENCE
+        )
+    
+    def _detect_language_remote(self, text: str) -> str:
+        """Language detection with a Gemini request"""
         try:
             if self.model is None:
                 self.configure_client()
@@ -207,12 +430,19 @@ class TranslationService:
     
     def health_check(self) -> Dict[str, Any]:
         """
-        Check if translation service is healthy
+        Check if translation service is healthy. The live probe result is
+        shared process-wide for GEMINI_HEALTH_CHECK_TTL seconds.
         """
+        if not self.is_configured():
+            return {'healthy': False, 'error': 'Service not configured'}
+        
+        result = get_client_registry().health_check(f'translation:{self.model_name}', self._probe_health)
+        result['translation_memory'] = translation_memory_stats()
+        return result
+    
+    def _probe_health(self) -> Dict[str, Any]:
+        """One live translation request"""
         try:
-            if not self.is_configured():
-                return {'healthy': False, 'error': 'Service not configured'}
-            
             test_prompt = "Translate 'hello' to Spanish. Return only the translation."
             response = self.model.generate_content(test_prompt)
             
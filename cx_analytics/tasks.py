@@ -0,0 +1,49 @@
+# tasks.py
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def run_analysis_job(self, job_pk):
+    """
+    Celery task running one AIAnalysisJob. A job interrupted by a worker
+    crash is resumed from its last checkpoint once
+    requeue_stale_analysis_jobs re-queues it, so the task itself is not
+    retried.
+    """
+    from cx_analytics.services.analysis_jobs import run_job
+    
+    status = run_job(job_pk)
+    logger.info(f"Analysis job {job_pk} finished with status {status}")
+
+
+@shared_task
+def requeue_stale_analysis_jobs(minutes=None):
+    """
+    Re-queue running AIAnalysisJobs whose worker died, scheduled by
+    CELERY_BEAT_SCHEDULE. A job is stale after ``minutes`` without a
+    checkpoint (AI_JOB_STALE_MINUTES by default).
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from cx_analytics.services.analysis_jobs import requeue_stale_jobs
+    
+    minutes = minutes or getattr(settings, 'AI_JOB_STALE_MINUTES', 30)
+    requeued = requeue_stale_jobs(timedelta(minutes=minutes))
+    if requeued:
+        logger.info(f"Re-queued stale analysis jobs: {', '.join(requeued)}")
+
+
+@shared_task
+def build_metric_snapshots(days=None):
+    """
+    Nightly MetricSnapshot build for every active organization, scheduled
+    by CELERY_BEAT_SCHEDULE. ``days`` also rebuilds the last N closed days
+    so deleted rows are picked up.
+    """
+    from cx_analytics.services.metric_snapshots import build_metric_snapshots as build
+    
+    results = build(days=days)
+    logger.info(f"Metric snapshots rebuilt for {len(results)} organizations: {sum(results.values())} days")
@@ -1,3 +1,616 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.models import (
+    Customer,
+    AIAnalysisJob,
+    Feedback,
+    FeedbackCounter,
+    FeedbackTheme,
+    MetricSnapshot,
+    Organization,
+    SentimentAnalysis,
+    Theme,
+)
+from cx_analytics.services.analysis_jobs import (
+    JOB_CANCELLED,
+    JOB_COMPLETED,
+    JOB_FEEDBACK_IMPORT,
+    JOB_PENDING,
+    JOB_RUNNING,
+    JOB_SENTIMENT_ANALYSIS,
+    JOB_THEME_EXTRACTION,
+    cancel_job,
+    create_job,
+    requeue_stale_jobs,
+    resume_job,
+    run_job,
+)
+from cx_analytics.services.batch_analysis import (
+    BatchItem,
+    BatchSentimentEngine,
+    TokenBucket,
+    analyze_feedback_queryset,
+    call_with_backoff,
+)
+from cx_analytics.services.columnar_export import PYARROW_AVAILABLE, ColumnarExporter
+from cx_analytics.services.gemini_analyzer import GeminiSentimentAnalyzer
+from cx_analytics.services.json_extraction import JSONExtractionError, extract_json, extract_json_array, extract_json_object
+from cx_analytics.services.translation_service import TRANSLATION_PACK_MAX_ITEMS, TranslationService
+from cx_analytics.services.language_detection import LanguageDetector
+from cx_analytics.services.metric_snapshots import MetricSnapshotBuilder, MetricSnapshotReader, day_bounds
+from cx_analytics.services.theme_extraction import ThemeExtractionPipeline, ThemeExtractionSummary, ThemeMerger
+
+
+class QuotaError(Exception):
+    """Stands in for google.api_core ResourceExhausted"""
+
+    def __init__(self):
+        super().__init__('429 Resource exhausted: quota exceeded')
+
+
+class FakeRateLimiter:
+    """Counts acquisitions instead of sleeping"""
+
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1.0, timeout=None):
+        self.acquired += 1
+        return True
+
+
+class FakeGeminiAnalyzer:
+    """
+    Local stand-in for GeminiSentimentAnalyzer. Content containing
+    'good' is positive, anything else negative; ``quota_errors`` calls
+    fail with a quota error first and ``fail_on`` content always fails.
+    """
+    api_key = 'test-key'
+
+    def __init__(self, quota_errors=0, fail_on=None, score=0.8):
+        self.quota_errors = quota_errors
+        self.fail_on = fail_on
+        self.score = score
+        self.calls = []
+
+    def analyze_feedback(self, content, language='en', analysis_config=None):
+        self.calls.append(content)
+        if self.quota_errors:
+            self.quota_errors -= 1
+            raise QuotaError()
+        if self.fail_on and self.fail_on in content:
+            raise ValueError('Malformed response')
+        score = self.score if 'good' in content else -self.score
+        return {
+            'overall_sentiment': {
+                'score': score,
+                'label': 'positive' if score > 0 else 'negative',
+                'confidence': 0.9,
+            },
+            'urgency': {'level': 'low', 'indicators': []},
+            'analysis_metadata': {'model_used': 'fake-gemini', 'model_version': 'test'},
+        }
+
+
+class MetricSnapshotReaderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        cls.customer = Customer.objects.create(
+            organization=cls.organization, customer_id='CUST-1', email='customer@example.com'
+        )
+
+    def create_feedback(self, days_ago):
+        feedback = Feedback.objects.create(
+            organization=self.organization, customer=self.customer, content='Feedback'
+        )
+        day = timezone.localdate() - timedelta(days=days_ago)
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=day_bounds(day)[0] + timedelta(hours=12))
+        return feedback
+
+    def test_closed_days_without_snapshot_are_read_live(self):
+        self.create_feedback(days_ago=2)
+
+        reader = MetricSnapshotReader.for_last_days(self.organization, 3)
+        reader.backfill = False
+
+        self.assertEqual(reader.totals('feedback')['count'], 1)
+        self.assertFalse(MetricSnapshot.objects.filter(organization=self.organization).exists())
+
+    def test_missing_days_are_backfilled_without_moving_the_watermark(self):
+        self.create_feedback(days_ago=5)
+        MetricSnapshotBuilder(self.organization).run()
+        watermark = MetricSnapshotBuilder(self.organization).get_watermark()
+        self.create_feedback(days_ago=2)
+
+        reader = MetricSnapshotReader(
+            self.organization, timezone.localdate() - timedelta(days=6), backfill=True
+        )
+
+        self.assertEqual(reader.totals('feedback')['count'], 2)
+        self.assertTrue(MetricSnapshot.objects.filter(
+            organization=self.organization,
+            period_type='daily',
+            snapshot_date=timezone.localdate() - timedelta(days=2),
+        ).exists())
+        self.assertEqual(MetricSnapshotBuilder(self.organization).get_watermark(), watermark)
+
+
+@mock.patch('cx_analytics.services.batch_analysis.time.sleep')
+class CallWithBackoffTests(SimpleTestCase):
+
+    def test_quota_errors_are_retried_with_growing_delays(self, sleep):
+        analyzer = FakeGeminiAnalyzer(quota_errors=3)
+        limiter = FakeRateLimiter()
+
+        with mock.patch('cx_analytics.services.batch_analysis.random.uniform', side_effect=lambda low, high: high):
+            result = call_with_backoff(lambda: analyzer.analyze_feedback('good'), limiter, base_delay=1.0)
+
+        self.assertEqual(result['overall_sentiment']['label'], 'positive')
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1.0, 2.0, 4.0])
+        # Every attempt, including retries, takes a token
+        self.assertEqual(limiter.acquired, 4)
+
+    def test_gives_up_after_max_retries(self, sleep):
+        analyzer = FakeGeminiAnalyzer(quota_errors=10)
+
+        with self.assertRaises(QuotaError):
+            call_with_backoff(lambda: analyzer.analyze_feedback('good'), max_retries=2)
+        self.assertEqual(len(analyzer.calls), 3)
+
+    def test_other_errors_are_not_retried(self, sleep):
+        analyzer = FakeGeminiAnalyzer(fail_on='bad')
+
+        with self.assertRaises(ValueError):
+            call_with_backoff(lambda: analyzer.analyze_feedback('bad'))
+        self.assertEqual(len(analyzer.calls), 1)
+        sleep.assert_not_called()
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_acquire_times_out_when_empty(self):
+        bucket = TokenBucket(rate=0.001, capacity=1)
+
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0.01))
+
+
+class BatchSentimentEngineTests(SimpleTestCase):
+
+    def test_results_keep_input_order_and_isolate_failures(self):
+        engine = BatchSentimentEngine(
+            analyzer=FakeGeminiAnalyzer(fail_on='broken'), rate_limiter=FakeRateLimiter(), max_workers=4
+        )
+        items = [BatchItem(index, text) for index, text in enumerate(['good', 'broken', 'meh', 'good too'])]
+
+        results = engine.analyze(items)
+
+        self.assertEqual([result.id for result in results], [0, 1, 2, 3])
+        self.assertEqual([result.success for result in results], [True, False, True, True])
+        self.assertEqual(results[2].result['overall_sentiment']['label'], 'negative')
+
+
+class AnalyzeFeedbackQuerysetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        customer = Customer.objects.create(
+            organization=cls.organization, customer_id='CUST-1', email='customer@example.com'
+        )
+        for index in range(5):
+            Feedback.objects.create(
+                organization=cls.organization,
+                customer=customer,
+                content=f'good feedback {index}' if index % 2 == 0 else f'slow feedback {index}',
+            )
+
+    def run_analysis(self, analyzer, **options):
+        engine = BatchSentimentEngine(analyzer=analyzer, rate_limiter=FakeRateLimiter(), max_workers=2)
+        return analyze_feedback_queryset(
+            Feedback.objects.filter(organization=self.organization).order_by('created_at'),
+            {}, engine=engine, packed=False, **options
+        )
+
+    def test_chunks_report_progress_and_write_results(self):
+        progress = []
+
+        analyzed = self.run_analysis(
+            FakeGeminiAnalyzer(), chunk_size=2, progress=lambda done, ok: progress.append((done, ok))
+        )
+
+        self.assertEqual(analyzed, 5)
+        self.assertEqual(progress, [(2, 2), (4, 4), (5, 5)])
+        self.assertEqual(SentimentAnalysis.objects.filter(organization=self.organization).count(), 5)
+        self.assertEqual(Feedback.objects.filter(organization=self.organization, ai_analyzed=True).count(), 5)
+        counter = FeedbackCounter.objects.get(organization=self.organization, dimension='ai_analyzed', value='true')
+        self.assertEqual(counter.count, 5)
+
+    def test_rerun_updates_existing_analyses(self):
+        self.run_analysis(FakeGeminiAnalyzer(score=0.4), chunk_size=3)
+        self.run_analysis(FakeGeminiAnalyzer(score=0.9), chunk_size=3)
+
+        analyses = SentimentAnalysis.objects.filter(organization=self.organization)
+        self.assertEqual(analyses.count(), 5)
+        self.assertEqual(sorted({abs(analysis.overall_score) for analysis in analyses}), [0.9])
+        self.assertEqual(
+            Feedback.objects.filter(organization=self.organization, sentiment_score=0.9).count(), 3
+        )
+
+
+class NullResultCache:
+
+    def get(self, key):
+        return None
+
+    def set(self, *args, **kwargs):
+        pass
+
+
+@mock.patch('cx_analytics.services.batch_analysis.time.sleep')
+class AnalyzeFeedbackPackTests(SimpleTestCase):
+
+    def make_analyzer(self):
+        # Skips __init__, which configures the Gemini client
+        analyzer = GeminiSentimentAnalyzer.__new__(GeminiSentimentAnalyzer)
+        analyzer.model_name = 'fake-gemini'
+        analyzer.result_cache = NullResultCache()
+        analyzer.rate_limiter = FakeRateLimiter()
+        return analyzer
+
+    def pack(self, count):
+        return [{'id': index, 'content': f'good feedback {index}', 'language': 'en'} for index in range(count)]
+
+    def test_quota_error_on_packed_request_is_raised(self, sleep):
+        analyzer = self.make_analyzer()
+
+        with mock.patch.object(analyzer, '_generate', side_effect=QuotaError()):
+            with self.assertRaises(QuotaError):
+                analyzer.analyze_feedback_pack(self.pack(3))
+
+    def test_individual_retries_are_rate_limited(self, sleep):
+        analyzer = self.make_analyzer()
+        fake = FakeGeminiAnalyzer(quota_errors=1)
+
+        with mock.patch.object(analyzer, '_generate', side_effect=ValueError('Malformed response')), \
+                mock.patch.object(analyzer, 'analyze_feedback', side_effect=fake.analyze_feedback):
+            results = analyzer.analyze_feedback_pack(self.pack(3))
+
+        self.assertEqual(sorted(results), [0, 1, 2])
+        # Three items plus one retry after the quota error
+        self.assertEqual(analyzer.rate_limiter.acquired, 4)
+
+
+@mock.patch('cx_analytics.services.batch_analysis.time.sleep')
+@mock.patch('cx_analytics.services.translation_service.lookup_translations', side_effect=lambda keys: {})
+@mock.patch('cx_analytics.services.translation_service.store_translations')
+class TranslateBatchTests(SimpleTestCase):
+
+    def make_service(self):
+        # Skips __init__, which configures the Gemini client
+        service = TranslationService.__new__(TranslationService)
+        service.model_name = 'fake-gemini'
+        service.is_configured_flag = True
+        service.rate_limiter = FakeRateLimiter()
+        return service
+
+    def texts(self, packs):
+        return [f'texto {index}' for index in range(TRANSLATION_PACK_MAX_ITEMS * packs)]
+
+    def translate_pack(self, pack, target_language):
+        return {key: item['text'].replace('texto', 'text') for key, item in pack}
+
+    def test_every_pack_request_is_rate_limited(self, store, lookup, sleep):
+        service = self.make_service()
+
+        with mock.patch.object(service, '_translate_pack', side_effect=self.translate_pack):
+            translated = service.translate_batch(self.texts(3), 'en', ['es'] * TRANSLATION_PACK_MAX_ITEMS * 3)
+
+        self.assertEqual(translated[0], 'text 0')
+        self.assertEqual(service.rate_limiter.acquired, 3)
+
+    def test_quota_errors_propagate_after_saving_finished_packs(self, store, lookup, sleep):
+        service = self.make_service()
+
+        def first_pack_only(pack, target_language):
+            if service.rate_limiter.acquired > 1:
+                raise QuotaError()
+            return self.translate_pack(pack, target_language)
+
+        with mock.patch.object(service, '_translate_pack', side_effect=first_pack_only):
+            with self.assertRaises(QuotaError):
+                service.translate_batch(self.texts(2), 'en', ['es'] * TRANSLATION_PACK_MAX_ITEMS * 2)
+
+        saved = store.call_args.args[0]
+        self.assertEqual(len(saved), TRANSLATION_PACK_MAX_ITEMS)
+
+
+class LanguageDetectorTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.detector = LanguageDetector()
+
+    def test_shared_scripts_are_split_by_marker_letters(self):
+        cases = [
+            ('ru', 'Курьер оставил посылку под дождём, и коробка промокла насквозь.'),
+            ('uk', 'Підкажіть, будь ласка, коли вийде нова версія?'),
+            ('ar', 'هل يمكنكم إخباري متى سيتوفر الإصدار الجديد؟'),
+            ('fa', 'طراحی جدید را خیلی دوست دارم، استفاده از آن خیلی راحت‌تر از قبل است.'),
+        ]
+        for language, text in cases:
+            with self.subTest(language=language):
+                self.assertEqual(self.detector.detect(text).language, language)
+
+    def test_shared_script_without_markers_is_not_confident(self):
+        guess = self.detector.detect('Спасибо за помощь')
+
+        self.assertEqual(guess.language, 'ru')
+        self.assertLess(guess.confidence, 0.8)
+
+    def test_unprofiled_latin_languages_are_not_confident(self):
+        texts = [
+            'Saya suka desain barunya, jauh lebih mudah digunakan daripada sebelumnya.',
+            'Kan I fortælle mig, hvornår den nye version bliver tilgængelig?',
+            'Nový design se mi moc líbí, používá se mnohem snadněji než dřív.',
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertLess(self.detector.detect(text).confidence, 0.8)
+
+    def test_profiled_languages_stay_confident(self):
+        guess = self.detector.detect('Das Essen war kalt und der Kellner hat unsere Getränke vergessen.')
+
+        self.assertEqual(guess.language, 'de')
+        self.assertGreaterEqual(guess.confidence, 0.8)
+
+
+class JSONExtractionTests(SimpleTestCase):
+
+    def test_repairs_complete_object(self):
+        self.assertEqual(
+            extract_json_object("```json\n{sentiment: 'positive', 'score': 0.5, flagged: False,}\n```"),
+            {'sentiment': 'positive', 'score': 0.5, 'flagged': False},
+        )
+
+    def test_truncated_object_raises(self):
+        for text in ('{"label": "positive", "summary": "The staff were', '{"label": "positive", "score": 0.8'):
+            with self.subTest(text=text):
+                with self.assertRaises(JSONExtractionError):
+                    extract_json_object(text)
+
+    def test_truncated_array_drops_open_item(self):
+        cases = [
+            '[{"id": "item_0", "score": 0.5}, {"id": "item_1", "score": -0.',
+            '[{"id": "item_0", "score": 0.5}, {"id": "item_1", "flagged": tr',
+            '[{"id": "item_0", "score": 0.5}, {"id": "item_1", "translation": "The parcel',
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                self.assertEqual(extract_json_array(text), [{'id': 'item_0', 'score': 0.5}])
+
+    def test_truncated_number_is_never_completed(self):
+        for text in ('[1, 2, -0.', '[1, 2, 3', '[true, fal'):
+            with self.subTest(text=text):
+                with self.assertRaises(JSONExtractionError):
+                    extract_json(text, expect='[')
+
+
+class StubThemeAnalyzer:
+    """Assigns 'Late delivery' to content mentioning 'late' and 'Pricing' to the rest"""
+    api_key = 'test-key'
+
+    def __init__(self):
+        self.chunks = []
+
+    def analyze_feedback_batch(self, contents, language='en'):
+        self.chunks.append(list(contents))
+        names = ['Late delivery' if 'late' in content else 'Pricing' for content in contents]
+        return {
+            'themes': [
+                {
+                    'name': name,
+                    'description': f'{name} feedback',
+                    'category': 'delivery' if name == 'Late delivery' else 'pricing',
+                    'keywords': [name.lower()],
+                    'sentiment_analysis': {'negative_count': names.count(name)},
+                }
+                for name in sorted(set(names))
+            ],
+            'feedback_assignments': [
+                {'feedback_index': index, 'themes': [{'theme_name': name, 'relevance_score': 0.9}]}
+                for index, name in enumerate(names)
+            ],
+        }
+
+
+class ThemeExtractionPipelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        customer = Customer.objects.create(
+            organization=cls.organization, customer_id='CUST-1', email='customer@example.com'
+        )
+        for content, label in (
+            ('Parcel came late', 'negative'),
+            ('Too expensive', 'neutral'),
+            ('Courier was late again', 'very_negative'),
+        ):
+            Feedback.objects.create(
+                organization=cls.organization, customer=customer, content=content, sentiment_label=label
+            )
+
+    def test_run_merges_themes_across_chunks(self):
+        analyzer = StubThemeAnalyzer()
+        pipeline = ThemeExtractionPipeline(
+            analyzer, max_workers=2, max_items=2, rate_limiter=FakeRateLimiter()
+        )
+
+        summary = pipeline.run(
+            Feedback.objects.order_by('created_at'), self.organization.pk, min_relevance_score=0.7
+        )
+
+        self.assertEqual(len(analyzer.chunks), 2)
+        self.assertEqual((summary.feedback_count, summary.failed_chunks, summary.links_written), (3, 0, 3))
+        themes = {theme.name: theme for theme in Theme.objects.filter(organization=self.organization)}
+        self.assertEqual(set(themes), {'Late delivery', 'Pricing'})
+        self.assertEqual(themes['Late delivery'].occurrence_count, 2)
+        self.assertEqual(themes['Late delivery'].sentiment_distribution, {'negative_count': 2})
+        self.assertEqual(FeedbackTheme.objects.filter(theme__organization=self.organization).count(), 3)
+        self.assertEqual(Feedback.objects.filter(organization=self.organization, ai_analyzed=True).count(), 3)
+        counter = FeedbackCounter.objects.get(organization=self.organization, dimension='ai_analyzed', value='true')
+        self.assertEqual(counter.count, 3)
+
+    def test_rerun_counts_each_link_once(self):
+        pipeline = ThemeExtractionPipeline(StubThemeAnalyzer(), max_items=2, rate_limiter=FakeRateLimiter())
+
+        for _ in range(2):
+            pipeline.run(Feedback.objects.order_by('created_at'), self.organization.pk)
+
+        theme = Theme.objects.get(organization=self.organization, name='Late delivery')
+        self.assertEqual(theme.occurrence_count, 2)
+        self.assertEqual(theme.sentiment_distribution, {'negative_count': 2})
+
+    @mock.patch('cx_analytics.theme_views.GeminiThemeAnalyzer', StubThemeAnalyzer)
+    def test_job_reanalyzes_selected_feedback(self):
+        Feedback.objects.update(ai_analyzed=True, ai_analysis_date=timezone.now() - timedelta(days=1))
+        feedback_ids = [str(pk) for pk in Feedback.objects.values_list('id', flat=True)]
+        job = create_job(self.organization, JOB_THEME_EXTRACTION, {'feedback_ids': feedback_ids})
+
+        self.assertEqual(run_job(job.pk), JOB_COMPLETED)
+
+        job.refresh_from_db()
+        self.assertEqual((job.total_items, job.processed_items), (3, 3))
+        self.assertEqual(FeedbackTheme.objects.filter(theme__organization=self.organization).count(), 3)
+
+    def test_writer_query_count_does_not_grow_with_the_chunk(self):
+        customer = Customer.objects.get(organization=self.organization)
+        for index in range(50):
+            Feedback.objects.create(organization=self.organization, customer=customer, content=f'Parcel {index} late')
+        chunk = list(Feedback.objects.filter(content__contains='late').values_list('id', 'content', 'sentiment_label'))
+        analyzer = StubThemeAnalyzer()
+        pipeline = ThemeExtractionPipeline(analyzer, rate_limiter=FakeRateLimiter())
+        merger = ThemeMerger()
+        result = analyzer.analyze_feedback_batch([content for _pk, content, _label in chunk])
+
+        # Theme upsert and ids, existing links, link upsert, Feedback update,
+        # plus the savepoint pair; then Theme read and bulk_update
+        with self.assertNumQueries(9):
+            pipeline._save_chunk(chunk, result, self.organization.pk, 0.7, merger, ThemeExtractionSummary())
+            pipeline._finalize(merger, self.organization.pk)
+
+        theme = Theme.objects.get(organization=self.organization, name='Late delivery')
+        self.assertEqual(theme.occurrence_count, 52)
+        self.assertEqual(theme.sentiment_distribution, {'negative_count': 2})
+
+
+class JobClaimTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+
+    def test_resumed_job_stops_the_cancelled_run(self):
+        job = create_job(self.organization, JOB_SENTIMENT_ANALYSIS, {'feedback_ids': []})
+        runs = []
+
+        def handler(context):
+            runs.append(context.run_id)
+            context.checkpoint(1, processed=1)
+            if len(runs) == 1:
+                # Cancelled and resumed before this run reaches its next checkpoint
+                cancel_job(job)
+                resume_job(job)
+            context.checkpoint(2, processed=1)
+            return context.state
+
+        with mock.patch.dict('cx_analytics.services.analysis_jobs.JOB_HANDLERS', {JOB_SENTIMENT_ANALYSIS: handler}):
+            first = run_job(job.pk)
+            second = run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((first, second), (JOB_CANCELLED, JOB_COMPLETED))
+        self.assertEqual(len(runs), 2)
+        self.assertNotEqual(runs[0], runs[1])
+        self.assertEqual(job.status, JOB_COMPLETED)
+        self.assertEqual(job.run_id, runs[1])
+        self.assertEqual(job.processed_items, 3)
+
+    def test_stale_run_cannot_checkpoint_a_pending_job(self):
+        job = create_job(self.organization, JOB_SENTIMENT_ANALYSIS, {'feedback_ids': []})
+
+        def handler(context):
+            AIAnalysisJob.objects.filter(pk=job.pk).update(status=JOB_PENDING)
+            context.checkpoint(1, processed=1)
+            return context.state
+
+        with mock.patch.dict('cx_analytics.services.analysis_jobs.JOB_HANDLERS', {JOB_SENTIMENT_ANALYSIS: handler}):
+            self.assertEqual(run_job(job.pk), JOB_CANCELLED)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_items), (JOB_PENDING, 0))
+
+    def test_stale_jobs_are_submitted_again(self):
+        job = create_job(self.organization, JOB_SENTIMENT_ANALYSIS, {'feedback_ids': []})
+        AIAnalysisJob.objects.filter(pk=job.pk).update(
+            status=JOB_RUNNING, updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with mock.patch('cx_analytics.services.analysis_jobs.get_job_executor') as get_executor:
+            requeued = requeue_stale_jobs(timedelta(minutes=30))
+
+        job.refresh_from_db()
+        self.assertEqual(requeued, [job.job_id])
+        self.assertEqual(job.status, JOB_PENDING)
+        get_executor.return_value.submit.assert_called_once_with(job.pk)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(), FEEDBACK_IMPORT_BATCH_SIZE=2)
+    def test_import_progress_counts_data_rows(self):
+        rows = ['customer_email,content'] + [f'user{index}@example.com,Feedback {index}' for index in range(3)]
+        path = default_storage.save('analysis_jobs/import.csv', ContentFile('\n'.join(rows).encode('utf-8')))
+        job = create_job(self.organization, JOB_FEEDBACK_IMPORT, {'file_path': path})
+
+        self.assertEqual(run_job(job.pk), JOB_COMPLETED)
+
+        job.refresh_from_db()
+        self.assertEqual((job.total_items, job.processed_items), (3, 3))
+
+
+@skipUnless(PYARROW_AVAILABLE, 'pyarrow is not installed')
+@override_settings(COLUMNAR_EXPORT_WATERMARK_LAG=300)
+class IncrementalColumnarExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        customer = Customer.objects.create(
+            organization=cls.organization, customer_id='CUST-1', email='customer@example.com'
+        )
+        Feedback.objects.create(organization=cls.organization, customer=customer, content='Still in flight')
+
+    def export(self):
+        exporter = ColumnarExporter(self.organization, 'feedback', fmt='arrow', incremental=True)
+        return exporter.write(io.BytesIO())
+
+    def test_rows_inside_the_lag_go_to_the_next_run(self):
+        started = timezone.now()
+
+        first = self.export()
+        with mock.patch('django.utils.timezone.now', return_value=started + timedelta(minutes=6)):
+            second = self.export()
+
+        self.assertEqual(first.rows, 0)
+        self.assertEqual(second.rows, 1)
+        self.assertEqual(second.changed_after, first.changed_until)
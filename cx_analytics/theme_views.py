@@ -1,20 +1,24 @@
 # views.py
 import os
-import csv
 import json
 import logging
 from django.conf import settings
 from django.http import JsonResponse
+from django.shortcuts import redirect
 from django.views import View
 from django.views.generic import ListView, CreateView, DetailView, TemplateView
 from django.views.generic.edit import FormView
 from django.urls import reverse_lazy
-from django.utils import timezone
-from django.db import transaction
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from core.models import *
 from .forms import *
+from .services.ai_result_cache import KIND_FEEDBACK_THEMES, get_result_cache
+from .services.gemini_client import get_client_registry
+from .services.json_extraction import extract_json_object
+from .services.analysis_jobs import (
+    JOB_FEEDBACK_IMPORT, JOB_THEME_EXTRACTION, create_job, enqueue_job, store_job_upload,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,24 +26,38 @@ class GeminiThemeAnalyzer:
     """Gemini AI integration for theme analysis"""
     
     def __init__(self):
-        import google.generativeai as genai
         api_key = os.getenv('GEMINI_API_KEY')
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.api_key = api_key
+        self.model_name = 'gemini-2.5-flash'
+        self.model = get_client_registry().get_model(self.model_name, api_key)
+        self.result_cache = get_result_cache()
     
     def analyze_feedback_batch(self, feedback_contents, language='en'):
         """Analyze batch of feedback contents and extract themes"""
         try:
-            prompt = self._build_theme_analysis_prompt(feedback_contents, language)
-            response = self.model.generate_content(prompt)
-            return self._parse_theme_response(response.text)
+            # The same feedback batch (in the same order) reuses an earlier result
+            result, cached = self.result_cache.get_or_compute(
+                KIND_FEEDBACK_THEMES,
+                json.dumps(list(feedback_contents), ensure_ascii=False),
+                lambda: self._analyze_uncached(feedback_contents, language),
+                language=language,
+                model_name=self.model_name,
+            )
+            if cached:
+                logger.info(f"Served theme analysis of {len(feedback_contents)} feedbacks from the result cache")
+            return result
         except Exception as e:
             logger.error(f"Gemini analysis failed: {str(e)}")
             raise
     
+    def _analyze_uncached(self, feedback_contents, language):
+        prompt = self._build_theme_analysis_prompt(feedback_contents, language)
+        response = self.model.generate_content(prompt)
+        return self._parse_theme_response(response.text)
+    
     def _build_theme_analysis_prompt(self, feedback_contents, language):
         """Build prompt for theme analysis"""
         feedback_text = "\n\n".join([
@@ -92,17 +110,14 @@ class GeminiThemeAnalyzer:
         3. Ensure relevance scores accurately reflect content relevance
         4. Include specific content snippets that support each theme
         5. Categorize themes appropriately based on actual content
+        6. feedback_index is 0-based: Feedback 1 has feedback_index 0
         """
     
     def _parse_theme_response(self, response_text):
         """Parse Gemini response into structured data"""
         try:
-            # Extract JSON from response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            json_str = response_text[start_idx:end_idx]
-            return json.loads(json_str)
-        except (json.JSONDecodeError, ValueError) as e:
+            return extract_json_object(response_text)
+        except ValueError as e:
             logger.error(f"Failed to parse Gemini response: {str(e)}")
             raise ValueError("Invalid response format from AI service")
 
@@ -120,10 +135,15 @@ class FeedbackCreateView(CreateView):
         return response
     
     def analyze_feedback_themes(self, feedback_objects):
-        """Trigger async theme analysis for feedback objects"""
-        from .tasks import analyze_feedback_themes_task
-        feedback_ids = [fb.id for fb in feedback_objects]
-        analyze_feedback_themes_task.delay(feedback_ids)
+        """Queue a background theme extraction job for feedback objects"""
+        feedback_ids = [str(fb.id) for fb in feedback_objects]
+        job = create_job(
+            feedback_objects[0].organization,
+            JOB_THEME_EXTRACTION,
+            {'feedback_ids': feedback_ids, 'language': feedback_objects[0].original_language or 'en'},
+            total_items=len(feedback_ids),
+        )
+        enqueue_job(job)
 
 class BulkFeedbackUploadView(FormView):
     form_class = BulkFeedbackUploadForm
@@ -137,66 +157,33 @@ class BulkFeedbackUploadView(FormView):
             language = form.cleaned_data['language']
             generate_themes = form.cleaned_data['generate_themes']
             
-            feedback_objects = self.process_csv_file(csv_file, organization, language)
-            
-            if generate_themes:
-                self.analyze_feedback_themes(feedback_objects)
+            # Imported (and, if requested, theme-analyzed) by background jobs
+            job = create_job(
+                organization,
+                JOB_FEEDBACK_IMPORT,
+                {
+                    'file_path': store_job_upload(csv_file),
+                    'language': language,
+                    'required_columns': ['customer_email', 'content'],
+                    'extract_themes': generate_themes,
+                },
+                description=f'Bulk feedback upload of {csv_file.name}',
+            )
+            enqueue_job(job)
             
             messages.success(
                 self.request, 
-                _(f'Successfully uploaded {len(feedback_objects)} feedback entries.')
+                _(f'Upload started as job {job.job_id}.')
             )
             return super().form_valid(form)
             
         except Exception as e:
             messages.error(self.request, _(f'Error processing CSV file: {str(e)}'))
             return self.form_invalid(form)
-    
-    def process_csv_file(self, csv_file, organization, language):
-        """Process CSV file and create feedback objects"""
-        feedback_objects = []
-        
-        decoded_file = csv_file.read().decode('utf-8').splitlines()
-        reader = csv.DictReader(decoded_file)
-        
-        required_columns = ['customer_email', 'content']
-        
-        for row_num, row in enumerate(reader, start=2):
-            # Validate required columns
-            if not all(col in row for col in required_columns):
-                raise ValidationError(_(f'Missing required columns in row {row_num}'))
-            
-            try:
-                customer, created = Customer.objects.get_or_create(
-                    email=row['customer_email'],
-                    organization=organization,
-                    defaults={'name': row.get('customer_name', '')}
-                )
-                
-                feedback = Feedback(
-                    organization=organization,
-                    customer=customer,
-                    channel_id=row.get('channel'),
-                    product_id=row.get('product'),
-                    subject=row.get('subject', ''),
-                    content=row['content'],
-                    feedback_type=row.get('feedback_type', 'general'),
-                    priority=row.get('priority', 'medium'),
-                    original_language=language
-                )
-                feedback.save()
-                feedback_objects.append(feedback)
-                
-            except Exception as e:
-                logger.error(f"Error processing row {row_num}: {str(e)}")
-                continue
-        
-        return feedback_objects
 
 class ThemeAnalysisView(FormView):
     form_class = ThemeAnalysisForm
     template_name = 'feedback/theme_analysis.html'
-    success_url = reverse_lazy('theme_list')
     
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -211,86 +198,42 @@ class ThemeAnalysisView(FormView):
             language = form.cleaned_data['language']
             min_relevance_score = form.cleaned_data['min_relevance_score']
             
-            # Perform theme analysis
-            analyzer = GeminiThemeAnalyzer()
-            feedback_contents = [fb.content for fb in feedback_queryset]
-            
-            analysis_result = analyzer.analyze_feedback_batch(feedback_contents, language)
+            organization_id = self.kwargs.get('organization_id') or (
+                feedback_queryset.values_list('organization_id', flat=True).first()
+            )
+            feedback_ids = [
+                str(feedback_id)
+                for feedback_id in feedback_queryset.filter(organization_id=organization_id).values_list('id', flat=True)
+            ]
             
-            # Process themes and assignments
-            self.process_theme_analysis(analysis_result, feedback_queryset, min_relevance_score)
+            # Chunked map-reduce extraction runs as a background job
+            # (cx_analytics.services.theme_extraction), checkpointed per chunk
+            job = create_job(
+                Organization.objects.get(id=organization_id),
+                JOB_THEME_EXTRACTION,
+                {
+                    'feedback_ids': feedback_ids,
+                    'language': language,
+                    'min_relevance_score': min_relevance_score,
+                },
+                description='Theme analysis',
+                total_items=len(feedback_ids),
+            )
+            enqueue_job(job)
             
             messages.success(
-                self.request, 
-                _(f'Successfully analyzed {len(feedback_queryset)} feedback entries and generated themes.')
+                self.request,
+                _('Theme analysis of %(count)s feedback entries started as job %(job_id)s.') % {
+                    'count': len(feedback_ids),
+                    'job_id': job.job_id,
+                }
             )
             
         except Exception as e:
             messages.error(self.request, _(f'Themes analysis failed: {str(e)}'))
             return self.form_invalid(form)
         
-        return super().form_valid(form)
-    
-    @transaction.atomic
-    def process_theme_analysis(self, analysis_result, feedback_queryset, min_relevance_score):
-        """Process AI analysis results and create theme relationships"""
-        organization = feedback_queryset.first().organization
-        
-        # Create or update themes
-        theme_map = {}
-        for theme_data in analysis_result.get('themes', []):
-            theme, created = Theme.objects.get_or_create(
-                organization=organization,
-                name=theme_data['name'],
-                defaults={
-                    'description': theme_data['description'],
-                    'category': theme_data['category'],
-                    'keywords': theme_data['keywords'],
-                    'content_snippets': theme_data['representative_snippets'],
-                    'occurrence_count': 0,
-                    'sentiment_distribution': theme_data['sentiment_analysis'],
-                    'auto_generated': True,
-                    'last_analysis_date': timezone.now()
-                }
-            )
-            theme_map[theme_data['name']] = theme
-        
-        # Create feedback-theme relationships
-        for assignment in analysis_result.get('feedback_assignments', []):
-            feedback_index = assignment['feedback_index']
-            if feedback_index >= len(feedback_queryset):
-                continue
-                
-            feedback = feedback_queryset[feedback_index]
-            
-            for theme_assignment in assignment['themes']:
-                theme_name = theme_assignment['theme_name']
-                relevance_score = theme_assignment['relevance_score']
-                
-                if (theme_name in theme_map and 
-                    relevance_score >= min_relevance_score):
-                    
-                    FeedbackTheme.objects.update_or_create(
-                        feedback=feedback,
-                        theme=theme_map[theme_name],
-                        defaults={
-                            'relevance_score': relevance_score,
-                            'matching_keywords': theme_assignment['matching_keywords'],
-                            'content_snippet': theme_assignment['content_snippet'],
-                            'is_primary': relevance_score > 0.8
-                        }
-                    )
-        
-        # Update theme occurrence counts
-        for theme in theme_map.values():
-            theme.occurrence_count = theme.feedback_themes.count()
-            theme.save()
-        
-        # Mark feedback as analyzed
-        feedback_queryset.update(
-            ai_analyzed=True,
-            ai_analysis_date=timezone.now()
-        )
+        return redirect('cx_analytics:job-progress', organization_pk=organization_id, job_id=job.job_id)
 
 class FeedbackListView(ListView):
     model = Feedback
@@ -16,5 +16,7 @@ urlpatterns = [
     path('organizations/<uuid:organization_pk>/sentiment/bulk-actions/', BulkActionsView.as_view(), name='sentiment-bulk-actions'),
     path('organizations/<uuid:organization_pk>/sentiment/dashboard/', SentimentAnalysisDashboardView.as_view(), name='sentiment-dashboard'),
     path('organizations/<uuid:organization_pk>/feedback/<uuid:feedback_pk>/translate/', TranslateFeedbackView.as_view(), name='feedback-translate'), 
+    path('organizations/<uuid:organization_pk>/jobs/<str:job_id>/progress/', AnalysisJobProgressView.as_view(), name='job-progress'),
+    path('organizations/<uuid:organization_pk>/jobs/<str:job_id>/action/', AnalysisJobActionView.as_view(), name='job-action'),
     
 ]
\ No newline at end of file
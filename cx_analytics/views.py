@@ -16,6 +16,11 @@ from .utils import *
 from .forms import *
 from .services.gemini_analyzer import GeminiSentimentAnalyzer
 from .services.translation_service import TranslationService
+from .services.batch_analysis import needs_human_review
+from .services.analysis_jobs import (
+    JOB_SENTIMENT_ANALYSIS, cancel_job, create_job, enqueue_job, job_progress, resume_job,
+)
+from feedback.services.feedback_statistics import get_organization_feedback_statistics
 from django.db.models import Count, Avg, Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger 
 
@@ -91,12 +96,13 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
             feedbacks_page = paginator.page(paginator.num_pages)
         
         # Get quick stats for filters
-        total_feedbacks = Feedback.objects.filter(organization=organization).count()
-        analyzed_count = Feedback.objects.filter(organization=organization, ai_analyzed=True).count()
-        needs_review_count = Feedback.objects.filter(organization=organization, requires_human_review=True).count()
+        statistics = get_organization_feedback_statistics(organization)
+        total_feedbacks = statistics.total
+        analyzed_count = statistics.ai_analyzed_count
+        needs_review_count = statistics.needs_review_count
         
         # Calculate sentiment distribution
-        sentiment_distribution = self.get_sentiment_distribution(organization)
+        sentiment_distribution = self.get_sentiment_distribution(organization, statistics)
         
         # Define sentiment choices
         SENTIMENT_CHOICES = [
@@ -125,10 +131,6 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
         # Convert sentiment distribution to JSON-serializable format
         sentiment_distribution_json = self.prepare_sentiment_distribution_for_json(sentiment_distribution)
         
-        # Debug: Print distribution data
-        print("Sentiment Distribution:", sentiment_distribution)
-        print("Sentiment Distribution JSON:", sentiment_distribution_json)
-        
         context.update({
             'page_title': _('Sentiment Analysis'),
             'feedbacks': feedbacks_page,
@@ -146,37 +148,14 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
         
         return context
 
-    def get_sentiment_distribution(self, organization):
+    def get_sentiment_distribution(self, organization, statistics=None):
         """
         Calculate sentiment distribution for the organization
         """
-        # Get all feedbacks for the organization
-        feedbacks = Feedback.objects.filter(organization=organization)
-        total_count = feedbacks.count()
-        
+        if statistics is None:
+            statistics = get_organization_feedback_statistics(organization)
         distribution = {}
         
-        # DEBUG: Check what sentiment labels exist in the database
-        unique_sentiments = feedbacks.filter(ai_analyzed=True).exclude(
-            sentiment_label__isnull=True
-        ).exclude(
-            sentiment_label=''
-        ).values_list('sentiment_label', flat=True).distinct()
-        
-        print("Unique sentiment labels in DB:", list(unique_sentiments))
-        
-        # Count analyzed feedbacks by sentiment with average scores
-        sentiment_data = feedbacks.filter(ai_analyzed=True).exclude(
-            sentiment_label__isnull=True
-        ).exclude(
-            sentiment_label=''
-        ).values('sentiment_label').annotate(
-            count=Count('id'),
-            avg_score=Avg('sentiment_score')
-        )
-        
-        print("Raw sentiment data from DB:", list(sentiment_data))
-        
         # Initialize all sentiment categories with proper mapping
         sentiment_categories = {
             'very_positive': {'count': 0, 'avg_score': 0, 'label': _('Very Positive')},
@@ -195,11 +174,10 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
             'very_negative': ['very_negative', 'NEGATIVE', 'negative', 'Very Negative'],
         }
         
-        # Populate with actual data using mapping
-        for item in sentiment_data:
-            sentiment_label = item['sentiment_label']
-            count = item['count']
-            avg_score = item['avg_score'] or 0
+        # Populate from the analyzed buckets of the grouped pass
+        for sentiment_label, bucket in statistics.sentiment_buckets.items():
+            if not sentiment_label or not bucket.analyzed_count:
+                continue
             
             # Find which category this sentiment belongs to
             matched_category = None
@@ -217,37 +195,38 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
                         break
             
             if matched_category and matched_category in sentiment_categories:
-                sentiment_categories[matched_category]['count'] += count
-                # For average score, we need to calculate weighted average later
-                sentiment_categories[matched_category]['avg_score'] = avg_score
+                sentiment_categories[matched_category]['count'] += bucket.analyzed_count
         
-        # Calculate weighted average scores
+        # Weighted average scores over every label mapped to the category
         for sentiment, data in sentiment_categories.items():
             if data['count'] > 0:
-                # Recalculate average from individual items for accuracy
-                sentiment_feedbacks = feedbacks.filter(ai_analyzed=True, sentiment_label__in=sentiment_mapping[sentiment])
-                avg_score = sentiment_feedbacks.aggregate(avg=Avg('sentiment_score'))['avg'] or 0
-                sentiment_categories[sentiment]['avg_score'] = avg_score
+                buckets = [
+                    statistics.sentiment_buckets[label]
+                    for label in set(sentiment_mapping[sentiment])
+                    if label in statistics.sentiment_buckets
+                ]
+                score_sum = sum(bucket.score_sum for bucket in buckets)
+                score_count = sum(bucket.score_count for bucket in buckets)
+                data['avg_score'] = score_sum / score_count if score_count else 0
         
         # Build distribution dictionary
         for sentiment, data in sentiment_categories.items():
             distribution[sentiment] = {
                 'count': data['count'],
-                'percentage': (data['count'] / total_count * 100) if total_count > 0 else 0,
+                'percentage': statistics.percentage(data['count']),
                 'avg_score': data['avg_score'],
                 'label': data['label']
             }
         
         # Count not analyzed feedbacks
-        not_analyzed_count = feedbacks.filter(ai_analyzed=False).count()
+        not_analyzed_count = statistics.not_analyzed_count
         distribution['not_analyzed'] = {
             'count': not_analyzed_count,
-            'percentage': (not_analyzed_count / total_count * 100) if total_count > 0 else 0,
+            'percentage': statistics.percentage(not_analyzed_count),
             'avg_score': None,
             'label': _('Not Analyzed')
         }
         
-        print("Final distribution:", distribution)
         return distribution
 
     def prepare_sentiment_distribution_for_json(self, sentiment_distribution):
@@ -319,7 +298,9 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
             updated = Feedback.objects.filter(
                 id__in=selected_ids,
                 organization=organization
-            ).update(requires_human_review=False)
+            ).update(requires_human_review=False, updated_at=timezone.now())
+            # Queryset updates bypass Feedback.save, so the counters are recomputed
+            FeedbackCounter.rebuild(organization)
             
             messages.success(request, _('Marked %(count)s items as reviewed.') % {'count': updated})
         
@@ -342,8 +323,10 @@ class SentimentAnalysisListView(SentimentAnalysisMixin, TemplateView):
                         ai_analysis_date=None,
                         sentiment_score=None,
                         sentiment_label='',
-                        requires_human_review=False
+                        requires_human_review=False,
+                        updated_at=timezone.now(),
                     )
+                    FeedbackCounter.rebuild(organization)
                 
                 messages.success(request, _('Removed analysis from %(count)s items.') % {'count': updated})
             
@@ -866,36 +849,32 @@ class BulkSentimentAnalysisView(SentimentAnalysisMixin, FormView):
             if not overwrite_existing:
                 feedbacks = feedbacks.filter(ai_analyzed=False)
             
-            total_to_analyze = feedbacks.count()
+            # Sorted so a resumed job walks the same order
+            feedback_pks = sorted(str(pk) for pk in feedbacks.values_list('pk', flat=True))
             
-            if total_to_analyze == 0:
+            if not feedback_pks:
                 messages.warning(self.request, _('No feedback items to analyze.'))
                 return redirect('cx_analytics:sentiment-list', organization_pk=self.get_organization().pk)
             
-            # Start bulk analysis
-            success_count = self._start_bulk_analysis(
-                feedbacks, 
+            # Runs as a background job; see AnalysisJobProgressView for polling
+            job = self._start_bulk_analysis(
+                feedback_pks, 
                 analysis_config, 
                 target_language, 
-                translate_content
+                translate_content,
+                overwrite_existing
             )
             
-            if success_count > 0:
-                messages.success(
-                    self.request,
-                    _('Bulk analysis completed. Successfully analyzed %(success)s out of %(count)s feedback items.') % {
-                        'count': total_to_analyze,
-                        'success': success_count
-                    }
-                )
-            else:
-                messages.error(
-                    self.request,
-                    _('Bulk analysis failed for all selected feedback items.')
-                )
+            messages.success(
+                self.request,
+                _('Bulk analysis of %(count)s feedback items started as job %(job_id)s.') % {
+                    'count': len(feedback_pks),
+                    'job_id': job.job_id
+                }
+            )
             
             logger.info(
-                f'Bulk sentiment analysis completed for {success_count}/{total_to_analyze} feedback items '
+                f'Bulk sentiment analysis job {job.job_id} queued for {len(feedback_pks)} feedback items '
                 f'in language: {target_language}'
             )
             
@@ -908,125 +887,32 @@ class BulkSentimentAnalysisView(SentimentAnalysisMixin, FormView):
         
         return redirect('cx_analytics:sentiment-list', organization_pk=self.get_organization().pk)
     
-    def _start_bulk_analysis(self, feedbacks, analysis_config, target_language, translate_content):
+    def _start_bulk_analysis(self, feedback_pks, analysis_config, target_language, translate_content,
+                             overwrite_existing=False):
         """
-        Start bulk analysis process
+        Queue a sentiment_analysis job: concurrent, rate-limited Gemini calls
+        with bulk writes per chunk (see cx_analytics.services.batch_analysis),
+        checkpointed after every chunk
         """
-        from django.utils import timezone
-        analyzer = GeminiSentimentAnalyzer()
-        translator = TranslationService()
-        success_count = 0
-        
-        for feedback in feedbacks:
-            try:
-                # Prepare content for analysis
-                content_to_analyze = feedback.content
-                analysis_language = feedback.original_language
-                translated_content = None
-                
-                # Translate content if requested
-                if translate_content and target_language != feedback.original_language:
-                    try:
-                        if translator.is_configured():
-                            translated_content = translator.translate_text(
-                                feedback.content,
-                                source_language=feedback.original_language or 'auto',
-                                target_language=target_language
-                            )
-                            content_to_analyze = translated_content
-                            analysis_language = target_language
-                    except Exception as e:
-                        logger.warning(f"Translation failed for feedback {feedback.feedback_id}: {str(e)}")
-                        # Continue with original content if translation fails
-                
-                # Analyze feedback
-                analysis_result = analyzer.analyze_feedback(
-                    content_to_analyze,
-                    analysis_language,
-                    analysis_config
-                )
-                
-                # Map sentiment labels
-                sentiment_label_map = {
-                    'very_negative': 'very_negative',
-                    'negative': 'negative',
-                    'neutral': 'neutral',
-                    'positive': 'positive',
-                    'very_positive': 'very_positive'
-                }
-                
-                overall_label = analysis_result['overall_sentiment']['label']
-                mapped_label = sentiment_label_map.get(overall_label, 'neutral')
-                
-                # Get intent data safely
-                intent_data = analysis_result.get('intent', {})
-                intent_type = intent_data.get('type') if isinstance(intent_data, dict) else None
-                intent_confidence = intent_data.get('confidence') if isinstance(intent_data, dict) else None
-                
-                # Get urgency data safely
-                urgency_data = analysis_result.get('urgency', {})
-                urgency_level = urgency_data.get('level', 'medium').lower() if isinstance(urgency_data, dict) else 'medium'
-                urgency_indicators = urgency_data.get('indicators', []) if isinstance(urgency_data, dict) else []
-                
-                # Create or update sentiment analysis - INCLUDING ORGANIZATION
-                SentimentAnalysis.objects.update_or_create(
-                    feedback=feedback,
-                    defaults={
-                        'organization': feedback.organization,  # CRITICAL: Add this line
-                        'overall_score': analysis_result['overall_sentiment']['score'],
-                        'overall_label': mapped_label,
-                        'confidence_score': analysis_result['overall_sentiment']['confidence'],
-                        'aspects': analysis_result.get('aspect_sentiments', {}),
-                        'emotions': analysis_result.get('emotions', {}),
-                        'intent': intent_type,
-                        'intent_confidence': intent_confidence,
-                        'urgency_level': urgency_level,
-                        'urgency_indicators': urgency_indicators,
-                        'key_phrases': analysis_result.get('key_phrases', []),
-                        'entities': analysis_result.get('entities', {}),
-                        'model_used': analysis_result.get('analysis_metadata', {}).get('model_used', 'gemini-1.5-flash'),
-                        'model_version': analysis_result.get('analysis_metadata', {}).get('model_version', '1.0'),
-                        'analysis_metadata': analysis_result.get('analysis_metadata', {}),
-                        'analysis_language': target_language,
-                        'translated_content': translated_content,
-                        'original_language': feedback.original_language
-                    }
-                )
-                
-                # Update feedback
-                feedback.ai_analyzed = True
-                feedback.ai_analysis_date = timezone.now()
-                feedback.sentiment_score = analysis_result['overall_sentiment']['score']
-                feedback.sentiment_label = mapped_label
-                feedback.requires_human_review = self._needs_human_review(analysis_result)
-                feedback.save()
-                
-                success_count += 1
-                logger.debug(f"Successfully analyzed feedback {feedback.feedback_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to analyze feedback {feedback.feedback_id}: {str(e)}")
-                continue
-        
-        return success_count
+        job = create_job(
+            self.get_organization(),
+            JOB_SENTIMENT_ANALYSIS,
+            {
+                'feedback_ids': feedback_pks,
+                'analysis_config': analysis_config,
+                'target_language': target_language,
+                'translate': translate_content,
+                'overwrite_existing': overwrite_existing,
+            },
+            description='Bulk sentiment analysis',
+            total_items=len(feedback_pks),
+        )
+        enqueue_job(job)
+        return job
     
     def _needs_human_review(self, analysis_result):
         """Determine if analysis requires human review"""
-        try:
-            if analysis_result['overall_sentiment']['confidence'] < 0.5:
-                return True
-            
-            sentiment_score = analysis_result['overall_sentiment']['score']
-            if -0.3 <= sentiment_score <= 0.3:
-                return True
-            
-            urgency_data = analysis_result.get('urgency', {})
-            if isinstance(urgency_data, dict) and urgency_data.get('level') == 'critical':
-                return True
-            
-            return False
-        except (KeyError, TypeError):
-            return True
+        return needs_human_review(analysis_result)
         
 class BulkSentimentAnalysisView1(SentimentAnalysisMixin, FormView):
     """
@@ -1292,7 +1178,9 @@ class BulkActionsView(SentimentAnalysisMixin, View):
         
         if action == 'bulk_mark_reviewed':
             # Mark feedbacks as reviewed
-            updated_count = feedbacks.update(requires_human_review=False)
+            updated_count = feedbacks.update(requires_human_review=False, updated_at=timezone.now())
+            # Queryset updates bypass Feedback.save(), so resync the counters
+            FeedbackCounter.rebuild(organization)
             messages.success(
                 request, 
                 _('Marked %(count)s feedback items as reviewed.') % {'count': updated_count}
@@ -1326,6 +1214,41 @@ class BulkActionsView(SentimentAnalysisMixin, View):
         
         return redirect('cx_analytics:sentiment-list', organization_pk=organization.pk)
     
+class AnalysisJobProgressView(SentimentAnalysisMixin, View):
+    """
+    Lightweight JSON progress of a background job, for polling
+    """
+    
+    def get(self, request, *args, **kwargs):
+        progress = job_progress(self.get_organization(), kwargs['job_id'])
+        if progress is None:
+            return JsonResponse({'error': _('Job not found')}, status=404)
+        return JsonResponse(progress)
+
+
+class AnalysisJobActionView(SentimentAnalysisMixin, View):
+    """
+    Cancel a running job or resume a failed / cancelled one from its last checkpoint
+    """
+    
+    def post(self, request, *args, **kwargs):
+        job = get_object_or_404(AIAnalysisJob, organization=self.get_organization(), job_id=kwargs['job_id'])
+        action = request.POST.get('action')
+        
+        if action == 'cancel':
+            changed = cancel_job(job)
+        elif action == 'resume':
+            changed = resume_job(job)
+        else:
+            return JsonResponse({'error': _('Unknown action')}, status=400)
+        
+        if not changed:
+            return JsonResponse({'error': _('Job cannot be %(action)s in its current state') % {
+                'action': 'cancelled' if action == 'cancel' else 'resumed'
+            }}, status=409)
+        return JsonResponse(job_progress(job.organization, job.job_id))
+
+
 class TranslateFeedbackView(SentimentAnalysisMixin, View):
     """
     Translate feedback content to another language
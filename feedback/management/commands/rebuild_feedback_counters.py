@@ -0,0 +1,50 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization, FeedbackCounter
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized FeedbackCounter rows from the Feedback table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            action='append',
+            dest='organizations',
+            help='Organization id or slug to rebuild (repeatable). Defaults to all organizations.',
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.all()
+
+        identifiers = options.get('organizations')
+        if identifiers:
+            selected = []
+            for identifier in identifiers:
+                organization = self._get_organization(identifier)
+                if organization is None:
+                    raise CommandError(f'Organization not found: {identifier}')
+                selected.append(organization)
+            organizations = selected
+
+        rebuilt = 0
+        for organization in organizations:
+            row_count = FeedbackCounter.rebuild(organization)
+            rebuilt += 1
+            self.stdout.write(f'{organization.name}: {row_count} counter rows')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt feedback counters for {rebuilt} organization(s)'))
+
+    def _get_organization(self, identifier):
+        """Look up an organization by primary key or slug"""
+        organization = Organization.objects.filter(slug=identifier).first()
+        if organization is None:
+            try:
+                organization = Organization.objects.filter(pk=identifier).first()
+            except Exception:
+                organization = None
+        return organization
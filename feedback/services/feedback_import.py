@@ -0,0 +1,322 @@
+# services/feedback_import.py
+import csv
+import io
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+WRITE_BATCH_SIZE = 500  # Rows per INSERT statement
+
+
+class FeedbackImportError(ValueError):
+    """The file cannot be imported at all (bad encoding, missing columns)"""
+
+
+@dataclass
+class ImportRowError:
+    """A row that was skipped"""
+    row_number: int
+    message: str
+
+    def __str__(self):
+        return f"Row {self.row_number}: {self.message}"
+
+
+@dataclass
+class FeedbackImportResult:
+    """Outcome of one import; only the first MAX_REPORTED_ERRORS errors are kept"""
+    imported_count: int = 0
+    customers_created: int = 0
+    error_count: int = 0
+    errors: List[ImportRowError] = field(default_factory=list)
+    feedback_ids: List[Any] = field(default_factory=list)
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(ImportRowError(row_number, message))
+
+
+def iter_csv_rows(uploaded_file) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    (row number, row) pairs read incrementally from an uploaded file; the
+    header is row 1. A UTF-8 BOM is skipped.
+    """
+    binary = getattr(uploaded_file, 'file', uploaded_file)
+    if hasattr(binary, 'seek'):
+        binary.seek(0)
+    text = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    try:
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, row
+    except UnicodeDecodeError as e:
+        raise FeedbackImportError(f"The file is not valid UTF-8: {str(e)}") from e
+    finally:
+        # Leave the upload's own file object open for Django to clean up
+        text.detach()
+
+
+class FeedbackImporter:
+    """
+    Streaming CSV import. Rows are read incrementally and written in
+    batches: every customer email of a batch is resolved with one IN
+    query, missing customers and all feedback rows are bulk-created, and
+    rows that cannot be imported are reported without failing the batch.
+    Lengths and choices are checked before the write; if the database
+    still rejects a batch it is retried in halves down to the bad rows.
+    Organization counters are rebuilt once at the end because bulk_create
+    bypasses Feedback.save.
+    """
+
+    def __init__(self, organization, channel=None, language: Optional[str] = None,
+                 required_columns: Sequence[str] = ('customer_email',),
+                 batch_size: Optional[int] = None, collect_ids: bool = False,
+                 metadata: Optional[Dict[str, Any]] = None, start_row: int = 0, on_batch: Optional[Callable[[FeedbackImportResult, int], None]] = None):
+        # channel: used for every row; otherwise the row's 'channel' column (an id)
+        # language: used for every row; otherwise the row's 'language' column
+        # metadata: stored on every imported Feedback (e.g. the importing job)
+        # start_row: rows up to this row number were imported by an earlier run
+        # on_batch: called with the result and the batch's last row number
+        self.organization = organization
+        self.channel = channel
+        self.language = language
+        self.required_columns = tuple(required_columns)
+        self.batch_size = batch_size or getattr(settings, 'FEEDBACK_IMPORT_BATCH_SIZE', DEFAULT_IMPORT_BATCH_SIZE)
+        self.collect_ids = collect_ids
+        self.metadata = metadata or {}
+        self.start_row = start_row
+        self.on_batch = on_batch
+        self._channel_ids = None
+        self._product_ids = None
+        self._field_rules = None
+
+    def import_file(self, uploaded_file) -> FeedbackImportResult:
+        from core.models import FeedbackCounter
+
+        result = FeedbackImportResult()
+        batch = []
+        header_checked = False
+        try:
+            for row_number, row in iter_csv_rows(uploaded_file):
+                if not header_checked:
+                    missing = [column for column in self.required_columns if column not in row]
+                    if missing:
+                        raise FeedbackImportError(f"Missing required columns: {', '.join(missing)}")
+                    header_checked = True
+                if row_number <= self.start_row:
+                    continue
+                batch.append((row_number, row))
+                if len(batch) >= self.batch_size:
+                    self._import_batch(batch, result)
+                    batch = []
+            if batch:
+                self._import_batch(batch, result)
+        finally:
+            # Also after an interrupted run: earlier batches are committed
+            if result.imported_count:
+                FeedbackCounter.rebuild(self.organization)
+        logger.info(
+            f"Feedback import for {self.organization.pk}: {result.imported_count} imported, "
+            f"{result.customers_created} customers created, {result.error_count} errors"
+        )
+        return result
+
+    def _known_ids(self) -> Tuple[set, set]:
+        """String ids of the organization's channels and products, loaded once"""
+        from core.models import Channel, Product
+
+        if self._channel_ids is None:
+            self._channel_ids = {
+                str(pk) for pk in Channel.objects.filter(organization=self.organization).values_list('pk', flat=True)
+            }
+            self._product_ids = {
+                str(pk) for pk in Product.objects.filter(organization=self.organization).values_list('pk', flat=True)
+            }
+        return self._channel_ids, self._product_ids
+
+    def _rules(self) -> Dict[str, Tuple[Optional[int], Optional[set]]]:
+        """value key -> (max length, allowed choices) from the model fields, loaded once"""
+        from core.models import Customer, Feedback
+
+        if self._field_rules is None:
+            fields = {
+                'email': Customer._meta.get_field('email'),
+                'feedback_type': Feedback._meta.get_field('feedback_type'),
+                'priority': Feedback._meta.get_field('priority'),
+                'status': Feedback._meta.get_field('status'),
+                'original_language': Feedback._meta.get_field('original_language'),
+            }
+            self._field_rules = {
+                key: (model_field.max_length, {str(value) for value, _label in model_field.flatchoices} or None)
+                for key, model_field in fields.items()
+            }
+        return self._field_rules
+
+    def _check_values(self, values: Dict[str, Any]) -> None:
+        """Rejects values the database would fail the whole batch on"""
+        for key, (max_length, choices) in self._rules().items():
+            value = values[key]
+            if choices is not None and value not in choices:
+                raise ValueError(f"Invalid {key} {value!r}")
+            if max_length is not None and len(value) > max_length:
+                raise ValueError(f"{key} is longer than {max_length} characters")
+
+    def _clean_row(self, row: Dict[str, str]) -> Dict[str, Any]:
+        """Feedback field values for one row; raises ValueError if it cannot be imported"""
+        email = (row.get('customer_email') or '').strip().lower()
+        if not email:
+            raise ValueError("Missing customer email")
+        for column in self.required_columns:
+            if column != 'customer_email' and not (row.get(column) or '').strip():
+                raise ValueError(f"Missing {column}")
+
+        values = {
+            'email': email,
+            'subject': (row.get('subject') or '')[:500],
+            'content': row.get('content') or '',
+            'feedback_type': row.get('feedback_type') or 'general',
+            'priority': row.get('priority') or 'medium',
+            'status': row.get('status') or 'new',
+            'original_language': self.language or row.get('language') or 'en',
+            'channel_id': None,
+            'product_id': None,
+        }
+
+        channel_ids, product_ids = self._known_ids()
+        if self.channel is not None:
+            values['channel_id'] = self.channel.pk
+        elif (row.get('channel') or '').strip():
+            if row['channel'].strip() not in channel_ids:
+                raise ValueError(f"Unknown channel {row['channel'].strip()}")
+            values['channel_id'] = row['channel'].strip()
+        if (row.get('product') or '').strip():
+            if row['product'].strip() not in product_ids:
+                raise ValueError(f"Unknown product {row['product'].strip()}")
+            values['product_id'] = row['product'].strip()
+
+        first_name = row.get('first_name') or ''
+        last_name = row.get('last_name') or ''
+        if not (first_name or last_name) and row.get('customer_name'):
+            first_name, _separator, last_name = row['customer_name'].strip().partition(' ')
+        values['first_name'] = first_name[:100]
+        values['last_name'] = last_name[:100]
+        self._check_values(values)
+        return values
+
+    def _resolve_customers(self, cleaned: List[Tuple[int, Dict[str, Any]]]) -> Tuple[Dict[str, Any], int]:
+        """
+        (email -> customer id, customers created); one IN query plus one
+        bulk insert for new emails
+        """
+        from core.models import Customer
+
+        emails = {values['email'] for _row_number, values in cleaned}
+        customer_ids = {}
+        for email, customer_id in Customer.objects.filter(
+            organization=self.organization, email__in=emails
+        ).order_by('created_at').values_list('email', 'id'):
+            customer_ids.setdefault(email, customer_id)
+
+        new_customers = {}
+        for _row_number, values in cleaned:
+            email = values['email']
+            if email not in customer_ids and email not in new_customers:
+                new_customers[email] = Customer(
+                    organization=self.organization,
+                    email=email,
+                    customer_id=f"CUST-{uuid.uuid4().hex[:8].upper()}",
+                    first_name=values['first_name'],
+                    last_name=values['last_name'],
+                )
+        if new_customers:
+            Customer.objects.bulk_create(new_customers.values(), batch_size=WRITE_BATCH_SIZE)
+            customer_ids.update({email: customer.pk for email, customer in new_customers.items()})
+        return customer_ids, len(new_customers)
+
+    def _feedback_ids(self, count: int) -> List[str]:
+        """Feedback.save's id format, checked against the table in one query"""
+        from core.models import Feedback
+
+        prefix = f"FB-{self.organization.slug.upper()}-"
+        ids = set()
+        while len(ids) < count:
+            candidates = {f"{prefix}{uuid.uuid4().hex[:8].upper()}" for _ in range(count - len(ids))}
+            candidates -= ids
+            taken = set(Feedback.objects.filter(feedback_id__in=candidates).values_list('feedback_id', flat=True))
+            ids |= candidates - taken
+        return list(ids)
+
+    def _write_rows(self, cleaned: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[Any], int]:
+        """(feedbacks created, customers created) for cleaned rows"""
+        from core.models import Feedback
+
+        customer_ids, customers_created = self._resolve_customers(cleaned)
+        feedbacks = [
+            Feedback(
+                organization=self.organization,
+                customer_id=customer_ids[values['email']],
+                channel_id=values['channel_id'],
+                product_id=values['product_id'],
+                feedback_id=feedback_id,
+                subject=values['subject'],
+                content=values['content'],
+                feedback_type=values['feedback_type'],
+                priority=values['priority'],
+                status=values['status'],
+                original_language=values['original_language'],
+                metadata=dict(self.metadata),
+            )
+            for (_row_number, values), feedback_id in zip(cleaned, self._feedback_ids(len(cleaned)))
+        ]
+        Feedback.objects.bulk_create(feedbacks, batch_size=WRITE_BATCH_SIZE)
+        return feedbacks, customers_created
+
+    def _write_split(self, cleaned: List[Tuple[int, Dict[str, Any]]],
+                     result: FeedbackImportResult) -> Tuple[List[Any], int]:
+        """
+        _write_rows in a savepoint; a rejected group is retried in halves so
+        a row the database refuses only fails itself
+        """
+        try:
+            with transaction.atomic():
+                return self._write_rows(cleaned)
+        except Exception as e:
+            if len(cleaned) == 1:
+                logger.warning(f"Feedback import row {cleaned[0][0]} failed: {str(e)}")
+                result.add_error(cleaned[0][0], f"Could not be saved: {str(e)}")
+                return [], 0
+            logger.warning(
+                f"Feedback import rows {cleaned[0][0]}-{cleaned[-1][0]} failed, retrying in halves: {str(e)}"
+            )
+            middle = len(cleaned) // 2
+            first_feedbacks, first_customers = self._write_split(cleaned[:middle], result)
+            second_feedbacks, second_customers = self._write_split(cleaned[middle:], result)
+            return first_feedbacks + second_feedbacks, first_customers + second_customers
+
+    def _import_batch(self, batch: Iterable[Tuple[int, Dict[str, str]]], result: FeedbackImportResult) -> None:
+        batch = list(batch)
+        cleaned = []
+        for row_number, row in batch:
+            try:
+                cleaned.append((row_number, self._clean_row(row)))
+            except ValueError as e:
+                result.add_error(row_number, str(e))
+
+        # on_batch runs in the same transaction as the batch's rows, so a
+        # checkpoint it records is committed exactly when the rows are
+        with transaction.atomic():
+            feedbacks, customers_created = self._write_split(cleaned, result) if cleaned else ([], 0)
+            result.imported_count += len(feedbacks)
+            result.customers_created += customers_created
+            if self.collect_ids:
+                result.feedback_ids.extend(feedback.pk for feedback in feedbacks)
+            if self.on_batch is not None:
+                self.on_batch(result, batch[-1][0])
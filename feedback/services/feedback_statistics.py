@@ -0,0 +1,228 @@
+# services/feedback_statistics.py
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+from django.db.models import Count, Avg, Sum, Q
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_STATUSES = ('new', 'in_progress', 'pending', 'resolved', 'closed', 'reopened')
+BREAKDOWN_FIELDS = ('origin', 'sentiment_label', 'priority', 'feedback_type')
+
+
+@dataclass
+class SentimentBucket:
+    """Per-label sentiment counters collected in the grouped pass"""
+    count: int = 0
+    analyzed_count: int = 0
+    score_sum: float = 0.0
+    score_count: int = 0
+
+    @property
+    def avg_score(self) -> float:
+        return self.score_sum / self.score_count if self.score_count else 0.0
+
+
+@dataclass
+class FeedbackStatistics:
+    """Aggregated feedback statistics for a queryset"""
+    total: int = 0
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    ai_analyzed_count: int = 0
+    needs_review_count: int = 0
+    avg_sentiment: float = 0.0
+    origin_stats: Dict[str, int] = field(default_factory=dict)
+    sentiment_stats: Dict[Optional[str], int] = field(default_factory=dict)
+    priority_stats: Dict[str, int] = field(default_factory=dict)
+    type_stats: Dict[str, int] = field(default_factory=dict)
+    sentiment_buckets: Dict[Optional[str], SentimentBucket] = field(default_factory=dict)
+
+    @property
+    def not_analyzed_count(self) -> int:
+        return self.total - self.ai_analyzed_count
+
+    def status_count(self, status: str) -> int:
+        return self.status_counts.get(status, 0)
+
+    def percentage(self, count: int) -> float:
+        return (count / self.total * 100) if self.total > 0 else 0
+
+    def distribution(self, field_name: str, include_empty: bool = True) -> List[Dict[str, Any]]:
+        """
+        Return a breakdown as a list of rows shaped like
+        ``values(field_name).annotate(count=..., percentage=...)``
+        """
+        stats = {
+            'origin': self.origin_stats,
+            'sentiment_label': self.sentiment_stats,
+            'priority': self.priority_stats,
+            'feedback_type': self.type_stats,
+        }[field_name]
+
+        return [
+            {
+                field_name: value,
+                'count': count,
+                'percentage': self.percentage(count),
+            }
+            for value, count in sorted(stats.items(), key=lambda item: item[1], reverse=True)
+            if include_empty or value not in (None, '')
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Legacy dictionary layout used by FeedbackListView"""
+        return {
+            'total_feedbacks': self.total,
+            'new_count': self.status_count('new'),
+            'in_progress_count': self.status_count('in_progress'),
+            'resolved_count': self.status_count('resolved'),
+            'closed_count': self.status_count('closed'),
+            'pending_count': self.status_count('pending'),
+            'ai_analyzed_count': self.ai_analyzed_count,
+            'avg_sentiment': round(float(self.avg_sentiment), 2) if self.avg_sentiment else 0.0,
+            'origin_stats': self.origin_stats,
+            'sentiment_stats': self.sentiment_stats,
+            'priority_stats': self.priority_stats,
+            'type_stats': self.type_stats,
+        }
+
+
+class FeedbackStatisticsEngine:
+    """
+    Compute feedback statistics in two queries: one conditional aggregate
+    for the scalar counters and one grouped pass for every breakdown.
+    """
+
+    def __init__(self, queryset):
+        # Ordering and select_related only slow the aggregate down
+        self.queryset = queryset.order_by().select_related(None)
+
+    def compute(self) -> FeedbackStatistics:
+        """
+        Run both passes and fold the rows into a FeedbackStatistics
+
+        Returns:
+            FeedbackStatistics: empty statistics if the database raises
+        """
+        try:
+            stats = FeedbackStatistics()
+            self._apply_totals(stats)
+            if stats.total:
+                self._apply_breakdowns(stats)
+            return stats
+        except Exception as e:
+            logger.error(f"Error calculating feedback statistics: {str(e)}")
+            return FeedbackStatistics()
+
+    def _apply_totals(self, stats: FeedbackStatistics) -> None:
+        """Single conditional-aggregation pass for the scalar counters"""
+        aggregates = {
+            'total': Count('id'),
+            'ai_analyzed_count': Count('id', filter=Q(ai_analyzed=True)),
+            'needs_review_count': Count('id', filter=Q(requires_human_review=True)),
+            'avg_sentiment': Avg('sentiment_score'),
+        }
+        for status in FEEDBACK_STATUSES:
+            aggregates[f'status_{status}'] = Count('id', filter=Q(status=status))
+
+        result = self.queryset.aggregate(**aggregates)
+
+        stats.total = result['total'] or 0
+        stats.ai_analyzed_count = result['ai_analyzed_count'] or 0
+        stats.needs_review_count = result['needs_review_count'] or 0
+        stats.avg_sentiment = result['avg_sentiment'] or 0.0
+        stats.status_counts = {
+            status: result[f'status_{status}'] or 0 for status in FEEDBACK_STATUSES
+        }
+
+    def _apply_breakdowns(self, stats: FeedbackStatistics) -> None:
+        """Single grouped pass over the cross product of the breakdown fields"""
+        analyzed = Q(ai_analyzed=True)
+        rows = self.queryset.values(*BREAKDOWN_FIELDS).annotate(
+            count=Count('id'),
+            analyzed_count=Count('id', filter=analyzed),
+            score_sum=Sum('sentiment_score', filter=analyzed),
+            score_count=Count('sentiment_score', filter=analyzed),
+        )
+
+        targets = {
+            'origin': stats.origin_stats,
+            'sentiment_label': stats.sentiment_stats,
+            'priority': stats.priority_stats,
+            'feedback_type': stats.type_stats,
+        }
+
+        for row in rows:
+            count = row['count']
+            for field_name, target in targets.items():
+                value = row[field_name]
+                target[value] = target.get(value, 0) + count
+
+            bucket = stats.sentiment_buckets.setdefault(row['sentiment_label'], SentimentBucket())
+            bucket.count += count
+            bucket.analyzed_count += row['analyzed_count']
+            bucket.score_sum += row['score_sum'] or 0.0
+            bucket.score_count += row['score_count']
+
+
+def get_feedback_statistics(queryset) -> FeedbackStatistics:
+    """Convenience wrapper around FeedbackStatisticsEngine"""
+    return FeedbackStatisticsEngine(queryset).compute()
+
+
+def statistics_from_counters(counters) -> FeedbackStatistics:
+    """Build FeedbackStatistics from FeedbackCounter rows"""
+    stats = FeedbackStatistics(status_counts={status: 0 for status in FEEDBACK_STATUSES})
+    targets = {
+        'status': stats.status_counts,
+        'origin': stats.origin_stats,
+        'priority': stats.priority_stats,
+        'feedback_type': stats.type_stats,
+    }
+
+    for counter in counters:
+        if counter.dimension == 'total':
+            stats.total = counter.count
+            stats.avg_sentiment = counter.avg_score
+        elif counter.dimension == 'ai_analyzed':
+            stats.ai_analyzed_count = counter.count
+        elif counter.dimension == 'requires_human_review':
+            stats.needs_review_count = counter.count
+        elif counter.dimension == 'sentiment_label':
+            label = counter.value or None
+            stats.sentiment_stats[label] = counter.count
+            stats.sentiment_buckets.setdefault(label, SentimentBucket()).count = counter.count
+        elif counter.dimension == 'analyzed_sentiment':
+            bucket = stats.sentiment_buckets.setdefault(counter.value or None, SentimentBucket())
+            bucket.analyzed_count = counter.count
+            bucket.score_sum = counter.score_sum
+            bucket.score_count = counter.score_count
+        elif counter.dimension in targets and counter.count:
+            targets[counter.dimension][counter.value] = counter.count
+
+    # Drop labels whose feedback has all been deleted or relabelled
+    stats.sentiment_stats = {label: count for label, count in stats.sentiment_stats.items() if count}
+    stats.sentiment_buckets = {
+        label: bucket for label, bucket in stats.sentiment_buckets.items()
+        if bucket.count or bucket.analyzed_count
+    }
+    return stats
+
+
+def get_organization_feedback_statistics(organization) -> FeedbackStatistics:
+    """
+    Read organization-wide statistics from the FeedbackCounter table (one query).
+    Counters are rebuilt on first access for organizations that have none yet.
+    """
+    from core.models import FeedbackCounter
+
+    try:
+        counters = list(FeedbackCounter.objects.filter(organization=organization))
+        if not any(counter.dimension == 'total' for counter in counters):
+            FeedbackCounter.rebuild(organization)
+            counters = list(FeedbackCounter.objects.filter(organization=organization))
+        return statistics_from_counters(counters)
+    except Exception as e:
+        logger.error(f"Error reading feedback counters: {str(e)}")
+        return get_feedback_statistics(organization.feedbacks.all())
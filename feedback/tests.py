@@ -1,3 +1,114 @@
+import io
+from unittest import mock
+
+from django.db import IntegrityError
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Customer, Feedback, Organization
+from feedback.services.feedback_import import FeedbackImporter
+from feedback.services.feedback_statistics import (
+    get_feedback_statistics,
+    get_organization_feedback_statistics,
+)
+
+
+class FeedbackStatisticsQueryCountTests(TestCase):
+    """The statistics paths must not regress into one query per breakdown"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        customer = Customer.objects.create(
+            organization=cls.organization, customer_id='CUST-1', email='customer@example.com'
+        )
+        rows = [
+            ('new', 'complaint', 'high', 'negative', -0.6, True),
+            ('new', 'suggestion', 'medium', 'positive', 0.7, True),
+            ('in_progress', 'question', 'low', 'neutral', 0.0, True),
+            ('resolved', 'compliment', 'medium', 'very_positive', 0.9, True),
+            ('closed', 'general', 'critical', None, None, False),
+            ('reopened', 'bug_report', 'high', None, None, False),
+        ]
+        for index, (status, feedback_type, priority, label, score, analyzed) in enumerate(rows):
+            Feedback.objects.create(
+                organization=cls.organization,
+                customer=customer,
+                content=f'Feedback {index}',
+                status=status,
+                feedback_type=feedback_type,
+                priority=priority,
+                sentiment_label=label,
+                sentiment_score=score,
+                ai_analyzed=analyzed,
+            )
+
+    def test_queryset_statistics_use_two_queries(self):
+        queryset = Feedback.objects.filter(organization=self.organization)
+        with self.assertNumQueries(2):
+            stats = get_feedback_statistics(queryset)
+
+        self.assertEqual(stats.total, 6)
+        self.assertEqual(stats.ai_analyzed_count, 4)
+        self.assertEqual(stats.status_count('new'), 2)
+        self.assertEqual(stats.priority_stats['high'], 2)
+        self.assertEqual(stats.sentiment_stats[None], 2)
+
+    def test_empty_queryset_skips_breakdown_query(self):
+        queryset = Feedback.objects.filter(organization=self.organization, status='pending')
+        with self.assertNumQueries(1):
+            stats = get_feedback_statistics(queryset)
+
+        self.assertEqual(stats.total, 0)
+
+    def test_organization_statistics_read_counters_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = get_organization_feedback_statistics(self.organization)
+
+        expected = get_feedback_statistics(Feedback.objects.filter(organization=self.organization))
+        self.assertEqual(stats.total, expected.total)
+        self.assertEqual(stats.ai_analyzed_count, expected.ai_analyzed_count)
+        self.assertEqual(stats.status_counts, expected.status_counts)
+        self.assertEqual(stats.type_stats, expected.type_stats)
+        self.assertEqual(stats.sentiment_stats, expected.sentiment_stats)
+
+
+class FeedbackImporterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+
+    def import_rows(self, rows, **options):
+        lines = ['customer_email,content,status,language'] + [','.join(row) for row in rows]
+        upload = io.BytesIO('\n'.join(lines).encode('utf-8'))
+        return FeedbackImporter(self.organization, **options).import_file(upload)
+
+    def test_invalid_values_only_skip_their_row(self):
+        result = self.import_rows([
+            ('one@example.com', 'Fine', 'new', 'en'),
+            ('two@example.com', 'Bad status', 'archived', 'en'),
+            ('three@example.com', 'Bad language', 'new', 'english-with-region'),
+            (f'{"x" * 250}@example.com', 'Long email', 'new', 'en'),
+            ('four@example.com', 'Also fine', 'resolved', 'de'),
+        ])
+
+        self.assertEqual(result.imported_count, 2)
+        self.assertEqual([error.row_number for error in result.errors], [3, 4, 5])
+        self.assertEqual(Feedback.objects.filter(organization=self.organization).count(), 2)
+
+    def test_rejected_batch_is_retried_in_halves(self):
+        bulk_create = Feedback.objects.bulk_create
+
+        def reject_broken(feedbacks, **kwargs):
+            if any(feedback.content == 'broken' for feedback in feedbacks):
+                raise IntegrityError('value too long')
+            return bulk_create(feedbacks, **kwargs)
+
+        rows = [(f'user{index}@example.com', 'broken' if index == 5 else 'Fine', 'new', 'en') for index in range(8)]
+        with mock.patch.object(Feedback.objects, 'bulk_create', side_effect=reject_broken):
+            result = self.import_rows(rows)
+
+        self.assertEqual(result.imported_count, 7)
+        self.assertEqual([error.row_number for error in result.errors], [7])
+        self.assertEqual(result.customers_created, 7)
+        self.assertEqual(Customer.objects.filter(organization=self.organization).count(), 7)
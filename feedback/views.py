@@ -28,12 +28,11 @@ def slugify_text(request):
 
 # views.py
 import logging
-import csv
 import uuid
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db import transaction
-from django.db.models import Q, Count, Avg, Case, When, IntegerField
+from django.db.models import Q, Case, When, IntegerField
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -43,6 +42,8 @@ from django.http import JsonResponse
 from core.models import *
 from .forms import *
 from common.utils import *
+from cx_analytics.services.analysis_jobs import JOB_FEEDBACK_IMPORT, create_job, enqueue_job, store_job_upload
+from .services.feedback_statistics import get_organization_feedback_statistics
 
 logger = logging.getLogger(__name__)
 
@@ -189,97 +190,8 @@ class FeedbackListView(LoginRequiredMixin, ListView):
         if not organization:
             return {}
         
-        try:
-            # Get all feedback for the organization
-            all_feedbacks = Feedback.objects.filter(organization=organization)
-            
-            # Basic counts
-            total_feedbacks = all_feedbacks.count()
-            
-            # Status counts using Django's aggregate functions
-            new_count = all_feedbacks.filter(status='new').count()
-            in_progress_count = all_feedbacks.filter(status='in_progress').count()
-            resolved_count = all_feedbacks.filter(status='resolved').count()
-            closed_count = all_feedbacks.filter(status='closed').count()
-            pending_count = all_feedbacks.filter(status='pending').count()
-            
-            # AI analyzed count
-            ai_analyzed_count = all_feedbacks.filter(ai_analyzed=True).count()
-            
-            # Average sentiment
-            avg_sentiment_result = all_feedbacks.filter(
-                sentiment_score__isnull=False
-            ).aggregate(avg=Avg('sentiment_score'))
-            avg_sentiment = avg_sentiment_result['avg'] or 0
-            
-            # Origin breakdown (NEW)
-            origin_counts = all_feedbacks.values('origin').annotate(
-                count=Count('id')
-            ).order_by('-count')
-            
-            # Convert to dictionary for easy access
-            origin_stats = {}
-            for item in origin_counts:
-                origin_stats[item['origin']] = item['count']
-            
-            # Sentiment breakdown
-            sentiment_counts = all_feedbacks.values('sentiment_label').annotate(
-                count=Count('id')
-            ).order_by('-count')
-            
-            sentiment_stats = {}
-            for item in sentiment_counts:
-                sentiment_stats[item['sentiment_label']] = item['count']
-            
-            # Priority breakdown
-            priority_counts = all_feedbacks.values('priority').annotate(
-                count=Count('id')
-            ).order_by('-count')
-            
-            priority_stats = {}
-            for item in priority_counts:
-                priority_stats[item['priority']] = item['count']
-            
-            # Type breakdown
-            type_counts = all_feedbacks.values('feedback_type').annotate(
-                count=Count('id')
-            ).order_by('-count')
-            
-            type_stats = {}
-            for item in type_counts:
-                type_stats[item['feedback_type']] = item['count']
-            
-            return {
-                'total_feedbacks': total_feedbacks,
-                'new_count': new_count,
-                'in_progress_count': in_progress_count,
-                'resolved_count': resolved_count,
-                'closed_count': closed_count,
-                'pending_count': pending_count,
-                'ai_analyzed_count': ai_analyzed_count,
-                'avg_sentiment': round(float(avg_sentiment), 2) if avg_sentiment else 0.0,
-                'origin_stats': origin_stats,  # NEW
-                'sentiment_stats': sentiment_stats,
-                'priority_stats': priority_stats,
-                'type_stats': type_stats,
-            }
-            
-        except Exception as e:
-            logger.error(f"Error calculating statistics: {str(e)}")
-            return {
-                'total_feedbacks': 0,
-                'new_count': 0,
-                'in_progress_count': 0,
-                'resolved_count': 0,
-                'closed_count': 0,
-                'pending_count': 0,
-                'ai_analyzed_count': 0,
-                'avg_sentiment': 0.0,
-                'origin_stats': {},  # NEW
-                'sentiment_stats': {},
-                'priority_stats': {},
-                'type_stats': {},
-            }
+        # Read from the incrementally maintained counters table
+        return get_organization_feedback_statistics(organization).as_dict()
     
     def get_queryset(self):
         """
@@ -392,9 +304,9 @@ class FeedbackListView(LoginRequiredMixin, ListView):
         # Calculate statistics
         statistics = self.calculate_statistics(organization)
         
-        # Get filtered count
-        filtered_feedbacks = self.get_queryset()
-        filtered_count = filtered_feedbacks.count()
+        # Get filtered count (the paginator has already counted the queryset)
+        paginator = context.get('paginator')
+        filtered_count = paginator.count if paginator else len(context.get('object_list', []))
         
         # Check if filters are applied
         has_filters = False
@@ -1342,10 +1254,14 @@ class BulkFeedbackAnalysisView(FeedbackMixin, FormView):
         """
         # For now, just mark as scheduled
         from django.utils import timezone
+        now = timezone.now()
         feedbacks.update(
-            ai_analysis_date=timezone.now(),
-            requires_human_review=True  # Mark for review after analysis
+            ai_analysis_date=now,
+            requires_human_review=True,  # Mark for review after analysis
+            updated_at=now,
         )
+        # Queryset updates bypass Feedback.save(), so resync the counters
+        FeedbackCounter.rebuild(self.get_organization())
         
         # TODO: Integrate with actual AI analysis service
         # This would typically be a Celery task
@@ -1368,75 +1284,24 @@ class FeedbackImportView(FeedbackMixin, FormView):
             file = form.cleaned_data['file']
             channel = form.cleaned_data['channel']
             
-            # Read CSV file with BOM handling
-            content = file.read().decode('utf-8-sig')  # FIXED: Use utf-8-sig
-            decoded_file = content.splitlines()
-            reader = csv.DictReader(decoded_file)
-            
-            imported_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(reader, 2):  # Start from 2 (header is 1)
-                try:
-                    with transaction.atomic():
-                        # Find or create customer
-                        customer_email = row.get('customer_email', '').strip().lower()
-                        if not customer_email:
-                            errors.append(f"Row {row_num}: Missing customer email")
-                            continue
-                        
-                        customer, created = Customer.objects.get_or_create(
-                            organization=self.get_organization(),
-                            email=customer_email,
-                            defaults={
-                                'customer_id': f"CUST-{uuid.uuid4().hex[:8].upper()}",
-                                'first_name': row.get('first_name', ''),
-                                'last_name': row.get('last_name', ''),
-                            }
-                        )
-                        
-                        # Create feedback
-                        feedback = Feedback(
-                            organization=self.get_organization(),
-                            customer=customer,
-                            channel=channel,
-                            subject=row.get('subject', '')[:500],
-                            content=row.get('content', ''),
-                            feedback_type=row.get('feedback_type', 'general'),
-                            priority=row.get('priority', 'medium'),
-                            status=row.get('status', 'new'),
-                            original_language=row.get('language', 'en'),
-                        )
-                        feedback.save()
-                        
-                        imported_count += 1
-                        
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-                    continue
-            
-            if imported_count > 0:
-                messages.success(
-                    self.request,
-                    _('Successfully imported %(count)s feedback items.') % {
-                        'count': imported_count
-                    }
-                )
+            organization = self.get_organization()
             
-            if errors:
-                messages.warning(
-                    self.request,
-                    _('Completed with %(error_count)s errors.') % {
-                        'error_count': len(errors)
-                    }
-                )
-                # Store errors in session for display
-                self.request.session['import_errors'] = errors[:10]  # Limit to 10 errors
+            # The import runs as a background job; poll its progress endpoint
+            job = create_job(
+                organization,
+                JOB_FEEDBACK_IMPORT,
+                {'file_path': store_job_upload(file), 'channel_id': str(channel.pk)},
+                description=f'CSV import of {file.name}',
+            )
+            enqueue_job(job)
             
-            logger.info(
-                f'Feedback import completed: {imported_count} imported, '
-                f'{len(errors)} errors by {self.request.user.email}'
+            messages.success(
+                self.request,
+                _('Import started as job %(job_id)s. Imported feedback appears as the job progresses.') % {
+                    'job_id': job.job_id
+                }
             )
+            logger.info(f'Feedback import job {job.job_id} queued by {self.request.user.email}')
             
         except Exception as e:
             logger.error(f'Error importing feedback: {str(e)}')
@@ -1446,7 +1311,7 @@ class FeedbackImportView(FeedbackMixin, FormView):
             )
             return self.form_invalid(form)
         
-        return redirect('feedback:feedback-list', organization_pk=self.get_organization().pk)
+        return redirect('feedback:feedback-list', organization_pk=organization.pk)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1464,48 +1329,19 @@ class FeedbackAnalysisDashboardView(FeedbackMixin, TemplateView):
         organization = self.get_organization()
         
         # Get analysis statistics
-        total_feedbacks = Feedback.objects.filter(organization=organization).count()
-        analyzed_feedbacks = Feedback.objects.filter(
-            organization=organization, ai_analyzed=True
-        ).count()
-        
-        # Sentiment distribution
-        sentiment_data = Feedback.objects.filter(
-            organization=organization,
-            sentiment_label__isnull=False
-        ).values('sentiment_label').annotate(
-            count=Count('id'),
-            percentage=Count('id') * 100.0 / total_feedbacks
-        )
-        
-        # Feedback type distribution
-        type_data = Feedback.objects.filter(
-            organization=organization
-        ).values('feedback_type').annotate(
-            count=Count('id'),
-            percentage=Count('id') * 100.0 / total_feedbacks
-        )
-        
-        # Priority distribution
-        priority_data = Feedback.objects.filter(
-            organization=organization
-        ).values('priority').annotate(
-            count=Count('id'),
-            percentage=Count('id') * 100.0 / total_feedbacks
-        )
+        statistics = get_organization_feedback_statistics(organization)
+        total_feedbacks = statistics.total
+        analyzed_feedbacks = statistics.ai_analyzed_count
         
         context.update({
             'page_title': _('Feedback Analysis Dashboard'),
             'total_feedbacks': total_feedbacks,
             'analyzed_feedbacks': analyzed_feedbacks,
-            'analysis_percentage': (analyzed_feedbacks / total_feedbacks * 100) if total_feedbacks > 0 else 0,
-            'sentiment_data': sentiment_data,
-            'type_data': type_data,
-            'priority_data': priority_data,
-            'needs_review': Feedback.objects.filter(
-                organization=organization,
-                requires_human_review=True
-            ).count(),
+            'analysis_percentage': statistics.percentage(analyzed_feedbacks),
+            'sentiment_data': statistics.distribution('sentiment_label', include_empty=False),
+            'type_data': statistics.distribution('feedback_type'),
+            'priority_data': statistics.distribution('priority'),
+            'needs_review': statistics.needs_review_count,
         })
         
         return context
@@ -12,6 +12,8 @@ import json
 import uuid
 from datetime import timedelta
 from core.models import *
+from cx_analytics.services.metric_snapshots import MetricSnapshotReader, day_bounds
+from surveys.services.theme_occurrences import top_labels
     
 
 class OrganizationContextMixin:
@@ -153,72 +155,74 @@ class CESDashboardView(OrganizationContextMixin, LoginRequiredMixin, TemplateVie
         
         # Get date range filter
         days_filter = int(self.request.GET.get('days', 30))
-        date_from = timezone.now() - timedelta(days=days_filter)
         
-        # Base queryset
+        # Closed days come from the daily snapshots, today is read live
+        reader = MetricSnapshotReader.for_last_days(organization, days_filter)
+        date_from = day_bounds(reader.start_date)[0]
+        ces = reader.totals('ces')
+        daily = reader.daily('ces')
+        
+        # Base queryset (only used for drill-down lists)
         queryset = CESResponse.objects.filter(
             organization=organization,
             created_at__gte=date_from
         )
         
         # Initialize default values
-        total = queryset.count()
+        total = ces.get('count', 0)
         
         # Overall Metrics
         context['total_responses'] = total
-        context['avg_ces_score'] = queryset.aggregate(
-            avg_score=Avg('normalized_score')
-        )['avg_score'] or 0
+        context['avg_ces_score'] = ces.get('normalized_sum', 0) / total if total else 0
         
         # Effort Level Distribution
-        effort_distribution = list(queryset.values('effort_level').annotate(
-            count=Count('id'),
-            avg_score=Avg('normalized_score')
-        ).order_by('effort_level'))
+        effort_distribution = [
+            {
+                'effort_level': level,
+                'count': bucket.get('count', 0),
+                'avg_score': bucket.get('normalized_sum', 0) / bucket['count'] if bucket.get('count') else None,
+            }
+            for level, bucket in sorted(ces.get('levels', {}).items())
+        ]
         context['effort_distribution'] = json.dumps(effort_distribution)
         
         # Score Distribution
-        score_distribution = list(queryset.values('score').annotate(
-            count=Count('id')
-        ).order_by('score'))
+        score_distribution = [
+            {'score': int(score), 'count': count}
+            for score, count in sorted(ces.get('histogram', {}).items(), key=lambda item: int(item[0]))
+        ]
         context['score_distribution'] = json.dumps(score_distribution)
         
-        # Daily Trends - FIXED: Use slicing after converting to list
-        daily_trends_query = queryset.extra(
-            select={'day': "DATE(created_at)"}
-        ).values('day').annotate(
-            avg_score=Avg('normalized_score'),
-            count=Count('id')
-        ).order_by('day')
-        
-        # Convert to list first, then slice
-        daily_trends = list(daily_trends_query)
-        # Take last 30 days if available
+        # Daily Trends - last 30 days with responses
+        daily_trends = [
+            {
+                'day': day.isoformat(),
+                'avg_score': section['normalized_sum'] / section['count'] if section.get('count') else None,
+                'count': section.get('count', 0),
+            }
+            for day, section in daily.items()
+            if section.get('count')
+        ]
         daily_trends = daily_trends[-30:] if len(daily_trends) > 30 else daily_trends
         context['daily_trends'] = json.dumps(daily_trends)
         
         # Effort Area Analysis
-        effort_area_analysis = list(queryset.values('effort_area').annotate(
-            count=Count('id'),
-            avg_score=Avg('normalized_score'),
-            avg_raw_score=Avg('score')
-        ).exclude(effort_area='').order_by('-avg_score'))
+        effort_area_analysis = [
+            {
+                'effort_area': area,
+                'count': bucket.get('count', 0),
+                'avg_score': bucket.get('normalized_sum', 0) / bucket['count'] if bucket.get('count') else None,
+                'avg_raw_score': bucket.get('score_sum', 0) / bucket['count'] if bucket.get('count') else None,
+            }
+            for area, bucket in ces.get('areas', {}).items()
+        ]
+        effort_area_analysis.sort(key=lambda item: item['avg_score'] or 0, reverse=True)
         context['effort_area_analysis'] = json.dumps(effort_area_analysis)
         
         # Friction Points Analysis (if AI analyzed)
-        context['common_friction_points'] = []
-        if queryset.filter(ai_analyzed=True).exists():
-            friction_points = {}
-            for response in queryset.filter(ai_analyzed=True):
-                if response.friction_points:
-                    for point in response.friction_points:
-                        friction_points[point] = friction_points.get(point, 0) + 1
-            
-            context['common_friction_points'] = sorted(
-                friction_points.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:10]
+        context['common_friction_points'] = top_labels(
+            organization, 'ces', 'friction_point', start=date_from, limit=10
+        )
         
         # Customer Segmentation by Effort
         high_effort_customers = list(queryset.filter(
@@ -238,87 +242,43 @@ class CESDashboardView(OrganizationContextMixin, LoginRequiredMixin, TemplateVie
         context['low_effort_customers'] = low_effort_customers
         
         # Time-based Metrics
-        context['today_count'] = queryset.filter(
-            created_at__date=timezone.now().date()
-        ).count()
-        
-        context['week_count'] = queryset.filter(
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).count()
-        
-        context['month_count'] = queryset.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count()
+        today = reader.today
+        context['today_count'] = daily.get(today, {}).get('count', 0)
+        context['week_count'] = sum(
+            section.get('count', 0) for day, section in daily.items()
+            if day >= today - timedelta(days=7)
+        )
+        context['month_count'] = sum(
+            section.get('count', 0) for day, section in daily.items()
+            if day >= today - timedelta(days=30)
+        )
         
         # CES Metric Calculation (Percentage of low-effort experiences)
-        low_effort_count = queryset.filter(
-            effort_level__in=['very_easy', 'easy', 'somewhat_easy']
-        ).count()
-        high_effort_count = queryset.filter(
-            effort_level__in=['very_difficult', 'difficult', 'somewhat_difficult']
-        ).count()
+        levels = ces.get('levels', {})
+        low_effort_count = sum(
+            levels.get(level, {}).get('count', 0) for level in ['very_easy', 'easy', 'somewhat_easy']
+        )
+        high_effort_count = sum(
+            levels.get(level, {}).get('count', 0) for level in ['very_difficult', 'difficult', 'somewhat_difficult']
+        )
         
         total_for_calc = total or 1  # Avoid division by zero
         context['ces_metric'] = (low_effort_count / total_for_calc) * 100
         context['detractor_rate'] = (high_effort_count / total_for_calc) * 100
         
-        # Response Frequency Analysis - FIXED
-        if queryset.exists():
-            # Method 1: Using Django's Extract function (database agnostic)
-            try:
-                from django.db.models.functions import ExtractHour
-                response_frequency = list(
-                    queryset.annotate(
-                        hour=ExtractHour('created_at')
-                    ).values('hour').annotate(
-                        count=Count('id')
-                    ).order_by('hour')
-                )
-            except:
-                # Method 2: Fallback using database-specific SQL
-                try:
-                    response_frequency = list(queryset.extra(
-                        select={'hour': 'strftime("%H", created_at)'}  # SQLite
-                    ).values('hour').annotate(
-                        count=Count('id')
-                    ).order_by('hour'))
-                except:
-                    # Method 3: Another fallback for MySQL
-                    try:
-                        response_frequency = list(queryset.extra(
-                            select={'hour': 'HOUR(created_at)'}  # MySQL
-                        ).values('hour').annotate(
-                            count=Count('id')
-                        ).order_by('hour'))
-                    except:
-                        # Method 4: Fallback for PostgreSQL
-                        try:
-                            response_frequency = list(queryset.extra(
-                                select={'hour': 'EXTRACT(HOUR FROM created_at)'}  # PostgreSQL
-                            ).values('hour').annotate(
-                                count=Count('id')
-                            ).order_by('hour'))
-                        except:
-                            # If all else fails, return empty list
-                            response_frequency = []
-        else:
-            response_frequency = []
+        # Response Frequency Analysis
+        response_frequency = [
+            {'hour': int(hour), 'count': count}
+            for hour, count in sorted(ces.get('hours', {}).items(), key=lambda item: int(item[0]))
+        ]
         context['response_frequency'] = json.dumps(response_frequency)
         
         # Sentiment Analysis (if available)
-        sentiment_data = []
-        if queryset.filter(ai_analyzed=True).exists():
-            sentiment_data = list(queryset.filter(
-                ai_analyzed=True
-            ).extra({
-                'sentiment_bucket': "CASE \
-                    WHEN sentiment_score < -0.5 THEN 'negative' \
-                    WHEN sentiment_score < 0.5 THEN 'neutral' \
-                    ELSE 'positive' \
-            END"
-            }).values('sentiment_bucket').annotate(
-                count=Count('id')
-            ))
+        sentiment_data = [
+            {'sentiment_bucket': bucket, 'count': count}
+            for bucket, count in ces.get('sentiment', {}).items()
+            if count
+        ]
         context['sentiment_data'] = json.dumps(sentiment_data)
         
         # Task Performance Analysis
@@ -335,10 +295,7 @@ class CESDashboardView(OrganizationContextMixin, LoginRequiredMixin, TemplateVie
         context['available_days'] = [7, 30, 90, 180, 365]
         
         # Scale information - with fallback
-        if queryset.exists():
-            context['scale_max'] = queryset.first().scale_max
-        else:
-            context['scale_max'] = 7  # Default value
+        context['scale_max'] = ces.get('scale_max') or 7  # Default value
         
         # Add empty list defaults for missing context
         if 'common_friction_points' not in context:
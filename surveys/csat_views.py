@@ -1,7 +1,6 @@
 from django.views.generic import ListView, DetailView, DeleteView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Count, Avg, Q, F
-from django.utils import timezone
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 import json
@@ -9,6 +8,8 @@ from datetime import timedelta
 from core.models import *
 from django.contrib import messages
 from django.urls import reverse_lazy
+from cx_analytics.services.metric_snapshots import MetricSnapshotReader, day_bounds, merge_metrics
+from surveys.services.theme_occurrences import top_labels
 
 
 from django.shortcuts import get_object_or_404
@@ -152,64 +153,82 @@ class CSATDashboardView(LoginRequiredMixin, TemplateView):
         
         # Get date range filter
         days_filter = int(self.request.GET.get('days', 30))
-        date_from = timezone.now() - timedelta(days=days_filter)
         
-        # Base queryset
+        # Closed days come from the daily snapshots, today is read live
+        reader = MetricSnapshotReader.for_last_days(organization, days_filter)
+        date_from = day_bounds(reader.start_date)[0]
+        csat = reader.totals('csat')
+        daily = reader.daily('csat')
+        
+        # Base queryset (only used for per-customer and theme drill-downs)
         queryset = CSATResponse.objects.filter(
             organization_id=organization_id,
             created_at__gte=date_from
         )
         
         # Overall Metrics
-        context['total_responses'] = queryset.count()
-        context['avg_score'] = queryset.aggregate(
-            avg_score=Avg('normalized_score')
-        )['avg_score'] or 0
+        context['total_responses'] = csat.get('count', 0)
+        context['avg_score'] = (
+            csat.get('normalized_sum', 0) / context['total_responses']
+            if context['total_responses'] else 0
+        )
         
         # Score Distribution
-        score_distribution = list(queryset.values('score').annotate(
-            count=Count('id')
-        ).order_by('score'))
+        score_distribution = [
+            {'score': int(score), 'count': count}
+            for score, count in sorted(csat.get('histogram', {}).items(), key=lambda item: int(item[0]))
+        ]
         context['score_distribution'] = json.dumps(score_distribution)
         
         # Satisfaction Level Distribution
-        satisfaction_distribution = list(queryset.values('satisfaction_level').annotate(
-            count=Count('id')
-        ))
+        satisfaction_distribution = [
+            {'satisfaction_level': level, 'count': count}
+            for level, count in csat.get('levels', {}).items()
+        ]
         context['satisfaction_distribution'] = json.dumps(satisfaction_distribution)
         
         # Daily Trends
-        daily_trends = list(queryset.extra(
-            select={'day': "DATE(created_at)"}
-        ).values('day').annotate(
-            avg_score=Avg('normalized_score'),
-            count=Count('id')
-        ).order_by('day')[:30])
+        daily_trends = [
+            {
+                'day': day.isoformat(),
+                'avg_score': section['normalized_sum'] / section['count'] if section.get('count') else None,
+                'count': section.get('count', 0),
+            }
+            for day, section in daily.items()
+            if section.get('count')
+        ][:30]
         context['daily_trends'] = json.dumps(daily_trends)
         
         # Interaction Type Analysis
-        interaction_analysis = list(queryset.values('interaction_type').annotate(
-            count=Count('id'),
-            avg_score=Avg('normalized_score')
-        ).exclude(interaction_type=''))
+        interaction_analysis = [
+            {
+                'interaction_type': interaction_type,
+                'count': bucket.get('count', 0),
+                'avg_score': bucket.get('normalized_sum', 0) / bucket['count'] if bucket.get('count') else None,
+            }
+            for interaction_type, bucket in csat.get('interactions', {}).items()
+        ]
         context['interaction_analysis'] = json.dumps(interaction_analysis)
         
         # Sentiment Analysis (if available)
-        sentiment_data = list(queryset.filter(
-            ai_analyzed=True
-        ).values('sentiment_score').annotate(
-            count=Count('id')
-        ).order_by('sentiment_score'))
+        sentiment_data = [
+            {'sentiment_score': None if score == 'None' else float(score), 'count': count}
+            for score, count in csat.get('sentiment', {}).items()
+        ]
+        sentiment_data.sort(key=lambda item: (item['sentiment_score'] is None, item['sentiment_score'] or 0))
         context['sentiment_data'] = json.dumps(sentiment_data)
         
         # Product Performance (if applicable)
-        product_performance = list(queryset.filter(
-            product__isnull=False
-        ).values('product__name').annotate(
-            count=Count('id'),
-            avg_score=Avg('normalized_score')
-        ).order_by('-avg_score')[:10])
-        context['product_performance'] = json.dumps(product_performance)
+        product_performance = [
+            {
+                'product__name': name,
+                'count': bucket.get('count', 0),
+                'avg_score': bucket.get('normalized_sum', 0) / bucket['count'] if bucket.get('count') else None,
+            }
+            for name, bucket in csat.get('products', {}).items()
+        ]
+        product_performance.sort(key=lambda item: item['avg_score'] or 0, reverse=True)
+        context['product_performance'] = json.dumps(product_performance[:10])
         
         # Customer Segmentation
         top_customers = list(queryset.values(
@@ -221,25 +240,22 @@ class CSATDashboardView(LoginRequiredMixin, TemplateView):
         context['top_customers'] = top_customers
         
         # Time-based Metrics
-        context['today_count'] = queryset.filter(
-            created_at__date=timezone.now().date()
-        ).count()
-        
-        context['yesterday_count'] = queryset.filter(
-            created_at__date=timezone.now().date() - timedelta(days=1)
-        ).count()
-        
-        context['weekly_avg'] = queryset.filter(
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).aggregate(Avg('normalized_score'))['normalized_score__avg'] or 0
+        today = reader.today
+        context['today_count'] = daily.get(today, {}).get('count', 0)
+        context['yesterday_count'] = daily.get(today - timedelta(days=1), {}).get('count', 0)
+        
+        week = {}
+        for day, section in daily.items():
+            if day >= today - timedelta(days=7):
+                merge_metrics(week, section)
+        context['weekly_avg'] = (
+            week.get('normalized_sum', 0) / week['count'] if week.get('count') else 0
+        )
         
         # Calculate NPS-like score
-        promoter_count = queryset.filter(
-            satisfaction_level='very_satisfied'
-        ).count()
-        detractor_count = queryset.filter(
-            satisfaction_level__in=['very_dissatisfied', 'dissatisfied']
-        ).count()
+        levels = csat.get('levels', {})
+        promoter_count = levels.get('very_satisfied', 0)
+        detractor_count = levels.get('very_dissatisfied', 0) + levels.get('dissatisfied', 0)
         total_count = context['total_responses'] or 1
         
         context['nps_score'] = ((promoter_count - detractor_count) / total_count) * 100
@@ -249,19 +265,9 @@ class CSATDashboardView(LoginRequiredMixin, TemplateView):
         context['response_rate'] = 0
         
         # Top Themes from AI Analysis
-        if queryset.filter(ai_analyzed=True).exists():
-            # Extract common themes from metadata
-            themes = {}
-            for response in queryset.filter(ai_analyzed=True).only('metadata'):
-                if 'themes' in response.metadata:
-                    for theme in response.metadata['themes']:
-                        themes[theme] = themes.get(theme, 0) + 1
-            
-            context['common_themes'] = sorted(
-                themes.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:5]
+        context['common_themes'] = top_labels(
+            organization, 'csat', 'theme', start=date_from, limit=5
+        )
         
         # Add filter options
         context['days_filter'] = days_filter
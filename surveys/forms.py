@@ -2,6 +2,7 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 from core.models import *
 import json
+from surveys.services.survey_counters import increment_survey_responses
 
 class SurveyForm(forms.ModelForm):
     class Meta:
@@ -343,10 +344,7 @@ class SurveyResponseForm(forms.Form):
             
             # Update survey statistics
             if self.survey:
-                self.survey.total_responses += 1
-                if self.survey.total_sent > 0:
-                    self.survey.response_rate = (self.survey.total_responses / self.survey.total_sent) * 100
-                self.survey.save(update_fields=['total_responses', 'response_rate', 'updated_at'])
+                increment_survey_responses(self.survey)
             
             # Update customer engagement metrics if customer exists
             if customer:
@@ -0,0 +1,50 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization
+from surveys.services.response_metrics import backfill_score_columns
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Populate the materialized NPS, CSAT and CES score columns of existing survey responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            help='Organization id or slug to backfill. Defaults to all organizations.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of responses loaded and written back per batch.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all_rows',
+            help='Re-extract every response instead of only rows with empty score columns.',
+        )
+
+    def handle(self, *args, **options):
+        organization = None
+        identifier = options.get('organization')
+        if identifier:
+            organization = Organization.objects.filter(slug=identifier).first()
+            if organization is None:
+                try:
+                    organization = Organization.objects.filter(pk=identifier).first()
+                except Exception:
+                    organization = None
+            if organization is None:
+                raise CommandError(f'Organization not found: {identifier}')
+
+        updated = backfill_score_columns(
+            organization,
+            batch_size=options['batch_size'],
+            only_missing=not options['all_rows'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Backfilled score columns for {updated} survey responses'))
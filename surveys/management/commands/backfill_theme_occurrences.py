@@ -0,0 +1,43 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization
+from surveys.services.theme_occurrences import backfill_occurrences
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-sync ThemeOccurrence rows from the key themes and friction points of analyzed '
+        'responses. Existing data is backfilled by migration core 0012; use this to repair drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            help='Organization id or slug to backfill. Defaults to all organizations.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of responses streamed per database round trip.',
+        )
+
+    def handle(self, *args, **options):
+        organization = None
+        identifier = options.get('organization')
+        if identifier:
+            organization = Organization.objects.filter(slug=identifier).first()
+            if organization is None:
+                try:
+                    organization = Organization.objects.filter(pk=identifier).first()
+                except Exception:
+                    organization = None
+            if organization is None:
+                raise CommandError(f'Organization not found: {identifier}')
+
+        synced = backfill_occurrences(organization, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Synced theme occurrences for {synced} responses'))
@@ -12,6 +12,7 @@ from django.core.exceptions import PermissionDenied
 from core.models import *
 from .forms import SurveyResponseForm
 import uuid
+from surveys.services.survey_counters import increment_survey_responses
 
 logger = logging.getLogger(__name__)
 
@@ -470,23 +471,8 @@ class SurveyResponseCreateView(CreateView):
             return self.form_invalid(form)
     
     def _update_survey_statistics(self):
-        """Update survey response statistics"""
-        try:
-            from django.db.models import F
-            
-            # Use atomic update to prevent race conditions
-            self.survey.total_responses = F('total_responses') + 1
-            
-            # Recalculate response rate
-            if self.survey.total_sent > 0:
-                new_total = self.survey.total_responses + 1
-                self.survey.response_rate = (new_total / self.survey.total_sent) * 100
-            
-            self.survey.save(update_fields=['total_responses', 'response_rate', 'updated_at'])
-            
-        except Exception as e:
-            logger.error(f"Error updating survey statistics: {str(e)}")
-            # Don't fail the response if stats update fails
+        """Update survey response statistics (response_rate is computed on read)"""
+        increment_survey_responses(self.survey)
     
     def _update_customer_interactions(self, customer):
         """Update customer interaction count"""
@@ -960,23 +946,8 @@ class SurveyResponseCreateView1(CreateView):
             return self.form_invalid(form)
     
     def _update_survey_statistics(self):
-        """Update survey response statistics"""
-        try:
-            from django.db.models import F
-            
-            # Use atomic update to prevent race conditions
-            self.survey.total_responses = F('total_responses') + 1
-            
-            # Recalculate response rate
-            if self.survey.total_sent > 0:
-                new_total = self.survey.total_responses + 1
-                self.survey.response_rate = (new_total / self.survey.total_sent) * 100
-            
-            self.survey.save(update_fields=['total_responses', 'response_rate', 'updated_at'])
-            
-        except Exception as e:
-            logger.error(f"Error updating survey statistics: {str(e)}")
-            # Don't fail the response if stats update fails
+        """Update survey response statistics (response_rate is computed on read)"""
+        increment_survey_responses(self.survey)
     
     def _update_customer_interactions(self, customer):
         """Update customer interaction count"""
@@ -1412,16 +1383,8 @@ class SurveyResponseCreateView1(CreateView):
             return self.form_invalid(form)
     
     def _update_survey_statistics(self):
-        """Update survey response statistics"""
-        try:
-            from django.db.models import F
-            
-            self.survey.total_responses = F('total_responses') + 1
-            if self.survey.total_sent > 0:
-                self.survey.response_rate = (self.survey.total_responses / self.survey.total_sent) * 100
-            self.survey.save(update_fields=['total_responses', 'response_rate', 'updated_at'])
-        except Exception as e:
-            logger.error(f"Error updating survey statistics: {str(e)}")
+        """Update survey response statistics (response_rate is computed on read)"""
+        increment_survey_responses(self.survey)
     
     def get_success_url(self):
         """Redirect to thank you page"""
@@ -2072,6 +2035,7 @@ from django.db.models.functions import TruncDate
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from datetime import timedelta
+from surveys.services.response_metrics import column_score_summary, completion_time_metrics
 
 
 class SurveyAnalyticsView(LoginRequiredMixin, DetailView):
@@ -2219,60 +2183,8 @@ class SurveyAnalyticsView(LoginRequiredMixin, DetailView):
         }
     
     def _get_completion_metrics(self, responses):
-        """Calculate completion time metrics"""
-        avg_completion_minutes = None
-        completion_data = []
-        
-        # Get responses with completion time
-        completed_with_time = responses.filter(completion_time__isnull=False)
-        
-        if completed_with_time.exists():
-            # Calculate total completion time in seconds
-            total_seconds = 0
-            valid_responses = 0
-            
-            for response in completed_with_time:
-                time_value = response.completion_time
-                if time_value is not None:
-                    if isinstance(time_value, timedelta):
-                        total_seconds += time_value.total_seconds()
-                    elif isinstance(time_value, (int, float)):
-                        total_seconds += float(time_value)
-                    valid_responses += 1
-            
-            if valid_responses > 0:
-                avg_completion_minutes = round(total_seconds / valid_responses / 60, 1)
-                
-                # Get completion time distribution
-                fast_responses = 0
-                medium_responses = 0
-                slow_responses = 0
-                
-                for response in completed_with_time:
-                    time_value = response.completion_time
-                    if time_value is not None:
-                        if isinstance(time_value, timedelta):
-                            minutes = time_value.total_seconds() / 60
-                        else:
-                            minutes = float(time_value) / 60
-                        
-                        if minutes < 2:
-                            fast_responses += 1
-                        elif minutes < 5:
-                            medium_responses += 1
-                        else:
-                            slow_responses += 1
-                
-                completion_data = [
-                    {'range': '< 2 min', 'count': fast_responses},
-                    {'range': '2-5 min', 'count': medium_responses},
-                    {'range': '> 5 min', 'count': slow_responses}
-                ]
-        
-        return {
-            'avg_completion_minutes': avg_completion_minutes,
-            'completion_distribution': completion_data
-        }
+        """Calculate completion time metrics (average and histogram in the database)"""
+        return completion_time_metrics(responses)
     
     def _get_response_channels(self, survey):
         """Get response distribution by channel"""
@@ -2288,64 +2200,31 @@ class SurveyAnalyticsView(LoginRequiredMixin, DetailView):
         """Get survey-specific metrics based on survey type"""
         metrics = {}
         
-        # Get all completed responses
-        total_responses = responses.count()
-        
         # CSAT metrics (for CSAT surveys)
         if survey.survey_type == 'csat':
-            csat_scores = []
-            for response in responses:
-                if response.response_data and isinstance(response.response_data, dict):
-                    # Look for CSAT score in response data
-                    for key, value in response.response_data.items():
-                        if isinstance(value, (int, float)) and 1 <= value <= 10:
-                            csat_scores.append(value)
-                            break
-            
-            if csat_scores:
-                avg_csat = sum(csat_scores) / len(csat_scores)
-                
-                # Categorize responses
-                promoters = len([s for s in csat_scores if s >= 9])
-                passives = len([s for s in csat_scores if 7 <= s <= 8])
-                detractors = len([s for s in csat_scores if s <= 6])
-                
+            summary = column_score_summary(responses, 'csat_score')
+            
+            if summary.total:
                 metrics['csat'] = {
-                    'avg_score': round(avg_csat, 1),
-                    'promoters': promoters,
-                    'passives': passives,
-                    'detractors': detractors,
-                    'total': len(csat_scores)
+                    'avg_score': round(summary.avg_score, 1),
+                    'promoters': summary.promoters,
+                    'passives': summary.passives,
+                    'detractors': summary.detractors,
+                    'total': summary.total
                 }
         
         # NPS metrics (for NPS surveys)
         elif survey.survey_type == 'nps':
-            nps_scores = []
-            for response in responses:
-                if response.response_data and isinstance(response.response_data, dict):
-                    # Look for NPS score in response data (0-10 scale)
-                    for key, value in response.response_data.items():
-                        if isinstance(value, (int, float)) and 0 <= value <= 10:
-                            nps_scores.append(value)
-                            break
-            
-            if nps_scores:
-                avg_nps = sum(nps_scores) / len(nps_scores)
-                
-                # Categorize responses for NPS calculation
-                promoters = len([s for s in nps_scores if s >= 9])
-                passives = len([s for s in nps_scores if 7 <= s <= 8])
-                detractors = len([s for s in nps_scores if s <= 6])
-                
-                nps_score = ((promoters - detractors) / len(nps_scores)) * 100 if nps_scores else 0
-                
+            summary = column_score_summary(responses, 'nps_score')
+            
+            if summary.total:
                 metrics['nps'] = {
-                    'avg_score': round(avg_nps, 1),
-                    'nps_score': round(nps_score, 1),
-                    'promoters': promoters,
-                    'passives': passives,
-                    'detractors': detractors,
-                    'total': len(nps_scores)
+                    'avg_score': round(summary.avg_score, 1),
+                    'nps_score': round(summary.nps_score, 1),
+                    'promoters': summary.promoters,
+                    'passives': summary.passives,
+                    'detractors': summary.detractors,
+                    'total': summary.total
                 }
         
         return metrics
@@ -2471,22 +2350,27 @@ def analyze_sentiment_api(request, pk):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
     
-import csv
-import json
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import View
 from django.utils import timezone
 from django.utils.translation import gettext as _
-from datetime import datetime
+from django.core.files.storage import default_storage
+from datetime import date, datetime
+import tempfile
+
+from cx_analytics.services.analysis_jobs import JOB_COLUMNAR_EXPORT, create_job, enqueue_job, job_progress
+from cx_analytics.services.columnar_export import (
+    FORMAT_EXTENSIONS,
+    PYARROW_AVAILABLE,
+    ColumnarExportError,
+    ColumnarExporter,
+    inline_export_max_rows,
+)
+from surveys.services.response_export import SurveyResponseCSVExporter
+from surveys.services.survey_reports import request_survey_report
 
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-import io
 
 class ExportSurveyResponsesCSVView(LoginRequiredMixin, View):
     """Export survey responses to CSV format"""
@@ -2505,27 +2389,18 @@ class ExportSurveyResponsesCSVView(LoginRequiredMixin, View):
                 status=403
             )
         
-        # Get all completed responses
-        responses = survey.responses.filter(is_complete=True).select_related(
-            'customer', 'channel'
-        ).order_by('-created_at')
-        
-        # Create the HttpResponse object with CSV header
-        response = HttpResponse(content_type='text/csv')
+        exporter = SurveyResponseCSVExporter(survey)
         filename = f"survey_{survey.pk}_responses_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
-        # Create CSV writer
-        writer = csv.writer(response)
-        
-        # Write headers based on survey type
-        headers = self._get_csv_headers(survey)
-        writer.writerow(headers)
-        
-        # Write data rows
-        for response_obj in responses:
-            row = self._format_response_row(response_obj, survey)
-            writer.writerow(row)
+        # ?compress=gzip streams a .csv.gz compressed on the fly
+        if request.GET.get('compress') == 'gzip':
+            response = StreamingHttpResponse(exporter.iter_gzip(), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(exporter.iter_csv(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Keep nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
         
         return response
     
@@ -2541,73 +2416,103 @@ class ExportSurveyResponsesCSVView(LoginRequiredMixin, View):
         except OrganizationMember.DoesNotExist:
             return False
     
-    def _get_csv_headers(self, survey):
-        """Get CSV headers based on survey type and structure"""
-        headers = [
-            _('Response ID'),
-            _('Timestamp'),
-            _('Customer Email'),
-            _('Customer Name'),
-            _('Completed'),
-            _('Completion Time (min)'),
-            _('Channel'),
-            _('Device Type'),
-            _('Sentiment Score'),
-            _('Language'),
-        ]
+
+class ExportSurveyResponsesColumnarView(ExportSurveyResponsesCSVView):
+    """
+    Export survey responses as a typed Parquet or Arrow IPC file (needs
+    pyarrow). Exports over COLUMNAR_EXPORT_INLINE_MAX_ROWS rows are written
+    by a background job and downloaded with ?job=<job_id> once it completes.
+    """
+    
+    def get(self, request, organization_pk, pk, fmt, *args, **kwargs):
+        survey = get_object_or_404(
+            Survey,
+            pk=pk,
+            organization__pk=organization_pk
+        )
         
-        # Add question headers
-        questions = survey.questions or []
-        for i, question in enumerate(questions, 1):
-            question_text = question.get('text', f'Question {i}')
-            # Truncate long question text for header
-            if len(question_text) > 50:
-                question_text = question_text[:47] + '...'
-            headers.append(f'Q{i}: {question_text}')
-        
-        # Add metadata headers
-        headers.append(_('Response Metadata'))
-        
-        return headers
-    
-    def _format_response_row(self, response_obj, survey):
-        """Format a response object into a CSV row"""
-        row = [
-            str(response_obj.pk),
-            response_obj.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            response_obj.customer.email if response_obj.customer else _('Anonymous'),
-            response_obj.customer.get_full_name() if response_obj.customer and hasattr(response_obj.customer, 'get_full_name') else '',
-            _('Yes') if response_obj.is_complete else _('No'),
-            round(response_obj.completion_time.total_seconds() / 60, 2) if response_obj.completion_time else '',
-            response_obj.channel.name if response_obj.channel else '',
-            response_obj.get_device_type_display() if response_obj.device_type else '',
-            response_obj.sentiment_score if response_obj.sentiment_score is not None else '',
-            response_obj.language,
-        ]
+        # Check permissions
+        if not self._has_permission(request.user, survey):
+            return HttpResponse(
+                _("You don't have permission to export this survey's data."),
+                status=403
+            )
         
-        # Add question answers
-        questions = survey.questions or []
-        response_data = response_obj.response_data or {}
+        if request.GET.get('job'):
+            return self._job_download(request, survey, request.GET['job'])
         
-        for i, question in enumerate(questions, 1):
-            question_id = question.get('id', f'q{i}')
-            answer = response_data.get(question_id, '')
-            
-            # Format answer based on type
-            if isinstance(answer, list):
-                answer = ', '.join(str(item) for item in answer)
-            elif isinstance(answer, dict):
-                answer = json.dumps(answer, ensure_ascii=False)
-            elif answer is None:
-                answer = ''
-            
-            row.append(str(answer))
+        try:
+            start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        except ValueError:
+            return HttpResponse(_("Dates must be in YYYY-MM-DD format."), status=400)
         
-        # Add metadata
-        metadata = response_obj.metadata or {}
-        row.append(json.dumps(metadata, ensure_ascii=False))
+        try:
+            exporter = ColumnarExporter(survey.organization, 'survey_responses', fmt=fmt, survey=survey, start=start, end=end)
+        except ColumnarExportError as e:
+            return HttpResponse(str(e), status=400 if PYARROW_AVAILABLE else 501)
+        
+        row_count = exporter.queryset().count()
+        if row_count > inline_export_max_rows():
+            job = create_job(
+                survey.organization,
+                JOB_COLUMNAR_EXPORT,
+                {
+                    'dataset': 'survey_responses',
+                    'format': fmt,
+                    'survey_id': str(survey.pk),
+                    'start': start.isoformat() if start else None,
+                    'end': end.isoformat() if end else None,
+                },
+                description=f"{fmt} export of survey {survey.pk} responses",
+                total_items=row_count,
+            )
+            enqueue_job(job)
+            return self._job_pending(request, survey, job.job_id)
         
-        return row
+        # Parquet needs the whole file written before it can be read, so
+        # spool it to disk rather than holding it in memory
+        export_file = tempfile.TemporaryFile()
+        try:
+            exporter.write(export_file)
+        except Exception:
+            export_file.close()
+            raise
+        export_file.seek(0)
+        
+        filename = f"survey_{survey.pk}_responses_{timezone.now().strftime('%Y%m%d_%H%M%S')}{FORMAT_EXTENSIONS[fmt]}"
+        return FileResponse(export_file, as_attachment=True, filename=filename, content_type='application/octet-stream')
+    
+    def _job_download(self, request, survey, job_id):
+        """The finished export of a background job, or its progress while it runs"""
+        job = get_object_or_404(
+            AIAnalysisJob,
+            organization=survey.organization,
+            job_id=job_id,
+            job_type=JOB_COLUMNAR_EXPORT,
+            parameters__survey_id=str(survey.pk),
+        )
+        path = (job.result_data or {}).get('file_path')
+        if job.status == 'completed' and path:
+            filename = f"survey_{survey.pk}_responses_{job.completed_at.strftime('%Y%m%d_%H%M%S')}{FORMAT_EXTENSIONS[job.parameters['format']]}"
+            return FileResponse(default_storage.open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/octet-stream')
+        return self._job_pending(request, survey, job.job_id)
+    
+    def _job_pending(self, request, survey, job_id):
+        download_url = f"{request.path}?job={job_id}"
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse({
+                **job_progress(survey.organization, job_id),
+                'progress_url': reverse('cx_analytics:job-progress', kwargs={
+                    'organization_pk': survey.organization_id, 'job_id': job_id,
+                }),
+                'download_url': download_url,
+            }, status=202)
+        
+        messages.info(request, _("The export is being prepared. Download it from %(url)s in a moment.") % {'url': download_url})
+        return redirect(request.META.get('HTTP_REFERER') or reverse(
+            'surveys:survey-analytics', kwargs={'organization_pk': survey.organization_id, 'pk': survey.pk}
+        ))
 
 
 class ExportSurveyAnalyticsReportView(LoginRequiredMixin, View):
@@ -2627,17 +2532,28 @@ class ExportSurveyAnalyticsReportView(LoginRequiredMixin, View):
                 status=403
             )
         
-        # Generate PDF
-        pdf_buffer = self._generate_pdf_report(survey, request.user)
-        
-        # Create response
-        response = HttpResponse(content_type='application/pdf')
-        filename = f"survey_{survey.pk}_analytics_report_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf_buffer.getvalue())
-        pdf_buffer.close()
-        
-        return response
+        # Served from storage when the survey's data has not changed since
+        # the last rendering; otherwise rendered on a worker
+        report, queued = request_survey_report(survey, request.user)
+        if queued:
+            # The local executor may already have finished it
+            report.refresh_from_db(fields=['generation_status', 'file', 'updated_at'])
+        
+        if report.generation_status == 'completed' and report.file:
+            filename = f"survey_{survey.pk}_analytics_report_{report.updated_at.strftime('%Y%m%d_%H%M%S')}.pdf"
+            return FileResponse(report.file.open('rb'), as_attachment=True, filename=filename, content_type='application/pdf')
+        
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse({
+                'report_id': str(report.pk),
+                'status': report.generation_status,
+                'download_url': request.path,
+            }, status=202)
+        
+        messages.info(request, _("The report is being generated. Download it again in a moment."))
+        return redirect(request.META.get('HTTP_REFERER') or reverse(
+            'surveys:survey-analytics', kwargs={'organization_pk': organization_pk, 'pk': pk}
+        ))
     
     def _has_permission(self, user, survey):
         """Check if user can export survey report"""
@@ -2650,259 +2566,3 @@ class ExportSurveyAnalyticsReportView(LoginRequiredMixin, View):
             return membership.role in ['owner', 'admin', 'manager', 'analyst']
         except OrganizationMember.DoesNotExist:
             return False
-    
-    def _generate_pdf_report(self, survey, user):
-        """Generate PDF report for survey analytics"""
-        buffer = io.BytesIO()
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Prepare story (content)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor('#2c3e50')
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.HexColor('#34495e')
-        )
-        
-        subheading_style = ParagraphStyle(
-            'CustomSubHeading',
-            parent=styles['Heading3'],
-            fontSize=14,
-            spaceAfter=8,
-            spaceBefore=15,
-            textColor=colors.HexColor('#7f8c8d')
-        )
-        
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        
-        # 1. Title and metadata
-        story.append(Paragraph(_("Survey Analytics Report"), title_style))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        # Survey info table
-        survey_data = [
-            [_("Survey Title:"), survey.title],
-            [_("Survey Type:"), survey.get_survey_type_display()],
-            [_("Status:"), survey.get_status_display()],
-            [_("Created_at:"), survey.created_at.strftime('%Y-%m-%d %H:%M:%S')],
-            [_("Organization:"), survey.organization.name],
-            [_("Generated By:"), user.get_full_name() or user.email],
-            [_("Generated On:"), timezone.now().strftime('%Y-%m-%d %H:%M:%S')],
-        ]
-        
-        survey_table = Table(survey_data, colWidths=[2*inch, 4*inch])
-        survey_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#495057')),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        story.append(survey_table)
-        story.append(Spacer(1, 0.3 * inch))
-        
-        # 2. Key Metrics Section
-        story.append(Paragraph(_("Key Metrics"), heading_style))
-        
-        # Calculate metrics (similar to SurveyAnalyticsView)
-        responses = survey.responses.filter(is_complete=True)
-        total_responses = responses.count()
-        total_sent = survey.total_sent or 0
-        completion_rate = (total_responses / total_sent * 100) if total_sent > 0 else 0
-        
-        # Get device breakdown
-        device_breakdown = responses.values('device_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # Get sentiment metrics
-        avg_sentiment = responses.aggregate(
-            avg_sentiment=Avg('sentiment_score')
-        )['avg_sentiment'] or 0
-        
-        # Metrics table
-        metrics_data = [
-            [_("Metric"), _("Value")],
-            [_("Total Responses"), str(total_responses)],
-            [_("Completion Rate"), f"{completion_rate:.1f}%"],
-            [_("Questions"), str(len(survey.questions or []))],
-            [_("Average Sentiment"), f"{avg_sentiment:.2f}" if avg_sentiment != 0 else _("N/A")],
-            [_("Total Sent"), str(total_sent)],
-        ]
-        
-        metrics_table = Table(metrics_data, colWidths=[3*inch, 3*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        story.append(metrics_table)
-        story.append(Spacer(1, 0.3 * inch))
-        
-        # 3. Device Breakdown Section
-        if device_breakdown:
-            story.append(Paragraph(_("Device Breakdown"), heading_style))
-            
-            device_data = [[_("Device Type"), _("Count"), _("Percentage")]]
-            for device in device_breakdown:
-                device_type = device['device_type'] or _('Unknown')
-                count = device['count']
-                percentage = (count / total_responses * 100) if total_responses > 0 else 0
-                device_data.append([
-                    device_type.title(),
-                    str(count),
-                    f"{percentage:.1f}%"
-                ])
-            
-            device_table = Table(device_data, colWidths=[2*inch, 2*inch, 2*inch])
-            device_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ecc71')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ]))
-            story.append(device_table)
-            story.append(Spacer(1, 0.3 * inch))
-        
-        # 4. Questions Overview Section
-        questions = survey.questions or []
-        if questions:
-            story.append(Paragraph(_("Questions Overview"), heading_style))
-            
-            for i, question in enumerate(questions, 1):
-                story.append(Paragraph(f"{i}. {question.get('text', _('Untitled Question'))}", subheading_style))
-                
-                question_details = []
-                if question.get('type'):
-                    question_details.append(_("Type: ") + question['type'])
-                if question.get('required'):
-                    question_details.append(_("Required: Yes"))
-                if question.get('options'):
-                    options = ', '.join(str(opt) for opt in question['options'][:5])
-                    if len(question['options']) > 5:
-                        options += f" (+{len(question['options']) - 5} more)"
-                    question_details.append(_("Options: ") + options)
-                
-                if question_details:
-                    story.append(Paragraph(' | '.join(question_details), normal_style))
-                
-                story.append(Spacer(1, 0.1 * inch))
-        
-        # 5. Recent Responses Section (last 20)
-        recent_responses = responses.select_related('customer').order_by('-created_at')[:20]
-        if recent_responses:
-            story.append(Paragraph(_("Recent Responses"), heading_style))
-            
-            responses_data = [[
-                _("Date"),
-                _("Customer"),
-                _("Sentiment"),
-                _("Device")
-            ]]
-            
-            for response_obj in recent_responses:
-                customer_info = _("Anonymous")
-                if response_obj.customer:
-                    if response_obj.customer.get_full_name():
-                        customer_info = response_obj.customer.get_full_name()
-                    elif response_obj.customer.email:
-                        customer_info = response_obj.customer.email
-                
-                sentiment = f"{response_obj.sentiment_score:.2f}" if response_obj.sentiment_score is not None else _("N/A")
-                device = response_obj.get_device_type_display() if response_obj.device_type else _("Unknown")
-                
-                responses_data.append([
-                    response_obj.created_at.strftime('%Y-%m-%d %H:%M'),
-                    customer_info[:30],  # Truncate long names
-                    sentiment,
-                    device
-                ])
-            
-            responses_table = Table(responses_data, colWidths=[1.5*inch, 2*inch, 1*inch, 1.5*inch])
-            responses_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e74c3c')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ]))
-            story.append(responses_table)
-            story.append(Spacer(1, 0.3 * inch))
-        
-        # 6. Summary Section
-        story.append(Paragraph(_("Summary"), heading_style))
-        
-        summary_text = _(
-            "This report provides analytics for the survey '{survey_title}'. "
-            "The survey has received {total_responses} complete responses "
-            "with a completion rate of {completion_rate:.1f}%. "
-            "The overall sentiment score is {sentiment_score:.2f}. "
-            "This report was generated on {generation_date}."
-        ).format(
-            survey_title=survey.title,
-            total_responses=total_responses,
-            completion_rate=completion_rate,
-            sentiment_score=avg_sentiment,
-            generation_date=timezone.now().strftime('%Y-%m-%d %H:%M:%S')
-        )
-        
-        story.append(Paragraph(summary_text, normal_style))
-        story.append(Spacer(1, 0.2 * inch))
-        
-        # 7. Footer
-        footer_text = _(
-            "Confidential - For internal use only. "
-            "Generated by Survey Analytics System v1.0"
-        )
-        story.append(Paragraph(footer_text, ParagraphStyle(
-            'Footer',
-            parent=normal_style,
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=1  # Center aligned
-        )))
-        
-        # Build PDF
-        doc.build(story)
-        
-        buffer.seek(0)
-        return buffer
\ No newline at end of file
@@ -1,21 +1,18 @@
 # services/ai_sentiment_service.py
-import json
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
 
+from cx_analytics.services.ai_result_cache import KIND_SURVEY_SENTIMENT, get_result_cache, make_cache_key
+from cx_analytics.services.gemini_client import GEMINI_AVAILABLE, get_client_registry
+from cx_analytics.services.json_extraction import JSONExtractionError, extract_json_object
+
 logger = logging.getLogger(__name__)
 
-# Try to import Gemini, but handle if not available
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
+if not GEMINI_AVAILABLE:
     logger.warning("google.generativeai not installed. Sentiment analysis will be disabled.")
-    genai = None
-    GEMINI_AVAILABLE = False
 
 class SurveySentimentAnalyzer:
     """
@@ -23,8 +20,10 @@ class SurveySentimentAnalyzer:
     """
     
     def __init__(self):
-        """Initialize Gemini client"""
+        """Take the shared Gemini model handle from the client registry"""
         self.api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        self.model_name = 'gemini-2.5-flash'  # Updated to latest stable version
+        self.result_cache = get_result_cache()
         
         if not GEMINI_AVAILABLE:
             logger.warning("Gemini library not available. Sentiment analysis will be disabled.")
@@ -34,9 +33,7 @@ class SurveySentimentAnalyzer:
             self.client = None
         else:
             try:
-                genai.configure(api_key=self.api_key)
-                self.client = genai
-                logger.info("Gemini client initialized successfully")
+                self.client = get_client_registry().get_model(self.model_name, self.api_key)
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini client: {str(e)}")
                 self.client = None
@@ -61,11 +58,19 @@ class SurveySentimentAnalyzer:
                 result['analysis_note'] = 'no_meaningful_text'
                 return result
             
-            # Configure the model
-            model = genai.GenerativeModel('gemini-2.5-flash')  # Updated to latest stable version
+            # Same answers in the same organization context reuse an earlier result
+            cache_key = self._cache_key(survey_response, organization_context)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                cached.update({
+                    'analysis_timestamp': timezone.now().isoformat(),
+                    'cached': True,
+                })
+                logger.info("Served sentiment analysis from the result cache")
+                return cached
             
             # Generate response
-            response = model.generate_content(
+            response = self.client.generate_content(
                 prompt,
                 generation_config={
                     'temperature': 0.1,
@@ -77,14 +82,19 @@ class SurveySentimentAnalyzer:
             
             # Parse the response
             analysis_result = self._parse_ai_response(response.text)
+            # The parser falls back to the default data (model_used 'none') on bad output
+            parsed = analysis_result.get('model_used') != 'none'
             
             # Add metadata
             analysis_result.update({
                 'analysis_timestamp': timezone.now().isoformat(),
-                'model_used': 'gemini-2.5-flash',
+                'model_used': self.model_name,
                 'confidence_score': self._calculate_confidence(analysis_result),
             })
             
+            if parsed:
+                self.result_cache.set(cache_key, analysis_result, KIND_SURVEY_SENTIMENT, self.model_name)
+            
             logger.info(f"Successfully analyzed sentiment")
             return analysis_result
             
@@ -108,12 +118,8 @@ class SurveySentimentAnalyzer:
         # Require at least 20 characters of meaningful text
         return total_text_length >= 20
     
-    def _build_analysis_prompt(self, survey_response: Dict[str, Any], 
-                             organization_context: Dict[str, Any]) -> str:
-        """
-        Build a comprehensive prompt for sentiment analysis
-        """
-        # Extract textual responses
+    def _text_responses(self, survey_response: Dict[str, Any]) -> list:
+        """Question / answer blocks for every substantial text answer"""
         text_responses = []
         for question_id, answer in survey_response.items():
             if isinstance(answer, str) and answer.strip():
@@ -122,6 +128,28 @@ class SurveySentimentAnalyzer:
                     # Clean question ID for readability
                     clean_question_id = str(question_id).replace('_', ' ').title()
                     text_responses.append(f"Question: {clean_question_id}\nAnswer: {answer}")
+        return text_responses
+    
+    def _cache_key(self, survey_response: Dict[str, Any], organization_context: Dict[str, Any]) -> str:
+        """Result cache key over the text answers and the context the prompt uses"""
+        context = {
+            name: organization_context.get(name)
+            for name in ('industry', 'organization_name', 'survey_type')
+        }
+        return make_cache_key(
+            KIND_SURVEY_SENTIMENT,
+            "\n\n".join(self._text_responses(survey_response)),
+            config=context,
+            model_name=self.model_name,
+        )
+    
+    def _build_analysis_prompt(self, survey_response: Dict[str, Any], 
+                             organization_context: Dict[str, Any]) -> str:
+        """
+        Build a comprehensive prompt for sentiment analysis
+        """
+        # Extract textual responses
+        text_responses = self._text_responses(survey_response)
         
         # Combine all text for analysis
         combined_text = "\n\n".join(text_responses) if text_responses else "No textual responses provided."
@@ -167,29 +195,8 @@ class SurveySentimentAnalyzer:
     def _parse_ai_response(self, ai_response: str) -> Dict[str, Any]:
         """Parse AI response into structured data"""
         try:
-            # Clean the response - remove markdown code blocks if present
-            cleaned_response = ai_response.strip()
-            
-            # Remove markdown code blocks
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.startswith('```'):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            
-            # Find JSON start and end
-            start_idx = cleaned_response.find('{')
-            end_idx = cleaned_response.rfind('}')
-            
-            if start_idx == -1 or end_idx == -1:
-                logger.error(f"No JSON object found in response: {cleaned_response[:200]}...")
-                return self._get_default_sentiment_data()
-            
-            json_str = cleaned_response[start_idx:end_idx + 1]
-            
-            # Parse JSON
-            result = json.loads(json_str)
+            # Skips fences and prose; repairs slightly invalid JSON, raises on truncation
+            result = extract_json_object(ai_response)
             
             # Validate required fields
             required_fields = ['overall_sentiment_score', 'sentiment_label']
@@ -222,7 +229,7 @@ class SurveySentimentAnalyzer:
             
             return result
             
-        except json.JSONDecodeError as e:
+        except JSONExtractionError as e:
             logger.error(f"Failed to parse AI response as JSON: {str(e)}")
             logger.debug(f"Raw AI response: {ai_response[:500]}")
             return self._get_default_sentiment_data()
@@ -0,0 +1,239 @@
+# services/nps_aggregation.py
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Any, List, Optional
+
+from django.db.models import Count
+from django.utils import timezone
+
+from cx_analytics.services.metric_snapshots import MetricSnapshotReader, day_bounds
+
+logger = logging.getLogger(__name__)
+
+NPS_SCORES = range(11)
+CATEGORIES = ('detractor', 'passive', 'promoter')
+
+
+def score_category(score: int) -> str:
+    """NPS category for a 0-10 score"""
+    if score >= 9:
+        return 'promoter'
+    if score >= 7:
+        return 'passive'
+    return 'detractor'
+
+
+def score_histogram(queryset) -> Dict[int, int]:
+    """Single values('score').annotate(Count) pass over a NPSResponse queryset"""
+    rows = queryset.order_by().values('score').annotate(count=Count('id'))
+    return {row['score']: row['count'] for row in rows if row['score'] is not None}
+
+
+@dataclass
+class NPSMetrics:
+    """NPS metrics derived from a 0-10 score histogram"""
+    histogram: Dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_histogram(cls, histogram: Optional[Dict[Any, int]]) -> 'NPSMetrics':
+        """Build from a histogram whose keys may be ints or strings (snapshot JSON)"""
+        return cls({int(score): count for score, count in (histogram or {}).items() if count})
+
+    @classmethod
+    def from_queryset(cls, queryset) -> 'NPSMetrics':
+        return cls(score_histogram(queryset))
+
+    @property
+    def total(self) -> int:
+        return sum(self.histogram.values())
+
+    def category_count(self, category: str) -> int:
+        return sum(count for score, count in self.histogram.items() if score_category(score) == category)
+
+    @property
+    def promoters(self) -> int:
+        return self.category_count('promoter')
+
+    @property
+    def passives(self) -> int:
+        return self.category_count('passive')
+
+    @property
+    def detractors(self) -> int:
+        return self.category_count('detractor')
+
+    def percentage(self, count: int) -> float:
+        total = self.total
+        return (count / total * 100) if total > 0 else 0
+
+    @property
+    def promoter_percent(self) -> float:
+        return self.percentage(self.promoters)
+
+    @property
+    def detractor_percent(self) -> float:
+        return self.percentage(self.detractors)
+
+    @property
+    def nps_score(self) -> float:
+        return self.promoter_percent - self.detractor_percent
+
+    @property
+    def avg_score(self) -> float:
+        total = self.total
+        return sum(score * count for score, count in self.histogram.items()) / total if total else 0
+
+    def category_data(self) -> List[Dict[str, Any]]:
+        """Category split in the shape used by the dashboard charts"""
+        return [
+            {
+                'category': category,
+                'count': self.category_count(category),
+                'percentage': round(self.percentage(self.category_count(category)), 1),
+            }
+            for category in CATEGORIES
+        ]
+
+    def score_distribution(self) -> Dict[int, int]:
+        """Counts for every score 0-10, including empty ones"""
+        return {score: self.histogram.get(score, 0) for score in NPS_SCORES}
+
+    def as_metrics_dict(self) -> Dict[str, Any]:
+        """Headline metrics shared by the dashboard page and the JSON API"""
+        return {
+            'total_responses': self.total,
+            'promoters': self.promoters,
+            'passives': self.passives,
+            'detractors': self.detractors,
+            'promoter_percent': round(self.promoter_percent, 1),
+            'detractor_percent': round(self.detractor_percent, 1),
+            'nps_score': round(self.nps_score, 1),
+            'avg_score': round(self.avg_score, 1) if self.avg_score else 0,
+        }
+
+
+@dataclass
+class NPSTrend:
+    """Previous-versus-current NPS comparison"""
+    previous: NPSMetrics
+    current: NPSMetrics
+
+    def as_dict(self) -> Dict[str, Any]:
+        prev_nps = round(self.previous.nps_score, 1) if self.previous.total else 0
+        curr_nps = round(self.current.nps_score, 1) if self.current.total else 0
+
+        trend = 0
+        if prev_nps != 0:
+            trend = ((curr_nps - prev_nps) / abs(prev_nps)) * 100
+
+        return {
+            'previous': prev_nps,
+            'current': curr_nps,
+            'trend': round(trend, 1),
+            'direction': 'up' if trend > 0 else 'down' if trend < 0 else 'stable'
+        }
+
+
+class NPSAggregator:
+    """
+    NPS aggregation for an organization over the last N days.
+    Histograms come from the daily MetricSnapshot rows (plus the live
+    current day); every other figure is derived from them in Python.
+    """
+
+    def __init__(self, organization, days: int = 30):
+        self.organization = organization
+        self.days = days
+        self.reader = MetricSnapshotReader.for_last_days(organization, days)
+        self._totals = None
+
+    @property
+    def start_date(self):
+        return day_bounds(self.reader.start_date)[0]
+
+    def totals(self) -> Dict[str, Any]:
+        """Merged NPS snapshot section for the whole range"""
+        if self._totals is None:
+            self._totals = self.reader.totals('nps')
+        return self._totals
+
+    def metrics(self) -> NPSMetrics:
+        return NPSMetrics.from_histogram(self.totals().get('histogram'))
+
+    def granularity(self) -> str:
+        if self.days <= 30:
+            return 'day'
+        if self.days <= 90:
+            return 'week'
+        return 'month'
+
+    def time_series(self) -> List[Dict[str, Any]]:
+        """Per-period metrics for the charts"""
+        series = []
+        for bucket in self.reader.bucketed('nps', self.granularity()):
+            metrics = NPSMetrics.from_histogram(bucket.get('histogram'))
+            series.append({
+                'date': bucket['period'].strftime('%Y-%m-%d'),
+                'count': metrics.total,
+                'nps': round(metrics.nps_score, 1),
+                'avg_score': round(metrics.avg_score, 1),
+            })
+        return series
+
+    def sentiment_data(self) -> Dict[str, Any]:
+        """Sentiment summary of the analyzed responses"""
+        sentiment = self.totals().get('sentiment', {})
+        total_analyzed = sentiment.get('analyzed', 0)
+        total_responses = self.totals().get('count', 0)
+
+        if total_analyzed > 0:
+            overall_sentiment = sentiment.get('sum', 0) / total_analyzed
+            positive = sentiment.get('positive', 0)
+            negative = sentiment.get('negative', 0)
+            neutral = total_analyzed - positive - negative
+            analysis_rate = (total_analyzed / total_responses * 100) if total_responses > 0 else 0
+        else:
+            overall_sentiment = 0
+            positive = negative = neutral = 0
+            analysis_rate = 0
+
+        return {
+            'overall': round(overall_sentiment, 2),
+            'positive': positive,
+            'negative': negative,
+            'neutral': neutral,
+            'analysis_rate': round(analysis_rate, 1)
+        }
+
+    def product_performance(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Per-product NPS from the merged product buckets"""
+        performance = []
+        for name, product in self.totals().get('products', {}).items():
+            count = product.get('count', 0)
+            if not count:
+                continue
+            performance.append({
+                'product__name': name,
+                'avg_score': product.get('score_sum', 0) / count,
+                'response_count': count,
+                'nps_score': (product.get('promoters', 0) * 100.0 / count) - (product.get('detractors', 0) * 100.0 / count),
+            })
+        return sorted(performance, key=lambda item: item['avg_score'], reverse=True)[:limit]
+
+    def trend(self, days: int = 30) -> NPSTrend:
+        """Compare the last ``days`` days with the ``days`` before them"""
+        today = timezone.localdate()
+        # The previous window is entirely closed days, so it reads snapshots only
+        previous = MetricSnapshotReader(
+            self.organization, today - timedelta(days=days * 2), today - timedelta(days=days + 1)
+        ).totals('nps')
+        if days == self.days:
+            current = self.totals()
+        else:
+            current = MetricSnapshotReader.for_last_days(self.organization, days).totals('nps')
+
+        return NPSTrend(
+            previous=NPSMetrics.from_histogram(previous.get('histogram')),
+            current=NPSMetrics.from_histogram(current.get('histogram')),
+        )
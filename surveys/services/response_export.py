@@ -0,0 +1,177 @@
+# services/response_export.py
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterator, List, Tuple
+
+from django.utils.translation import gettext as _
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip
+FLUSH_ROWS = 500  # Rows written per yielded chunk
+GZIP_LEVEL = 6
+
+EXPORT_FIELDS = (
+    'pk',
+    'created_at',
+    'customer__email',
+    'customer__first_name',
+    'customer__last_name',
+    'is_complete',
+    'completion_time',
+    'channel__name',
+    'device_type',
+    'sentiment_score',
+    'language',
+    'response_data',
+    'metadata',
+)
+
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _format_answer(answer: Any) -> str:
+    """Answer cell: lists joined, dicts as JSON"""
+    if answer is None or answer == '':
+        return ''
+    if isinstance(answer, str):
+        return answer
+    if isinstance(answer, list):
+        return ', '.join(str(item) for item in answer)
+    if isinstance(answer, dict):
+        return _encode_json(answer)
+    return str(answer)
+
+
+class SurveyResponseCSVExporter:
+    """
+    Streams a survey's completed responses as CSV.
+
+    Rows come from a values() projection read with iterator(), so memory
+    stays flat however many responses the survey has. Everything that is
+    the same for every row (question columns, translated labels, device
+    type names) is computed once up front. Output is yielded in chunks of
+    FLUSH_ROWS rows, optionally gzip-compressed as it is produced.
+    """
+
+    def __init__(self, survey, chunk_size: int = EXPORT_CHUNK_SIZE):
+        from core.models import SurveyResponse
+
+        self.survey = survey
+        self.chunk_size = chunk_size
+        self.question_columns = self._question_columns(survey.questions or [])
+        self.device_labels = {
+            value: str(label)
+            for value, label in SurveyResponse._meta.get_field('device_type').flatchoices
+        }
+        self.anonymous = str(_('Anonymous'))
+        self.yes = str(_('Yes'))
+        self.no = str(_('No'))
+
+    @staticmethod
+    def _question_columns(questions: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """(response_data key, header) for every question, in survey order"""
+        columns = []
+        for i, question in enumerate(questions, 1):
+            question_text = question.get('text', f'Question {i}')
+            # Truncate long question text for header
+            if len(question_text) > 50:
+                question_text = question_text[:47] + '...'
+            columns.append((question.get('id', f'q{i}'), f'Q{i}: {question_text}'))
+        return columns
+
+    def headers(self) -> List[str]:
+        headers = [
+            _('Response ID'),
+            _('Timestamp'),
+            _('Customer Email'),
+            _('Customer Name'),
+            _('Completed'),
+            _('Completion Time (min)'),
+            _('Channel'),
+            _('Device Type'),
+            _('Sentiment Score'),
+            _('Language'),
+        ]
+        headers.extend(header for _question_id, header in self.question_columns)
+        headers.append(_('Response Metadata'))
+        return headers
+
+    def queryset(self):
+        return self.survey.responses.filter(is_complete=True).order_by('-created_at').values(*EXPORT_FIELDS)
+
+    def format_row(self, values: Dict[str, Any]) -> List[Any]:
+        email = values['customer__email']
+        if email is not None:
+            name = f"{values['customer__first_name']} {values['customer__last_name']}".strip() or email
+        else:
+            email, name = self.anonymous, ''
+        completion_time = values['completion_time']
+        sentiment_score = values['sentiment_score']
+
+        row = [
+            str(values['pk']),
+            values['created_at'].strftime('%Y-%m-%d %H:%M:%S'),
+            email,
+            name,
+            self.yes if values['is_complete'] else self.no,
+            round(completion_time.total_seconds() / 60, 2) if completion_time else '',
+            values['channel__name'] or '',
+            self.device_labels.get(values['device_type'], '') if values['device_type'] else '',
+            sentiment_score if sentiment_score is not None else '',
+            values['language'],
+        ]
+
+        response_data = values['response_data'] or {}
+        for question_id, _header in self.question_columns:
+            row.append(_format_answer(response_data.get(question_id, '')))
+
+        metadata = values['metadata']
+        row.append(_encode_json(metadata) if metadata else '{}')
+        return row
+
+    def iter_csv(self) -> Iterator[bytes]:
+        """UTF-8 CSV in chunks; the header row is yielded before the first query"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def drain() -> bytes:
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        writer.writerow(self.headers())
+        yield drain()
+
+        pending = 0
+        exported = 0
+        for values in self.queryset().iterator(chunk_size=self.chunk_size):
+            writer.writerow(self.format_row(values))
+            pending += 1
+            if pending >= FLUSH_ROWS:
+                exported += pending
+                pending = 0
+                yield drain()
+        if pending:
+            exported += pending
+            yield drain()
+        logger.info(f"Exported {exported} responses for survey {self.survey.pk}")
+
+    def iter_gzip(self, level: int = GZIP_LEVEL) -> Iterator[bytes]:
+        """iter_csv compressed on the fly into a single gzip member"""
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        first = True
+        for data in self.iter_csv():
+            compressed = compressor.compress(data)
+            if first:
+                # Push the header row out now instead of waiting for the
+                # compressor's buffer to fill
+                compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+                first = False
+            if compressed:
+                yield compressed
+        yield compressor.flush()
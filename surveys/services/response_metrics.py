@@ -0,0 +1,135 @@
+# services/response_metrics.py
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Any
+
+from django.db.models import Avg, Count, Case, When, IntegerField, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_BUCKETS = (
+    ('< 2 min', None, timedelta(minutes=2)),
+    ('2-5 min', timedelta(minutes=2), timedelta(minutes=5)),
+    ('> 5 min', timedelta(minutes=5), None),
+)
+
+
+@dataclass
+class ScoreSummary:
+    """Average and promoter / passive / detractor split of a score column"""
+    total: int = 0
+    avg_score: float = 0.0
+    promoters: int = 0
+    passives: int = 0
+    detractors: int = 0
+
+    @property
+    def nps_score(self) -> float:
+        return ((self.promoters - self.detractors) / self.total) * 100 if self.total else 0
+
+
+def column_score_summary(queryset, column: str) -> ScoreSummary:
+    """
+    Summarize a materialized score column (nps_score, csat_score, ...)
+    with a single conditional aggregate
+    """
+    result = queryset.order_by().aggregate(
+        total=Count(column),
+        avg_score=Avg(column),
+        promoters=Count(column, filter=Q(**{f'{column}__gte': 9})),
+        passives=Count(column, filter=Q(**{f'{column}__gte': 7, f'{column}__lte': 8})),
+        detractors=Count(column, filter=Q(**{f'{column}__lte': 6})),
+    )
+    if not result['total']:
+        return ScoreSummary()
+    return ScoreSummary(
+        total=result['total'],
+        avg_score=float(result['avg_score'] or 0),
+        promoters=result['promoters'],
+        passives=result['passives'],
+        detractors=result['detractors'],
+    )
+
+
+def completion_time_metrics(queryset) -> Dict[str, Any]:
+    """Average completion time and its histogram in a single aggregate query"""
+    aggregates = {
+        'avg_completion': Avg('completion_time'),
+        'timed_count': Count('completion_time'),
+    }
+    for index, (label, lower, upper) in enumerate(COMPLETION_BUCKETS):
+        condition = {'completion_time__isnull': False}
+        if lower is not None:
+            condition['completion_time__gte'] = lower
+        if upper is not None:
+            condition['completion_time__lt'] = upper
+        aggregates[f'bucket_{index}'] = Count(
+            Case(When(then=1, **condition), output_field=IntegerField())
+        )
+
+    result = queryset.order_by().aggregate(**aggregates)
+
+    if not result['timed_count']:
+        return {'avg_completion_minutes': None, 'completion_distribution': []}
+
+    avg_completion = result['avg_completion']
+    if isinstance(avg_completion, timedelta):
+        avg_seconds = avg_completion.total_seconds()
+    else:
+        # Some backends return the average duration as microseconds
+        avg_seconds = float(avg_completion or 0) / 1_000_000
+
+    return {
+        'avg_completion_minutes': round(avg_seconds / 60, 1),
+        'completion_distribution': [
+            {'range': label, 'count': result[f'bucket_{index}']}
+            for index, (label, _lower, _upper) in enumerate(COMPLETION_BUCKETS)
+        ],
+    }
+
+
+def backfill_score_columns(organization=None, batch_size: int = 500, only_missing: bool = True) -> int:
+    """
+    Populate the materialized score columns of existing SurveyResponse rows.
+    Rows are walked in primary-key order and the ones whose columns change
+    are written back with bulk_update, one batch per round trip. Rows that
+    still have no parseable score are left alone, so reruns do not keep
+    rewriting them and bumping updated_at.
+    """
+    from core.models import SurveyResponse
+
+    queryset = SurveyResponse.objects.filter(
+        survey_type__in=['nps', 'csat', 'ces']
+    ).select_related('survey').order_by('pk')
+    if organization is not None:
+        queryset = queryset.filter(survey__organization=organization)
+    if only_missing:
+        queryset = queryset.filter(nps_score__isnull=True, csat_score__isnull=True, ces_score__isnull=True)
+
+    updated = 0
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            break
+
+        now = timezone.now()
+        changed = []
+        for response in batch:
+            stored = [getattr(response, field_name) for field_name in SurveyResponse.SCORE_FIELDS]
+            response.materialize_scores()
+            if [getattr(response, field_name) for field_name in SurveyResponse.SCORE_FIELDS] != stored:
+                response.updated_at = now
+                changed.append(response)
+        if changed:
+            # updated_at so incremental exports pick up the new scores
+            SurveyResponse.objects.bulk_update(changed, [*SurveyResponse.SCORE_FIELDS, 'updated_at'])
+
+        updated += len(changed)
+        last_pk = batch[-1].pk
+        logger.info(f"Backfilled score columns for {updated} survey responses")
+
+    return updated
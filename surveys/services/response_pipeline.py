@@ -0,0 +1,214 @@
+# services/response_pipeline.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import (
+    SurveyResponse,
+    create_specialized_response,
+    create_mixed_response_for_mixed_surveys,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+STATUS_PENDING = 'pending'
+STATUS_COMPLETED = 'completed'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+FINAL_STATUSES = (STATUS_COMPLETED, STATUS_SKIPPED, STATUS_FAILED)
+
+
+class PipelineStageError(Exception):
+    """Raised by a stage that did not finish and should be retried"""
+
+
+@dataclass(frozen=True)
+class PipelineStage:
+    """One idempotent step of the post-save pipeline"""
+    name: str
+    handler: Callable[[SurveyResponse], Any]
+    applies: Callable[[SurveyResponse], bool] = lambda response: True
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+
+def _is_mixed_survey(response: SurveyResponse) -> bool:
+    return bool(response.survey and response.survey.survey_type == 'mixed')
+
+
+def _analyze_sentiment(response: SurveyResponse) -> None:
+    """Run sentiment analysis once; results are propagated by the model"""
+    if response.ai_analyzed:
+        return
+    if not response.analyze_sentiment_sync():
+        raise PipelineStageError(f"Sentiment analysis failed for survey response {response.id}")
+
+
+# Stages run in this order; each one must be safe to run again after a retry
+PIPELINE_STAGES: Tuple[PipelineStage, ...] = (
+    PipelineStage(
+        'specialized_response',
+        create_specialized_response,
+        applies=lambda response: response.survey_type in ('nps', 'csat', 'ces'),
+    ),
+    PipelineStage('mixed_response', create_mixed_response_for_mixed_surveys, applies=_is_mixed_survey),
+    PipelineStage('sentiment_analysis', _analyze_sentiment),
+)
+
+
+class SurveyResponsePipeline:
+    """
+    Run the post-save stages of a SurveyResponse in order.
+
+    Progress is kept in SurveyResponse.pipeline_state as
+    ``{stage: {'status', 'attempts', 'error', 'finished_at'}}`` so a retried
+    run skips finished stages. A stage that raises stops the run; once it
+    has used up max_attempts it is marked failed and later stages proceed.
+    """
+
+    def __init__(self, stages: Tuple[PipelineStage, ...] = PIPELINE_STAGES):
+        self.stages = stages
+
+    def run(self, response_id) -> bool:
+        """
+        Run every pending stage
+
+        Returns:
+            bool: True when no stage is left to retry
+        """
+        try:
+            response = SurveyResponse.objects.select_related(
+                'survey', 'survey__organization', 'customer', 'channel'
+            ).get(pk=response_id)
+        except SurveyResponse.DoesNotExist:
+            logger.warning(f"Survey response {response_id} no longer exists, pipeline dropped")
+            return True
+
+        state: Dict[str, Dict[str, Any]] = dict(response.pipeline_state or {})
+        finished = True
+
+        for stage in self.stages:
+            entry = dict(state.get(stage.name) or {'status': STATUS_PENDING, 'attempts': 0})
+            if entry['status'] in FINAL_STATUSES:
+                continue
+
+            if not stage.applies(response):
+                entry['status'] = STATUS_SKIPPED
+                state[stage.name] = entry
+                continue
+
+            entry['attempts'] = entry.get('attempts', 0) + 1
+            try:
+                stage.handler(response)
+                entry['status'] = STATUS_COMPLETED
+                entry.pop('error', None)
+                entry['finished_at'] = timezone.now().isoformat()
+                state[stage.name] = entry
+            except Exception as e:
+                entry['error'] = str(e)
+                if entry['attempts'] >= stage.max_attempts:
+                    logger.error(
+                        f"Pipeline stage '{stage.name}' failed for survey response {response_id} "
+                        f"after {entry['attempts']} attempts: {str(e)}"
+                    )
+                    entry['status'] = STATUS_FAILED
+                    entry['finished_at'] = timezone.now().isoformat()
+                    state[stage.name] = entry
+                    continue
+
+                logger.warning(
+                    f"Pipeline stage '{stage.name}' failed for survey response {response_id} "
+                    f"(attempt {entry['attempts']}/{stage.max_attempts}): {str(e)}"
+                )
+                state[stage.name] = entry
+                finished = False
+                break
+
+        # Queryset update so the state write does not fire post_save again
+        SurveyResponse.objects.filter(pk=response_id).update(pipeline_state=state)
+        return finished
+
+
+def run_response_pipeline(response_id) -> bool:
+    """Convenience wrapper around SurveyResponsePipeline"""
+    return SurveyResponsePipeline().run(response_id)
+
+
+class LocalExecutor:
+    """
+    In-process executor for tests and single-node deployments.
+    With ``background=False`` the pipeline runs inline in the caller.
+    """
+
+    def __init__(self, background: bool = True, max_workers: int = 2, retry_delay: float = 1.0):
+        self.background = background
+        self.max_workers = max_workers
+        self.retry_delay = retry_delay
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, response_id) -> None:
+        if not self.background:
+            self._run(response_id)
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='survey-pipeline'
+                )
+        self._pool.submit(self._run, response_id)
+
+    def _run(self, response_id) -> None:
+        try:
+            retries = 0
+            # Each failing run uses up an attempt, so this loop is bounded
+            while not run_response_pipeline(response_id):
+                if self.retry_delay:
+                    time.sleep(self.retry_delay * (2 ** retries))
+                retries += 1
+        except Exception as e:
+            logger.error(f"Error running pipeline for survey response {response_id}: {str(e)}", exc_info=True)
+        finally:
+            if self.background:
+                close_old_connections()
+
+
+class CeleryExecutor:
+    """Hand the pipeline to the Celery worker queue"""
+
+    def submit(self, response_id) -> None:
+        from surveys.tasks import run_survey_response_pipeline
+        run_survey_response_pipeline.delay(str(response_id))
+
+
+_executor = None
+
+
+def get_executor():
+    """
+    Executor selected by settings.SURVEY_PIPELINE_EXECUTOR:
+    'local' (background thread), 'inline' (synchronous) or 'celery'
+    """
+    global _executor
+    if _executor is None:
+        name = getattr(settings, 'SURVEY_PIPELINE_EXECUTOR', 'local')
+        if name == 'celery':
+            _executor = CeleryExecutor()
+        elif name == 'inline':
+            _executor = LocalExecutor(background=False, retry_delay=0)
+        else:
+            _executor = LocalExecutor()
+    return _executor
+
+
+def enqueue_response_pipeline(response_id) -> None:
+    """Submit the pipeline once the surrounding transaction commits"""
+    transaction.on_commit(lambda: get_executor().submit(response_id))
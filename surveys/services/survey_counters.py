@@ -0,0 +1,57 @@
+# services/survey_counters.py
+import logging
+
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def calculate_response_rate(total_responses: int, total_sent: int) -> float:
+    """Response rate in percent; computed on read instead of being stored"""
+    return (total_responses / total_sent) * 100 if total_sent and total_sent > 0 else 0.0
+
+
+def _survey_queryset(survey):
+    from core.models import Survey
+    return Survey.objects.filter(pk=getattr(survey, 'pk', survey))
+
+
+def increment_survey_responses(survey, amount: int = 1) -> None:
+    """
+    Add ``amount`` to Survey.total_responses with a single UPDATE ... SET
+    total_responses = total_responses + n, so concurrent submissions never
+    lose increments. The in-memory instance (if one is passed) is refreshed.
+    """
+    try:
+        _survey_queryset(survey).update(
+            total_responses=F('total_responses') + amount,
+            updated_at=timezone.now(),
+        )
+        if hasattr(survey, 'refresh_from_db'):
+            survey.refresh_from_db(fields=['total_responses'])
+    except Exception as e:
+        # Counters must never fail a submission
+        logger.error(f"Error updating survey statistics: {str(e)}")
+
+
+def increment_surveys_sent(survey, amount: int = 1) -> None:
+    """Atomically add ``amount`` to Survey.total_sent"""
+    try:
+        _survey_queryset(survey).update(
+            total_sent=F('total_sent') + amount,
+            updated_at=timezone.now(),
+        )
+        if hasattr(survey, 'refresh_from_db'):
+            survey.refresh_from_db(fields=['total_sent'])
+    except Exception as e:
+        logger.error(f"Error updating survey sent count: {str(e)}")
+
+
+def resync_survey_counters(survey) -> int:
+    """Reset total_responses to the number of complete SurveyResponse rows"""
+    from core.models import SurveyResponse
+
+    total = SurveyResponse.objects.filter(survey_id=getattr(survey, 'pk', survey), is_complete=True).count()
+    _survey_queryset(survey).update(total_responses=total, updated_at=timezone.now())
+    return total
@@ -0,0 +1,104 @@
+# services/survey_definitions.py
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# Bump when SurveyDefinition changes shape so old pickles are never read
+DEFINITION_CACHE_VERSION = 1
+DEFINITION_CACHE_TIMEOUT = 60 * 15
+# A per-process cache only sees invalidations made by its own process, so
+# other processes may serve an edited survey's old definition until expiry
+LOCAL_DEFINITION_CACHE_TIMEOUT = 30
+
+
+def definition_cache_key(identifier) -> str:
+    return f'survey_definition:v{DEFINITION_CACHE_VERSION}:{identifier}'
+
+
+def definition_cache_timeout() -> int:
+    """SURVEY_DEFINITION_CACHE_TIMEOUT, or a default that depends on whether the cache is shared"""
+    timeout = getattr(settings, 'SURVEY_DEFINITION_CACHE_TIMEOUT', None)
+    if timeout is not None:
+        return timeout
+    if isinstance(caches['default'], LocMemCache):
+        return LOCAL_DEFINITION_CACHE_TIMEOUT
+    return DEFINITION_CACHE_TIMEOUT
+
+
+@dataclass
+class SurveyDefinition:
+    """Everything the public survey endpoint needs, cached as one entry"""
+    survey: Any
+    questions: List[Dict[str, Any]] = field(default_factory=list)
+    question_ids: List[str] = field(default_factory=list)
+    status: str = 'draft'
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    response_limit: Optional[int] = None
+
+    @classmethod
+    def from_survey(cls, survey) -> 'SurveyDefinition':
+        questions = [question for question in (survey.questions or []) if isinstance(question, dict)]
+        return cls(
+            survey=survey,
+            questions=questions,
+            question_ids=[
+                str(question.get('id', f'question_{index}'))
+                for index, question in enumerate(questions)
+            ],
+            status=survey.status,
+            start_date=survey.start_date,
+            end_date=survey.end_date,
+            response_limit=survey.response_limit,
+        )
+
+
+def get_survey_definition(identifier) -> Optional[SurveyDefinition]:
+    """
+    Resolve a public survey link (primary key or public_uuid) to its
+    definition. A cache hit costs no query; a miss costs one indexed lookup.
+    """
+    if not identifier:
+        return None
+    if not isinstance(identifier, UUID):
+        try:
+            identifier = UUID(str(identifier))
+        except (ValueError, AttributeError):
+            return None
+
+    key = definition_cache_key(identifier)
+    definition = cache.get(key)
+    if definition is not None:
+        return definition
+
+    from core.models import Survey
+
+    survey = Survey.objects.select_related('organization').filter(
+        Q(pk=identifier) | Q(public_uuid=identifier)
+    ).first()
+    if survey is None:
+        return None
+
+    definition = SurveyDefinition.from_survey(survey)
+    cache.set(key, definition, definition_cache_timeout())
+    return definition
+
+
+def invalidate_survey_definition(survey) -> None:
+    """Drop the cached definition under every identifier the survey answers to"""
+    keys = [definition_cache_key(survey.pk)]
+    if getattr(survey, 'public_uuid', None):
+        keys.append(definition_cache_key(survey.public_uuid))
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.error(f"Error invalidating survey definition cache for {survey.pk}: {str(e)}")
@@ -0,0 +1,441 @@
+# services/survey_reports.py
+import hashlib
+import io
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF layout changes so stored reports are re-rendered
+REPORT_FORMAT_VERSION = 1
+REPORT_SOURCE = 'survey_analytics'
+RECENT_RESPONSES = 20
+
+REPORT_PENDING = 'pending'
+REPORT_GENERATING = 'generating'
+REPORT_COMPLETED = 'completed'
+REPORT_FAILED = 'failed'
+# A report left 'generating' this long lost its worker and may be claimed again
+REPORT_STALE_AFTER = timedelta(minutes=15)
+
+SURVEY_REPORT_TYPES = {
+    'nps': 'nps_report',
+    'csat': 'csat_report',
+    'ces': 'ces_report',
+}
+
+
+def survey_data_version(survey) -> str:
+    """
+    Watermark of everything the report shows: the survey row (bumped by
+    every new response through the counters) plus the count and latest
+    change of its complete responses, which also catches later sentiment
+    analysis and deletions. One aggregate query.
+    """
+    from core.models import SurveyResponse
+
+    stats = SurveyResponse.objects.filter(survey=survey, is_complete=True).aggregate(
+        count=Count('id'),
+        last_change=Max('updated_at'),
+    )
+    raw = '|'.join([
+        str(REPORT_FORMAT_VERSION),
+        survey.updated_at.isoformat() if survey.updated_at else '',
+        str(stats['count']),
+        stats['last_change'].isoformat() if stats['last_change'] else '',
+    ])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _survey_reports(survey):
+    from core.models import Report
+
+    return Report.objects.filter(
+        organization_id=survey.organization_id,
+        metadata__source=REPORT_SOURCE,
+        metadata__survey_id=str(survey.pk),
+    )
+
+
+def _stale_generating(cutoff=None) -> Q:
+    cutoff = cutoff or timezone.now() - REPORT_STALE_AFTER
+    return Q(generation_status=REPORT_GENERATING, updated_at__lt=cutoff)
+
+
+def find_survey_report(survey, data_version: str):
+    """The report for this data version that is done or on its way, if any"""
+    return _survey_reports(survey).filter(
+        metadata__data_version=data_version,
+        generation_status__in=[REPORT_PENDING, REPORT_GENERATING, REPORT_COMPLETED],
+    ).order_by('-created_at').first()
+
+
+def request_survey_report(survey, user) -> Tuple[Any, bool]:
+    """
+    (report, queued). Returns the stored report for the survey's current
+    data version, or creates a pending one and queues a worker job to
+    render it. Concurrent requests for the same survey are serialized so
+    only one job is queued per version; a report stuck generating for
+    REPORT_STALE_AFTER is put back to pending and queued again.
+    """
+    from core.models import Report, Survey
+
+    data_version = survey_data_version(survey)
+    with transaction.atomic():
+        Survey.objects.select_for_update().filter(pk=survey.pk).first()
+        report = find_survey_report(survey, data_version)
+        if report is not None:
+            # Re-queue a rendering whose worker died
+            if not Report.objects.filter(_stale_generating(), pk=report.pk).update(
+                generation_status=REPORT_PENDING, updated_at=timezone.now()
+            ):
+                return report, False
+            logger.warning(f"Report {report.pk} was stuck generating; queueing it again")
+            report.generation_status = REPORT_PENDING
+            _queue_report(survey, report)
+            return report, True
+
+        today = timezone.localdate()
+        report = Report.objects.create(
+            organization_id=survey.organization_id,
+            title=_("Survey Analytics Report: %(title)s") % {'title': survey.title},
+            report_type=SURVEY_REPORT_TYPES.get(survey.survey_type, 'detailed_analysis'),
+            start_date=timezone.localdate(survey.created_at) if survey.created_at else today,
+            end_date=today,
+            file_format='pdf',
+            generated_by=user,
+            generation_status=REPORT_PENDING,
+            metadata={
+                'source': REPORT_SOURCE,
+                'survey_id': str(survey.pk),
+                'data_version': data_version,
+            },
+        )
+        _queue_report(survey, report)
+    return report, True
+
+
+def _queue_report(survey, report) -> None:
+    from cx_analytics.services.analysis_jobs import JOB_REPORT_GENERATION, create_job, enqueue_job
+
+    job = create_job(
+        survey.organization,
+        JOB_REPORT_GENERATION,
+        {'report_id': str(report.pk)},
+        description=f"Analytics report for survey {survey.pk}",
+        total_items=1,
+    )
+    enqueue_job(job)
+
+
+@dataclass
+class SurveyReportData:
+    """Everything the PDF shows, computed with four queries"""
+    total_responses: int = 0
+    total_sent: int = 0
+    completion_rate: float = 0.0
+    avg_sentiment: float = 0.0
+    device_breakdown: List[Dict[str, Any]] = field(default_factory=list)
+    recent_responses: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def for_survey(cls, survey) -> 'SurveyReportData':
+        responses = survey.responses.filter(is_complete=True).order_by()
+        stats = responses.aggregate(total=Count('id'), avg_sentiment=Avg('sentiment_score'))
+        total_sent = survey.total_sent or 0
+        return cls(
+            total_responses=stats['total'],
+            total_sent=total_sent,
+            completion_rate=(stats['total'] / total_sent * 100) if total_sent > 0 else 0,
+            avg_sentiment=stats['avg_sentiment'] or 0,
+            device_breakdown=list(
+                responses.values('device_type').annotate(count=Count('id')).order_by('-count')
+            ),
+            recent_responses=list(
+                responses.order_by('-created_at').values(
+                    'created_at', 'sentiment_score', 'device_type',
+                    'customer__first_name', 'customer__last_name', 'customer__email',
+                )[:RECENT_RESPONSES]
+            ),
+        )
+
+
+def render_survey_report_pdf(survey, data: SurveyReportData, generated_by=None) -> bytes:
+    """The survey analytics PDF built with ReportLab"""
+    from core.models import SurveyResponse
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+
+    story = []
+    styles = getSampleStyleSheet()
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Title'],
+        fontSize=24,
+        spaceAfter=30,
+        textColor=colors.HexColor('#2c3e50')
+    )
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        spaceBefore=20,
+        textColor=colors.HexColor('#34495e')
+    )
+    subheading_style = ParagraphStyle(
+        'CustomSubHeading',
+        parent=styles['Heading3'],
+        fontSize=14,
+        spaceAfter=8,
+        spaceBefore=15,
+        textColor=colors.HexColor('#7f8c8d')
+    )
+    normal_style = ParagraphStyle('ReportNormal', parent=styles['Normal'], fontSize=10)
+
+    generated_on = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    generated_by_name = (generated_by.get_full_name() or generated_by.email) if generated_by else ''
+
+    # 1. Title and metadata
+    story.append(Paragraph(_("Survey Analytics Report"), title_style))
+    story.append(Spacer(1, 0.1 * inch))
+
+    survey_data = [
+        [_("Survey Title:"), survey.title],
+        [_("Survey Type:"), survey.get_survey_type_display()],
+        [_("Status:"), survey.get_status_display()],
+        [_("Created_at:"), survey.created_at.strftime('%Y-%m-%d %H:%M:%S')],
+        [_("Organization:"), survey.organization.name],
+        [_("Generated By:"), generated_by_name],
+        [_("Generated On:"), generated_on],
+    ]
+    survey_table = Table(survey_data, colWidths=[2*inch, 4*inch])
+    survey_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#495057')),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    story.append(survey_table)
+    story.append(Spacer(1, 0.3 * inch))
+
+    # 2. Key Metrics Section
+    story.append(Paragraph(_("Key Metrics"), heading_style))
+    metrics_data = [
+        [_("Metric"), _("Value")],
+        [_("Total Responses"), str(data.total_responses)],
+        [_("Completion Rate"), f"{data.completion_rate:.1f}%"],
+        [_("Questions"), str(len(survey.questions or []))],
+        [_("Average Sentiment"), f"{data.avg_sentiment:.2f}" if data.avg_sentiment != 0 else _("N/A")],
+        [_("Total Sent"), str(data.total_sent)],
+    ]
+    metrics_table = Table(metrics_data, colWidths=[3*inch, 3*inch])
+    metrics_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    story.append(metrics_table)
+    story.append(Spacer(1, 0.3 * inch))
+
+    # 3. Device Breakdown Section
+    if data.device_breakdown:
+        story.append(Paragraph(_("Device Breakdown"), heading_style))
+        device_data = [[_("Device Type"), _("Count"), _("Percentage")]]
+        for device in data.device_breakdown:
+            device_type = device['device_type'] or _('Unknown')
+            count = device['count']
+            percentage = (count / data.total_responses * 100) if data.total_responses > 0 else 0
+            device_data.append([device_type.title(), str(count), f"{percentage:.1f}%"])
+
+        device_table = Table(device_data, colWidths=[2*inch, 2*inch, 2*inch])
+        device_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ecc71')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+        story.append(device_table)
+        story.append(Spacer(1, 0.3 * inch))
+
+    # 4. Questions Overview Section
+    questions = survey.questions or []
+    if questions:
+        story.append(Paragraph(_("Questions Overview"), heading_style))
+        for i, question in enumerate(questions, 1):
+            story.append(Paragraph(f"{i}. {question.get('text', _('Untitled Question'))}", subheading_style))
+
+            question_details = []
+            if question.get('type'):
+                question_details.append(_("Type: ") + question['type'])
+            if question.get('required'):
+                question_details.append(_("Required: Yes"))
+            if question.get('options'):
+                options = ', '.join(str(opt) for opt in question['options'][:5])
+                if len(question['options']) > 5:
+                    options += f" (+{len(question['options']) - 5} more)"
+                question_details.append(_("Options: ") + options)
+
+            if question_details:
+                story.append(Paragraph(' | '.join(question_details), normal_style))
+            story.append(Spacer(1, 0.1 * inch))
+
+    # 5. Recent Responses Section
+    if data.recent_responses:
+        story.append(Paragraph(_("Recent Responses"), heading_style))
+        device_labels = dict(SurveyResponse._meta.get_field('device_type').flatchoices)
+        responses_data = [[_("Date"), _("Customer"), _("Sentiment"), _("Device")]]
+        for response in data.recent_responses:
+            customer_info = _("Anonymous")
+            if response['customer__email'] is not None:
+                full_name = f"{response['customer__first_name']} {response['customer__last_name']}".strip()
+                customer_info = full_name or response['customer__email'] or customer_info
+
+            sentiment = f"{response['sentiment_score']:.2f}" if response['sentiment_score'] is not None else _("N/A")
+            device = str(device_labels.get(response['device_type'], response['device_type'])) if response['device_type'] else _("Unknown")
+            responses_data.append([
+                response['created_at'].strftime('%Y-%m-%d %H:%M'),
+                customer_info[:30],  # Truncate long names
+                sentiment,
+                device
+            ])
+
+        responses_table = Table(responses_data, colWidths=[1.5*inch, 2*inch, 1*inch, 1.5*inch])
+        responses_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e74c3c')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+        story.append(responses_table)
+        story.append(Spacer(1, 0.3 * inch))
+
+    # 6. Summary Section
+    story.append(Paragraph(_("Summary"), heading_style))
+    summary_text = _(
+        "This report provides analytics for the survey '{survey_title}'. "
+        "The survey has received {total_responses} complete responses "
+        "with a completion rate of {completion_rate:.1f}%. "
+        "The overall sentiment score is {sentiment_score:.2f}. "
+        "This report was generated on {generation_date}."
+    ).format(
+        survey_title=survey.title,
+        total_responses=data.total_responses,
+        completion_rate=data.completion_rate,
+        sentiment_score=data.avg_sentiment,
+        generation_date=generated_on
+    )
+    story.append(Paragraph(summary_text, normal_style))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # 7. Footer
+    footer_text = _(
+        "Confidential - For internal use only. "
+        "Generated by Survey Analytics System v1.0"
+    )
+    story.append(Paragraph(footer_text, ParagraphStyle(
+        'Footer',
+        parent=normal_style,
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=1  # Center aligned
+    )))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def generate_survey_report(report_pk) -> Optional[Any]:
+    """
+    Render a pending report and store the PDF in Report.file. Runs on a
+    worker; generation_status moves pending -> generating -> completed
+    (or failed). A report stuck in generating for REPORT_STALE_AFTER is
+    claimed again, e.g. when its job is requeued after a worker died.
+    Older reports of the same survey are removed once the new one is
+    stored.
+    """
+    from core.models import Report, Survey
+
+    now = timezone.now()
+    claimed = Report.objects.filter(
+        Q(generation_status__in=[REPORT_PENDING, REPORT_FAILED]) | _stale_generating(now - REPORT_STALE_AFTER),
+        pk=report_pk,
+    ).update(generation_status=REPORT_GENERATING, updated_at=now)
+    if not claimed:
+        return None
+    report = Report.objects.select_related('generated_by').get(pk=report_pk)
+
+    try:
+        survey = Survey.objects.select_related('organization').get(pk=report.metadata['survey_id'])
+        pdf = render_survey_report_pdf(survey, SurveyReportData.for_survey(survey), report.generated_by)
+        report.file.save(
+            f"survey_{survey.pk}_analytics_report_{report.metadata['data_version']}.pdf",
+            ContentFile(pdf),
+            save=False,
+        )
+    except Exception as e:
+        logger.error(f"Error generating report {report_pk}: {str(e)}", exc_info=True)
+        Report.objects.filter(pk=report_pk).update(
+            generation_status=REPORT_FAILED,
+            metadata={**report.metadata, 'error': str(e)},
+            updated_at=timezone.now(),
+        )
+        raise
+
+    Report.objects.filter(pk=report_pk).update(
+        file=report.file.name,
+        generation_status=REPORT_COMPLETED,
+        updated_at=timezone.now(),
+    )
+    report.generation_status = REPORT_COMPLETED
+
+    # Superseded versions are never served again
+    for old_report in _survey_reports(survey).filter(
+        created_at__lt=report.created_at,
+        generation_status__in=[REPORT_COMPLETED, REPORT_FAILED],
+    ):
+        if old_report.file:
+            old_report.file.delete(save=False)
+        old_report.delete()
+
+    logger.info(f"Stored report {report_pk} for survey {survey.pk} ({len(pdf)} bytes)")
+    return report
@@ -0,0 +1,53 @@
+# services/theme_occurrences.py
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Count
+
+from core.models import ThemeOccurrence, NPSResponse, CSATResponse, CESResponse
+
+logger = logging.getLogger(__name__)
+
+
+def top_labels(organization, source: str, kind: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None, limit: int = 10) -> List[Tuple[str, int]]:
+    """
+    Most frequent themes / friction points for analyzed responses
+
+    Args:
+        organization: Organization the responses belong to
+        source: 'nps', 'csat' or 'ces'
+        kind: 'theme' or 'friction_point'
+        start, end: Optional response creation window
+        limit: Number of labels to return
+
+    Returns:
+        List of (label, count) tuples, most frequent first
+    """
+    # Existing responses were backfilled by migration core 0012
+    occurrences = ThemeOccurrence.objects.filter(organization=organization, source=source, kind=kind)
+    if start:
+        occurrences = occurrences.filter(response_created_at__gte=start)
+    if end:
+        occurrences = occurrences.filter(response_created_at__lte=end)
+
+    rows = occurrences.values('label').annotate(count=Count('id')).order_by('-count', 'label')[:limit]
+    return [(row['label'], row['count']) for row in rows]
+
+
+def backfill_occurrences(organization=None, batch_size: int = 500) -> int:
+    """Re-sync ThemeOccurrence rows for analyzed responses (repairs drift)"""
+    synced = 0
+    for source, model in (('nps', NPSResponse), ('csat', CSATResponse), ('ces', CESResponse)):
+        queryset = model.objects.filter(ai_analyzed=True).order_by()
+        if organization is not None:
+            queryset = queryset.filter(organization=organization)
+
+        fields = ['id', 'organization_id', 'created_at', 'ai_analyzed']
+        fields.append({'nps': 'key_themes', 'csat': 'metadata', 'ces': 'friction_points'}[source])
+
+        for response in queryset.only(*fields).iterator(chunk_size=batch_size):
+            ThemeOccurrence.sync_response(source, response)
+            synced += 1
+    return synced
@@ -42,6 +42,19 @@ def analyze_survey_response_sentiment(self, response_id):
     except Exception as e:
         logger.error(f"Error in sentiment analysis task: {str(e)}", exc_info=True)
         raise self.retry(countdown=300)  # Retry after 5 minutes
+
+
+@shared_task(bind=True, max_retries=3)
+def run_survey_response_pipeline(self, response_id):
+    """
+    Celery task running the SurveyResponse post-save pipeline.
+    Finished stages are skipped on retry, see SurveyResponsePipeline.
+    """
+    from surveys.services.response_pipeline import run_response_pipeline
+    
+    if not run_response_pipeline(response_id):
+        logger.warning(f"Pipeline for survey response {response_id} has stages to retry")
+        raise self.retry(countdown=60 * (2 ** self.request.retries))
     
 
 # surveys/tasks.py
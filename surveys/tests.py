@@ -1,3 +1,194 @@
-from django.test import TestCase
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import AIAnalysisJob, Organization, Report, Survey, SurveyResponse
+from surveys.services.response_metrics import backfill_score_columns
+from surveys.services.response_pipeline import LocalExecutor
+from surveys.services.survey_counters import increment_survey_responses, increment_surveys_sent
+from surveys.services.survey_reports import (
+    REPORT_COMPLETED,
+    REPORT_GENERATING,
+    REPORT_PENDING,
+    REPORT_SOURCE,
+    generate_survey_report,
+    request_survey_report,
+    survey_data_version,
+)
+from surveys.views import SurveyPublicView
+
+
+class MaterializeScoresTests(SimpleTestCase):
+
+    def test_parsed_score_is_stored(self):
+        response = SurveyResponse(survey_type='nps', response_data={'score': 9})
+        response.materialize_scores()
+
+        self.assertEqual(response.nps_score, 9)
+
+    def test_missing_scores_are_stored_as_none(self):
+        for survey_type in ('nps', 'ces'):
+            with self.subTest(survey_type=survey_type):
+                response = SurveyResponse(survey_type=survey_type, response_data={'comment': 'No rating given'})
+                response.materialize_scores()
+
+                self.assertIsNone(getattr(response, f'{survey_type}_score'))
+
+    def test_getter_keeps_display_default(self):
+        response = SurveyResponse(survey_type='nps', response_data={'comment': 'No rating given'})
+        response.materialize_scores()
+
+        self.assertEqual(response.get_nps_score(), 5)
+
+
+class BackfillScoreColumnsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(name='Acme', slug='acme')
+        cls.survey = Survey.objects.create(organization=organization, title='Onboarding', survey_type='nps')
+
+    def test_rerun_leaves_unparseable_rows_alone(self):
+        scored = SurveyResponse.objects.create(survey=self.survey, response_data={'score': 9})
+        unscored = SurveyResponse.objects.create(survey=self.survey, response_data={'comment': 'No rating given'})
+        stamped = timezone.now() - timedelta(days=1)
+        SurveyResponse.objects.update(nps_score=None, updated_at=stamped)
+
+        self.assertEqual(backfill_score_columns(), 1)
+        self.assertEqual(backfill_score_columns(), 0)
+
+        scored.refresh_from_db()
+        unscored.refresh_from_db()
+        self.assertEqual(scored.nps_score, 9)
+        self.assertGreater(scored.updated_at, stamped)
+        self.assertEqual(unscored.updated_at, stamped)
+
+
+class SurveyCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+
+    def test_saving_a_stale_instance_keeps_counters(self):
+        survey = Survey.objects.create(organization=self.organization, title='Onboarding', survey_type='nps')
+        stale = Survey.objects.get(pk=survey.pk)
+
+        increment_survey_responses(survey, 3)
+        increment_surveys_sent(survey, 5)
+        stale.title = 'Onboarding (edited)'
+        stale.save()
+
+        survey.refresh_from_db()
+        self.assertEqual(survey.title, 'Onboarding (edited)')
+        self.assertEqual(survey.total_responses, 3)
+        self.assertEqual(survey.total_sent, 5)
+
+
+@mock.patch('surveys.services.response_pipeline._executor', LocalExecutor(background=False, retry_delay=0))
+class ConcurrentSurveySubmissionTests(TransactionTestCase):
+    """
+    Parallel submissions through the public view. SQLite serializes the
+    writers, which still exposes read-modify-write counters that lose
+    increments.
+    """
+
+    def test_parallel_submissions_are_all_counted(self):
+        organization = Organization.objects.create(name='Acme', slug='acme')
+        survey = Survey.objects.create(
+            organization=organization,
+            title='Onboarding',
+            survey_type='nps',
+            status='active',
+            questions=[{'id': 'score', 'type': 'nps', 'text': 'How likely are you to recommend us?'}],
+        )
+        view = SurveyPublicView.as_view()
+        factory = RequestFactory()
+        threads, submissions = 10, 100
+        start = threading.Barrier(threads)
+        failures = []
+
+        def submit():
+            try:
+                start.wait()
+                for index in range(submissions):
+                    request = factory.post('/s/', {'q_0': str(index % 11)})
+                    request.user = AnonymousUser()
+                    request.session = SessionStore()
+                    response = view(request, survey_uuid=survey.pk)
+                    if response.status_code != 200:
+                        failures.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=submit) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        survey.refresh_from_db()
+        self.assertEqual(failures, [])
+        self.assertEqual(SurveyResponse.objects.filter(survey=survey).count(), threads * submissions)
+        self.assertEqual(survey.total_responses, threads * submissions)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StaleReportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Acme', slug='acme')
+        cls.survey = Survey.objects.create(organization=cls.organization, title='Onboarding', survey_type='nps')
+
+    def create_report(self, age):
+        today = timezone.localdate()
+        report = Report.objects.create(
+            organization=self.organization,
+            title='Survey Analytics Report: Onboarding',
+            report_type='nps_report',
+            start_date=today,
+            end_date=today,
+            file_format='pdf',
+            generation_status=REPORT_GENERATING,
+            metadata={
+                'source': REPORT_SOURCE,
+                'survey_id': str(self.survey.pk),
+                'data_version': survey_data_version(self.survey),
+            },
+        )
+        Report.objects.filter(pk=report.pk).update(updated_at=timezone.now() - age)
+        return report
+
+    def test_request_waits_for_a_live_rendering(self):
+        report = self.create_report(timedelta(minutes=1))
+
+        found, queued = request_survey_report(self.survey, None)
+
+        self.assertEqual((found.pk, queued), (report.pk, False))
+        self.assertFalse(AIAnalysisJob.objects.exists())
+
+    def test_request_requeues_a_stuck_rendering(self):
+        report = self.create_report(timedelta(hours=1))
+
+        found, queued = request_survey_report(self.survey, None)
+
+        report.refresh_from_db()
+        self.assertEqual((found.pk, queued), (report.pk, True))
+        self.assertEqual(report.generation_status, REPORT_PENDING)
+        self.assertEqual(AIAnalysisJob.objects.filter(parameters__report_id=str(report.pk)).count(), 1)
+
+    @mock.patch('surveys.services.survey_reports.render_survey_report_pdf', return_value=b'%PDF-1.4')
+    def test_worker_claims_a_stuck_rendering(self, _render):
+        live = self.create_report(timedelta(minutes=1))
+        stuck = self.create_report(timedelta(hours=1))
+
+        self.assertIsNone(generate_survey_report(live.pk))
+        self.assertEqual(generate_survey_report(stuck.pk).generation_status, REPORT_COMPLETED)
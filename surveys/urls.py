@@ -46,6 +46,8 @@ urlpatterns = [
     path('organizations/<uuid:organization_pk>/surveys/<uuid:survey_id>/responses/<uuid:pk>/', SurveyResponseDetailView.as_view(), name='survey-response-detail'),
     
     path('organizations/<uuid:organization_pk>/surveys/<uuid:pk>/export/csv/', ExportSurveyResponsesCSVView.as_view(), name='export-survey-csv'),
+    path('organizations/<uuid:organization_pk>/surveys/<uuid:pk>/export/parquet/', ExportSurveyResponsesColumnarView.as_view(), {'fmt': 'parquet'}, name='export-survey-parquet'),
+    path('organizations/<uuid:organization_pk>/surveys/<uuid:pk>/export/arrow/', ExportSurveyResponsesColumnarView.as_view(), {'fmt': 'arrow'}, name='export-survey-arrow'),
     path('organizations/<uuid:organization_pk>/surveys/<uuid:pk>/export/report/', ExportSurveyAnalyticsReportView.as_view(), name='export-survey-report'),
    
    
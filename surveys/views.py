@@ -15,6 +15,8 @@ from datetime import timedelta
 
 from core.models import *
 from .forms import SurveyForm, SurveyResponseForm
+from surveys.services.survey_counters import increment_survey_responses
+from surveys.services.survey_definitions import get_survey_definition
 
 class OrganizationMixin:
     """Mixin to handle organization context"""
@@ -184,47 +186,11 @@ class SurveyPublicView(View):
     
     def get_survey(self, survey_uuid):
         """
-        Get survey by UUID - tries pk first, then metadata.public_uuid as fallback.
+        Get survey by UUID (primary key or public_uuid) from the cached survey definition.
         Does NOT filter by status here - we check status separately for better error messages.
         """
-        survey = None
-        
-        if not survey_uuid:
-            return None
-        
-        # Convert string to UUID if needed
-        if isinstance(survey_uuid, str):
-            try:
-                survey_uuid = UUID(survey_uuid)
-            except (ValueError, AttributeError):
-                return None
-        
-        # Primary approach: Look up by primary key (recommended)
-        try:
-            survey = Survey.objects.select_related('organization').get(pk=survey_uuid)
-            return survey
-        except Survey.DoesNotExist:
-            pass
-        
-        # Fallback: Look for metadata.public_uuid (for backward compatibility)
-        try:
-            survey = Survey.objects.select_related('organization').get(
-                metadata__public_uuid=str(survey_uuid)
-            )
-            return survey
-        except Survey.DoesNotExist:
-            pass
-        
-        # Second fallback: metadata contains approach
-        try:
-            survey = Survey.objects.select_related('organization').get(
-                metadata__contains={'public_uuid': str(survey_uuid)}
-            )
-            return survey
-        except Survey.DoesNotExist:
-            pass
-        
-        return None
+        self.definition = get_survey_definition(survey_uuid)
+        return self.definition.survey if self.definition else None
     
     def check_survey_availability(self, survey):
         """
@@ -270,9 +236,11 @@ class SurveyPublicView(View):
                     'date': end_date.strftime('%B %d, %Y')
                 }
         
-        # Check response limit if set
-        if survey.response_limit and survey.total_responses >= survey.response_limit:
-            return False, _('This survey has reached its maximum number of responses.')
+        # Check response limit if set (the counter is read live, it is not part of the cached definition)
+        if survey.response_limit:
+            survey.refresh_from_db(fields=['total_responses'])
+            if survey.total_responses >= survey.response_limit:
+                return False, _('This survey has reached its maximum number of responses.')
         
         return True, None
     
@@ -292,7 +260,7 @@ class SurveyPublicView(View):
                 })
             
             # Create the form
-            form = SurveyResponseForm(questions=survey.questions, survey=survey)
+            form = SurveyResponseForm(questions=self.definition.questions, survey=survey)
             
             # Prepare context
             context = self._prepare_context(survey, form)
@@ -334,21 +302,20 @@ class SurveyPublicView(View):
             # Process the form
             form = SurveyResponseForm(
                 request.POST, 
-                questions=survey.questions, 
+                questions=self.definition.questions, 
                 survey=survey,
                 organization=survey.organization  # Pass organization to form
             )
             
             if form.is_valid():
                 # Build response data
+                question_ids = self.definition.question_ids
                 response_data = {}
                 for field_name, value in form.cleaned_data.items():
                     if field_name.startswith('q_'):
                         question_index = int(field_name[2:])
-                        if question_index < len(survey.questions):
-                            question = survey.questions[question_index]
-                            question_id = str(question.get('id', f'question_{question_index}'))
-                            response_data[question_id] = value
+                        if question_index < len(question_ids):
+                            response_data[question_ids[question_index]] = value
                 
                 # Get or create anonymous customer for public surveys
                 # CRITICAL: Always pass the survey's organization
@@ -367,10 +334,7 @@ class SurveyPublicView(View):
                 )
                 
                 # Update survey statistics
-                survey.total_responses += 1
-                if survey.total_sent > 0:
-                    survey.response_rate = (survey.total_responses / survey.total_sent) * 100
-                survey.save(update_fields=['total_responses', 'response_rate', 'updated_at'])
+                increment_survey_responses(survey)
                 
                 # Prepare thank you context
                 context = self._prepare_context(survey, form)
@@ -733,10 +697,7 @@ class SurveyPublicView1(View):
                 )
                 
                 # Update survey statistics
-                survey.total_responses += 1
-                if survey.total_sent > 0:
-                    survey.response_rate = (survey.total_responses / survey.total_sent) * 100
-                survey.save(update_fields=['total_responses', 'response_rate'])
+                increment_survey_responses(survey)
                 
                 # Prepare thank you context
                 context = self._prepare_context(survey, form)
@@ -846,7 +807,7 @@ class SurveyEmbedView(View):
     """View for embedding surveys in other websites"""
     
     def get(self, request, survey_uuid):
-        survey = get_object_or_404(Survey, metadata__public_uuid=survey_uuid, status='active')
+        survey = get_object_or_404(Survey, public_uuid=survey_uuid, status='active')
         
         return render(request, 'surveys/survey-embed.html', {
             'survey': survey,